@@ -8,9 +8,8 @@ set "PY_JEFE=%USERPROFILE%\Documents\A-DataStack\01-Proyectos\00-Toolkits\WPy64-
 set "PY_JOSE=%USERPROFILE%\Documents\A-DataStack\00-Toolkits\WinPython\WPy64-312101\python\python.exe"
 set "PY_VENV=%~dp0venv\Scripts\python.exe"
 
-:: APUNTAMOS A AMBOS MAINS
-set "MAIN_EXTRACCION=%~dp0extraccion\main.py"
-set "MAIN_TRANSFORMACION=%~dp0main.py"
+:: ORQUESTADOR COMBINADO (los ETLs se encolan a medida que termina cada robot)
+set "MAIN_PIPELINE=%~dp0pipeline_master.py"
 
 if exist "%PY_VENV%" (
     set "FINAL_PY=%PY_VENV%"
@@ -35,17 +34,19 @@ if exist "%PY_VENV%" (
 
 echo.
 echo ==================================================
-echo   PASO 2: Ejecutando Extraccion (Modo Auto)
+echo   PASO 2: Extraccion + Transformacion solapadas (Modo Auto)
 echo ==================================================
-:: cmd /c ejecuta y luego devuelve el control al .bat para seguir a la siguiente linea
-cmd /c ""%FINAL_PY%" "%MAIN_EXTRACCION%" --auto"
+cmd /c ""%FINAL_PY%" "%MAIN_PIPELINE%" --auto"
+set "RC_PIPELINE=%errorlevel%"
 
 echo.
-echo ==================================================
-echo   PASO 3: Ejecutando Transformacion (Modo Auto)
-echo ==================================================
-cmd /c ""%FINAL_PY%" "%MAIN_TRANSFORMACION%" --auto"
+if "%RC_PIPELINE%"=="0" (
+    echo [OK] EL PIPELINE COMPLETO HA FINALIZADO.
+) else (
+    echo [!] EL PIPELINE FINALIZO CON FALLOS ^(codigo %RC_PIPELINE%^). Revise el resumen en consola.
+)
 
-echo.
-echo [OK] EL PIPELINE COMPLETO HA FINALIZADO.
-pause
\ No newline at end of file
+:: En modo programado (Pipeline_Master.bat --auto) no se espera a ninguna tecla
+if /i not "%~1"=="--auto" pause
+if not "%RC_PIPELINE%"=="0" exit /b 1
+exit /b 0
\ No newline at end of file
@@ -0,0 +1,278 @@
+# Orquestador de Backfill (reproceso de periodos históricos).
+# Antes, reprocesar un periodo pasado implicaba soltar Excels a mano en las carpetas raw y correr
+# reconstrucciones completas. Aquí un dataset + rango de fechas se divide en tramos acotados
+# (día, quincena o mes); cada tramo se descarga en su propia carpeta de staging, se consolida en
+# Bronze bajo el lock del dataset (commit independiente por tramo) y recién entonces sus Excels se
+# publican en la carpeta raw real. Al final se reconstruye el Gold una sola vez.
+#
+# Uso: python backfill.py --dataset atc --desde 01/01/2025 --hasta 31/03/2025 --tramo quincena --workers 2
+
+import os
+import sys
+import glob
+import json
+import shutil
+import calendar
+import argparse
+import datetime
+import importlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# --- EL TRUCO DEL ASCENSOR PARA LOS SCRAPERS ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+ruta_extraccion = os.path.join(current_dir, "extraccion")
+if ruta_extraccion not in sys.path:
+    sys.path.append(ruta_extraccion)
+
+from config import PATHS
+from utils import console, logger, ingesta_incremental_polars, escritura_atomica
+
+# ========================================================
+# 1. REGISTRO DE DATASETS REPROCESABLES
+# ========================================================
+# scraper: "modulo.funcion" dentro de extraccion/
+# raw:     claves de PATHS donde el scraper deja sus archivos
+# ingestas: (clave raw, archivo Bronze, columna fecha[, columna ID a normalizar]) que se consolidan por tramo (upsert por fecha)
+# etls:    objetivos de main.py que reconstruyen Silver/Gold al final
+DATASETS = {
+    "atc": {
+        "scraper": "scraper_atc.descargar_atc",
+        "raw": ["raw_atencion"],
+        "ingestas": [("raw_atencion", "Atencion_Cliente_Raw_Bronze.parquet", "Fecha Llamada")],
+        "etls": ["trans_atc"],
+    },
+    "cobranza": {
+        "scraper": "scraper_cobranza.descargar_cobranza",
+        "raw": ["raw_cobranza"],
+        "ingestas": [("raw_cobranza", "Cobranza_Raw_Bronze.parquet", "Fecha Llamada")],
+        "etls": ["trans_cobranza"],
+    },
+    "comeback": {
+        "scraper": "scraper_comebackhome.descargar_comebackhome",
+        "raw": ["raw_comeback"],
+        "ingestas": [("raw_comeback", "ComeBackHome_Raw_Bronze.parquet", "Fecha Llamada")],
+        "etls": ["trans_comeback"],
+    },
+    "ont_off": {
+        "scraper": "scraper_ont_off.descargar_ont_off",
+        "raw": ["raw_ont_off"],
+        "ingestas": [("raw_ont_off", "ONT_OFF_Raw_Bronze.parquet", "Fecha Llamada")],
+        "etls": ["trans_ont_off"],
+    },
+    "recaudacion": {
+        "scraper": "scraper_recaudacion.descargar_recaudacion_y_horas",
+        "raw": ["raw_recaudacion", "raw_horaspago"],
+        "ingestas": [("raw_recaudacion", "Recaudacion_Raw_Bronze.parquet", "Fecha", "ID Pago"),
+                     ("raw_horaspago", "Horas_Raw_Bronze.parquet", "Fecha", "ID Pago")],
+        "etls": ["trans_recaudacion"],
+    },
+    "ventas": {
+        "scraper": "scraper_ventas.descargar_ventas",
+        "raw": ["ventas_abonados"],
+        "ingestas": [("ventas_abonados", "Ventas_Listado_Bronze.parquet", "Fecha Contrato")],
+        "etls": ["trans_ventas"],
+    },
+    "ventas_estatus": {
+        "scraper": "scraper_ventas_estatus.descargar_ventas_estatus",
+        "raw": ["ventas_estatus"],
+        "ingestas": [("ventas_estatus", "Ventas_Estatus_Bronze.parquet", "Fecha Venta")],
+        "etls": ["trans_ventase"],
+    },
+    # Tickets: el ETL lee los Excel de IdF por archivo (sin Bronze incremental), así que el commit
+    # del tramo es la publicación de sus archivos en raw.
+    "ordenes_servicio": {
+        "scraper": "scraper_ordenes_servicio.descargar_ordenes_servicio",
+        "raw": ["raw_idf", "raw_sla"],
+        "ingestas": [],
+        "etls": ["trans_ordenes_servicio"],
+    },
+}
+
+GRANULARIDADES = ("dia", "quincena", "mes")
+
+# ========================================================
+# 2. TRAMOS
+# ========================================================
+def generar_tramos(desde, hasta, granularidad="quincena"):
+    """Divide [desde, hasta] (datetime.date) en tramos contiguos alineados al calendario."""
+    if granularidad not in GRANULARIDADES:
+        raise ValueError(f"Granularidad inválida: {granularidad}. Use {', '.join(GRANULARIDADES)}.")
+    tramos = []
+    actual = desde
+    while actual <= hasta:
+        ultimo_dia = calendar.monthrange(actual.year, actual.month)[1]
+        if granularidad == "dia":
+            fin = actual
+        elif granularidad == "quincena":
+            fin = actual.replace(day=15) if actual.day <= 15 else actual.replace(day=ultimo_dia)
+        else:
+            fin = actual.replace(day=ultimo_dia)
+        fin = min(fin, hasta)
+        tramos.append((actual, fin))
+        actual = fin + datetime.timedelta(days=1)
+    return tramos
+
+def etiqueta_tramo(ini, fin):
+    return f"{ini:%Y%m%d}_{fin:%Y%m%d}"
+
+def carpeta_backfill(dataset):
+    return os.path.join(PATHS["raw"], "_backfill", dataset)
+
+# ========================================================
+# 3. MANIFIESTO (REANUDACIÓN)
+# ========================================================
+def leer_manifiesto(dataset):
+    ruta = os.path.join(carpeta_backfill(dataset), "manifiesto.json")
+    if not os.path.exists(ruta):
+        return {"completados": {}}
+    with open(ruta, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def registrar_tramo(dataset, etiqueta, archivos):
+    """Solo el proceso principal escribe el manifiesto (publicación atómica)."""
+    manifiesto = leer_manifiesto(dataset)
+    manifiesto["completados"][etiqueta] = {
+        "archivos": archivos,
+        "fecha": datetime.datetime.now().isoformat(timespec="seconds"),
+    }
+    ruta = os.path.join(carpeta_backfill(dataset), "manifiesto.json")
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    with escritura_atomica(ruta) as ruta_tmp:
+        with open(ruta_tmp, "w", encoding="utf-8") as f:
+            json.dump(manifiesto, f, ensure_ascii=False, indent=2)
+
+# ========================================================
+# 4. PROCESAMIENTO DE UN TRAMO (PROCESO TRABAJADOR)
+# ========================================================
+def procesar_tramo(dataset, ini, fin):
+    """
+    Descarga, consolida y publica un tramo. Corre en un proceso aparte: las rutas raw del dataset
+    se redirigen (solo en este proceso) a una carpeta de staging propia del tramo, de modo que
+    tramos concurrentes no se pisan y la ingesta solo ve los archivos del tramo.
+    Retorna la cantidad de archivos publicados. Lanza excepción si el tramo falla.
+    """
+    ds = DATASETS[dataset]
+    etiqueta = etiqueta_tramo(ini, fin)
+    base = os.path.join(carpeta_backfill(dataset), etiqueta)
+    shutil.rmtree(base, ignore_errors=True)  # Restos de un intento fallido anterior
+
+    staging = {clave: os.path.join(base, clave) for clave in ds["raw"]}
+    destinos = {clave: PATHS[clave] for clave in ds["raw"]}
+    for ruta in staging.values():
+        os.makedirs(ruta, exist_ok=True)
+
+    # A. EXTRACCIÓN (los scrapers leen PATHS al momento de descargar)
+    modulo, funcion = ds["scraper"].rsplit(".", 1)
+    rutina = getattr(importlib.import_module(modulo), funcion)
+    orq_ext = importlib.import_module("extraccion.main")
+
+    PATHS.update(staging)
+    try:
+        fallos = orq_ext.ejecutar_wrapper(rutina, ini.strftime("%d/%m/%Y"), fin.strftime("%d/%m/%Y"))
+    finally:
+        PATHS.update(destinos)
+    if fallos:
+        raise RuntimeError(f"Falló la descarga del tramo {etiqueta}: {', '.join(fallos)}")
+
+    # B. COMMIT BRONZE DEL TRAMO (upsert por fecha bajo el lock del Bronze)
+    for clave, archivo_bronze, columna_fecha, *columna_id in ds["ingestas"]:
+        if glob.glob(os.path.join(staging[clave], "*.xlsx")):
+            ingesta_incremental_polars(
+                ruta_raw=staging[clave],
+                ruta_bronze_historico=os.path.join(PATHS["bronze"], archivo_bronze),
+                columna_fecha=columna_fecha,
+                columna_id=columna_id[0] if columna_id else None
+            )
+
+    # C. PUBLICACIÓN EN RAW (para que las corridas normales también vean el periodo)
+    publicados = []
+    for clave, ruta in staging.items():
+        os.makedirs(destinos[clave], exist_ok=True)
+        for archivo in glob.glob(os.path.join(ruta, "*.xlsx")):
+            destino = os.path.join(destinos[clave], os.path.basename(archivo))
+            os.replace(archivo, destino)
+            publicados.append(os.path.basename(archivo))
+
+    shutil.rmtree(base, ignore_errors=True)
+    return publicados
+
+# ========================================================
+# 5. ORQUESTACIÓN
+# ========================================================
+def ejecutar_backfill(dataset, desde, hasta, granularidad="quincena", workers=2, forzar=False, transformar=True):
+    """
+    API programática del backfill. Retorna la lista de tramos fallidos (vacía si todo salió bien).
+    Los tramos ya registrados en el manifiesto se omiten salvo forzar=True.
+    """
+    if dataset not in DATASETS:
+        raise KeyError(f"Dataset no registrado para backfill: {dataset}")
+
+    tramos = generar_tramos(desde, hasta, granularidad)
+    completados = {} if forzar else leer_manifiesto(dataset)["completados"]
+    pendientes = [(i, f) for i, f in tramos if etiqueta_tramo(i, f) not in completados]
+
+    console.rule(f"[bold blue]⏪ BACKFILL {dataset.upper()}: {desde:%d/%m/%Y} al {hasta:%d/%m/%Y} ({granularidad})[/]")
+    console.print(f"[cyan]📦 Tramos: {len(tramos)} | Pendientes: {len(pendientes)} | Concurrencia: {workers}[/]")
+
+    fallidos = []
+    with ProcessPoolExecutor(max_workers=max(1, workers)) as pool:
+        futuros = {pool.submit(procesar_tramo, dataset, i, f): etiqueta_tramo(i, f) for i, f in pendientes}
+        for futuro in as_completed(futuros):
+            etiqueta = futuros[futuro]
+            try:
+                publicados = futuro.result()
+                registrar_tramo(dataset, etiqueta, publicados)
+                console.print(f"[bold green]✅ Tramo {etiqueta} confirmado ({len(publicados)} archivos).[/]")
+                logger.info(f"BACKFILL | {dataset} | {etiqueta} | Archivos: {len(publicados)}")
+            except Exception as e:
+                fallidos.append(etiqueta)
+                console.print(f"[bold red]❌ Tramo {etiqueta} falló: {e}[/]")
+                logger.error(f"BACKFILL | {dataset} | {etiqueta} | {e}")
+
+    # Sin tramos nuevos confirmados no hay nada que reconstruir
+    if transformar and len(fallidos) < len(pendientes):
+        console.rule("[bold magenta]🏗️ Reconstruyendo Silver/Gold del dataset[/]")
+        import main as orquestador_transformacion
+        fallidos.extend(orquestador_transformacion.ejecutar_objetivos(DATASETS[dataset]["etls"]))
+
+    return fallidos
+
+def fecha_arg(valor):
+    try:
+        return datetime.datetime.strptime(valor, "%d/%m/%Y").date()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Fecha inválida '{valor}', use DD/MM/YYYY.")
+
+def parsear_argumentos(argv=None):
+    parser = argparse.ArgumentParser(description="Backfill de periodos históricos Fibex.")
+    parser.add_argument("--dataset", choices=sorted(DATASETS), help="Dataset a reprocesar.")
+    parser.add_argument("--desde", type=fecha_arg, help="Fecha inicial DD/MM/YYYY.")
+    parser.add_argument("--hasta", type=fecha_arg, help="Fecha final DD/MM/YYYY.")
+    parser.add_argument("--tramo", choices=GRANULARIDADES, default="quincena", help="Tamaño de cada tramo.")
+    parser.add_argument("--workers", type=int, default=2, help="Tramos simultáneos (navegadores en paralelo).")
+    parser.add_argument("--forzar", action="store_true", help="Reprocesa también los tramos ya confirmados.")
+    parser.add_argument("--sin-transformar", action="store_true", help="Solo Bronze/raw; no reconstruye el Gold.")
+    parser.add_argument("--listar", action="store_true", help="Muestra los datasets disponibles y sale.")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parsear_argumentos(argv)
+    if args.listar or not args.dataset:
+        for nombre, ds in DATASETS.items():
+            console.print(f"  • [bold]{nombre}[/]: {ds['scraper']} -> {', '.join(ds['etls'])}")
+        return 0
+    if not args.desde or not args.hasta or args.desde > args.hasta:
+        console.print("[bold red]❌ Debe indicar --desde y --hasta (desde <= hasta).[/]")
+        return 2
+
+    fallidos = ejecutar_backfill(args.dataset, args.desde, args.hasta, args.tramo,
+                                 workers=args.workers, forzar=args.forzar,
+                                 transformar=not args.sin_transformar)
+    if fallidos:
+        console.print(f"[bold red]❌ Pendientes/fallidos: {', '.join(fallidos)}. Reejecute el mismo comando para reanudar.[/]")
+        return 1
+    console.print("[bold green]✨ Backfill completado.[/]")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,333 @@
+# Benchmarks de rendimiento (tiempo y RAM pico) de las piezas compartidas y de los motores de tickets.
+# Solo miden: la equivalencia de resultados se comprueba con pytest en tests/.
+#
+# Uso:
+#   python benchmarks.py dedup                     -> ultimo_por_llave contra ordenar + deduplicar
+#   python benchmarks.py excel --dataset idf       -> lectura completa vs leer_excel_proyectado (idf | abonados)
+#   python benchmarks.py clasificador              -> clasificador regex anterior vs autómata (Pandas y Polars)
+#   python benchmarks.py motores-tickets           -> motor pandas vs polars sobre los Excel de IdF
+
+import os
+import sys
+import glob
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+import subprocess
+
+import duckdb
+import numpy as np
+import pandas as pd
+import polars as pl
+from rich.table import Table
+
+from config import PATHS
+from utils import (console, get_ram_usage_mb, leer_excel_proyectado, ultimo_por_llave, ultimo_por_llave_polars,
+                   sql_ultimo_por_llave)
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+
+# ========================================================
+# 1. DEDUPLICACIÓN (ULTIMO_POR_LLAVE)
+# ========================================================
+def benchmark_ultimo_por_llave(n_filas=3_000_000, semilla=42):
+    """Deduplicación por ordenamiento contra ultimo_por_llave en Pandas, Polars y DuckDB (llave tipo CDC)."""
+    rng = np.random.default_rng(semilla)
+    df = pd.DataFrame({
+        "N° Abonado": rng.integers(0, n_filas // 10, n_filas).astype(str),
+        "Fecha": pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 30, n_filas), unit="D"),
+        "Hora": rng.choice([f"{h:02d}:00" for h in range(8, 20)], n_filas),
+        "Fecha_Modificacion_Archivo": pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 10 ** 6, n_filas), unit="s"),
+        "Monto": rng.random(n_filas),
+        "Detalle": rng.integers(0, 5_000, n_filas).astype(str),
+    })
+    llaves, version = ["N° Abonado", "Fecha", "Hora"], "Fecha_Modificacion_Archivo"
+    df_pl = pl.from_pandas(df)
+    con = duckdb.connect(database=":memory:")
+    con.execute("CREATE TABLE df AS SELECT * FROM df")
+    particion = ", ".join(f'"{c}"' for c in llaves)
+
+    casos = [
+        ("Pandas", lambda: df.sort_values(version).drop_duplicates(llaves, keep="last"),
+                   lambda: ultimo_por_llave(df, llaves, version)),
+        ("Polars", lambda: df_pl.sort(version).unique(llaves, keep="last", maintain_order=True),
+                   lambda: ultimo_por_llave_polars(df_pl, llaves, version)),
+        ("DuckDB", lambda: con.execute(f'SELECT * FROM df QUALIFY ROW_NUMBER() OVER (PARTITION BY {particion} '
+                                       f'ORDER BY "{version}" DESC) = 1').fetch_arrow_table(),
+                   lambda: con.execute(sql_ultimo_por_llave("SELECT * FROM df", llaves, version, nulos="primero")).fetch_arrow_table()),
+    ]
+    tabla = Table(title=f"🏁 Último registro por llave ({n_filas:,} filas)")
+    for col in ("Motor", "Ordenar + deduplicar (s)", "ultimo_por_llave (s)", "Aceleración"):
+        tabla.add_column(col)
+    for motor, ordenado, por_hash in casos:
+        tiempos = []
+        for funcion in (ordenado, por_hash):
+            inicio = time.perf_counter()
+            funcion()
+            tiempos.append(time.perf_counter() - inicio)
+        tabla.add_row(motor, f"{tiempos[0]:.2f}", f"{tiempos[1]:.2f}", f"{tiempos[0] / tiempos[1]:.1f}x")
+    con.close()
+    console.print(tabla)
+
+# ========================================================
+# 2. LECTURA DE EXCEL PROYECTADA
+# ========================================================
+def _medir_lectura_excel(ruta, columnas=None, alias=None):
+    """
+    Corre en un proceso aparte: lee el Excel hasta Pandas (completo si columnas es None) muestreando
+    el RSS cada 10 ms. Retorna (segundos, RAM pico MB o None sin psutil, n° columnas, MB del DataFrame).
+    """
+    base = get_ram_usage_mb()
+    pico = [base or 0.0]
+    detener = threading.Event()
+
+    def muestrear():
+        while not detener.is_set():
+            pico[0] = max(pico[0], get_ram_usage_mb() or 0.0)
+            time.sleep(0.01)
+
+    hilo = threading.Thread(target=muestrear, daemon=True)
+    hilo.start()
+    inicio = time.perf_counter()
+    if columnas is None:
+        df_pl = pl.read_excel(ruta, engine="calamine", infer_schema_length=0)
+    else:
+        df_pl = leer_excel_proyectado(ruta, columnas, alias)
+    df = df_pl.to_pandas(use_pyarrow_extension_array=True)
+    segundos = time.perf_counter() - inicio
+    detener.set()
+    hilo.join()
+    return segundos, (pico[0] - base) if base is not None else None, df.shape[1], df.memory_usage(deep=True).sum() / 1024 ** 2
+
+def benchmark_lectura_excel(carpeta, columnas, alias=None, n_archivos=2):
+    """
+    Lectura completa contra leer_excel_proyectado sobre los n Excel más pesados de 'carpeta' (los exportes
+    más anchos del SAE). Cada lectura corre en un proceso nuevo para que la RAM pico no se contamine.
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    candidatos = [r for r in glob.glob(os.path.join(carpeta, "*.xls*"))
+                  if not os.path.basename(r).startswith("~$") and "Consolidado" not in os.path.basename(r)]
+    candidatos = sorted(candidatos, key=os.path.getsize, reverse=True)[:n_archivos]
+    if not candidatos:
+        console.print(f"[yellow]⚠️ No hay Excel en {carpeta}[/]")
+        return
+
+    contexto = multiprocessing.get_context("spawn")
+    tabla = Table(title=f"🏁 Lectura de Excel: completa vs proyectada ({len(columnas)} columnas pedidas)")
+    for col in ("Archivo", "MB", "Lectura", "Columnas", "Tiempo (s)", "RAM pico (MB)", "DataFrame (MB)"):
+        tabla.add_column(col)
+    for ruta in candidatos:
+        for etiqueta, proyeccion in (("Completa", None), ("Proyectada", columnas)):
+            with ProcessPoolExecutor(max_workers=1, mp_context=contexto) as proceso:
+                segundos, pico, n_columnas, mb_df = proceso.submit(_medir_lectura_excel, ruta, proyeccion, alias).result()
+            tabla.add_row(os.path.basename(ruta), f"{os.path.getsize(ruta) / 1024 ** 2:,.1f}", etiqueta, str(n_columnas),
+                          f"{segundos:.2f}", f"{pico:,.0f}" if pico is not None else "N/A", f"{mb_df:,.1f}")
+    console.print(tabla)
+
+# ========================================================
+# 3. CLASIFICADOR DE TICKETS
+# ========================================================
+def clasificar_tickets_regex(solucion_norm, usuario_norm, grupo_norm):
+    """Implementación anterior del clasificador (un str.contains con regex por regla), referencia de velocidad y de resultados."""
+    from transformacion.ETLs.trans_ordenes_servicio import (
+        SOLUCIONES_ADMINISTRATIVAS, SOLUCIONES_LOGICAS_NOC, SOLUCIONES_FISICAS_OP, NOC_USERS,
+    )
+    patron_admin  = '|'.join(SOLUCIONES_ADMINISTRATIVAS)
+    patron_logico = '|'.join(SOLUCIONES_LOGICAS_NOC)
+    patron_fisico = '|'.join(SOLUCIONES_FISICAS_OP)
+    condiciones = [
+        solucion_norm.str.contains(patron_admin, regex=True, na=False),
+        usuario_norm.isin(NOC_USERS),
+        grupo_norm.isin(NOC_USERS),
+        usuario_norm.str.contains('NOC', na=False),
+        grupo_norm.str.contains('OPERACIONES|MESA DE CONTROL', na=False),
+        solucion_norm.str.contains(patron_fisico, regex=True, na=False),
+        solucion_norm.str.contains(patron_logico, regex=True, na=False)
+    ]
+    opciones = ['ADMINISTRATIVO', 'NOC', 'NOC', 'NOC', 'OPERACIONES', 'OPERACIONES', 'NOC']
+    return np.select(condiciones, opciones, default='N/S')
+
+def textos_clasificador(n_filas, rng, unicos=False):
+    """Soluciones, usuarios y grupos sintéticos con el vocabulario real de las reglas (Series de Pandas)."""
+    from transformacion.ETLs.trans_ordenes_servicio import (
+        SOLUCIONES_ADMINISTRATIVAS, SOLUCIONES_LOGICAS_NOC, SOLUCIONES_FISICAS_OP, NOC_USERS,
+    )
+    palabras = SOLUCIONES_ADMINISTRATIVAS + SOLUCIONES_FISICAS_OP + SOLUCIONES_LOGICAS_NOC
+    relleno = ["CLIENTE", "REPORTA", "SE", "REALIZA", "SIN", "NOVEDAD", "EN", "SITIO", "OK", "TECNICO"]
+    soluciones = [" ".join(rng.choice(relleno + palabras, size=rng.integers(1, 5))) for _ in range(2_000)] + ["", "N/A"]
+    usuarios = NOC_USERS + ["NOC_GUARDIA", "SUPERVISOR", "CAJERO1", "ATC_WEB", ""] + [f"USUARIO{i}" for i in range(200)]
+    grupos = ["OPERACIONES ESTE", "MESA DE CONTROL", "GFARFAN", "CUADRILLA 1", "CALL CENTER", "", "ALMACEN"]
+
+    sol = pd.Series(rng.choice(soluciones, size=n_filas), dtype=object)
+    if unicos:
+        sol = sol + " #" + pd.Series(np.arange(n_filas)).astype(str)
+    usr = pd.Series(rng.choice(usuarios, size=n_filas), dtype=object)
+    grp = pd.Series(rng.choice(grupos, size=n_filas), dtype=object)
+    return sol, usr, grp
+
+def benchmark_clasificador(n_filas=1_000_000, semilla=42):
+    """
+    Compara el clasificador regex anterior contra el autómata (Pandas sobre valores únicos y
+    expresión Polars) con textos repetidos (caso habitual) y con textos únicos por fila (peor caso).
+    """
+    from transformacion.ETLs.trans_ordenes_servicio import clasificar_tickets
+    from transformacion.ETLs.trans_ordenes_servicio_polars import expr_clasificacion
+
+    rng = np.random.default_rng(semilla)
+    tabla = Table(title=f"🏁 Clasificador de tickets ({n_filas:,} filas)")
+    for col in ("Escenario", "Regex (filas/s)", "Autómata Pandas (filas/s)", "Autómata Polars (filas/s)"):
+        tabla.add_column(col)
+    for escenario in ("Textos repetidos", "Textos únicos"):
+        sol, usr, grp = textos_clasificador(n_filas, rng, unicos=escenario == "Textos únicos")
+
+        t = time.perf_counter(); clasificar_tickets_regex(sol, usr, grp); t_regex = time.perf_counter() - t
+        t = time.perf_counter(); clasificar_tickets(sol, usr, grp); t_pandas = time.perf_counter() - t
+        df_pl = pl.DataFrame({"sol": sol.tolist(), "usr": usr.tolist(), "grp": grp.tolist()})
+        t = time.perf_counter()
+        df_pl.select(expr_clasificacion(pl.col("sol"), pl.col("usr"), pl.col("grp"))).to_series()
+        t_polars = time.perf_counter() - t
+
+        tabla.add_row(escenario, f"{n_filas / t_regex:,.0f}", f"{n_filas / t_pandas:,.0f}", f"{n_filas / t_polars:,.0f}")
+    console.print(tabla)
+
+# ========================================================
+# 4. MOTORES DE TICKETS (PANDAS VS POLARS)
+# ========================================================
+def normalizar_para_comparar(ruta):
+    """Parquet de salida con tipos homogéneos y filas ordenadas, para comparar motores sin importar el orden."""
+    df = pd.read_parquet(ruta)
+    for c in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[c]):
+            df[c] = df[c].astype("datetime64[ns]")
+        elif pd.api.types.is_numeric_dtype(df[c]):
+            df[c] = df[c].astype("float64")
+        else:
+            df[c] = df[c].astype(object).where(df[c].notna(), None)
+    return df.sort_values(list(df.columns), na_position="last", kind="stable").reset_index(drop=True)
+
+# pandas suma por grupo con compensación de Kahan y Polars no: las sumas de SLA_Gold pueden diferir
+# en el último bit. Lo mismo Duracion_Horas: Polars divide por 60 multiplicando por el recíproco.
+# Todo lo demás (filas, llaves, conteos y columnas enteras) se exige exacto.
+TOLERANCIA_RELATIVA = {"SLA_Gold": 1e-12, "Tickets_Silver_Master": 1e-12, "Tickets_Fact_Gold": 1e-12}
+
+def comparar_salidas(lake_a, lake_b):
+    """
+    Compara los archivos de salida de dos lakes (orden de filas irrelevante). Retorna {salida: detalle}
+    donde detalle es "OK" o la descripción de la primera diferencia encontrada.
+    """
+    import modo_dev
+    from transformacion.ETLs.trans_ordenes_servicio_polars import NOMBRES_SALIDA
+    resultado = {}
+    for nombre, archivo in NOMBRES_SALIDA.items():
+        capa = "silver" if nombre == "Tickets_Silver_Master" else "gold"
+        ruta_a = os.path.join(modo_dev.ruta_equivalente(modo_dev.PATHS_ORIGINALES[capa], lake_a), archivo)
+        ruta_b = os.path.join(modo_dev.ruta_equivalente(modo_dev.PATHS_ORIGINALES[capa], lake_b), archivo)
+        if not (os.path.exists(ruta_a) and os.path.exists(ruta_b)):
+            resultado[nombre] = "Falta en algún motor"
+            continue
+        a, b = normalizar_para_comparar(ruta_a), normalizar_para_comparar(ruta_b)
+        if list(a.columns) != list(b.columns):
+            resultado[nombre] = f"Columnas distintas: {sorted(set(a.columns) ^ set(b.columns))}"
+            continue
+        try:
+            rtol = TOLERANCIA_RELATIVA.get(nombre)
+            pd.testing.assert_frame_equal(a, b, check_dtype=False, check_exact=rtol is None, rtol=rtol or 1e-5)
+            resultado[nombre] = "OK"
+        except AssertionError as e:
+            resultado[nombre] = f"{len(a):,} vs {len(b):,} filas | " + str(e).splitlines()[0]
+    return resultado
+
+def _correr_motor(modulo, lake):
+    """Ejecuta un motor en un proceso nuevo contra 'lake'. Retorna (segundos, RAM pico MB, código)."""
+    import psutil
+    codigo = (
+        "import sys, modo_dev; modo_dev.activar_lake_dev(sys.argv[2]); "
+        "from transformacion.ETLs import cargar_etl; cargar_etl(sys.argv[1]).ejecutar()"
+    )
+    inicio = time.time()
+    proceso = subprocess.Popen([sys.executable, "-c", codigo, modulo, lake], cwd=RAIZ,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    pico = 0.0
+    ps = psutil.Process(proceso.pid)
+    while proceso.poll() is None:
+        try:
+            pico = max(pico, ps.memory_info().rss / 1024 ** 2)
+        except psutil.Error:
+            pass
+        time.sleep(0.05)
+    return time.time() - inicio, pico, proceso.returncode
+
+def comparar_motores(ruta_raw=None):
+    """
+    Corre ambos motores sobre los mismos Excel de IdF, cada uno en un lake temporal y en un proceso
+    limpio (tiempo de pared y RAM pico), y verifica que todas las salidas sean idénticas.
+    Retorna True si todas coinciden.
+    """
+    import modo_dev
+
+    ruta_raw = ruta_raw or modo_dev.PATHS_ORIGINALES["raw_idf"]
+    archivos = [f for f in glob.glob(os.path.join(ruta_raw, "*.xlsx")) if not os.path.basename(f).startswith("~$")]
+    if not archivos:
+        console.print(f"[yellow]⚠️ No hay Excel de IdF en {ruta_raw}.[/]")
+        return False
+
+    raiz = tempfile.mkdtemp(prefix="bench_tickets_")
+    try:
+        lakes, tabla = {}, Table(title=f"🏁 Motores de Tickets ({len(archivos)} archivos IdF)")
+        for col in ("Motor", "Tiempo (s)", "RAM pico (MB)", "Estado"):
+            tabla.add_column(col)
+        for modulo in ("trans_ordenes_servicio", "trans_ordenes_servicio_polars"):
+            lake = os.path.join(raiz, modulo)
+            for archivo in archivos:
+                modo_dev.enlazar_o_copiar(archivo, os.path.join(modo_dev.ruta_equivalente(modo_dev.PATHS_ORIGINALES["raw_idf"], lake),
+                                                                os.path.basename(archivo)))
+            segundos, pico, codigo = _correr_motor(modulo, lake)
+            lakes[modulo] = lake
+            tabla.add_row(modulo, f"{segundos:.1f}", f"{pico:,.0f}", "[green]OK[/]" if codigo == 0 else f"[red]exit {codigo}[/]")
+        console.print(tabla)
+
+        resultado = comparar_salidas(lakes["trans_ordenes_servicio"], lakes["trans_ordenes_servicio_polars"])
+        tabla_eq = Table(title="🔍 Equivalencia de salidas")
+        tabla_eq.add_column("Salida")
+        tabla_eq.add_column("Resultado")
+        for nombre, detalle in resultado.items():
+            tabla_eq.add_row(nombre, "[green]Idéntica[/]" if detalle == "OK" else f"[red]{detalle}[/]")
+        console.print(tabla_eq)
+        return all(d == "OK" for d in resultado.values())
+    finally:
+        shutil.rmtree(raiz, ignore_errors=True)
+
+# ========================================================
+# 5. CLI
+# ========================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de rendimiento del pipeline Fibex.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    sub.add_parser("dedup", help="ultimo_por_llave contra ordenar + deduplicar.")
+    p_excel = sub.add_parser("excel", help="Lectura completa vs proyectada de los Excel más pesados.")
+    p_excel.add_argument("--dataset", choices=["idf", "abonados"], default="idf")
+    sub.add_parser("clasificador", help="Clasificador regex anterior vs autómata.")
+    sub.add_parser("motores-tickets", help="Motor pandas vs polars de tickets (tiempo, RAM y equivalencia).")
+    args = parser.parse_args(argv)
+
+    if args.comando == "dedup":
+        benchmark_ultimo_por_llave()
+    elif args.comando == "excel":
+        if args.dataset == "idf":
+            from transformacion.ETLs.trans_ordenes_servicio import COLS_EXCEL_IDF
+            benchmark_lectura_excel(PATHS["raw_idf"], COLS_EXCEL_IDF)
+        else:
+            from transformacion.ETLs.trans_abonados_idf import COLS_EXCEL_ABONADOS, MAPEO_COLUMNAS
+            benchmark_lectura_excel(PATHS["raw_abonados_idf"], COLS_EXCEL_ABONADOS, alias=MAPEO_COLUMNAS)
+    elif args.comando == "clasificador":
+        benchmark_clasificador()
+    elif args.comando == "motores-tickets":
+        return 0 if comparar_motores() else 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
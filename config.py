@@ -127,4 +127,58 @@ TELEGRAM_CHAT_ID = REGLAS.get("TELEGRAM_CHAT_ID", "")
 
 # --- CREDENCIALES DEL SAE PLUS ---
 SAE_USUARIO = REGLAS.get("SAE_USUARIO", os.getenv("SAE_USUARIO", "USUARIO_POR_DEFECTO"))
-SAE_CLAVE = REGLAS.get("SAE_CLAVE", os.getenv("SAE_CLAVE", "CLAVE_POR_DEFECTO"))
\ No newline at end of file
+SAE_CLAVE = REGLAS.get("SAE_CLAVE", os.getenv("SAE_CLAVE", "CLAVE_POR_DEFECTO"))
+# --- PROTOCOLO DE ESCRITURA DEL LAKE (LOCKS + PUBLICACIÓN ATÓMICA) ---
+# Espera máxima por el lock de un dataset, antigüedad a partir de la cual un .lock huérfano se
+# considera abandonado (solo si no se puede comprobar que su proceso dueño murió: otro host o
+# Windows sin psutil), y reintentos de publicación cuando Power BI mantiene abierto el destino.
+LOCK_ESPERA_MAX_SEG = REGLAS.get("LOCK_ESPERA_MAX_SEG", 900)
+LOCK_EXPIRACION_SEG = REGLAS.get("LOCK_EXPIRACION_SEG", 6 * 3600)
+PUBLICACION_REINTENTOS = REGLAS.get("PUBLICACION_REINTENTOS", 8)
+
+# --- VIGILANTE DE CARPETAS RAW (INGESTA POR EVENTOS) ---
+# Silencio requerido tras la última llegada antes de disparar un dataset, tiempo que un archivo
+# debe mantener tamaño/fecha sin cambios para considerarse completo, e intervalo del modo polling.
+VIGILANTE_DEBOUNCE_SEG = REGLAS.get("VIGILANTE_DEBOUNCE_SEG", 30)
+VIGILANTE_ESTABILIDAD_SEG = REGLAS.get("VIGILANTE_ESTABILIDAD_SEG", 10)
+VIGILANTE_POLL_SEG = REGLAS.get("VIGILANTE_POLL_SEG", 10)
+
+# --- MODO DESARROLLO (LAKE DE MUESTRA) ---
+# Lake paralelo con una muestra determinística del Bronze para iterar ETLs en segundos.
+DEV_RUTA_LAKE = REGLAS.get("DEV_RUTA_LAKE", RUTA_BASE + "_dev")
+DEV_FRACCION = REGLAS.get("DEV_FRACCION", 0.05)
+DEV_SEMILLA = REGLAS.get("DEV_SEMILLA", 42)
+DEV_MIN_POR_ESTRATO = REGLAS.get("DEV_MIN_POR_ESTRATO", 20)
+DEV_ARCHIVOS_RAW = REGLAS.get("DEV_ARCHIVOS_RAW", 2)
+DEV_TOLERANCIA = REGLAS.get("DEV_TOLERANCIA", 0.15)
+
+# --- MÉTRICAS (PROMETHEUS TEXTFILE COLLECTOR) ---
+# Carpeta que lee el node_exporter (--collector.textfile.directory) y puerto del endpoint opcional.
+# Por defecto junto al lake, fuera del repositorio: las corridas no ensucian el árbol de código.
+METRICAS_ACTIVAS = REGLAS.get("METRICAS_ACTIVAS", True)
+METRICAS_DIR = REGLAS.get("METRICAS_DIR", os.path.join(RUTA_BASE, "metricas"))
+METRICAS_PUERTO = REGLAS.get("METRICAS_PUERTO", 9108)
+
+# --- MOTOR DEL ETL DE TICKETS ---
+# "pandas" (trans_ordenes_servicio, relee los Excel) o "polars" (trans_ordenes_servicio_polars, plan lazy sobre el Bronze).
+MOTOR_TICKETS = REGLAS.get("MOTOR_TICKETS", "pandas")
+
+# --- SKETCHES DE CUANTILES (T-DIGEST) ---
+# Compresión del t-digest (más alto = más centroides y más precisión en las colas) y
+# percentiles que se decodifican en la tabla SLA_Percentiles_Gold.
+TDIGEST_COMPRESION = REGLAS.get("TDIGEST_COMPRESION", 200)
+CUANTILES_SLA = REGLAS.get("CUANTILES_SLA", [0.5, 0.9, 0.95])
+
+# --- SKETCHES DE CONTEO DISTINTO (HYPERLOGLOG) ---
+# Precisión p: 2^p registros de 1 byte por sketch. Error estándar relativo ≈ 1.04 / sqrt(2^p)
+# (p=12 -> 4 KB por sketch y ~1.6%).
+HLL_PRECISION = REGLAS.get("HLL_PRECISION", 12)
+
+# --- BACKLOG DE TICKETS ---
+# Límites en días de los tramos de antigüedad de Tickets_Backlog_Gold: [0, 1), [1, 3), ... y "+30".
+BACKLOG_TRAMOS_DIAS = REGLAS.get("BACKLOG_TRAMOS_DIAS", [1, 3, 7, 15, 30])
+
+# --- GOLD INCREMENTAL DE RECAUDACIÓN ---
+# Días hacia atrás que se reprocesan por cada fecha nueva de Horas de pago: una hora que llega tarde
+# cambia la "Hora de Pago" de cobros de días anteriores.
+RECAUDACION_DIAS_HORAS_TARDIAS = REGLAS.get("RECAUDACION_DIAS_HORAS_TARDIAS", 7)
@@ -1,5 +1,6 @@
 import os
 import sys
+import argparse
 import datetime 
 from datetime import timedelta
 import time
@@ -129,48 +130,118 @@ def ejecutar_scraper(rutina, f_ini, f_fin):
     rutina(f_ini, f_fin)
 
 def ejecutar_wrapper(rutina, f_ini, f_fin):
-    """Itera sobre la lista de scrapers y maneja los errores definitivos tras los reintentos."""
-    if isinstance(rutina, list):
-        for r in rutina:
-            try:
-                ejecutar_scraper(r, f_ini, f_fin)
-            except Exception as e:
-                logger_extraccion.error(f"Fallo definitivo en {r.__name__}: {e}", exc_info=True)
-                console.print(f"[bold red]💥 Fallo definitivo en {r.__name__} tras 3 intentos: {e}[/]")
-    else:
+    """
+    Itera sobre la lista de scrapers y maneja los errores definitivos tras los reintentos.
+    Retorna la lista de nombres de los scrapers que fallaron.
+    """
+    rutinas = rutina if isinstance(rutina, list) else [rutina]
+    fallos = []
+    for r in rutinas:
         try:
-            ejecutar_scraper(rutina, f_ini, f_fin)
+            ejecutar_scraper(r, f_ini, f_fin)
         except Exception as e:
-            logger_extraccion.error(f"Fallo definitivo en {rutina.__name__}: {e}", exc_info=True)
-            console.print(f"[bold red]💥 Fallo definitivo en {rutina.__name__} tras 3 intentos: {e}[/]")
+            logger_extraccion.error(f"Fallo definitivo en {r.__name__}: {e}", exc_info=True)
+            console.print(f"[bold red]💥 Fallo definitivo en {r.__name__} tras 3 intentos: {e}[/]")
+            fallos.append(r.__name__)
+    return fallos
+
+def resolver_opcion(opcion):
+    """
+    Traduce una opción a su entrada en MENU. Acepta la clave numérica ("2"), el nombre
+    de la rutina ("descargar_atc") o su forma corta ("atc").
+    Retorna (clave, seleccion) o (None, None) si no existe.
+    """
+    opcion = str(opcion).strip()
+    if opcion in MENU:
+        return opcion, MENU[opcion]
+    buscado = opcion.lower().replace('descargar_', '')
+    for clave, val in MENU.items():
+        target = val['target']
+        if not isinstance(target, list) and target.__name__.replace('descargar_', '') == buscado:
+            return clave, val
+    return None, None
+
+def validar_fecha(valor):
+    """Tipo para argparse: valida DD/MM/YYYY y lo retorna como texto."""
+    try:
+        datetime.datetime.strptime(valor, "%d/%m/%Y")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Fecha inválida '{valor}', use DD/MM/YYYY.")
+    return valor
+
+def ejecutar_rutinas(opciones, f_ini, f_fin, desde=1):
+    """
+    API programática (sin menú ni input()) para descargar una o varias opciones del menú
+    en la ventana de fechas indicada. `desde` permite reanudar la opción 1 a partir del
+    robot N. Retorna la lista de scrapers que fallaron.
+    """
+    fallos = []
+    for opcion in opciones:
+        clave, seleccion = resolver_opcion(opcion)
+        if not seleccion:
+            console.print(f"[bold red]❌ Opción desconocida: {opcion}[/]")
+            fallos.append(str(opcion))
+            continue
+
+        rutinas = seleccion['target']
+        if isinstance(rutinas, list) and 1 < desde <= len(rutinas):
+            rutinas = rutinas[desde - 1:]
+
+        logger_extraccion.info(f"Ejecutando opción seleccionada: {seleccion['label']} | Fechas: {f_ini} al {f_fin}")
+        console.rule(f"[bold blue]Iniciando: {seleccion['label']} ({f_ini} al {f_fin})[/]")
+        fallos.extend(ejecutar_wrapper(rutinas, f_ini, f_fin))
+    return fallos
+
+def parsear_argumentos(argv=None):
+    parser = argparse.ArgumentParser(description="Orquestador de extracción (SAE Plus) Fibex.")
+    parser.add_argument("--auto", action="store_true",
+                        help="Modo desatendido: sin preguntas, opción 1 y últimos 7 días salvo que se indique otra cosa.")
+    parser.add_argument("-o", "--opcion", action="append", default=[],
+                        help="Clave del menú o nombre del robot (ej. 'atc'). Se puede repetir.")
+    parser.add_argument("--desde", type=validar_fecha, help="Fecha inicial DD/MM/YYYY.")
+    parser.add_argument("--hasta", type=validar_fecha, help="Fecha final DD/MM/YYYY.")
+    parser.add_argument("--reanudar", type=int, default=1,
+                        help="En la opción 1, número del robot desde el cual reanudar.")
+    parser.add_argument("--listar", action="store_true", help="Muestra el menú y termina.")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parsear_argumentos(argv)
+
+    if args.listar:
+        mostrar_menu()
+        return 0
 
-def main():
     logger_extraccion.info("="*50)
     logger_extraccion.info("🤖 INICIO DE ORQUESTADOR DE EXTRACCIÓN")
     console.rule("[bold blue]🤖 BIENVENIDO AL ROBOT DE EXTRACCIÓN SAE[/]")
     
-    auto_mode = "--auto" in sys.argv
-    f_ini, f_fin = pedir_fechas(auto_mode)
+    # Cualquier parámetro explícito implica ejecución desatendida (sin Prompt)
+    auto_mode = args.auto or bool(args.opcion) or bool(args.desde or args.hasta)
+    if args.desde and args.hasta:
+        f_ini, f_fin = args.desde, args.hasta
+    else:
+        f_ini, f_fin = pedir_fechas(auto_mode)
+        f_ini = args.desde or f_ini
+        f_fin = args.hasta or f_fin
     
     console.print("\n")
     
-    if auto_mode:
+    idx_inicio = args.reanudar
+    if args.opcion:
+        opciones = args.opcion
+    elif auto_mode:
         console.print("[bold green]🤖 Ejecutando todos los reportes (Opción 1) automáticamente...[/]")
-        opcion = "1"
+        opciones = ["1"]
     else:
         mostrar_menu()
         opcion = Prompt.ask("\n[bold yellow]¿Qué reporte deseas descargar?[/]", choices=list(MENU.keys()), default="1")
         console.print("\n")
-    
-    # Iniciamos el cronómetro justo después de las interacciones del usuario
-    inicio_extraccion = time.time()
-    
-    seleccion = MENU.get(opcion)
-    if seleccion:
-        rutinas = seleccion['target']
-        
-        # Si elige la extracción global y no está en modo automático, preguntamos desde dónde iniciar
-        if opcion == "1" and isinstance(rutinas, list) and not auto_mode:
+        opciones = [opcion]
+
+        # Si elige la extracción global en modo interactivo, preguntamos desde dónde iniciar
+        rutinas = MENU[opcion]['target']
+        if opcion == "1" and isinstance(rutinas, list):
             console.print("\n[bold cyan]Secuencia de extracción programada:[/]")
             for i, r in enumerate(rutinas, 1):
                 nombre_limpio = r.__name__.replace('descargar_', '').replace('_', ' ').title()
@@ -181,26 +252,29 @@ def main():
                 default="1"
             )
             try:
-                idx_inicio = int(str_inicio) - 1
-                if 0 <= idx_inicio < len(rutinas):
-                    rutinas = rutinas[idx_inicio:]
+                idx_inicio = int(str_inicio)
             except ValueError:
-                pass # Si introduce texto no válido, asume el inicio (0)
-
-        logger_extraccion.info(f"Ejecutando opción seleccionada: {seleccion['label']} | Fechas: {f_ini} al {f_fin}")
-        console.rule(f"[bold blue]Iniciando: {seleccion['label']} ({f_ini} al {f_fin})[/]")
-        ejecutar_wrapper(rutinas, f_ini, f_fin) 
+                idx_inicio = 1 # Si introduce texto no válido, asume el inicio
+    
+    # Iniciamos el cronómetro justo después de las interacciones del usuario
+    inicio_extraccion = time.time()
+    
+    fallos = ejecutar_rutinas(opciones, f_ini, f_fin, desde=idx_inicio)
     
     console.rule("[bold green]✅ FIN DE EXTRACCIÓN GLOBAL[/]")
     duration = time.time() - inicio_extraccion
-    logger_extraccion.info(f"✅ FIN DE ORQUESTADOR DE EXTRACCIÓN | Tiempo Total: {duration:.2f}s")
+    logger_extraccion.info(f"✅ FIN DE ORQUESTADOR DE EXTRACCIÓN | Tiempo Total: {duration:.2f}s | Fallos: {len(fallos)}")
     tiempo(inicio_extraccion)
+
+    if fallos:
+        console.print(f"[bold red]❌ {len(fallos)} robot(s) con fallo: {', '.join(fallos)}[/]")
     
     # --- NOTIFICACIÓN AL BOT ---
     #enviar_notificacion_bot(
-        #mensaje=f"✅ *Extracción SAE Completada*\n🤖 Reporte(s): {seleccion['label'] if seleccion else 'Desconocido'}\n📅 Rango: {f_ini} al {f_fin}\n⏱️ Tiempo Total: {duration/60:.2f} minutos",
+        #mensaje=f"✅ *Extracción SAE Completada*\n🤖 Reporte(s): {', '.join(opciones)}\n📅 Rango: {f_ini} al {f_fin}\n⏱️ Tiempo Total: {duration/60:.2f} minutos",
        # plataforma="telegram" # Puedes cambiarlo a "webhook" si prefieres Slack o Discord
     #)
+    return 1 if fallos else 0
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
@@ -1,49 +1,45 @@
 import sys
+import argparse
 from rich.console import Console
 from rich.panel import Panel
 from rich.table import Table
 from rich.prompt import Prompt
-from config import THEME_COLOR
+from config import THEME_COLOR, MOTOR_TICKETS
 import time 
-from utils import tiempo, audit_performance, liberar_ram_os
-from notificaciones import enviar_notificacion_bot
+from functools import wraps
 
 # ========================================================
-# 1. IMPORTACIÓN DE MÓDULOS (ETLs)
+# 1. REGISTRO DE MÓDULOS (ETLs)
 # ========================================================
-from transformacion.ETLs import (
-    # --- INGRESOS ---
-    trans_abonados_idf,
-    trans_actualizacion_datos,
-    trans_afluencia_gold,
-    trans_afluencia_silver,
-    trans_atc,
-    trans_cobranza,
-    trans_comeback,
-    trans_dim_franquicias,
-    trans_dimclientes,
-    trans_empleados,
-    trans_estadistica_abonado,
-    trans_ont_off,
-    trans_ordenes_servicio,
-    trans_recaudacion,
-    trans_reclamos,
-    trans_ventase,            # 1. Financiero
-    trans_ventas              # 2. Comercial           # 1. Denominador (Stock de Clientes)        # 3. El Puente (Dimensión),
-    # --- TRANSFORMACIONES & DW ---
-)
+# Los ETLs se importan de forma perezosa (ver transformacion/ETLs/__init__.py): el MENÚ
+# referencia cada módulo por su nombre y solo se carga cuando la opción se ejecuta.
+from transformacion.ETLs import cargar_etl
 
 console = Console(theme=THEME_COLOR)
 
+# utils (y notificaciones, que lo importa) cargan pandas, polars, duckdb y pyarrow al importarse.
+# main.py los importa recién al ejecutar, así 'import main' (pipeline_master, backfill,
+# modo_dev, --medir-arranque) no paga ese costo.
+def auditado(func):
+    """Aplica utils.audit_performance en el momento de la llamada y no al importar main."""
+    @wraps(func)
+    def envoltura(*args, **kwargs):
+        from utils import audit_performance
+        return audit_performance(func)(*args, **kwargs)
+    return envoltura
+
 # ========================================================
 # 2. ORQUESTADORES (PIPELINES COMPLEJOS)
 # ========================================================
 # --- PIPELINE DE AFLUENCIA ---
 class PipelineAfluencia:
+    modulos = ["trans_afluencia_silver", "trans_afluencia_gold"]
+
     def ejecutar(self):
-        ruta_silver = trans_afluencia_silver.ejecutar() 
-        if ruta_silver:
-            trans_afluencia_gold.ejecutar(ruta_silver)
+        ruta_silver = cargar_etl("trans_afluencia_silver").ejecutar() 
+        if not ruta_silver:
+            raise RuntimeError("Afluencia Silver no generó archivo de salida")
+        cargar_etl("trans_afluencia_gold").ejecutar(ruta_silver)
 
 afluencia_completa = PipelineAfluencia()
 
@@ -55,20 +51,23 @@ class PipelineIndicadores:
     2. Generar Tickets Master (Gold IDF + Gold SLA) -> Necesario para numeradores.
     3. Generar Dimensión Franquicias -> Lee 1 y 2 para unir el modelo.
     """
+    etl_tickets = "trans_ordenes_servicio_polars" if MOTOR_TICKETS == "polars" else "trans_ordenes_servicio"
+    modulos = ["trans_abonados_idf", etl_tickets, "trans_dim_franquicias"]
+
     def ejecutar(self):
         console.rule("[bold magenta]SUITE DE INDICADORES TÉCNICOS (IDF + SLA)[/]")
         
         # PASO 1: Generar el Denominador (Abonados)
         console.print("\n[dim]1. Actualizando Stock de Abonados...[/]")
-        trans_abonados_idf.ejecutar()
+        cargar_etl("trans_abonados_idf").ejecutar()
         
         # PASO 2: Generar Numeradores y Tiempos (Script Unificado)
         console.print("\n[dim]2. Procesando Tickets (Fallas y SLAs)...[/]")
-        trans_ordenes_servicio.ejecutar()
+        cargar_etl(self.etl_tickets).ejecutar()
         
         # PASO 3: Crear la Dimensión que los une
         console.print("\n[dim]3. Regenerando Dimensión Franquicias...[/]")
-        trans_dim_franquicias.ejecutar()
+        cargar_etl("trans_dim_franquicias").ejecutar()
         
         console.print("[bold green]✅ Suite de Indicadores sincronizada correctamente.[/]")
 
@@ -77,20 +76,40 @@ idf_suite_completa = PipelineIndicadores()
 # ========================================================
 # 3. WRAPPER DE EJECUCIÓN
 # ========================================================
-@audit_performance
+@auditado
 def ejecutar_wrapper(modulo):
+    """
+    Ejecuta un módulo, un pipeline o una lista de ellos sin detener la suite ante errores.
+    Retorna la lista de nombres que fallaron para poder resumir la ejecución (exit code).
+    Los ETLs registran sus errores fatales y los relanzan: cualquier excepción que salga
+    de ejecutar() cuenta como fallo.
+    """
+    fallos = []
     try:
         if isinstance(modulo, list):
             for m in modulo:
-                ejecutar_wrapper(m)
+                fallos.extend(ejecutar_wrapper(m))
         else:
+            if isinstance(modulo, str):
+                modulo = cargar_etl(modulo)
             if hasattr(modulo, 'ejecutar'):
                 modulo.ejecutar()
+                from utils import liberar_ram_os
                 liberar_ram_os()
             else:
                 console.print(f"[red]❌ El módulo {modulo} no tiene función ejecutar()[/]")
+                fallos.append(nombre_objetivo(modulo))
     except Exception as e:
         console.print(f"[bold red]Error crítico ejecutando módulo: {e}[/]")
+        fallos.append(nombre_objetivo(modulo))
+    return fallos
+
+def nombre_objetivo(modulo):
+    """Nombre legible de un módulo ETL o pipeline (ej. 'trans_recaudacion')."""
+    if isinstance(modulo, str):
+        return modulo
+    nombre = getattr(modulo, '__name__', None) or type(modulo).__name__
+    return nombre.split('.')[-1]
 
 # ========================================================
 # 4. MENÚ DE OPCIONES
@@ -98,44 +117,45 @@ def ejecutar_wrapper(modulo):
 MENU = {
     "1":  {"icono": "🚀", "label": "EJECUTAR TODO (Full Data Warehouse)", "target": [
         # FASE 1: DIMENSIONES MAESTRAS (Actualizar primero para integridad referencial)
-        trans_empleados,
-        trans_dimclientes,
+        "trans_empleados",
+        "trans_dimclientes",
         
         # FASE 2: TABLAS DE HECHOS (FACTS - Ingesta Base)
-        trans_recaudacion, trans_ventas, trans_ventase, trans_reclamos, trans_atc, 
-        trans_ont_off, trans_cobranza, trans_actualizacion_datos, trans_comeback,
+        "trans_recaudacion", "trans_ventas", "trans_ventase", "trans_reclamos", "trans_atc", 
+        "trans_ont_off", "trans_cobranza", "trans_actualizacion_datos", "trans_comeback",
         
         # FASE 3: SUITE DE INDICADORES (Abonados -> Tickets -> Dimensión Franquicias)
         idf_suite_completa,
         
         # FASE 4: HECHOS SECUNDARIOS Y MODELADO FINAL (Dependen de Fases 1 y 2)
-        trans_estadistica_abonado,
+        "trans_estadistica_abonado",
         afluencia_completa
     ]},
     
     # --- OPCIONES INDIVIDUALES ---
-    "2":  {"icono": "💰", "label": "Recaudación",             "target": trans_recaudacion},
-    "3":  {"icono": "📊", "label": "Ventas (General)",        "target": trans_ventas},
-    "4":  {"icono": "💼", "label": "Ventas (Estatus)",        "target": trans_ventase},
-    "5":  {"icono": "🛠️", "label": "Reclamos",                "target": trans_reclamos},
-    "6":  {"icono": "🎧", "label": "Atención al Cliente",     "target": trans_atc},
+    "2":  {"icono": "💰", "label": "Recaudación",             "target": "trans_recaudacion"},
+    "3":  {"icono": "📊", "label": "Ventas (General)",        "target": "trans_ventas"},
+    "4":  {"icono": "💼", "label": "Ventas (Estatus)",        "target": "trans_ventase"},
+    "5":  {"icono": "🛠️", "label": "Reclamos",                "target": "trans_reclamos"},
+    "6":  {"icono": "🎧", "label": "Atención al Cliente",     "target": "trans_atc"},
     
     # --- AQUÍ ESTÁ LA MAGIA ---
     # La opción 7 ahora corre TODA la lógica necesaria para que Power BI no falle
     "7":  {"icono": "📉", "label": "Suite Técnica (IDF + SLA + Abonados)", "target": idf_suite_completa},
     
     # La opción 8 apunta al master por si solo quieres actualizar tickets sin re-leer abonados
-    "8":  {"icono": "📜", "label": "Solo Tickets (IDF/SLA)",  "target": trans_ordenes_servicio},
-    "9":  {"icono": "📞", "label": "Gestión Cobranza",        "target": trans_cobranza},
-    "10": {"icono": "📝", "label": "Actualización Datos",     "target": trans_actualizacion_datos},
-    "11": {"icono": "🏠", "label": "Come Back Home",          "target": trans_comeback},
-    "12": {"icono": "👤", "label": "Empleados (RRHH)",        "target": trans_empleados},
+    "8":  {"icono": "📜", "label": "Solo Tickets (IDF/SLA)",  "target": "trans_ordenes_servicio"},
+    "9":  {"icono": "📞", "label": "Gestión Cobranza",        "target": "trans_cobranza"},
+    "10": {"icono": "📝", "label": "Actualización Datos",     "target": "trans_actualizacion_datos"},
+    "11": {"icono": "🏠", "label": "Come Back Home",          "target": "trans_comeback"},
+    "12": {"icono": "👤", "label": "Empleados (RRHH)",        "target": "trans_empleados"},
     
     # --- TRANSFORMACIONES ---
-    "13": {"icono": "💎", "label": "Dimensión Clientes",      "target": trans_dimclientes},
-    "14": {"icono": "📈", "label": "Estadística Abonado",     "target": trans_estadistica_abonado},
+    "13": {"icono": "💎", "label": "Dimensión Clientes",      "target": "trans_dimclientes"},
+    "14": {"icono": "📈", "label": "Estadística Abonado",     "target": "trans_estadistica_abonado"},
     "15": {"icono": "🔄", "label": "Afluencia (Silver+Gold)", "target": afluencia_completa},
-    "16": {"icono": "🎧", "label": "ONTs Apagadas (Gold)",    "target": trans_ont_off},
+    "16": {"icono": "🎧", "label": "ONTs Apagadas (Gold)",    "target": "trans_ont_off"},
+    "17": {"icono": "⚡", "label": "Solo Tickets (Motor Polars)", "target": "trans_ordenes_servicio_polars"},
     
 }
 
@@ -157,28 +177,140 @@ def mostrar_menu():
         expand=False
     )
     console.print(panel)
-@audit_performance
-def main():
-    mostrar_menu()
-    opcion = Prompt.ask("\n[bold yellow]¿Qué proceso deseas correr?[/]", choices=list(MENU.keys()), default="1")
-    console.print("\n")
+def resolver_opcion(opcion):
+    """
+    Traduce una opción del menú a su entrada en MENU. Acepta la clave numérica ("2")
+    o el nombre del módulo/pipeline (ej. "trans_recaudacion", "PipelineIndicadores").
+    Retorna (clave, seleccion) o (None, None) si no existe.
+    """
+    opcion = str(opcion).strip()
+    if opcion in MENU:
+        return opcion, MENU[opcion]
+    for clave, val in MENU.items():
+        target = val['target']
+        if not isinstance(target, list) and nombre_objetivo(target).lower() == opcion.lower():
+            return clave, val
+    return None, None
+
+def precargar_objetivo(modulo):
+    """Importa (sin ejecutar) todos los ETLs que necesita un target del MENÚ."""
+    if isinstance(modulo, list):
+        for m in modulo:
+            precargar_objetivo(m)
+    elif isinstance(modulo, str):
+        cargar_etl(modulo)
+    else:
+        for m in getattr(modulo, 'modulos', []):
+            cargar_etl(m)
+
+def medir_arranque(opciones=None):
+    """
+    Mide el arranque en frío de cada opción del menú en un proceso Python nuevo:
+    tiempo de 'import main' y tiempo de importar los ETLs que la opción requiere.
+    """
+    import subprocess
+    import os
+
+    opciones = opciones or list(MENU.keys())
+    codigo = (
+        "import sys, time; t0 = time.perf_counter(); import main; t1 = time.perf_counter(); "
+        "main.precargar_objetivo(main.MENU[sys.argv[1]]['target']); t2 = time.perf_counter(); "
+        "print(f'{t1 - t0:.3f} {t2 - t1:.3f}')"
+    )
+
+    table = Table(title="Arranque en frío por opción (segundos)")
+    table.add_column("ID", style="bold yellow", justify="right")
+    table.add_column("Opción")
+    table.add_column("import main", justify="right")
+    table.add_column("Carga ETLs", justify="right")
+    table.add_column("Total", justify="right", style="bold green")
+
+    for clave in opciones:
+        res = subprocess.run(
+            [sys.executable, "-c", codigo, clave],
+            capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+        )
+        if res.returncode != 0 or not res.stdout.strip():
+            table.add_row(clave, MENU[clave]['label'], "-", "-", "[red]error[/]")
+            continue
+        t_main, t_etls = (float(x) for x in res.stdout.strip().splitlines()[-1].split())
+        table.add_row(clave, MENU[clave]['label'], f"{t_main:.2f}", f"{t_etls:.2f}", f"{t_main + t_etls:.2f}")
+
+    console.print(table)
+
+def ejecutar_objetivos(opciones):
+    """
+    API programática (sin menú ni input()) para correr una o varias opciones en secuencia.
+    Retorna la lista de módulos que fallaron; una lista vacía significa ejecución limpia.
+    """
+    fallos = []
+    try:
+        for opcion in opciones:
+            clave, seleccion = resolver_opcion(opcion)
+            if not seleccion:
+                console.print(f"[bold red]❌ Opción desconocida: {opcion}[/]")
+                fallos.append(str(opcion))
+                continue
+            console.rule(f"[bold blue]Iniciando: {seleccion['label']}")
+            fallos.extend(ejecutar_wrapper(seleccion['target']))
+    finally:
+        # Las dimensiones compartidas solo viven lo que dura la corrida
+        if "utils" in sys.modules:
+            sys.modules["utils"].cache_dimensiones.limpiar()
+    return fallos
+
+def parsear_argumentos(argv=None):
+    parser = argparse.ArgumentParser(description="Orquestador de transformaciones (ETLs) Fibex.")
+    parser.add_argument("--auto", action="store_true",
+                        help="Modo desatendido: corre la opción 1 (Full Data Warehouse) sin menú.")
+    parser.add_argument("-o", "--opcion", action="append", default=[],
+                        help="Clave del menú o nombre del módulo a ejecutar. Se puede repetir.")
+    parser.add_argument("--listar", action="store_true", help="Muestra el menú y termina.")
+    parser.add_argument("--medir-arranque", action="store_true",
+                        help="Mide el arranque en frío de cada opción (o de las indicadas con -o) y termina.")
+    return parser.parse_args(argv)
+
+@auditado
+def main(argv=None):
+    args = parsear_argumentos(argv)
+
+    if args.listar:
+        mostrar_menu()
+        return 0
+
+    if args.medir_arranque:
+        medir_arranque([resolver_opcion(o)[0] for o in args.opcion if resolver_opcion(o)[0]] or None)
+        return 0
+
+    if args.opcion:
+        opciones = args.opcion
+    elif args.auto:
+        console.print("[bold green]🤖 Modo Automático Activado:[/] Ejecutando opción 1 sin intervención.")
+        opciones = ["1"]
+    else:
+        mostrar_menu()
+        opciones = [Prompt.ask("\n[bold yellow]¿Qué proceso deseas correr?[/]", choices=list(MENU.keys()), default="1")]
+        console.print("\n")
     
     # Iniciamos el cronómetro justo después de la selección del menú
     inicio_transformacion = time.time()
     
-    seleccion = MENU.get(opcion)
-    if seleccion:
-        console.rule(f"[bold blue]Iniciando: {seleccion['label']}")
-        ejecutar_wrapper(seleccion['target']) 
+    fallos = ejecutar_objetivos(opciones)
     
+    from utils import tiempo
     console.rule("[bold green] FIN DE EJECUCIÓN GLOBAL[/]")
     duracion = time.time() - inicio_transformacion
     tiempo(inicio_transformacion)
+
+    if fallos:
+        console.print(f"[bold red]❌ {len(fallos)} proceso(s) con fallo: {', '.join(fallos)}[/]")
     
+    #from notificaciones import enviar_notificacion_bot
     #enviar_notificacion_bot(
-        #mensaje=f"✅ *Transformación (ETLs) Completada*\n⚙️ Proceso: {seleccion['label'] if seleccion else 'Desconocido'}\n⏱️ Tiempo Total: {duracion/60:.2f} minutos",
+        #mensaje=f"✅ *Transformación (ETLs) Completada*\n⚙️ Proceso: {', '.join(opciones)}\n⏱️ Tiempo Total: {duracion/60:.2f} minutos",
         #plataforma="telegram"
     #)
+    return 1 if fallos else 0
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,214 @@
+# Exportador de métricas en formato Prometheus (textfile collector).
+# Los decoradores de utils (reportar_tiempo, audit_performance) y guardar_parquet registran aquí
+# duraciones, filas, bytes escritos, RAM pico y fallos. Al cerrar cada etapa las métricas se
+# consolidan con las de corridas y procesos anteriores (estado JSON bajo lock) y se publica
+# atómicamente <METRICAS_DIR>/fibex_pipeline.prom, que el node_exporter existente recoge.
+# Para probar sin node_exporter: python metricas.py --servir  ->  http://localhost:9108/metrics
+#
+# Este módulo no importa utils al cargar (utils lo importa a él); el lock y la publicación
+# atómica se toman de utils de forma diferida.
+
+import os
+import sys
+import json
+import time
+import atexit
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from config import METRICAS_ACTIVAS, METRICAS_DIR, METRICAS_PUERTO
+
+ARCHIVO_PROM = "fibex_pipeline.prom"
+ARCHIVO_ESTADO = "fibex_pipeline_estado.json"
+
+# nombre -> (tipo, ayuda)
+DEFINICIONES = {
+    "fibex_etapa_duracion_segundos":       ("gauge",   "Duración de la última ejecución de la etapa."),
+    "fibex_etapa_ejecuciones_total":       ("counter", "Ejecuciones de la etapa por resultado."),
+    "fibex_etapa_ultima_ejecucion_timestamp": ("gauge", "Marca de tiempo Unix del fin de la última ejecución."),
+    "fibex_etapa_ram_pico_mb":             ("gauge",   "RAM máxima del proceso durante la última ejecución (MB)."),
+    "fibex_filas_procesadas_total":        ("counter", "Filas recibidas por las funciones auditadas."),
+    "fibex_scraper_descarga_segundos":     ("gauge",   "Duración de la última descarga del robot."),
+    "fibex_scraper_fallos_total":          ("counter", "Intentos fallidos de descarga del robot."),
+    "fibex_archivo_filas":                 ("gauge",   "Filas del último guardado del archivo."),
+    "fibex_archivo_bytes":                 ("gauge",   "Tamaño en disco del último guardado del archivo."),
+    "fibex_bytes_escritos_total":          ("counter", "Bytes escritos al lake por capa."),
+}
+
+_mutex = threading.Lock()
+_pendientes = {}  # (nombre, (("label", "valor"), ...)) -> valor (delta si counter, último si gauge)
+
+# ========================================================
+# 1. REGISTRO EN MEMORIA
+# ========================================================
+def _clave(nombre, labels):
+    return (nombre, tuple(sorted((k, str(v)) for k, v in (labels or {}).items())))
+
+def incrementar(nombre, valor=1, **labels):
+    if not METRICAS_ACTIVAS:
+        return
+    with _mutex:
+        clave = _clave(nombre, labels)
+        _pendientes[clave] = _pendientes.get(clave, 0) + valor
+
+def fijar(nombre, valor, **labels):
+    if not METRICAS_ACTIVAS:
+        return
+    with _mutex:
+        _pendientes[_clave(nombre, labels)] = valor
+
+def registrar_etapa(etapa, duracion, exito, ram_pico_mb=None, es_scraper=False, filas=None):
+    """Punto de entrada de los decoradores: una etapa (función decorada) terminó."""
+    resultado = "exito" if exito else "fallo"
+    tipo = "scraper" if es_scraper else "etl"
+    fijar("fibex_etapa_duracion_segundos", round(duracion, 3), etapa=etapa, tipo=tipo)
+    incrementar("fibex_etapa_ejecuciones_total", etapa=etapa, tipo=tipo, resultado=resultado)
+    fijar("fibex_etapa_ultima_ejecucion_timestamp", int(time.time()), etapa=etapa, tipo=tipo)
+    if ram_pico_mb:
+        fijar("fibex_etapa_ram_pico_mb", round(ram_pico_mb, 1), etapa=etapa, tipo=tipo)
+    if filas:
+        incrementar("fibex_filas_procesadas_total", filas, etapa=etapa)
+    if es_scraper:
+        if exito:
+            fijar("fibex_scraper_descarga_segundos", round(duracion, 3), scraper=etapa)
+        else:
+            incrementar("fibex_scraper_fallos_total", scraper=etapa)
+
+def registrar_archivo(ruta, filas, capa):
+    """Punto de entrada de guardar_parquet tras publicar un archivo."""
+    try:
+        tamano = os.path.getsize(ruta)
+    except OSError:
+        tamano = 0
+    archivo = os.path.basename(ruta)
+    fijar("fibex_archivo_filas", filas, archivo=archivo, capa=capa)
+    fijar("fibex_archivo_bytes", tamano, archivo=archivo, capa=capa)
+    incrementar("fibex_bytes_escritos_total", tamano, capa=capa)
+
+# ========================================================
+# 2. CONSOLIDACIÓN Y PUBLICACIÓN
+# ========================================================
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def formato_prometheus(estado):
+    """Serializa {nombre: {labels_json: valor}} en formato de exposición de Prometheus."""
+    lineas = []
+    for nombre in sorted(estado):
+        tipo, ayuda = DEFINICIONES.get(nombre, ("untyped", ""))
+        lineas.append(f"# HELP {nombre} {ayuda}")
+        lineas.append(f"# TYPE {nombre} {tipo}")
+        for labels_json, valor in sorted(estado[nombre].items()):
+            labels = json.loads(labels_json)
+            etiquetas = ",".join(f'{k}="{_escapar(v)}"' for k, v in labels)
+            lineas.append(f"{nombre}{{{etiquetas}}} {valor}" if etiquetas else f"{nombre} {valor}")
+    return "\n".join(lineas) + "\n"
+
+def leer_estado(carpeta=None):
+    ruta = os.path.join(carpeta or METRICAS_DIR, ARCHIVO_ESTADO)
+    try:
+        with open(ruta, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def volcar(carpeta=None):
+    """
+    Consolida las métricas pendientes con el estado acumulado (counters suman, gauges reemplazan)
+    y republica el archivo .prom. Seguro entre procesos: el ciclo ocurre bajo el lock del estado.
+    """
+    if not METRICAS_ACTIVAS:
+        return
+    with _mutex:
+        pendientes = dict(_pendientes)
+        _pendientes.clear()
+    if not pendientes:
+        return
+
+    from utils import bloqueo_dataset, escritura_atomica
+
+    carpeta = carpeta or METRICAS_DIR
+    os.makedirs(carpeta, exist_ok=True)
+    ruta_estado = os.path.join(carpeta, ARCHIVO_ESTADO)
+    try:
+        with bloqueo_dataset(ruta_estado, espera_max=30):
+            estado = leer_estado(carpeta)
+            for (nombre, labels), valor in pendientes.items():
+                serie = estado.setdefault(nombre, {})
+                labels_json = json.dumps(labels, ensure_ascii=False)
+                if DEFINICIONES.get(nombre, ("gauge",))[0] == "counter":
+                    serie[labels_json] = serie.get(labels_json, 0) + valor
+                else:
+                    serie[labels_json] = valor
+            with escritura_atomica(ruta_estado) as ruta_tmp:
+                with open(ruta_tmp, "w", encoding="utf-8") as f:
+                    json.dump(estado, f, ensure_ascii=False)
+            with escritura_atomica(os.path.join(carpeta, ARCHIVO_PROM)) as ruta_tmp:
+                with open(ruta_tmp, "w", encoding="utf-8", newline="\n") as f:
+                    f.write(formato_prometheus(estado))
+    except Exception:
+        # Las métricas nunca deben tumbar un ETL; se reintenta en el próximo volcado
+        with _mutex:
+            for clave, valor in pendientes.items():
+                if DEFINICIONES.get(clave[0], ("gauge",))[0] == "counter":
+                    _pendientes[clave] = _pendientes.get(clave, 0) + valor
+                else:
+                    _pendientes.setdefault(clave, valor)
+
+# Lo registrado fuera de una etapa decorada (ej. un guardar_parquet suelto) se publica al salir
+atexit.register(volcar)
+
+# ========================================================
+# 3. ENDPOINT HTTP OPCIONAL
+# ========================================================
+class ManejadorMetricas(BaseHTTPRequestHandler):
+    carpeta = None
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        try:
+            with open(os.path.join(self.carpeta or METRICAS_DIR, ARCHIVO_PROM), "rb") as f:
+                cuerpo = f.read()
+        except OSError:
+            cuerpo = b""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, *args):
+        pass  # Sin ruido en consola por cada scrape
+
+def servir_metricas(puerto=None, carpeta=None, en_segundo_plano=False):
+    """Expone el .prom consolidado en http://localhost:<puerto>/metrics."""
+    ManejadorMetricas.carpeta = carpeta
+    servidor = ThreadingHTTPServer(("127.0.0.1", puerto or METRICAS_PUERTO), ManejadorMetricas)
+    if en_segundo_plano:
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        return servidor
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+    return servidor
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Métricas Prometheus del pipeline Fibex.")
+    parser.add_argument("--servir", action="store_true", help="Levanta el endpoint /metrics local.")
+    parser.add_argument("--puerto", type=int, help="Puerto del endpoint (por defecto METRICAS_PUERTO).")
+    args = parser.parse_args(argv)
+    if args.servir:
+        print(f"Sirviendo métricas en http://127.0.0.1:{args.puerto or METRICAS_PUERTO}/metrics (Ctrl+C para salir)")
+        servir_metricas(args.puerto)
+    else:
+        sys.stdout.write(formato_prometheus(leer_estado()))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
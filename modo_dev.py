@@ -0,0 +1,306 @@
+# Modo desarrollo: ETLs contra una muestra del lake.
+# Probar un cambio en trans_reclamos o trans_ordenes_servicio obligaba a procesar todo el histórico.
+# Este módulo arma un lake paralelo (DEV_RUTA_LAKE) con una muestra determinística y estratificada
+# del Bronze (por mes y franquicia), redirige PATHS hacia él ANTES de importar los ETLs (el registro
+# es perezoso y varios ETLs fijan sus rutas al importarse) y, al terminar, compara las métricas
+# clave de las salidas contra las del lake completo.
+#
+# Uso: python modo_dev.py preparar --fraccion 0.05
+#      python modo_dev.py ejecutar trans_reclamos
+#      python modo_dev.py comparar
+
+import os
+import sys
+import glob
+import json
+import time
+import shutil
+import argparse
+import datetime
+
+import polars as pl
+from rich.table import Table
+
+from config import (PATHS, RUTA_BASE, DEV_RUTA_LAKE, DEV_FRACCION, DEV_SEMILLA,
+                    DEV_MIN_POR_ESTRATO, DEV_ARCHIVOS_RAW, DEV_TOLERANCIA)
+from utils import console
+
+# Carpetas raw que algunos ETLs leen directo (sin Bronze). En el lake dev llevan solo los
+# archivos más recientes; el resto de carpetas raw quedan vacías para que la ingesta incremental
+# no reemplace la muestra del Bronze con días completos.
+RAW_DIRECTO = ("raw_idf", "raw_abonados_idf", "raw_estad_abonados", "raw_asesores_univ_14")
+MANIFIESTO = "_dev_manifiesto.json"
+CUBETAS = 1_000_000
+
+# ========================================================
+# 1. REDIRECCIÓN DE RUTAS
+# ========================================================
+PATHS_ORIGINALES = dict(PATHS)
+
+def ruta_equivalente(ruta, lake_destino, lake_origen=RUTA_BASE):
+    """Traduce una ruta del lake de origen a la misma ubicación relativa en otro lake."""
+    return os.path.join(lake_destino, os.path.relpath(ruta, lake_origen))
+
+def activar_lake_dev(lake=None):
+    """
+    Redirige PATHS (mutación en sitio: todos los módulos comparten el mismo dict) al lake dev.
+    Debe llamarse antes de importar main o cualquier ETL.
+    """
+    lake = lake or DEV_RUTA_LAKE
+    for clave, ruta in PATHS_ORIGINALES.items():
+        PATHS[clave] = ruta_equivalente(ruta, lake)
+    return lake
+
+# ========================================================
+# 2. MUESTREO ESTRATIFICADO DETERMINÍSTICO
+# ========================================================
+def columnas_estrato(schema):
+    """Primera columna de fecha (por tipo o por nombre 'Fecha...') y columna de franquicia, si existen."""
+    col_fecha = next((c for c, t in schema.items() if t in (pl.Date, pl.Datetime)), None)
+    if col_fecha is None:
+        col_fecha = next((c for c in schema if c.lower().startswith("fecha")), None)
+    col_franq = next((c for c in schema if "franquicia" in c.lower()), None)
+    return col_fecha, col_franq
+
+def expr_mes(col, tipo):
+    if tipo in (pl.Date, pl.Datetime):
+        return pl.col(col).dt.truncate("1mo").cast(pl.Utf8)
+    texto = pl.col(col).cast(pl.Utf8)
+    fecha = pl.coalesce([
+        texto.str.slice(0, 10).str.strptime(pl.Date, "%Y-%m-%d", strict=False),
+        texto.str.slice(0, 10).str.strptime(pl.Date, "%d/%m/%Y", strict=False),
+    ])
+    return fecha.dt.truncate("1mo").cast(pl.Utf8)
+
+def muestra_estratificada(lf, fraccion=None, semilla=None, min_por_estrato=None):
+    """
+    Conserva las filas cuyo hash (de la fila completa) cae bajo `fraccion`, más las
+    `min_por_estrato` filas de menor hash de cada estrato mes × franquicia, para que ningún
+    periodo ni franquicia desaparezca de la muestra. Misma semilla => misma muestra.
+    """
+    fraccion = DEV_FRACCION if fraccion is None else fraccion
+    semilla = DEV_SEMILLA if semilla is None else semilla
+    min_por_estrato = DEV_MIN_POR_ESTRATO if min_por_estrato is None else min_por_estrato
+
+    schema = lf.collect_schema()
+    col_fecha, col_franq = columnas_estrato(schema)
+    estrato = [
+        (expr_mes(col_fecha, schema[col_fecha]) if col_fecha else pl.lit("")).alias("_estrato_mes"),
+        (pl.col(col_franq).cast(pl.Utf8) if col_franq else pl.lit("")).alias("_estrato_franq"),
+    ]
+    h = pl.struct(pl.all()).hash(seed=semilla)
+    return (
+        lf.with_columns(h.alias("_h"))
+          .with_columns(estrato)
+          .filter(
+              ((pl.col("_h") % CUBETAS) < int(fraccion * CUBETAS))
+              | (pl.col("_h").rank("ordinal").over(["_estrato_mes", "_estrato_franq"]) <= min_por_estrato)
+          )
+          .drop(["_h", "_estrato_mes", "_estrato_franq"])
+    )
+
+def enlazar_o_copiar(origen, destino):
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    if os.path.exists(destino):
+        os.remove(destino)
+    try:
+        os.link(origen, destino)  # Mismo disco: sin costo de espacio
+    except OSError:
+        shutil.copy2(origen, destino)
+
+# ========================================================
+# 3. PREPARACIÓN DEL LAKE DEV
+# ========================================================
+def preparar_lake_dev(lake=None, fraccion=None, semilla=None, archivos_raw=None, forzar=False):
+    """
+    Construye el lake dev:
+      - Bronze: muestra estratificada de cada parquet.
+      - Silver/Gold: dimensiones y archivos auxiliares completos (los joins necesitan todas las
+        llaves); tablas de hechos muestreadas con la misma regla.
+      - Raw: solo las carpetas de RAW_DIRECTO, con sus `archivos_raw` archivos más recientes.
+    """
+    lake = lake or DEV_RUTA_LAKE
+    fraccion = DEV_FRACCION if fraccion is None else fraccion
+    semilla = DEV_SEMILLA if semilla is None else semilla
+    archivos_raw = DEV_ARCHIVOS_RAW if archivos_raw is None else archivos_raw
+
+    if os.path.exists(lake):
+        if not forzar:
+            console.print(f"[yellow]⚠️ El lake dev ya existe en {lake}. Use --forzar para regenerarlo.[/]")
+            return leer_manifiesto(lake)
+        shutil.rmtree(lake)
+
+    console.rule(f"[bold blue]🧪 PREPARANDO LAKE DEV (fracción {fraccion:.1%}, semilla {semilla})[/]")
+    manifiesto = {"fraccion": fraccion, "semilla": semilla, "creado": datetime.datetime.now().isoformat(timespec="seconds"),
+                  "tablas": {}, "raw": {}}
+
+    for capa in ("bronze", "silver", "gold"):
+        origen = PATHS_ORIGINALES[capa]
+        for archivo in sorted(glob.glob(os.path.join(origen, "*"))):
+            if os.path.isdir(archivo):
+                continue  # _particiones, _metadatos, staging
+            destino = ruta_equivalente(archivo, lake)
+            nombre = os.path.basename(archivo)
+            es_dimension = "dim" in nombre.lower() or "maestro" in nombre.lower()
+            if not nombre.endswith(".parquet") or (capa != "bronze" and es_dimension):
+                enlazar_o_copiar(archivo, destino)
+                continue
+            try:
+                filas_total = pl.scan_parquet(archivo).select(pl.len()).collect().item()
+                os.makedirs(os.path.dirname(destino), exist_ok=True)
+                muestra = muestra_estratificada(pl.scan_parquet(archivo), fraccion, semilla).collect()
+                muestra.write_parquet(destino)
+                manifiesto["tablas"][f"{capa}/{nombre}"] = {"filas_total": filas_total, "filas_muestra": muestra.height}
+                console.print(f"[dim]  {capa}/{nombre}: {muestra.height:,} de {filas_total:,} filas[/]")
+            except Exception as e:
+                console.print(f"[yellow]⚠️ {capa}/{nombre} no se pudo muestrear ({e}); se copia completo.[/]")
+                enlazar_o_copiar(archivo, destino)
+
+    for clave in RAW_DIRECTO:
+        origen = PATHS_ORIGINALES.get(clave)
+        if not origen or not os.path.isdir(origen):
+            continue
+        archivos = [f for f in glob.glob(os.path.join(origen, "*.xlsx")) if not os.path.basename(f).startswith("~$")]
+        recientes = sorted(archivos, key=os.path.getmtime)[-archivos_raw:] if archivos_raw else []
+        for archivo in recientes:
+            enlazar_o_copiar(archivo, ruta_equivalente(archivo, lake))
+        manifiesto["raw"][clave] = {"archivos_total": len(archivos), "archivos_muestra": len(recientes)}
+
+    total = sum(t["filas_total"] for t in manifiesto["tablas"].values() if t["filas_total"])
+    muestra = sum(t["filas_muestra"] for t in manifiesto["tablas"].values())
+    manifiesto["fraccion_efectiva"] = (muestra / total) if total else fraccion
+
+    # Todas las carpetas de PATHS deben existir (los ETLs hacen glob sobre ellas)
+    for ruta in PATHS_ORIGINALES.values():
+        os.makedirs(ruta_equivalente(ruta, lake), exist_ok=True)
+    with open(os.path.join(lake, MANIFIESTO), "w", encoding="utf-8") as f:
+        json.dump(manifiesto, f, ensure_ascii=False, indent=2)
+
+    console.print(f"[bold green]✅ Lake dev listo en {lake} (fracción efectiva {manifiesto['fraccion_efectiva']:.2%}).[/]")
+    return manifiesto
+
+def leer_manifiesto(lake=None):
+    ruta = os.path.join(lake or DEV_RUTA_LAKE, MANIFIESTO)
+    if not os.path.exists(ruta):
+        return None
+    with open(ruta, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+# ========================================================
+# 4. COMPARACIÓN CONTRA EL LAKE COMPLETO
+# ========================================================
+def metricas_tabla(ruta):
+    """Filas, medias de columnas numéricas y cobertura de franquicias de un parquet."""
+    lf = pl.scan_parquet(ruta)
+    schema = lf.collect_schema()
+    numericas = [c for c, t in schema.items() if t.is_numeric() and not c.endswith("_SK")]
+    _, col_franq = columnas_estrato(schema)
+    exprs = [pl.len().alias("filas")] + [pl.col(c).cast(pl.Float64).mean().alias(f"media:{c}") for c in numericas]
+    if col_franq:
+        exprs.append(pl.col(col_franq).n_unique().alias(f"distintos:{col_franq}"))
+    return lf.select(exprs).collect().row(0, named=True)
+
+def comparar_metricas(lake=None, desde=None, tolerancia=None):
+    """
+    Compara cada parquet Silver/Gold del lake dev (opcionalmente solo los escritos después de
+    `desde`) contra su par en el lake completo. Las medias y la cobertura de franquicias no
+    dependen del tamaño de la muestra y se validan contra la tolerancia; el conteo de filas se
+    reporta escalado por la fracción efectiva solo como referencia.
+    Retorna la lista de desvíos (tabla, métrica, valor dev, valor completo).
+    """
+    lake = lake or DEV_RUTA_LAKE
+    tolerancia = DEV_TOLERANCIA if tolerancia is None else tolerancia
+    manifiesto = leer_manifiesto(lake) or {}
+    fraccion = manifiesto.get("fraccion_efectiva") or DEV_FRACCION
+
+    tabla = Table(title="🧪 Métricas Dev vs Lake Completo", show_lines=False)
+    for col in ("Tabla", "Métrica", "Dev", "Completo", "Desvío"):
+        tabla.add_column(col)
+    desvios = []
+
+    for capa in ("silver", "gold"):
+        for ruta_dev in sorted(glob.glob(os.path.join(ruta_equivalente(PATHS_ORIGINALES[capa], lake), "*.parquet"))):
+            if desde and os.path.getmtime(ruta_dev) < desde:
+                continue
+            nombre = os.path.basename(ruta_dev)
+            ruta_full = os.path.join(PATHS_ORIGINALES[capa], nombre)
+            if not os.path.exists(ruta_full):
+                continue
+            try:
+                m_dev, m_full = metricas_tabla(ruta_dev), metricas_tabla(ruta_full)
+            except Exception as e:
+                console.print(f"[yellow]⚠️ No se pudo comparar {capa}/{nombre}: {e}[/]")
+                continue
+
+            es_dimension = "dim" in nombre.lower() or "maestro" in nombre.lower()
+            estimado = m_dev["filas"] if es_dimension or not fraccion else m_dev["filas"] / fraccion
+            tabla.add_row(f"{capa}/{nombre}", "filas (escaladas)", f"{estimado:,.0f}", f"{m_full['filas']:,}", "[dim]ref[/]")
+            for metrica, valor_full in m_full.items():
+                if metrica == "filas" or metrica not in m_dev or valor_full is None or m_dev[metrica] is None:
+                    continue
+                valor_dev = m_dev[metrica]
+                desvio = abs(valor_dev - valor_full) / abs(valor_full) if valor_full else abs(valor_dev)
+                fuera = desvio > tolerancia
+                if fuera:
+                    desvios.append((f"{capa}/{nombre}", metrica, valor_dev, valor_full))
+                estilo = "red" if fuera else "green"
+                tabla.add_row("", metrica, f"{valor_dev:,.3f}", f"{valor_full:,.3f}", f"[{estilo}]{desvio:.1%}[/]")
+
+    console.print(tabla)
+    if desvios:
+        console.print(f"[bold red]❌ {len(desvios)} métricas fuera de tolerancia ({tolerancia:.0%}).[/]")
+    else:
+        console.print("[bold green]✅ Métricas dentro de tolerancia.[/]")
+    return desvios
+
+# ========================================================
+# 5. EJECUCIÓN
+# ========================================================
+def ejecutar_dev(objetivos, lake=None, comparar=True):
+    """Corre objetivos de main.py contra el lake dev. Retorna (fallos, desvios)."""
+    lake = activar_lake_dev(lake)
+    if leer_manifiesto(lake) is None:
+        console.print(f"[bold red]❌ No hay lake dev en {lake}. Ejecute primero: python modo_dev.py preparar[/]")
+        return list(objetivos), []
+
+    console.rule(f"[bold magenta]🧪 MODO DEV: {', '.join(objetivos)}[/]")
+    inicio = time.time()
+    import main as orquestador_transformacion  # Importado DESPUÉS de redirigir PATHS
+    fallos = orquestador_transformacion.ejecutar_objetivos(list(objetivos))
+    desvios = comparar_metricas(lake, desde=inicio) if comparar and not fallos else []
+    return fallos, desvios
+
+def parsear_argumentos(argv=None):
+    parser = argparse.ArgumentParser(description="Modo desarrollo: ETLs sobre una muestra del lake.")
+    parser.add_argument("--lake", help="Ruta del lake dev (por defecto DEV_RUTA_LAKE).")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p_prep = sub.add_parser("preparar", help="Construye el lake dev muestreado.")
+    p_prep.add_argument("--fraccion", type=float, help="Fracción de filas a conservar (0-1).")
+    p_prep.add_argument("--semilla", type=int, help="Semilla del hash de muestreo.")
+    p_prep.add_argument("--archivos-raw", type=int, help="Archivos raw recientes por carpeta de lectura directa.")
+    p_prep.add_argument("--forzar", action="store_true", help="Regenera el lake dev si ya existe.")
+
+    p_ejec = sub.add_parser("ejecutar", help="Corre ETLs/pipelines de main.py sobre el lake dev.")
+    p_ejec.add_argument("objetivos", nargs="+", help="Nombres de módulo o pipeline (ej. trans_reclamos).")
+    p_ejec.add_argument("--sin-comparar", action="store_true", help="No compara métricas contra el lake completo.")
+
+    p_comp = sub.add_parser("comparar", help="Compara todas las salidas del lake dev contra el completo.")
+    p_comp.add_argument("--tolerancia", type=float, help="Desvío relativo máximo aceptado.")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parsear_argumentos(argv)
+    if args.comando == "preparar":
+        preparar_lake_dev(args.lake, args.fraccion, args.semilla, args.archivos_raw, args.forzar)
+        return 0
+    if args.comando == "comparar":
+        return 1 if comparar_metricas(args.lake, tolerancia=args.tolerancia) else 0
+
+    fallos, desvios = ejecutar_dev(args.objetivos, args.lake, comparar=not args.sin_comparar)
+    if fallos:
+        console.print(f"[bold red]❌ Fallaron: {', '.join(fallos)}[/]")
+    return 1 if (fallos or desvios) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,194 @@
+# Orquestador combinado Extracción -> Transformación.
+# En lugar de esperar a que terminen TODOS los robots para luego correr los ETLs, cada vez que un
+# scraper finaliza se encolan los ETLs que dependen de él. Los ETLs corren en un proceso aparte
+# (CPU: pandas/polars/duckdb) mientras el proceso principal sigue navegando el SAE (I/O: Playwright),
+# de modo que la descarga del siguiente reporte se solapa con la transformación del anterior.
+
+import os
+import sys
+import time
+import argparse
+import datetime
+from datetime import timedelta
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+# --- EL TRUCO DEL ASCENSOR PARA LOS SCRAPERS ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+ruta_extraccion = os.path.join(current_dir, "extraccion")
+if ruta_extraccion not in sys.path:
+    sys.path.append(ruta_extraccion)
+
+from utils import console, tiempo, logger_extraccion
+
+# ========================================================
+# 1. DEPENDENCIAS ETL -> SCRAPERS
+# ========================================================
+# Cada objetivo de transformación (nombre de módulo o pipeline de main.py) declara los robots
+# cuyos archivos consume. El orden del diccionario es el orden de encolado cuando varios ETLs
+# se liberan con el mismo evento (dimensiones primero, afluencia al final).
+ETL_REQUISITOS = {
+    "trans_empleados":           ["descargar_empleados"],
+    "trans_dimclientes":         ["descargar_abonados"],
+    "trans_recaudacion":         ["descargar_recaudacion_y_horas"],
+    "trans_ventas":              ["descargar_ventas"],
+    "trans_ventase":             ["descargar_ventas_estatus"],
+    "trans_reclamos":            ["descargar_reclamos"],
+    "trans_atc":                 ["descargar_atc"],
+    "trans_ont_off":             ["descargar_ont_off", "descargar_atc"],
+    "trans_cobranza":            ["descargar_cobranza"],
+    "trans_actualizacion_datos": ["descargar_act_datos"],
+    "trans_comeback":            ["descargar_comebackhome"],
+    "PipelineIndicadores":       ["descargar_abonados", "descargar_ordenes_servicio"],
+    "trans_estadistica_abonado": ["descargar_estadisticas_abonados"],
+    "PipelineAfluencia":         ["descargar_ventas_estatus", "descargar_atc",
+                                  "descargar_recaudacion_y_horas", "descargar_empleados"],
+}
+
+# ETLs que leen el Gold de otros ETLs. Si el productor participa en la corrida, el consumidor
+# no se encola hasta que el productor terminó (aunque haya fallado: se usa el Gold previo),
+# así con --workers-etl > 1 nunca leen un Gold que se está reescribiendo.
+ETL_DEPENDENCIAS = {
+    "trans_ont_off":     ["trans_atc"],
+    "PipelineAfluencia": ["trans_ventase", "trans_atc", "trans_recaudacion", "trans_empleados"],
+}
+
+def cargar_orquestador_extraccion():
+    """Importa extraccion/main.py (y con él Playwright) solo en el proceso que navega."""
+    import importlib
+    return importlib.import_module("extraccion.main")
+
+def transformar(objetivo):
+    """Punto de entrada del proceso de transformación. Retorna la lista de fallos."""
+    import main as orquestador_transformacion
+    return orquestador_transformacion.ejecutar_objetivos([objetivo])
+
+# ========================================================
+# 2. PIPELINE SOLAPADO
+# ========================================================
+def ejecutar_pipeline(opciones, f_ini, f_fin, workers_etl=1):
+    """
+    Corre los robots de las opciones indicadas (claves del menú de extracción) y, a medida
+    que cada uno termina, encola los ETLs cuyas dependencias ya se cumplieron.
+    Un ETL está listo cuando terminaron todos sus robots presentes en esta corrida y al menos
+    uno fue exitoso; se encola cuando además terminaron los ETLs de ETL_DEPENDENCIAS que
+    participan en la corrida. Con workers_etl=1 los ETLs se ejecutan en serie y en orden de encolado.
+    Retorna (fallos_extraccion, fallos_transformacion).
+    """
+    orq_ext = cargar_orquestador_extraccion()
+
+    rutinas = []
+    for opcion in opciones:
+        clave, seleccion = orq_ext.resolver_opcion(opcion)
+        if not seleccion:
+            console.print(f"[bold red]❌ Opción desconocida: {opcion}[/]")
+            continue
+        target = seleccion['target']
+        rutinas.extend(target if isinstance(target, list) else [target])
+
+    participantes = {r.__name__ for r in rutinas}
+    pendientes = {
+        etl: [s for s in reqs if s in participantes]
+        for etl, reqs in ETL_REQUISITOS.items()
+        if any(s in participantes for s in reqs)
+    }
+    dependencias = {
+        etl: [d for d in ETL_DEPENDENCIAS.get(etl, []) if d in pendientes]
+        for etl in pendientes
+    }
+
+    terminados, exitosos = set(), set()
+    fallos_extraccion, fallos_transformacion = [], []
+    listos, futuros, etls_terminados = [], {}, set()
+
+    def recoger(futuro):
+        etl = futuros.pop(futuro)
+        try:
+            fallos_transformacion.extend(futuro.result())
+        except Exception as e:
+            console.print(f"[bold red]💥 Fallo en el proceso de transformación de {etl}: {e}[/]")
+            fallos_transformacion.append(etl)
+        etls_terminados.add(etl)
+
+    def despachar(pool):
+        # Recoge los ETLs ya terminados y encola los listos cuyos productores terminaron
+        for futuro in [f for f in futuros if f.done()]:
+            recoger(futuro)
+        for etl in list(listos):
+            if all(d in etls_terminados for d in dependencias[etl]):
+                listos.remove(etl)
+                console.print(f"[bold magenta]📤 Encolando transformación: {etl}[/]")
+                futuros[pool.submit(transformar, etl)] = etl
+
+    with ProcessPoolExecutor(max_workers=workers_etl) as pool:
+        for rutina in rutinas:
+            nombre = rutina.__name__
+            console.rule(f"[bold blue]⬇️ Descargando: {nombre} ({f_ini} al {f_fin})[/]")
+            fallos = orq_ext.ejecutar_wrapper(rutina, f_ini, f_fin)
+            fallos_extraccion.extend(fallos)
+            terminados.add(nombre)
+            if not fallos:
+                exitosos.add(nombre)
+
+            for etl, reqs in list(pendientes.items()):
+                if not all(s in terminados for s in reqs):
+                    continue
+                del pendientes[etl]
+                if any(s in exitosos for s in reqs):
+                    logger_extraccion.info(f"PIPELINE | {nombre} completado -> listo {etl}")
+                    listos.append(etl)
+                else:
+                    console.print(f"[yellow]⚠️ Se omite {etl}: fallaron todas sus descargas.[/]")
+                    fallos_transformacion.append(etl)
+                    etls_terminados.add(etl)
+            despachar(pool)
+
+        console.rule("[bold cyan]⏳ Extracción finalizada. Esperando transformaciones en curso...[/]")
+        despachar(pool)
+        while futuros:
+            wait(list(futuros), return_when=FIRST_COMPLETED)
+            despachar(pool)
+
+    return fallos_extraccion, fallos_transformacion
+
+# ========================================================
+# 3. CLI
+# ========================================================
+def parsear_argumentos(argv=None):
+    parser = argparse.ArgumentParser(description="Pipeline combinado Extracción + Transformación Fibex.")
+    parser.add_argument("--auto", action="store_true", help="Compatibilidad con los .bat (ya es desatendido).")
+    parser.add_argument("-o", "--opcion", action="append", default=[],
+                        help="Clave del menú de extracción o nombre del robot. Por defecto la opción 1.")
+    parser.add_argument("--desde", help="Fecha inicial DD/MM/YYYY (por defecto hace 7 días).")
+    parser.add_argument("--hasta", help="Fecha final DD/MM/YYYY (por defecto hoy).")
+    parser.add_argument("--workers-etl", type=int, default=1,
+                        help="Procesos de transformación simultáneos (1 = en serie).")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parsear_argumentos(argv)
+
+    hoy = datetime.datetime.today()
+    f_ini = args.desde or (hoy - timedelta(days=7)).strftime("%d/%m/%Y")
+    f_fin = args.hasta or hoy.strftime("%d/%m/%Y")
+    for valor in (f_ini, f_fin):
+        try:
+            datetime.datetime.strptime(valor, "%d/%m/%Y")
+        except ValueError:
+            console.print(f"[bold red]❌ Fecha inválida '{valor}', use DD/MM/YYYY.[/]")
+            return 2
+
+    console.rule("[bold blue]🚀 PIPELINE MASTER: EXTRACCIÓN + TRANSFORMACIÓN SOLAPADAS[/]")
+    inicio = time.time()
+
+    fallos_ext, fallos_trans = ejecutar_pipeline(args.opcion or ["1"], f_ini, f_fin, workers_etl=args.workers_etl)
+
+    console.rule("[bold green]✅ FIN DEL PIPELINE COMBINADO[/]")
+    tiempo(inicio)
+    if fallos_ext:
+        console.print(f"[bold red]❌ Robots con fallo: {', '.join(fallos_ext)}[/]")
+    if fallos_trans:
+        console.print(f"[bold red]❌ Transformaciones con fallo: {', '.join(fallos_trans)}[/]")
+    return 1 if (fallos_ext or fallos_trans) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,635 @@
+# Sketches fusionables para métricas de la capa Gold.
+# Un sketch resume la distribución de una métrica en pocos KB y se puede fusionar con otros sin
+# volver a las filas originales: los ETL guardan un sketch por grupo fino (ej. quincena × franquicia ×
+# clasificación) y cualquier nivel superior se responde fusionando sketches.
+#
+# - TDigest: cuantiles aproximados (p50/p90/p95 de minutos de SLA) con más precisión en las colas.
+# - BitmapRoaring: conjunto exacto y comprimido de IDs enteros (abonados activos por snapshot y
+#   franquicia); la fusión es la unión y además responde altas, bajas y retenidos entre snapshots.
+# - HyperLogLog: conteo distinto aproximado en 4 KB por grupo, para sumar abonados distintos entre
+#   quincenas, franquicias o estatus sin volver al detalle.
+#
+# Uso rápido:
+#   python sketches.py --por Franquicia          -> percentiles de SLA por franquicia (todas las quincenas)
+#   python sketches.py --delta "ENE 2025 Q2" "FEB 2025 Q1"   -> nuevos/perdidos/retenidos entre snapshots
+#   python sketches.py --distintos Franquicia    -> abonados distintos por franquicia (todo el histórico)
+
+import os
+import sys
+import math
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from config import PATHS, TDIGEST_COMPRESION, CUANTILES_SLA, HLL_PRECISION
+
+ARCHIVO_SKETCHES_SLA = "SLA_Sketches_Gold.parquet"
+COLUMNAS_SKETCH = ["Metrica", "N", "Minimo", "Maximo", "Sketch"]
+ARCHIVO_BITMAPS_ABONADOS = "Stock_Abonados_Bitmaps_Gold.parquet"
+ARCHIVO_DELTA_ABONADOS = "Stock_Abonados_Delta_Gold.parquet"
+COLUMNAS_BITMAP = ["N", "Descartados", "Bitmap"]
+ARCHIVO_HLL_ABONADOS = "Stock_Abonados_HLL_Gold.parquet"
+COLUMNAS_HLL = ["N", "Sketch"]
+COLUMNAS_DELTA_ABONADOS = ["Quincena Evaluada", "Quincena Anterior", "Franquicia", "Abonados_Inicio",
+                           "Nuevos", "Perdidos", "Retenidos", "Abonados_Fin"]
+
+# ========================================================
+# 1. T-DIGEST
+# ========================================================
+class TDigest:
+    """
+    t-digest con función de escala k1 (Dunning): los centroides son pequeños cerca de los extremos y
+    grandes en el centro, así p90/p95 son más precisos que p50. Construcción y fusión son la misma
+    operación vectorizada (ordenar centroides y agruparlos por unidad de k), por lo que el resultado
+    es determinístico: los mismos valores producen los mismos bytes.
+
+    Mientras un grupo no necesita comprimirse (pocos valores) cada valor es su propio centroide y
+    cuantil() coincide con PERCENTILE.INC de Excel/DAX.
+    """
+
+    def __init__(self, medias=(), pesos=(), minimo=np.nan, maximo=np.nan, compresion=None):
+        self.compresion = float(compresion or TDIGEST_COMPRESION)
+        self.medias = np.asarray(medias, dtype=np.float64)
+        self.pesos = np.asarray(pesos, dtype=np.float64)
+        self.minimo = float(minimo)
+        self.maximo = float(maximo)
+
+    @property
+    def n(self):
+        return int(round(self.pesos.sum()))
+
+    def __len__(self):
+        return self.n
+
+    def __repr__(self):
+        return f"TDigest(n={self.n:,}, centroides={len(self.medias)}, compresion={self.compresion:g})"
+
+    @classmethod
+    def desde_valores(cls, valores, compresion=None):
+        """Sketch de un arreglo de valores (se ignoran NaN)."""
+        valores = np.asarray(valores, dtype=np.float64)
+        valores = np.sort(valores[~np.isnan(valores)], kind="stable")
+        if not len(valores):
+            return cls(compresion=compresion)
+        digest = cls(valores, np.ones(len(valores)), valores[0], valores[-1], compresion)
+        return digest._comprimir()
+
+    @classmethod
+    def fusionar(cls, digests, compresion=None):
+        """Un sketch equivalente al de la unión de los valores de todos los 'digests'."""
+        digests = [d for d in digests if d.n]
+        if not digests:
+            return cls(compresion=compresion)
+        medias = np.concatenate([d.medias for d in digests])
+        pesos = np.concatenate([d.pesos for d in digests])
+        orden = np.argsort(medias, kind="stable")
+        digest = cls(medias[orden], pesos[orden], min(d.minimo for d in digests), max(d.maximo for d in digests),
+                     compresion or digests[0].compresion)
+        return digest._comprimir()
+
+    def _comprimir(self):
+        # Cada centroide va a la unidad de k1 en que cae su centro; los contiguos en la misma unidad se unen.
+        total = self.pesos.sum()
+        centro = (np.cumsum(self.pesos) - self.pesos / 2) / total
+        k = self.compresion / (2 * math.pi) * np.arcsin(np.clip(2 * centro - 1, -1, 1))
+        unidad = np.floor(k)
+        inicios = np.flatnonzero(np.r_[True, unidad[1:] != unidad[:-1]])
+        pesos = np.add.reduceat(self.pesos, inicios)
+        self.medias = np.add.reduceat(self.medias * self.pesos, inicios) / pesos
+        self.pesos = pesos
+        return self
+
+    def cuantil(self, q):
+        """Cuantil(es) aproximado(s) para q en [0, 1] (escalar o arreglo). NaN si el sketch está vacío."""
+        q = np.asarray(q, dtype=np.float64)
+        if not self.n:
+            return np.full(q.shape, np.nan) if q.ndim else np.nan
+        # Posición (base 0) del centro de cada centroide, como el rango de PERCENTILE.INC
+        antes = np.cumsum(self.pesos) - self.pesos
+        x = np.r_[0.0, antes + (self.pesos - 1) / 2, self.pesos.sum() - 1]
+        y = np.r_[self.minimo, self.medias, self.maximo]
+        resultado = np.interp(q * (self.pesos.sum() - 1), x, y)
+        return resultado if q.ndim else float(resultado)
+
+    def a_bytes(self):
+        """Serialización compacta (float64): [compresión, mínimo, máximo, medias..., pesos...]."""
+        return np.concatenate([[self.compresion, self.minimo, self.maximo], self.medias, self.pesos]).tobytes()
+
+    @classmethod
+    def desde_bytes(cls, datos):
+        arr = np.frombuffer(datos, dtype=np.float64)
+        k = (len(arr) - 3) // 2
+        return cls(arr[3:3 + k].copy(), arr[3 + k:].copy(), arr[1], arr[2], arr[0])
+
+# ========================================================
+# 2. TABLAS DE SKETCHES (UNA FILA POR GRUPO Y MÉTRICA)
+# ========================================================
+def sketches_por_grupo(df, llaves, metricas, compresion=None):
+    """
+    Un t-digest por grupo de 'llaves' y columna de 'metricas'. Retorna un DataFrame en formato largo:
+    llaves + Metrica, N, Minimo, Maximo, Sketch (bytes). Las llaves nulas forman su propio grupo.
+    """
+    filas = []
+    for clave, grupo in df.groupby(list(llaves), dropna=False, sort=True):
+        clave = clave if isinstance(clave, tuple) else (clave,)
+        for metrica in metricas:
+            digest = TDigest.desde_valores(grupo[metrica].to_numpy(dtype=np.float64, na_value=np.nan), compresion)
+            if digest.n:
+                filas.append((*clave, metrica, digest.n, digest.minimo, digest.maximo, digest.a_bytes()))
+    resultado = pd.DataFrame(filas, columns=[*llaves, *COLUMNAS_SKETCH])
+    for c in llaves:  # Las llaves conservan su tipo original
+        if len(resultado) and resultado[c].dtype != df[c].dtype:
+            resultado[c] = resultado[c].astype(df[c].dtype)
+    return resultado.astype({"N": "int64"})
+
+def fusionar_sketches(df_sketches, por=()):
+    """Fusiona los sketches al nivel 'por' (subconjunto de las llaves). Misma estructura de salida."""
+    por = [*por, "Metrica"]
+    filas = []
+    for clave, grupo in df_sketches.groupby(por, dropna=False, sort=True):
+        digest = TDigest.fusionar([TDigest.desde_bytes(s) for s in grupo["Sketch"]])
+        filas.append((*clave, digest.n, digest.minimo, digest.maximo, digest.a_bytes()))
+    return pd.DataFrame(filas, columns=[*por, *COLUMNAS_SKETCH[1:]])
+
+def nombre_percentil(q):
+    return f"P{q * 100:g}"
+
+def tabla_percentiles(df_sketches, por=(), cuantiles=None):
+    """Percentiles decodificados al nivel 'por': llaves + Metrica, N y una columna P<q> por cuantil."""
+    cuantiles = list(cuantiles or CUANTILES_SLA)
+    fusion = fusionar_sketches(df_sketches, por)
+    valores = np.array([TDigest.desde_bytes(s).cuantil(cuantiles) for s in fusion["Sketch"]]).reshape(len(fusion), len(cuantiles))
+    tabla = fusion.drop(columns=["Sketch"])
+    for i, q in enumerate(cuantiles):
+        tabla[nombre_percentil(q)] = valores[:, i]
+    return tabla
+
+# ========================================================
+# 3. API DE CONSULTA (SLA DE TICKETS)
+# ========================================================
+def _leer_gold(archivo, ruta=None, filtros=None):
+    """Tabla de sketches del Gold con 'filtros' = {columna: valor o lista de valores} ya aplicados."""
+    df = pd.read_parquet(ruta or os.path.join(PATHS.get("gold"), archivo))
+    for columna, valor in (filtros or {}).items():
+        valores = valor if isinstance(valor, (list, tuple, set)) else [valor]
+        df = df[df[columna].isin(valores)]
+    return df
+
+def cargar_sketches_sla(ruta=None, filtros=None):
+    """
+    Lee SLA_Sketches_Gold.parquet. 'filtros' = {columna: valor o lista de valores}, aplicados antes
+    de fusionar (ej. {"Franquicia": "FIBEX CARACAS", "Metrica": "SLA Resolucion Min"}).
+    """
+    return _leer_gold(ARCHIVO_SKETCHES_SLA, ruta, filtros)
+
+def percentiles_sla(por=("Quincena Evaluada",), cuantiles=None, filtros=None, ruta=None):
+    """
+    Percentiles de SLA a cualquier nivel de agregación, respondidos desde los sketches:
+        percentiles_sla(por=["Franquicia"], filtros={"Metrica": "SLA Resolucion Min"})
+        percentiles_sla(por=[], cuantiles=[0.5, 0.99])   # histórico completo
+    """
+    return tabla_percentiles(cargar_sketches_sla(ruta, filtros), por, cuantiles)
+
+# ========================================================
+# 4. BITMAP ROARING (CONJUNTOS EXACTOS DE IDs)
+# ========================================================
+UMBRAL_ARREGLO = 4096       # Un bloque con más valores se guarda como mapa de bits
+COOKIE_ROARING = 12346      # Formato portable de Roaring sin run containers
+
+def _bloque_a_mapa(bloque):
+    if bloque.dtype == np.uint64:
+        return bloque
+    bits = np.zeros(1 << 16, dtype=bool)
+    bits[bloque] = True
+    return np.packbits(bits, bitorder="little").view(np.uint64)
+
+def _bloque_a_valores(bloque):
+    if bloque.dtype == np.uint16:
+        return bloque
+    return np.flatnonzero(np.unpackbits(bloque.view(np.uint8), bitorder="little")).astype(np.uint16)
+
+def _cardinal_bloque(bloque):
+    return int(np.bitwise_count(bloque).sum()) if bloque.dtype == np.uint64 else len(bloque)
+
+def _normalizar_bloque(bloque):
+    """Representación más chica del bloque (arreglo o mapa); None si quedó vacío."""
+    n = _cardinal_bloque(bloque)
+    if not n:
+        return None
+    if bloque.dtype == np.uint64:
+        return _bloque_a_valores(bloque) if n <= UMBRAL_ARREGLO else bloque
+    return _bloque_a_mapa(bloque) if n > UMBRAL_ARREGLO else bloque
+
+def _bloques_de_ids(ids):
+    """{clave: bloque} de un arreglo uint32 ordenado y sin repetidos."""
+    if not len(ids):
+        return {}
+    altos = (ids >> 16).astype(np.uint16)
+    inicios = np.flatnonzero(np.r_[True, altos[1:] != altos[:-1]])
+    bajos = (ids & 0xFFFF).astype(np.uint16)
+    return dict(zip(altos[inicios].tolist(), (_normalizar_bloque(b) for b in np.split(bajos, inicios[1:]))))
+
+def _ids_de_bloques(claves, bloques):
+    """IDs uint32 (ordenados) de los bloques de 'claves' (ordenadas), con bloques = {clave: bloque}."""
+    if not claves:
+        return np.empty(0, dtype=np.uint32)
+    valores = [_bloque_a_valores(bloques[k]) for k in claves]
+    altos = np.repeat(np.asarray(claves, dtype=np.uint32), [len(v) for v in valores])
+    return (altos << np.uint32(16)) | np.concatenate(valores).astype(np.uint32)
+
+class BitmapRoaring:
+    """
+    Conjunto de enteros de 32 bits con el esquema Roaring: cada ID se parte en sus 16 bits altos (la
+    clave del bloque) y sus 16 bits bajos, que el bloque guarda como arreglo ordenado de uint16 (hasta
+    4.096 valores) o como mapa de 65.536 bits (8 KB). Unión, intersección y diferencia trabajan bloque a
+    bloque con numpy, así que comparar snapshots de millones de abonados toma milisegundos.
+
+    a_bytes() usa el formato portable de Roaring (sin run containers), el mismo que leen
+    pyroaring/CRoaring/Java, por lo que los bitmaps del Gold se pueden abrir fuera de este módulo.
+    """
+
+    def __init__(self, claves=(), bloques=()):
+        self.claves = np.asarray(claves, dtype=np.uint16)
+        self.bloques = list(bloques)
+
+    @classmethod
+    def desde_ids(cls, ids):
+        """Bitmap de un arreglo de enteros en [0, 2^32) (los repetidos cuentan una vez)."""
+        bloques = _bloques_de_ids(np.unique(np.asarray(ids, dtype=np.uint32)))
+        return cls(list(bloques), list(bloques.values()))
+
+    def a_ids(self):
+        """IDs del conjunto como arreglo ordenado de uint32."""
+        return _ids_de_bloques(self.claves.tolist(), dict(zip(self.claves.tolist(), self.bloques)))
+
+    def __len__(self):
+        return sum(_cardinal_bloque(b) for b in self.bloques)
+
+    def __repr__(self):
+        mapas = sum(b.dtype == np.uint64 for b in self.bloques)
+        return f"BitmapRoaring(n={len(self):,}, bloques={len(self.bloques)}, mapas={mapas})"
+
+    def __eq__(self, otro):
+        return isinstance(otro, BitmapRoaring) and np.array_equal(self.a_ids(), otro.a_ids())
+
+    def __contains__(self, valor):
+        i = np.searchsorted(self.claves, valor >> 16)
+        if i == len(self.claves) or self.claves[i] != valor >> 16:
+            return False
+        bloque, bajo = self.bloques[i], valor & 0xFFFF
+        if bloque.dtype == np.uint64:
+            return bool((int(bloque[bajo >> 6]) >> (bajo & 63)) & 1)
+        j = np.searchsorted(bloque, bajo)
+        return j < len(bloque) and bloque[j] == bajo
+
+    def _operar(self, otro, operacion):
+        propios = dict(zip(self.claves.tolist(), self.bloques))
+        ajenos = dict(zip(otro.claves.tolist(), otro.bloques))
+        comunes = propios.keys() & ajenos.keys()
+        resultado = {}
+        if operacion != "interseccion":  # Unión y diferencia conservan los bloques solo propios
+            resultado.update((k, b) for k, b in propios.items() if k not in comunes)
+        if operacion == "union":
+            resultado.update((k, b) for k, b in ajenos.items() if k not in comunes)
+        # Los pares arreglo-arreglo (bloques dispersos, pueden ser miles) se resuelven en una sola
+        # operación de numpy sobre sus IDs completos; los que involucran un mapa, con operaciones de bits.
+        arreglos = sorted(k for k in comunes if propios[k].dtype == np.uint16 and ajenos[k].dtype == np.uint16)
+        if arreglos:
+            a, b = _ids_de_bloques(arreglos, propios), _ids_de_bloques(arreglos, ajenos)
+            if operacion == "union":
+                ids = np.union1d(a, b)
+            elif operacion == "interseccion":
+                ids = np.intersect1d(a, b, assume_unique=True)
+            else:
+                ids = np.setdiff1d(a, b, assume_unique=True)
+            resultado.update(_bloques_de_ids(ids.astype(np.uint32)))
+        for k in comunes.difference(arreglos):
+            a, b = _bloque_a_mapa(propios[k]), _bloque_a_mapa(ajenos[k])
+            bloque = _normalizar_bloque(a | b if operacion == "union" else a & b if operacion == "interseccion" else a & ~b)
+            if bloque is not None:
+                resultado[k] = bloque
+        claves = sorted(resultado)
+        return BitmapRoaring(claves, [resultado[k] for k in claves])
+
+    def __or__(self, otro):
+        return self._operar(otro, "union")
+
+    def __and__(self, otro):
+        return self._operar(otro, "interseccion")
+
+    def __sub__(self, otro):
+        return self._operar(otro, "diferencia")
+
+    @classmethod
+    def union_de(cls, bitmaps):
+        resultado = cls()
+        for bitmap in bitmaps:
+            resultado = resultado | bitmap
+        return resultado
+
+    @classmethod
+    def interseccion_de(cls, bitmaps):
+        """IDs presentes en todos los 'bitmaps' (vacío si no hay ninguno)."""
+        bitmaps = list(bitmaps)
+        if not bitmaps:
+            return cls()
+        resultado = bitmaps[0]
+        for bitmap in bitmaps[1:]:
+            resultado = resultado & bitmap
+        return resultado
+
+    def a_bytes(self):
+        """Cookie, n° de bloques, (clave, cardinal - 1) por bloque, offsets y los bloques (little endian)."""
+        n = len(self.bloques)
+        cardinales = np.array([_cardinal_bloque(b) for b in self.bloques], dtype=np.int64)
+        tamanios = np.array([8192 if b.dtype == np.uint64 else 2 * len(b) for b in self.bloques], dtype=np.int64)
+        inicio = 8 + 4 * n + 4 * n
+        offsets = inicio + np.concatenate([[0], np.cumsum(tamanios)[:-1]]) if n else np.empty(0, dtype=np.int64)
+        encabezado = np.empty(2 * n, dtype="<u2")
+        encabezado[0::2], encabezado[1::2] = self.claves, cardinales - 1
+        partes = [np.array([COOKIE_ROARING, n], dtype="<u4").tobytes(), encabezado.tobytes(), offsets.astype("<u4").tobytes()]
+        partes += [b.astype("<u8" if b.dtype == np.uint64 else "<u2").tobytes() for b in self.bloques]
+        return b"".join(partes)
+
+    @classmethod
+    def desde_bytes(cls, datos):
+        cookie, n = np.frombuffer(datos, dtype="<u4", count=2)
+        if cookie != COOKIE_ROARING:
+            raise ValueError(f"Bitmap Roaring no soportado (cookie {cookie}): solo el formato sin run containers.")
+        encabezado = np.frombuffer(datos, dtype="<u2", count=2 * n, offset=8)
+        offsets = np.frombuffer(datos, dtype="<u4", count=n, offset=8 + 4 * n)
+        bloques = []
+        for cardinal, offset in zip(encabezado[1::2].astype(np.int64) + 1, offsets.tolist()):
+            if cardinal > UMBRAL_ARREGLO:
+                bloques.append(np.frombuffer(datos, dtype="<u8", count=1024, offset=offset).astype(np.uint64))
+            else:
+                bloques.append(np.frombuffer(datos, dtype="<u2", count=cardinal, offset=offset).astype(np.uint16))
+        return cls(encabezado[0::2].copy(), bloques)
+
+def bitmaps_por_grupo(df, llaves, columna_id):
+    """
+    Un BitmapRoaring de 'columna_id' por grupo de 'llaves'. Retorna llaves + N (IDs distintos),
+    Descartados (filas cuyo ID no es un entero de 32 bits) y Bitmap (bytes).
+    """
+    valores = pd.to_numeric(df[columna_id], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+    validos = (valores >= 0) & (valores < 2 ** 32) & (valores == np.floor(valores))
+    filas = []
+    for clave, indices in df.groupby(list(llaves), dropna=False, sort=True).indices.items():
+        clave = clave if isinstance(clave, tuple) else (clave,)
+        mascara = validos[indices]
+        bitmap = BitmapRoaring.desde_ids(valores[indices][mascara].astype(np.uint32))
+        filas.append((*clave, len(bitmap), int((~mascara).sum()), bitmap.a_bytes()))
+    resultado = pd.DataFrame(filas, columns=[*llaves, *COLUMNAS_BITMAP])
+    for c in llaves:
+        if len(resultado) and resultado[c].dtype != df[c].dtype:
+            resultado[c] = resultado[c].astype(df[c].dtype)
+    return resultado.astype({"N": "int64", "Descartados": "int64"})
+
+def fusionar_bitmaps(df_bitmaps, por=()):
+    """Une los bitmaps al nivel 'por' (subconjunto de las llaves). Misma estructura de salida."""
+    por = list(por)
+    grupos = df_bitmaps.groupby(por, dropna=False, sort=True) if por else [((), df_bitmaps)]
+    filas = []
+    for clave, grupo in grupos:
+        clave = clave if isinstance(clave, tuple) else (clave,)
+        bitmap = BitmapRoaring.union_de(BitmapRoaring.desde_bytes(b) for b in grupo["Bitmap"])
+        filas.append((*clave, len(bitmap), int(grupo["Descartados"].sum()), bitmap.a_bytes()))
+    return pd.DataFrame(filas, columns=[*por, *COLUMNAS_BITMAP])
+
+# ========================================================
+# 5. SNAPSHOTS DE ABONADOS (ALTAS, BAJAS Y RETENIDOS)
+# ========================================================
+def cargar_bitmaps_abonados(ruta=None, filtros=None):
+    """Lee Stock_Abonados_Bitmaps_Gold.parquet ('filtros' como en cargar_sketches_sla)."""
+    return _leer_gold(ARCHIVO_BITMAPS_ABONADOS, ruta, filtros)
+
+def bitmap_abonados(quincena, franquicias=None, df_bitmaps=None):
+    """Abonados activos de una quincena (unión de las franquicias pedidas; todas si es None)."""
+    df = cargar_bitmaps_abonados() if df_bitmaps is None else df_bitmaps
+    filtro = df["Quincena Evaluada"] == quincena
+    if franquicias is not None:
+        filtro &= df["Franquicia"].isin([franquicias] if isinstance(franquicias, str) else list(franquicias))
+    return BitmapRoaring.union_de(BitmapRoaring.desde_bytes(b) for b in df.loc[filtro, "Bitmap"])
+
+def delta_abonados(desde, hasta, franquicias=None, df_bitmaps=None):
+    """
+    {"Nuevos", "Perdidos", "Retenidos"} entre dos quincenas, como BitmapRoaring (len() para contar,
+    .a_ids() para exportar los IDs):  delta_abonados("ENE 2025 Q2", "FEB 2025 Q1", "FIBEX CARACAS")
+    """
+    df = cargar_bitmaps_abonados() if df_bitmaps is None else df_bitmaps
+    antes = bitmap_abonados(desde, franquicias, df)
+    despues = bitmap_abonados(hasta, franquicias, df)
+    return {"Nuevos": despues - antes, "Perdidos": antes - despues, "Retenidos": antes & despues}
+
+def retenidos_abonados(quincenas, franquicias=None, df_bitmaps=None):
+    """Abonados activos en todas las 'quincenas' (intersección de N snapshots)."""
+    df = cargar_bitmaps_abonados() if df_bitmaps is None else df_bitmaps
+    return BitmapRoaring.interseccion_de(bitmap_abonados(q, franquicias, df) for q in quincenas)
+
+def tabla_delta_abonados(df_bitmaps):
+    """
+    Gold de movimientos: por franquicia (y 'TODAS') y cada quincena contra la anterior en orden de
+    Fecha_Corte: Abonados_Inicio, Nuevos, Perdidos, Retenidos y Abonados_Fin. Una franquicia ausente en
+    una quincena cuenta como vacía; un abonado que cambia de franquicia es baja en una y alta en la otra.
+    """
+    if df_bitmaps.empty:
+        return pd.DataFrame(columns=COLUMNAS_DELTA_ABONADOS)
+    total = fusionar_bitmaps(df_bitmaps, ["Quincena Evaluada", "Fecha_Corte"]).assign(Franquicia="TODAS")
+    df = pd.concat([df_bitmaps, total], ignore_index=True)
+    quincenas = (df_bitmaps[["Quincena Evaluada", "Fecha_Corte"]].drop_duplicates("Quincena Evaluada")
+                 .sort_values("Fecha_Corte", kind="stable")["Quincena Evaluada"].tolist())
+    filas = []
+    for franquicia, grupo in df.groupby("Franquicia", sort=True):
+        por_quincena = dict(zip(grupo["Quincena Evaluada"], grupo["Bitmap"]))
+        anterior = None
+        for quincena in quincenas:
+            actual = BitmapRoaring.desde_bytes(por_quincena[quincena]) if quincena in por_quincena else BitmapRoaring()
+            if anterior is not None:
+                previo = anterior[1]
+                filas.append((quincena, anterior[0], franquicia, len(previo), len(actual - previo),
+                              len(previo - actual), len(previo & actual), len(actual)))
+            anterior = (quincena, actual)
+    return pd.DataFrame(filas, columns=COLUMNAS_DELTA_ABONADOS)
+
+# ========================================================
+# 6. HYPERLOGLOG (ABONADOS DISTINTOS A CUALQUIER NIVEL)
+# ========================================================
+def _sigma(x):
+    if x == 1:
+        return math.inf
+    y, z = 1.0, x
+    while True:
+        x *= x
+        previo, z = z, z + x * y
+        y += y
+        if z == previo:
+            return z
+
+def _tau(x):
+    if x == 0 or x == 1:
+        return 0.0
+    y, z = 1.0, 1 - x
+    while True:
+        x = math.sqrt(x)
+        y *= 0.5
+        previo, z = z, z - (1 - x) ** 2 * y
+        if z == previo:
+            return z / 3
+
+class HyperLogLog:
+    """
+    Conteo distinto aproximado con 2^p registros de 1 byte. Cada ID se hashea a 64 bits con
+    pd.util.hash_pandas_object (estable entre corridas); los p bits altos eligen el registro y éste
+    guarda el máximo de (ceros a la izquierda + 1) de los bits restantes. Fusionar es tomar el máximo
+    registro a registro, así que fusionar sketches da exactamente el sketch de la unión de los IDs.
+
+    La estimación usa el estimador mejorado de Ertl (2017), sin tablas empíricas de sesgo y válido en
+    todo el rango: error estándar relativo ≈ 1.04 / sqrt(2^p) (1.6% con p=12, ~95% de las estimaciones
+    dentro de ±3.3%), y en grupos de pocos cientos de IDs el error es de unas pocas unidades.
+    """
+
+    def __init__(self, registros=None, precision=None):
+        self.precision = int(precision or HLL_PRECISION)
+        self.registros = (np.zeros(1 << self.precision, dtype=np.uint8) if registros is None
+                          else np.asarray(registros, dtype=np.uint8))
+
+    @property
+    def error_estandar(self):
+        """Error estándar relativo teórico de la estimación."""
+        return 1.04 / math.sqrt(len(self.registros))
+
+    def __repr__(self):
+        return f"HyperLogLog(p={self.precision}, estimado={self.estimar():,.0f})"
+
+    @staticmethod
+    def hashes(valores):
+        """Hash de 64 bits de cada valor no nulo, comparado como texto ('123' y 123 son el mismo ID)."""
+        serie = pd.Series(valores).dropna()
+        return pd.util.hash_pandas_object(serie.astype(str).astype(object), index=False).to_numpy(dtype=np.uint64)
+
+    @classmethod
+    def desde_hashes(cls, hashes, precision=None):
+        digest = cls(precision=precision)
+        p = digest.precision
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        resto = hashes & np.uint64((1 << (64 - p)) - 1)
+        # Largo en bits del resto, exacto en float64 trabajando por mitades de 32 bits (0 si resto == 0)
+        alto = np.frexp((resto >> np.uint64(32)).astype(np.float64))[1]
+        bajo = np.frexp((resto & np.uint64(0xFFFFFFFF)).astype(np.float64))[1]
+        largo = np.where(alto > 0, alto + 32, bajo)
+        np.maximum.at(digest.registros, (hashes >> np.uint64(64 - p)).astype(np.intp), (64 - p - largo + 1).astype(np.uint8))
+        return digest
+
+    @classmethod
+    def desde_valores(cls, valores, precision=None):
+        """Sketch de los valores distintos de un arreglo o Series (se ignoran nulos)."""
+        return cls.desde_hashes(cls.hashes(valores), precision)
+
+    @classmethod
+    def fusionar(cls, digests, precision=None):
+        """Sketch de la unión: máximo registro a registro (todos deben tener la misma precisión)."""
+        digests = list(digests)
+        if not digests:
+            return cls(precision=precision)
+        if len({d.precision for d in digests}) > 1:
+            raise ValueError("No se pueden fusionar sketches HyperLogLog de distinta precisión.")
+        return cls(np.maximum.reduce([d.registros for d in digests]), digests[0].precision)
+
+    def estimar(self):
+        m, q = len(self.registros), 64 - self.precision
+        c = np.bincount(self.registros, minlength=q + 2).astype(np.float64)
+        z = m * _tau(1 - c[q + 1] / m)
+        for k in range(q, 0, -1):
+            z = 0.5 * (z + c[k])
+        z += m * _sigma(c[0] / m)
+        return m * m / (2 * math.log(2) * z)
+
+    def a_bytes(self):
+        """[precisión (1 byte), registros...]."""
+        return bytes([self.precision]) + self.registros.tobytes()
+
+    @classmethod
+    def desde_bytes(cls, datos):
+        return cls(np.frombuffer(datos, dtype=np.uint8, offset=1).copy(), datos[0])
+
+def hll_por_grupo(df, llaves, columna_id, precision=None):
+    """Un HyperLogLog de 'columna_id' por grupo de 'llaves': llaves + N (distintos exactos del grupo) y Sketch."""
+    validos = df[columna_id].notna().to_numpy()
+    hashes = np.zeros(len(df), dtype=np.uint64)
+    hashes[validos] = HyperLogLog.hashes(df[columna_id])
+    ids = df[columna_id].astype(str).to_numpy()
+    filas = []
+    for clave, indices in df.groupby(list(llaves), dropna=False, sort=True).indices.items():
+        clave = clave if isinstance(clave, tuple) else (clave,)
+        indices = indices[validos[indices]]
+        digest = HyperLogLog.desde_hashes(hashes[indices], precision)
+        filas.append((*clave, len(pd.unique(ids[indices])), digest.a_bytes()))
+    resultado = pd.DataFrame(filas, columns=[*llaves, *COLUMNAS_HLL])
+    for c in llaves:
+        if len(resultado) and resultado[c].dtype != df[c].dtype:
+            resultado[c] = resultado[c].astype(df[c].dtype)
+    return resultado.astype({"N": "int64"})
+
+def tabla_distintos(df_hll, por=()):
+    """
+    Distintos estimados al nivel 'por' fusionando sketches: por + Distintos y Margen_95 (±1.96 errores
+    estándar). Un grupo que ya es una sola fila del Gold devuelve su conteo exacto (N) con margen 0.
+    """
+    por = list(por)
+    grupos = df_hll.groupby(por, dropna=False, sort=True) if por else [((), df_hll)]
+    filas = []
+    for clave, grupo in grupos:
+        clave = clave if isinstance(clave, tuple) else (clave,)
+        if len(grupo) == 1:
+            filas.append((*clave, int(grupo["N"].iloc[0]), 0))
+            continue
+        digest = HyperLogLog.fusionar(HyperLogLog.desde_bytes(s) for s in grupo["Sketch"])
+        estimado = digest.estimar()
+        filas.append((*clave, int(round(estimado)), int(math.ceil(1.96 * digest.error_estandar * estimado))))
+    return pd.DataFrame(filas, columns=[*por, "Distintos", "Margen_95"])
+
+def cargar_hll_abonados(ruta=None, filtros=None):
+    """Lee Stock_Abonados_HLL_Gold.parquet ('filtros' como en cargar_sketches_sla)."""
+    return _leer_gold(ARCHIVO_HLL_ABONADOS, ruta, filtros)
+
+def distintos_abonados(por=("Quincena Evaluada",), filtros=None, ruta=None):
+    """
+    Abonados distintos a cualquier nivel, respondidos desde los sketches:
+        distintos_abonados(por=["Franquicia"])                                       # todo el histórico
+        distintos_abonados(por=[], filtros={"Quincena Evaluada": ["ENE 2025 Q1", "ENE 2025 Q2"]})
+    """
+    return tabla_distintos(cargar_hll_abonados(ruta, filtros), por)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Percentiles de SLA desde los sketches de la capa Gold.")
+    parser.add_argument("--por", nargs="*", default=["Quincena Evaluada"],
+                        help="Columnas de agrupación (vacío = histórico completo).")
+    parser.add_argument("--metrica", default="SLA Resolucion Min")
+    parser.add_argument("--delta", nargs=2, metavar=("DESDE", "HASTA"),
+                        help="Nuevos, perdidos y retenidos entre dos quincenas de abonados.")
+    parser.add_argument("--franquicia", nargs="*", help="Limita --delta a estas franquicias.")
+    parser.add_argument("--distintos", nargs="*", metavar="COLUMNA",
+                        help="Abonados distintos agrupados por estas columnas (sin columnas = histórico completo).")
+    args = parser.parse_args(argv)
+    if args.delta:
+        import time
+        df_bitmaps = cargar_bitmaps_abonados()
+        inicio = time.perf_counter()
+        delta = delta_abonados(*args.delta, franquicias=args.franquicia or None, df_bitmaps=df_bitmaps)
+        milisegundos = (time.perf_counter() - inicio) * 1000
+        for nombre, bitmap in delta.items():
+            print(f"{nombre:<10} {len(bitmap):>12,}")
+        print(f"({milisegundos:,.1f} ms)")
+        return 0
+    if args.distintos is not None:
+        with pd.option_context("display.max_rows", 200, "display.width", 200):
+            print(distintos_abonados(args.distintos).to_string(index=False))
+        return 0
+    tabla = percentiles_sla(args.por, filtros={"Metrica": args.metrica})
+    with pd.option_context("display.max_rows", 200, "display.width", 200):
+        print(tabla.drop(columns=["Metrica"]).to_string(index=False))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,22 @@
+# Configuración común de pytest: la raíz del repo en sys.path (igual que el truco del ascensor de
+# los ETLs) y un lake temporal para las pruebas que escriben Bronze/Silver/Gold.
+import os
+import sys
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
+
+@pytest.fixture
+def lake(tmp_path, monkeypatch):
+    """
+    Redirige PATHS (dict compartido por todos los módulos) a un lake vacío en tmp_path mientras dura
+    la prueba, con la misma traducción de rutas que modo_dev. Retorna la raíz del lake.
+    """
+    import modo_dev
+    from config import PATHS
+    for clave, ruta in modo_dev.PATHS_ORIGINALES.items():
+        monkeypatch.setitem(PATHS, clave, modo_dev.ruta_equivalente(ruta, str(tmp_path)))
+    return tmp_path
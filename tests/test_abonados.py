@@ -0,0 +1,29 @@
+import os
+
+import pandas as pd
+
+from transformacion.ETLs.trans_abonados_idf import (migrar_silver_legado, particiones_existentes,
+                                                    retirar_silver_consolidado)
+
+def _silver(quincenas):
+    return pd.DataFrame({"Quincena Evaluada": [q for q in quincenas for _ in range(3)],
+                         "ID": [str(i) for i in range(3 * len(quincenas))], "Franquicia": "FIBEX A"})
+
+def test_archivo_unico_se_migra_y_se_retira(tmp_path):
+    carpeta, legado = str(tmp_path / "Stock_Abonados_Silver_Detalle"), str(tmp_path / "Stock_Abonados_Silver_Detalle.parquet")
+    _silver(["ENE 2025 Q1", "ENE 2025 Q2"]).to_parquet(legado)
+
+    migrar_silver_legado(legado, carpeta)
+    retirar_silver_consolidado(legado, carpeta)
+    assert not os.path.exists(legado)
+    assert sorted(particiones_existentes(carpeta)) == ["ENE 2025 Q1", "ENE 2025 Q2"]
+
+def test_archivo_unico_con_quincenas_sin_particion_se_conserva(tmp_path):
+    # Migración interrumpida: solo una de las dos quincenas llegó a su partición
+    carpeta, legado = str(tmp_path / "Stock_Abonados_Silver_Detalle"), str(tmp_path / "Stock_Abonados_Silver_Detalle.parquet")
+    _silver(["ENE 2025 Q1", "ENE 2025 Q2"]).to_parquet(legado)
+    os.makedirs(carpeta)
+    _silver(["ENE 2025 Q1"]).to_parquet(os.path.join(carpeta, "ENE_2025_Q1.parquet"))
+
+    retirar_silver_consolidado(legado, carpeta)
+    assert os.path.exists(legado)
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+
+from transformacion.ETLs.trans_ordenes_servicio import (COLS_OBSERVACION_BACKLOG, ORDEN_BACKLOG, ORDEN_BACKLOG_GOLD,
+                                                        actualizar_backlog, backlog_desde_cero,
+                                                        backlog_desde_observaciones, golds_backlog, ordenar_backlog)
+
+QUINCENAS = ["ENE 2025 Q1", "ENE 2025 Q2", "FEB 2025 Q1", "FEB 2025 Q2", "MAR 2025 Q1"]
+
+def observaciones(quincena, indice, rng, n_ordenes=400):
+    """Filas de Silver de una quincena: órdenes que reaparecen entre quincenas, abiertas o cerradas."""
+    fin = pd.Timestamp("2025-01-15") + pd.DateOffset(days=15 * indice)
+    ordenes = rng.choice(np.arange(1_000), n_ordenes, replace=False)
+    apertura = fin - pd.to_timedelta(rng.integers(0, 40 * 24, n_ordenes), unit="h")
+    cerrada = rng.random(n_ordenes) < 0.6
+    df = pd.DataFrame({
+        "N° Orden": ordenes.astype(str),
+        "N° Contrato": rng.integers(0, 500, n_ordenes).astype(str),
+        "Franquicia": rng.choice(["FIBEX ESTE", "FIBEX OESTE", "FIBEX CENTRO"], n_ordenes),
+        "Clasificacion": rng.choice(["NOC", "OPERACIONES", "ADMINISTRATIVO"], n_ordenes),
+        "Grupo Trabajo": rng.choice(["CUADRILLA 1", "MESA DE CONTROL"], n_ordenes),
+        "Detalle Orden": "FALLA",
+        "Estatus_orden": np.where(cerrada, "CERRADA", "ABIERTA"),
+        "Fecha Apertura": apertura,
+        "Quincena Evaluada": quincena,
+        "FechaFin": fin,
+        "Fecha Cierre": pd.Series(fin, index=range(n_ordenes)).where(cerrada),
+    })
+    return df.reindex(columns=COLS_OBSERVACION_BACKLOG)
+
+def aplicar(backlog, particiones, cambiadas, nuevas):
+    """Aplica al backlog el cambio de 'cambiadas' (las más recientes) como lo hace el ETL."""
+    ordenes_previas = set().union(*[set(particiones[q]["N° Orden"]) for q in cambiadas if q in particiones])
+    for q in cambiadas:
+        particiones.pop(q, None)
+    particiones.update(nuevas)
+    df_nuevas = pd.concat(list(nuevas.values()), ignore_index=True) if nuevas else None
+
+    def leer_intactas(ordenes):
+        partes = [p[p["N° Orden"].isin(ordenes)] for q, p in particiones.items() if q not in cambiadas]
+        return pd.concat(partes, ignore_index=True) if partes else None
+
+    return actualizar_backlog(backlog, ordenes_previas, df_nuevas, leer_intactas)
+
+def desde_cero(particiones):
+    return backlog_desde_cero(pd.concat(list(particiones.values()), ignore_index=True))
+
+def test_backlog_incremental_igual_a_desde_cero():
+    rng = np.random.default_rng(42)
+    particiones, backlog = {}, ordenar_backlog([])
+
+    # Quincenas nuevas, una por corrida
+    for i, q in enumerate(QUINCENAS):
+        backlog = aplicar(backlog, particiones, [q], {q: observaciones(q, i, rng)})
+        pd.testing.assert_frame_equal(backlog.reset_index(drop=True), desde_cero(particiones), check_dtype=False)
+
+    # La última quincena se recalcula con otro contenido (el Excel se reemplazó)
+    ultima = QUINCENAS[-1]
+    backlog = aplicar(backlog, particiones, [ultima], {ultima: observaciones(ultima, len(QUINCENAS) - 1, rng, n_ordenes=150)})
+    pd.testing.assert_frame_equal(backlog.reset_index(drop=True), desde_cero(particiones), check_dtype=False)
+
+    # La última quincena se retira: sus órdenes vuelven a su aparición anterior
+    backlog = aplicar(backlog, particiones, [ultima], {})
+    pd.testing.assert_frame_equal(backlog.reset_index(drop=True), desde_cero(particiones), check_dtype=False)
+
+def test_backlog_sin_tickets_abiertos():
+    rng = np.random.default_rng(7)
+    cerradas = observaciones(QUINCENAS[0], 0, rng)
+    cerradas["Fecha Cierre"] = cerradas["FechaFin"]
+    corte = pd.Timestamp("2025-01-16")
+    for backlog in (backlog_desde_observaciones(None), backlog_desde_cero(cerradas),
+                    # Estado vacío guardado por una versión anterior: columnas sin tipo
+                    pd.DataFrame(columns=ORDEN_BACKLOG)):
+        assert backlog.empty
+        golds = golds_backlog(backlog, corte)
+        assert golds["Tickets_Backlog_Gold"].empty and golds["Tickets_Backlog_Resumen_Gold"].empty
+        assert list(golds["Tickets_Backlog_Gold"].columns) == ORDEN_BACKLOG_GOLD
+    assert str(backlog_desde_cero(cerradas)["Fecha Apertura"].dtype) == "datetime64[ns]"
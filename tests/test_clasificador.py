@@ -0,0 +1,18 @@
+import numpy as np
+import polars as pl
+import pytest
+
+from benchmarks import clasificar_tickets_regex, textos_clasificador
+from transformacion.ETLs.trans_ordenes_servicio import clasificar_tickets
+from transformacion.ETLs.trans_ordenes_servicio_polars import expr_clasificacion
+
+@pytest.mark.parametrize("unicos", [False, True], ids=["textos_repetidos", "textos_unicos"])
+def test_automata_igual_a_regex(unicos):
+    """El autómata (Pandas y expresión Polars) clasifica fila a fila igual que las regex anteriores."""
+    sol, usr, grp = textos_clasificador(50_000, np.random.default_rng(42), unicos=unicos)
+    esperado = clasificar_tickets_regex(sol, usr, grp)
+
+    np.testing.assert_array_equal(np.asarray(clasificar_tickets(sol, usr, grp)), esperado)
+    df_pl = pl.DataFrame({"sol": sol.tolist(), "usr": usr.tolist(), "grp": grp.tolist()})
+    obtenido_pl = df_pl.select(expr_clasificacion(pl.col("sol"), pl.col("usr"), pl.col("grp"))).to_series().to_numpy()
+    np.testing.assert_array_equal(obtenido_pl, esperado)
@@ -0,0 +1,39 @@
+import os
+
+import pandas as pd
+import polars as pl
+
+from utils import asignar_cliente_sk, cache_dimensiones, escritura_atomica, leer_dimension_pandas, leer_dimension_polars
+
+def test_vistas_comparten_una_sola_carga(tmp_path):
+    ruta = str(tmp_path / "Atencion_Cliente_Gold.parquet")
+    pd.DataFrame({"N° Abonado": ["1", "2"], "Tipo Respuesta": ["A", "B"]}).to_parquet(ruta)
+    cache_dimensiones.limpiar()
+    cargas = cache_dimensiones.cargas
+
+    df_pl = leer_dimension_polars(ruta)
+    df_pd = leer_dimension_pandas(ruta)
+    assert isinstance(df_pl, pl.DataFrame) and df_pl.height == len(df_pd) == 2
+    assert cache_dimensiones.cargas == cargas + 1
+
+    # Reescribir la dimensión invalida la entrada: la siguiente vista ve la versión nueva
+    with escritura_atomica(ruta) as tmp:
+        pd.DataFrame({"N° Abonado": ["3"], "Tipo Respuesta": ["C"]}).to_parquet(tmp)
+    assert leer_dimension_polars(ruta)["N° Abonado"].to_list() == ["3"]
+    cache_dimensiones.limpiar()
+
+def test_asignar_cliente_sk_cruza_con_la_dimension_cacheada(lake):
+    from config import PATHS
+    ruta_dim = os.path.join(PATHS["gold"], "Dim_Cliente.parquet")
+    os.makedirs(os.path.dirname(ruta_dim), exist_ok=True)
+    pd.DataFrame({"N° Abonado": ["10", "20"], "Cliente_SK": [1, 2]}).to_parquet(ruta_dim)
+    cache_dimensiones.limpiar()
+
+    hechos = pl.DataFrame({"N° Abonado": ["20", "99"], "Monto": [5.0, 7.0]})
+    resultado = asignar_cliente_sk(hechos)
+    assert dict(zip(resultado["N° Abonado"], resultado["Cliente_SK"])) == {"20": 2, "99": -1}
+
+    cargas = cache_dimensiones.cargas
+    asignar_cliente_sk(hechos.lazy()).collect()
+    assert cache_dimensiones.cargas == cargas
+    cache_dimensiones.limpiar()
@@ -0,0 +1,24 @@
+import polars as pl
+
+from utils import clave_encabezado
+from transformacion.ETLs.trans_ordenes_servicio_polars import proyectar_encabezados
+
+def test_clave_encabezado():
+    assert clave_encabezado("Nº Orden") == clave_encabezado(" N° ORDEN") == clave_encabezado("n°  orden")
+    assert clave_encabezado("Usuario_Emision") == clave_encabezado("Usuario Emisión")
+
+def test_proyectar_encabezados_unifica_variantes_del_bronze():
+    # Bronze con dos Excel que escriben el mismo encabezado distinto (unión por nombre)
+    bronze = pl.DataFrame({
+        "Source.Name": ["a.xlsx", "a.xlsx", "b.xlsx"],
+        "N° Orden": ["1", "2", None],
+        "Nº ORDEN": [None, None, "3"],
+        "usuario emision": ["U1", "U2", "U3"],
+        "Otra": ["x", "y", "z"],
+    })
+    lf, presentes = proyectar_encabezados(bronze.lazy(), ["N° Orden", "Usuario Emisión", "Franquicia"])
+    df = lf.collect()
+    assert presentes == ["N° Orden", "Usuario Emisión"]
+    assert df.columns == ["Source.Name", "N° Orden", "Usuario Emisión"]
+    assert df["N° Orden"].to_list() == ["1", "2", "3"]
+    assert df["Usuario Emisión"].to_list() == ["U1", "U2", "U3"]
@@ -0,0 +1,57 @@
+import os
+
+import pandas as pd
+
+from utils import ParticionesIncrementales
+
+def test_particiones_recalcula_solo_lo_cambiado(lake, tmp_path):
+    entradas = {q: tmp_path / f"{q}.xlsx" for q in ("ENE 2025 Q1", "ENE 2025 Q2")}
+    for ruta in entradas.values():
+        ruta.write_bytes(b"v1")
+    grupos = {q: [str(r)] for q, r in entradas.items()}
+
+    part = ParticionesIncrementales("trans_prueba")
+    cambiadas, eliminadas = part.pendientes(grupos)
+    assert (cambiadas, eliminadas) == (sorted(grupos), [])
+    for q in cambiadas:
+        part.guardar(q, {"Gold": pd.DataFrame({"Quincena": [q], "n": [1]})})
+    part.marcar_publicado()
+
+    # Nada queda a medio publicar: sin staging, .tmp ni locks junto a las particiones
+    sobrantes = [f for _, _, archivos in os.walk(part.carpeta) for f in archivos
+                 if f.endswith((".staging", ".tmp", ".lock"))]
+    assert sobrantes == []
+
+    # Una corrida nueva lee el manifiesto: solo la quincena modificada se recalcula
+    entradas["ENE 2025 Q2"].write_bytes(b"v2 mas larga")
+    part = ParticionesIncrementales("trans_prueba")
+    assert not part.requiere_publicar()
+    assert part.pendientes(grupos) == (["ENE 2025 Q2"], [])
+    assert part.pendientes({"ENE 2025 Q1": grupos["ENE 2025 Q1"]}) == ([], ["ENE 2025 Q2"])
+    part.eliminar("ENE 2025 Q2")
+    assert part.requiere_publicar()
+    assert part.consolidar("Gold")["Quincena"].tolist() == ["ENE 2025 Q1"]
+
+def test_publicacion_se_reanuda_desde_la_salida_que_fallo(lake, tmp_path):
+    entrada = tmp_path / "ENE 2025 Q1.xlsx"
+    entrada.write_bytes(b"v1")
+    grupos = {"ENE 2025 Q1": [str(entrada)]}
+    part = ParticionesIncrementales("trans_prueba")
+    part.pendientes(grupos)
+    part.guardar("ENE 2025 Q1", {s: pd.DataFrame({"n": [1]}) for s in ("Silver", "Gold_A", "Gold_B")})
+
+    # La escritura de Gold_B falla (Power BI bloqueando el archivo): el proceso muere sin marcarla
+    part.marcar_publicado("Silver")
+    part.marcar_publicado("Gold_A")
+
+    part = ParticionesIncrementales("trans_prueba")
+    assert part.pendientes(grupos) == ([], [])
+    assert part.requiere_publicar()
+    assert [s for s in ("Silver", "Gold_A", "Gold_B") if part.requiere_publicar(s)] == ["Gold_B"]
+    part.marcar_publicado("Gold_B")
+    part.marcar_publicado()
+    assert not part.requiere_publicar() and not part.requiere_publicar("Gold_B")
+
+    # Recalcular una partición vuelve a exigir todas las salidas
+    part.guardar("ENE 2025 Q1", {"Silver": pd.DataFrame({"n": [2]})})
+    assert part.requiere_publicar("Silver") and part.requiere_publicar("Gold_A")
@@ -0,0 +1,120 @@
+import os
+import random
+
+import polars as pl
+import pytest
+
+from config import PATHS
+from transformacion.ETLs import cargar_etl
+
+pytest.importorskip("xlsxwriter")
+
+OFICINAS = ["OFI-LECHERIA", "OFI-METROPOLIS", "ALIADO X", "VIRTUAL WEB"]
+
+def _fila(rng, pid, fecha):
+    return {"ID Contrato": str(rng.randrange(300)), "ID Pago": pid, "N° Abonado": "x", "Fecha": fecha,
+            "Total Pago": f"{rng.randrange(1, 900)},5", "Forma de Pago": rng.choice(["EF", "TR"]), "Banco": "B",
+            "Oficina Cobro": rng.choice(OFICINAS), "Cobrador": "c"}
+
+def _escribir(carpeta, nombre, filas):
+    os.makedirs(carpeta, exist_ok=True)
+    pl.DataFrame(filas, schema={c: pl.Utf8 for c in filas[0]}).write_excel(os.path.join(carpeta, nombre))
+
+def _horas(rng, filas):
+    # La mitad de los IDs numéricos llegan como '123.0' (Excel): el cruce compara el ID normalizado
+    return [{"ID Pago": f["ID Pago"] + (".0" if f["ID Pago"].isdigit() and rng.random() < .5 else ""),
+             "Fecha": f["Fecha"], "Hora de Pago": f"{rng.randrange(7, 20):02d}:00:00"} for f in filas if rng.random() < .7]
+
+def _gold_igual_a_reconstruccion(m):
+    """El Gold publicado coincide fila a fila con recalcular todo el histórico del Bronze."""
+    rutas = m.rutas_recaudacion()
+    con = m.conectar_duckdb(rutas)
+    sql_gold = m.preparar_vistas(con, rutas)
+    columnas = ", ".join(f'"{c}"' for c in m.COLUMNAS_GOLD)
+    con.execute(f"CREATE TEMP TABLE completo AS SELECT {columnas} FROM ({sql_gold.replace('{origen}', 'recaudacion')})")
+    ruta_gold = rutas["gold"].replace("\\", "/")
+    con.execute(f"CREATE TEMP TABLE publicado AS SELECT * FROM read_parquet('{ruta_gold}')")
+    sobran = con.execute("SELECT COUNT(*) FROM (SELECT * FROM publicado EXCEPT ALL SELECT * FROM completo)").fetchone()[0]
+    faltan = con.execute("SELECT COUNT(*) FROM (SELECT * FROM completo EXCEPT ALL SELECT * FROM publicado)").fetchone()[0]
+    con.close()
+    assert (sobran, faltan) == (0, 0)
+
+def _huellas_particiones():
+    carpeta = os.path.join(PATHS["silver"], "_particiones", "trans_recaudacion", "Recaudacion_Gold")
+    return {f: os.stat(os.path.join(carpeta, f)).st_mtime_ns for f in os.listdir(carpeta)}
+
+def test_gold_incremental_igual_a_reconstruccion(lake):
+    rng = random.Random(3)
+    m = cargar_etl("trans_recaudacion")
+    rutas = m.rutas_recaudacion()
+    raw, raw_horas = PATHS["raw_recaudacion"], PATHS["raw_horaspago"]
+    pids_viejos = [str(i) for i in range(1, 400)] + [f"A-{i}" for i in range(20)] + [f"00{i}" for i in range(10)]
+    contador = [0]
+
+    def lote(mes, dias, n, reusar=.05):
+        filas = []
+        for _ in range(n):
+            contador[0] += 1
+            pid = rng.choice(pids_viejos) if rng.random() < reusar else str(100000 + contador[0])
+            filas.append(_fila(rng, pid, f"2025-{mes:02d}-{rng.choice(dias):02d}"))
+        return filas
+
+    # Carga inicial: enero y febrero
+    r1 = lote(1, range(1, 29), 400) + lote(2, range(1, 29), 400)
+    _escribir(raw, "Rec 1.xlsx", r1)
+    _escribir(raw_horas, "Horas 1.xlsx", _horas(rng, r1))
+    m.ejecutar()
+    _gold_igual_a_reconstruccion(m)
+    assert {"2025-01.parquet", "2025-02.parquet"} <= set(_huellas_particiones())
+
+    # Delta de marzo (IDs viejos se mueven de mes) + horas tardías de cobros de fines de febrero.
+    # Los Excel anteriores siguen en las carpetas RAW, como en producción.
+    _escribir(raw, "Rec 2.xlsx", lote(3, range(1, 20), 300))
+    tardias = [f for f in r1 if f["Fecha"] >= "2025-02-25"][:50]
+    _escribir(raw_horas, "Horas 2.xlsx", [{"ID Pago": f["ID Pago"], "Fecha": "2025-03-01", "Hora de Pago": "23:00:00"} for f in tardias])
+    m.ejecutar()
+    _gold_igual_a_reconstruccion(m)
+
+    # Sin archivos nuevos ni modificados: ni el Bronze ni las particiones se reescriben
+    antes, bronze_antes = _huellas_particiones(), os.stat(rutas["bronze"]).st_mtime_ns
+    m.ejecutar()
+    assert _huellas_particiones() == antes
+    assert os.stat(rutas["bronze"]).st_mtime_ns == bronze_antes
+    _gold_igual_a_reconstruccion(m)
+
+    # Un mes nuevo con IDs nuevos: el delta son solo sus fechas, no todo lo que hay en RAW
+    _escribir(raw, "Rec 3.xlsx", lote(4, range(1, 29), 200, reusar=0))
+    antes = _huellas_particiones()
+    m.ejecutar()
+    despues = _huellas_particiones()
+    assert "2025-04.parquet" in despues
+    assert all(despues[f] == antes[f] for f in ("2025-01.parquet", "2025-02.parquet", "2025-03.parquet"))
+    _gold_igual_a_reconstruccion(m)
+
+    # Reemplazo de un día de enero (upsert) que borra cobros ganadores
+    _escribir(raw, "Rec 4.xlsx", lote(1, [10], 50))
+    m.ejecutar()
+    _gold_igual_a_reconstruccion(m)
+
+    # Un Excel retirado de RAW: al reingerir, el reemplazo de sus días se refleja en el Gold
+    os.remove(os.path.join(raw, "Rec 4.xlsx"))
+    _escribir(raw, "Rec 5.xlsx", lote(2, [3], 20))
+    m.ejecutar()
+    _gold_igual_a_reconstruccion(m)
+
+    # Todo se publicó con escritura_atomica: no quedan staging, .tmp ni locks en el lake
+    sobrantes = [f for _, _, archivos in os.walk(PATHS["silver"]) for f in archivos
+                 if f.endswith((".staging", ".tmp", ".lock"))]
+    assert sobrantes == []
+
+def test_error_de_ingesta_fuerza_reconstruccion(lake, monkeypatch):
+    m = cargar_etl("trans_recaudacion")
+    rutas = m.rutas_recaudacion()
+    _escribir(rutas["raw"], "Rec 1.xlsx", [_fila(random.Random(1), "1", "2025-01-05")])
+
+    def fallar(**kwargs):
+        raise OSError("disco lleno")
+    monkeypatch.setattr(m, "ingesta_incremental_polars", fallar)
+    vistos = {"Rec 0.xlsx": {"tamanio": 1, "mtime_ns": 1}}
+    # None (no []) para que el Gold se reconstruya; los archivos no cuentan como ingeridos
+    assert m.actualizar_bronze("Recaudación", rutas["raw"], rutas["bronze"], vistos) == (None, vistos)
@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from config import CUANTILES_SLA
+from sketches import (TDigest, BitmapRoaring, HyperLogLog, sketches_por_grupo, tabla_percentiles,
+                      nombre_percentil, hll_por_grupo, tabla_distintos)
+
+# ========================================================
+# T-DIGEST
+# ========================================================
+def test_tdigest_error_de_rango():
+    """
+    Sketches por grupo sobre minutos de SLA sintéticos (lognormales de distinta escala por grupo),
+    fusionados al total y a un nivel intermedio: el error, medido en rango (fracción de filas entre
+    el valor estimado y el exacto), queda bajo 0.5%.
+    """
+    rng = np.random.default_rng(42)
+    n_filas, n_grupos = 200_000, 300
+    grupo = rng.integers(0, n_grupos, n_filas)
+    escala = rng.uniform(3, 7, n_grupos)
+    df = pd.DataFrame({"Nivel": grupo % 10, "Grupo": grupo,
+                       "Minutos": np.round(rng.lognormal(escala[grupo], 1.0), 2)})
+    sk = sketches_por_grupo(df, ["Nivel", "Grupo"], ["Minutos"])
+    por_nivel, total = tabla_percentiles(sk, ["Nivel"]), tabla_percentiles(sk, [])
+
+    peor = 0.0
+    for nivel, fila in [(None, total.iloc[0])] + [(f["Nivel"], f) for _, f in por_nivel.iterrows()]:
+        valores = np.sort(df["Minutos"].to_numpy() if nivel is None else df.loc[df["Nivel"] == nivel, "Minutos"].to_numpy())
+        for q in CUANTILES_SLA:
+            exacto, estimado = np.quantile(valores, q), fila[nombre_percentil(q)]
+            peor = max(peor, abs(np.searchsorted(valores, estimado) - np.searchsorted(valores, exacto)) / len(valores))
+    assert peor < 0.005
+
+def test_tdigest_grupo_pequeno_exacto_por_bytes():
+    """Con pocos valores el sketch es exacto (PERCENTILE.INC) y sobrevive la ida y vuelta por bytes."""
+    chico = np.random.default_rng(7).lognormal(4, 1, 50)
+    digest = TDigest.desde_bytes(TDigest.desde_valores(chico).a_bytes())
+    np.testing.assert_allclose(digest.cuantil(list(CUANTILES_SLA)), np.quantile(chico, list(CUANTILES_SLA)))
+
+# ========================================================
+# BITMAP ROARING
+# ========================================================
+@pytest.fixture(scope="module")
+def ids_roaring():
+    """IDs con bloques densos (mapa de bits) y dispersos (arreglo)."""
+    rng = np.random.default_rng(42)
+    n_ids = 300_000
+    densos = rng.integers(0, 4 * 10 ** 5, n_ids)
+    dispersos = rng.integers(0, 2 ** 32 - 1, n_ids // 100, dtype=np.uint64)
+    a_ids = np.unique(np.concatenate([densos, dispersos]).astype(np.uint32))
+    b_ids = np.unique(np.concatenate([a_ids[rng.random(len(a_ids)) < 0.9], rng.integers(0, 5 * 10 ** 5, n_ids // 10)]).astype(np.uint32))
+    return a_ids, b_ids
+
+@pytest.mark.parametrize("operacion, referencia", [
+    (lambda a, b: a | b, np.union1d),
+    (lambda a, b: a & b, np.intersect1d),
+    (lambda a, b: a - b, np.setdiff1d),
+], ids=["union", "interseccion", "diferencia"])
+def test_roaring_operaciones_contra_numpy(ids_roaring, operacion, referencia):
+    a_ids, b_ids = ids_roaring
+    resultado = operacion(BitmapRoaring.desde_ids(a_ids), BitmapRoaring.desde_ids(b_ids))
+    esperado = referencia(a_ids, b_ids)
+    np.testing.assert_array_equal(resultado.a_ids(), esperado)
+    assert len(resultado) == len(esperado)
+
+def test_roaring_bytes_y_pertenencia(ids_roaring):
+    a_ids, _ = ids_roaring
+    a = BitmapRoaring.desde_ids(a_ids)
+    assert BitmapRoaring.desde_bytes(a.a_bytes()) == a
+    assert BitmapRoaring.desde_bytes(BitmapRoaring().a_bytes()) == BitmapRoaring()
+    rng = np.random.default_rng(3)
+    muestra = np.r_[rng.integers(0, 5 * 10 ** 5, 200), rng.choice(a_ids, 200)]
+    pos = np.minimum(np.searchsorted(a_ids, muestra), len(a_ids) - 1)
+    assert [int(v) in a for v in muestra] == (a_ids[pos] == muestra).tolist()
+
+# ========================================================
+# HYPERLOGLOG
+# ========================================================
+@pytest.fixture(scope="module")
+def df_hll():
+    rng = np.random.default_rng(42)
+    n_filas, n_ids = 300_000, 200_000
+    return pd.DataFrame({
+        "Quincena Evaluada": rng.choice([f"Q{i:02d}" for i in range(12)], n_filas),
+        "Franquicia": rng.choice([f"FIBEX {i:02d}" for i in range(25)], n_filas, p=np.r_[[0.3], np.full(24, 0.7 / 24)]),
+        "Estatus": rng.choice(["ACTIVO", "SUSPENDIDO"], n_filas, p=[0.85, 0.15]),
+        "ID": rng.zipf(1.3, n_filas) % n_ids,
+    }).astype({"ID": str})
+
+def test_hll_error_contra_nunique(df_hll):
+    """Fusionado a varios niveles: peor error dentro de 4σ y RMSE no mayor a 1.5 veces el teórico."""
+    sk = hll_por_grupo(df_hll, ["Quincena Evaluada", "Franquicia", "Estatus"], "ID")
+    errores = []
+    for nivel in ([], ["Quincena Evaluada"], ["Franquicia"], ["Estatus"], ["Quincena Evaluada", "Estatus"], ["Franquicia", "Estatus"]):
+        estimado = tabla_distintos(sk, nivel)
+        exacto = (df_hll.groupby(nivel, sort=True)["ID"].nunique().reset_index(name="Exacto") if nivel
+                  else pd.DataFrame({"Exacto": [df_hll["ID"].nunique()]}))
+        cruce = estimado.merge(exacto, on=nivel) if nivel else estimado.join(exacto)
+        errores.append(((cruce["Distintos"] - cruce["Exacto"]) / cruce["Exacto"]).to_numpy())
+    errores = np.concatenate(errores)
+    teorico = HyperLogLog().error_estandar
+    assert np.abs(errores).max() <= 4 * teorico
+    assert np.sqrt(np.mean(errores ** 2)) <= 1.5 * teorico
+
+def test_hll_fusion_igual_al_sketch_de_la_union(df_hll):
+    mitad = len(df_hll) // 2
+    union = HyperLogLog.fusionar([HyperLogLog.desde_valores(df_hll["ID"].iloc[:mitad]),
+                                  HyperLogLog.desde_valores(df_hll["ID"].iloc[mitad:])])
+    np.testing.assert_array_equal(union.registros, HyperLogLog.desde_valores(df_hll["ID"]).registros)
+    np.testing.assert_array_equal(HyperLogLog.desde_bytes(union.a_bytes()).registros, union.registros)
@@ -0,0 +1,62 @@
+import duckdb
+import numpy as np
+import pandas as pd
+import polars as pl
+import pytest
+
+from utils import sql_ultimo_por_llave, ultimo_por_llave, ultimo_por_llave_polars
+
+@pytest.fixture(scope="module")
+def df():
+    """Llaves nulas, versiones nulas y empates de versión dentro de una misma llave."""
+    n_filas = 50_000
+    rng = np.random.default_rng(42)
+    df = pd.DataFrame({
+        "Abonado": pd.Series(rng.integers(0, n_filas // 4, n_filas).astype(str)).where(rng.random(n_filas) > 0.01),
+        "Fecha": pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 5, n_filas), unit="D"),
+        "Version": (pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 50, n_filas), unit="h"))
+                   .where(rng.random(n_filas) > 0.02),
+    })
+    df["fila"] = np.arange(n_filas)
+    return df
+
+def referencia(df, llaves, nulos, desempate):
+    """Ordenamiento estable por versión + drop_duplicates: la semántica que reemplaza ultimo_por_llave."""
+    descendente = desempate == "primero"
+    na = "last" if (nulos == "ultimo") != descendente else "first"
+    ref = (df.sort_values("Version", ascending=not descendente, na_position=na, kind="stable")
+             .drop_duplicates(llaves, keep="first" if descendente else "last"))
+    return np.sort(ref["fila"].to_numpy())
+
+@pytest.mark.parametrize("nulos", ["ultimo", "primero"])
+@pytest.mark.parametrize("desempate", ["ultimo", "primero"])
+def test_pandas_igual_a_referencia(df, nulos, desempate):
+    llaves = ["Abonado", "Fecha"]
+    obtenido = ultimo_por_llave(df, llaves, "Version", nulos, desempate)["fila"].to_numpy()
+    np.testing.assert_array_equal(np.sort(obtenido), referencia(df, llaves, nulos, desempate))
+
+@pytest.mark.parametrize("nulos", ["ultimo", "primero"])
+@pytest.mark.parametrize("desempate", ["ultimo", "primero"])
+def test_polars_igual_a_referencia(df, nulos, desempate):
+    llaves = ["Abonado", "Fecha"]
+    obtenido = ultimo_por_llave_polars(pl.from_pandas(df), llaves, "Version", nulos, desempate)["fila"].to_numpy()
+    np.testing.assert_array_equal(np.sort(obtenido), referencia(df, llaves, nulos, desempate))
+
+@pytest.mark.parametrize("nulos", ["ultimo", "primero"])
+@pytest.mark.parametrize("desempate", ["ultimo", "primero"])
+def test_duckdb_igual_a_referencia(df, nulos, desempate):
+    llaves = ["Abonado", "Fecha"]
+    con = duckdb.connect(database=":memory:")
+    con.register("df", df)
+    # En SQL el desempate se expresa con una columna de orden (gana el mayor = aparece después)
+    origen = "SELECT *, " + ("fila" if desempate == "ultimo" else "-fila") + " AS orden FROM df"
+    resultado = con.execute(sql_ultimo_por_llave(origen, llaves, "Version", nulos, columna_desempate="orden")).df()
+    con.close()
+    assert list(resultado.columns) == list(df.columns) + ["orden"]
+    np.testing.assert_array_equal(np.sort(resultado["fila"].to_numpy()), referencia(df, llaves, nulos, desempate))
+
+def test_sin_version_equivale_a_drop_duplicates(df):
+    llaves = ["Abonado", "Fecha"]
+    esperado = df.drop_duplicates(subset=llaves, keep="last")
+    pd.testing.assert_frame_equal(ultimo_por_llave(df, llaves), esperado)
+    pd.testing.assert_frame_equal(ultimo_por_llave(df, llaves, version="NoExiste"), esperado)
@@ -0,0 +1,33 @@
+import os
+import time
+
+import pytest
+
+from config import PATHS
+
+pytest.importorskip("watchdog")
+
+def test_watchdog_dispara_el_dataset_de_la_carpeta(lake):
+    import vigilante
+    from watchdog.observers import Observer
+    carpeta = PATHS["raw_cobranza"]
+    os.makedirs(carpeta, exist_ok=True)
+    cola = vigilante.ColaEventos(debounce=0, estabilidad=0)
+    fuente = Observer()
+    fuente.schedule(vigilante.ManejadorEventos(cola), PATHS["raw"], recursive=True)
+    fuente.start()
+    try:
+        # Descarga del navegador: se escribe como temporal y se renombra al terminar
+        temporal = os.path.join(carpeta, "Cobranza.xlsx.crdownload")
+        with open(temporal, "wb") as f:
+            f.write(b"x" * 1024)
+        os.replace(temporal, os.path.join(carpeta, "Cobranza.xlsx"))
+        listos, limite = [], time.time() + 10
+        while not listos and time.time() < limite:
+            time.sleep(0.1)
+            listos = cola.listos()
+    finally:
+        fuente.stop()
+        fuente.join()
+    assert listos == ["raw_cobranza"]
+    assert vigilante.objetivos_para(listos) == ["trans_cobranza"]
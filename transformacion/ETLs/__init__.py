@@ -0,0 +1,35 @@
+# Registro perezoso de ETLs. Los módulos de transformación arrastran pandas, polars, duckdb,
+# pyarrow y rich al importarse, por lo que el orquestador solo los importa cuando la opción
+# seleccionada realmente los necesita (en lugar de cargar los ~17 módulos al arrancar).
+
+import importlib
+
+ETLS_DISPONIBLES = (
+    "trans_abonados_idf",
+    "trans_actualizacion_datos",
+    "trans_afluencia_gold",
+    "trans_afluencia_silver",
+    "trans_atc",
+    "trans_cobranza",
+    "trans_comeback",
+    "trans_dim_franquicias",
+    "trans_dimclientes",
+    "trans_empleados",
+    "trans_estadistica_abonado",
+    "trans_ont_off",
+    "trans_ordenes_servicio",
+    "trans_ordenes_servicio_polars",
+    "trans_recaudacion",
+    "trans_reclamos",
+    "trans_ventase",
+    "trans_ventas",
+)
+
+def cargar_etl(nombre):
+    """
+    Importa bajo demanda el módulo transformacion.ETLs.<nombre> y lo retorna.
+    Python cachea el módulo en sys.modules, por lo que llamadas repetidas no tienen costo.
+    """
+    if nombre not in ETLS_DISPONIBLES:
+        raise KeyError(f"ETL no registrado: {nombre}")
+    return importlib.import_module(f"{__name__}.{nombre}")
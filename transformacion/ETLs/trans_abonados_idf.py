@@ -6,7 +6,7 @@ import glob
 import re
 import datetime
 import calendar
-import polars as pl
+import json
 import duckdb
 from rich.progress import Progress, SpinnerColumn, BarColumn, TextColumn, TimeElapsedColumn
 
@@ -21,8 +21,14 @@ from utils import (
     guardar_parquet, 
     reportar_tiempo, 
     console, 
-    limpiar_nulos_powerbi
+    limpiar_nulos_powerbi,
+    escritura_atomica,
+    bloqueo_dataset,
+    logger,
+    leer_excel_proyectado
 )
+from sketches import (bitmaps_por_grupo, tabla_delta_abonados, hll_por_grupo, ARCHIVO_BITMAPS_ABONADOS,
+                      ARCHIVO_DELTA_ABONADOS, ARCHIVO_HLL_ABONADOS)
 
 # --- CONFIGURACIÓN GLOBAL ---
 MAPEO_COLUMNAS = {
@@ -42,6 +48,20 @@ COLS_ABONADOS_SILVER = [
     "Franquicia" 
 ]
 
+# Columnas que se leen del snapshot (las variantes de encabezado llegan vía MAPEO_COLUMNAS)
+COLS_EXCEL_ABONADOS = ["ID", "Estatus", "Franquicia", "Detalle Orden", "Detalle"]
+
+# El detalle Silver vive en una carpeta con un Parquet por quincena: reemplazar un snapshot es
+# escribir una sola partición. No se republica un archivo único (sería reescribir todo el histórico en
+# cada corrida): los consumidores leen la carpeta, read_parquet('.../Stock_Abonados_Silver_Detalle/*.parquet')
+# en DuckDB/Polars o el conector Carpeta en Power BI. Un archivo único heredado se migra en la primera
+# corrida y luego se retira para que nadie siga leyendo una copia vieja.
+NOMBRE_SILVER_DETALLE = "Stock_Abonados_Silver_Detalle"
+NOMBRE_GOLD_RESUMEN = "Stock_Abonados_Gold_Resumen.parquet"
+
+# Metadatos por snapshot RAW (fecha de corte, quincena, filas) para planificar sin abrir los Excel
+NOMBRE_METADATOS_SNAPSHOTS = os.path.join("_metadatos", "trans_abonados_idf_snapshots.json")
+
 # ==========================================
 # LÓGICA DE NEGOCIO (FECHAS SNAPSHOT)
 # ==========================================
@@ -90,6 +110,185 @@ def obtener_fecha_corte_snapshot(nombre_archivo):
     except Exception as e:
         return None, None, None
 
+# ==========================================
+# METADATOS DE SNAPSHOTS (PLANIFICACIÓN SIN TOCAR LOS EXCEL)
+# ==========================================
+def cargar_metadatos_snapshots(ruta):
+    """{nombre de archivo: {tamanio, mtime_ns, fecha_corte, quincena, filas, abonados}} o {} si no existe."""
+    if not os.path.exists(ruta):
+        return {}
+    try:
+        with open(ruta, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        logger.warning(f"ABONADOS | Metadatos de snapshots ilegibles, se recalculan: {e}")
+        return {}
+
+def guardar_metadatos_snapshots(ruta, metadatos):
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    with escritura_atomica(ruta) as ruta_tmp:
+        with open(ruta_tmp, "w", encoding="utf-8") as f:
+            json.dump(metadatos, f, ensure_ascii=False, indent=2)
+
+def planificar_snapshots(archivos, metadatos):
+    """
+    Actualiza 'metadatos' con los archivos actuales: solo los nuevos o modificados (tamaño o mtime
+    distintos) recalculan su fecha de corte y pierden sus conteos; los que ya no están se olvidan.
+    Retorna [(ruta, fecha_corte, quincena)] en orden cronológico, sin los archivos sin fecha reconocible.
+    """
+    actuales = {}
+    for ruta in archivos:
+        nombre, st = os.path.basename(ruta), os.stat(ruta)
+        entrada = metadatos.get(nombre)
+        if not entrada or entrada.get("tamanio") != st.st_size or entrada.get("mtime_ns") != st.st_mtime_ns:
+            fecha_corte, _, quincena = obtener_fecha_corte_snapshot(ruta)
+            entrada = {"tamanio": st.st_size, "mtime_ns": st.st_mtime_ns,
+                       "fecha_corte": fecha_corte.strftime("%Y-%m-%d") if fecha_corte else None,
+                       "quincena": quincena, "filas": None, "abonados": None}
+        actuales[nombre] = (ruta, entrada)
+    metadatos.clear()
+    metadatos.update({nombre: entrada for nombre, (_, entrada) in actuales.items()})
+    plan = [(ruta, pd.Timestamp(e["fecha_corte"]), e["quincena"]) for ruta, e in actuales.values() if e["fecha_corte"]]
+    return sorted(plan, key=lambda x: x[1])
+
+# ==========================================
+# SILVER PARTICIONADO POR QUINCENA
+# ==========================================
+def _sql_ruta(ruta):
+    return ruta.replace(chr(92), '/').replace("'", "''")
+
+def ruta_particion(carpeta, quincena):
+    return os.path.join(carpeta, re.sub(r"\W+", "_", str(quincena)).strip("_") + ".parquet")
+
+def particiones_existentes(carpeta):
+    """{Quincena Evaluada: ruta de su partición} según el contenido de cada archivo."""
+    archivos = sorted(glob.glob(os.path.join(carpeta, "*.parquet")))
+    if not archivos:
+        return {}
+    con = duckdb.connect(database=':memory:')
+    try:
+        filas = con.execute(
+            f"""SELECT DISTINCT "Quincena Evaluada", filename
+                FROM read_parquet([{", ".join(f"'{_sql_ruta(a)}'" for a in archivos)}], filename=true)"""
+        ).fetchall()
+    finally:
+        con.close()
+    return {quincena: os.path.normpath(ruta) for quincena, ruta in filas}
+
+def migrar_silver_legado(ruta_legado, carpeta):
+    """Parte el Stock_Abonados_Silver_Detalle.parquet único en una partición por quincena."""
+    console.print("[cyan]📦 Migrando el Silver de abonados a particiones por quincena...[/]")
+    con = duckdb.connect(database=':memory:')
+    con.execute("PRAGMA memory_limit='2GB'")
+    try:
+        origen = f"read_parquet('{_sql_ruta(ruta_legado)}')"
+        total = con.execute(f"SELECT COUNT(*) FROM {origen}").fetchone()[0]  # type: ignore
+        quincenas = [q for (q,) in con.execute(f'SELECT DISTINCT "Quincena Evaluada" FROM {origen}').fetchall()]
+        for quincena in quincenas:
+            with escritura_atomica(ruta_particion(carpeta, quincena)) as ruta_temp:
+                con.execute(
+                    f"""COPY (SELECT * FROM {origen} WHERE "Quincena Evaluada" IS NOT DISTINCT FROM ?)
+                        TO '{_sql_ruta(ruta_temp)}' (FORMAT PARQUET, COMPRESSION 'SNAPPY')""", [quincena])
+        migradas = con.execute(
+            f"SELECT COUNT(*) FROM read_parquet('{_sql_ruta(os.path.join(carpeta, '*.parquet'))}')").fetchone()[0]  # type: ignore
+    finally:
+        con.close()
+    if migradas != total:
+        raise RuntimeError(f"Migración de abonados incompleta: {migradas:,} de {total:,} filas.")
+    logger.info(f"ABONADOS | Silver migrado a {len(quincenas)} particiones ({total:,} filas)")
+    console.print(f"[green]✅ {len(quincenas)} quincenas migradas ({total:,} filas).[/]")
+
+def retirar_silver_consolidado(ruta_consolidado, carpeta):
+    """
+    Borra el archivo único heredado: las particiones son la única copia vigente del detalle. Si trae
+    alguna quincena sin partición (ej. una migración interrumpida) se conserva y se avisa.
+    """
+    if not os.path.exists(ruta_consolidado):
+        return
+    con = duckdb.connect(database=':memory:')
+    try:
+        quincenas = {q for (q,) in con.execute(
+            f"""SELECT DISTINCT "Quincena Evaluada" FROM read_parquet('{_sql_ruta(ruta_consolidado)}')""").fetchall()}
+    finally:
+        con.close()
+    faltantes = quincenas - set(particiones_existentes(carpeta))
+    if faltantes:
+        console.print(f"[yellow]⚠️ {os.path.basename(ruta_consolidado)} trae quincenas sin partición ({', '.join(map(str, sorted(faltantes, key=str)))}); no se retira.[/]")
+        return
+    os.remove(ruta_consolidado)
+    logger.info(f"ABONADOS | Retirado {os.path.basename(ruta_consolidado)}; el detalle se lee desde las particiones")
+    console.print(f"[dim]🧹 {os.path.basename(ruta_consolidado)} retirado: el detalle se lee desde la carpeta de particiones.[/]")
+
+def refrescar_gold(carpeta, ruta_gold, quincenas=None):
+    """
+    Stock_Abonados_Gold_Resumen desde las particiones. Con 'quincenas' solo se recalculan esas
+    (sus filas previas se reemplazan y el resto del Gold se conserva); sin ellas, todo el Silver.
+    """
+    particiones = particiones_existentes(carpeta)
+    incremental = quincenas is not None and os.path.exists(ruta_gold)
+    objetivo = [particiones[q] for q in (quincenas if incremental else particiones) if q in particiones]
+    if not objetivo and not incremental:
+        return
+    agregado = """SELECT "Quincena Evaluada", Franquicia,
+                       COUNT(DISTINCT ID) as Total_Abonados,
+                       MAX(FechaFin) as Fecha_Corte
+                FROM read_parquet([{}], union_by_name=true)
+                GROUP BY "Quincena Evaluada", Franquicia""".format(", ".join(f"'{_sql_ruta(r)}'" for r in objetivo))
+    con = duckdb.connect(database=':memory:')
+    try:
+        with escritura_atomica(ruta_gold) as ruta_temp_gold:
+            if incremental:
+                con.execute("CREATE TEMP TABLE tocadas (q VARCHAR)")
+                con.executemany("INSERT INTO tocadas VALUES (?)", [[q] for q in quincenas])  # type: ignore
+                consulta = f"""
+                    SELECT * FROM read_parquet('{_sql_ruta(ruta_gold)}')
+                    WHERE "Quincena Evaluada" NOT IN (SELECT q FROM tocadas)
+                    {"UNION ALL BY NAME " + agregado if objetivo else ""}"""
+            else:
+                consulta = agregado
+            con.execute(f"COPY ({consulta}) TO '{_sql_ruta(ruta_temp_gold)}' (FORMAT PARQUET, COMPRESSION 'SNAPPY')")
+    finally:
+        con.close()
+
+def refrescar_sketches(carpeta, ruta_gold, quincenas=None):
+    """
+    Tablas Gold que resumen el detalle sin copiarlo, leyendo cada partición una sola vez:
+      - Stock_Abonados_Bitmaps_Gold: BitmapRoaring de IDs activos por quincena × franquicia, y desde
+        ellos Stock_Abonados_Delta_Gold (altas/bajas/retenidos contra la quincena anterior).
+      - Stock_Abonados_HLL_Gold: HyperLogLog por quincena × franquicia × estatus, para sumar abonados
+        distintos a cualquier nivel (sketches.distintos_abonados).
+    Con 'quincenas' solo se recalculan esas particiones; el delta siempre se rehace completo porque
+    sale de los bitmaps en milisegundos.
+    """
+    salidas = {ARCHIVO_BITMAPS_ABONADOS: (["Quincena Evaluada", "Fecha_Corte", "Franquicia"], bitmaps_por_grupo),
+               ARCHIVO_HLL_ABONADOS: (["Quincena Evaluada", "Fecha_Corte", "Franquicia", "Estatus"], hll_por_grupo)}
+    particiones = particiones_existentes(carpeta)
+    incremental = quincenas is not None and all(os.path.exists(os.path.join(ruta_gold, a)) for a in salidas)
+    tablas = {archivo: [] for archivo in salidas}
+    if incremental:
+        for archivo, partes in tablas.items():
+            df_previo = pd.read_parquet(os.path.join(ruta_gold, archivo))
+            partes.append(df_previo[~df_previo["Quincena Evaluada"].isin(quincenas)])
+    descartados = 0
+    for quincena in (quincenas if incremental else particiones):
+        if quincena not in particiones:
+            continue
+        df = pd.read_parquet(particiones[quincena], columns=["Quincena Evaluada", "FechaFin", "Franquicia", "Estatus", "ID"])
+        df = df.rename(columns={"FechaFin": "Fecha_Corte"})
+        for archivo, (llaves, construir) in salidas.items():
+            tablas[archivo].append(construir(df, llaves, "ID"))
+        descartados += int(tablas[ARCHIVO_BITMAPS_ABONADOS][-1]["Descartados"].sum())
+    if descartados:
+        logger.warning(f"ABONADOS | {descartados:,} filas con ID no numérico quedaron fuera de los bitmaps")
+    for archivo, partes in tablas.items():
+        df_tabla = pd.concat(partes, ignore_index=True) if partes else pd.DataFrame()
+        if df_tabla.empty:
+            continue
+        df_tabla = df_tabla.sort_values(salidas[archivo][0][1:], kind="stable", ignore_index=True)
+        guardar_parquet(df_tabla, archivo, ruta_destino=ruta_gold)
+        if archivo == ARCHIVO_BITMAPS_ABONADOS:
+            guardar_parquet(tabla_delta_abonados(df_tabla), ARCHIVO_DELTA_ABONADOS, ruta_destino=ruta_gold)
+
 # ==========================================
 # ORQUESTADOR (INCREMENTAL CRONOLÓGICO)
 # ==========================================
@@ -103,38 +302,44 @@ def ejecutar():
         os.makedirs(ruta_origen, exist_ok=True)
 
     # --- FIX CRONOLÓGICO: Ordenamos por la FECHA REAL del archivo, no por el nombre ---
+    # La fecha de corte sale de los metadatos persistidos; solo se recalcula para archivos nuevos o modificados
+    ruta_silver = PATHS.get("silver", "data/silver")
+    ruta_metadatos = os.path.join(ruta_silver, NOMBRE_METADATOS_SNAPSHOTS)
     archivos_raw = glob.glob(os.path.join(ruta_origen, "*.xlsx")) #type: ignore
-    archivos = sorted(
-        [f for f in archivos_raw if not os.path.basename(f).startswith("~$")],
-        key=lambda x: obtener_fecha_corte_snapshot(x)[0] if obtener_fecha_corte_snapshot(x)[0] else pd.Timestamp('1900-01-01') #type: ignore
-    )
+    metadatos = cargar_metadatos_snapshots(ruta_metadatos)
+    plan = planificar_snapshots([f for f in archivos_raw if not os.path.basename(f).startswith("~$")], metadatos)
+    guardar_metadatos_snapshots(ruta_metadatos, metadatos)
     
-    if not archivos:
+    if not plan:
         console.print("[bold red]⛔ No se encontraron archivos RAW para procesar.[/]")
         return
 
     # 1. LEER MEMORIA HISTÓRICA
-    ruta_silver = PATHS.get("silver", "data/silver")
-    ruta_silver_completa = os.path.join(ruta_silver, "Stock_Abonados_Silver_Detalle.parquet")
-    
+    carpeta_silver = os.path.join(ruta_silver, NOMBRE_SILVER_DETALLE)
+    ruta_consolidado = os.path.join(ruta_silver, NOMBRE_SILVER_DETALLE + ".parquet")
+    ruta_gold_completa = os.path.join(PATHS.get("gold", "data/gold"), NOMBRE_GOLD_RESUMEN)
+    rutas_gold_sketches = [os.path.join(PATHS.get("gold", "data/gold"), a) for a in (ARCHIVO_BITMAPS_ABONADOS, ARCHIVO_HLL_ABONADOS)]
+
     quincenas_existentes = set()
-    if os.path.exists(ruta_silver_completa):
-        try:
-            df_hist_meta = pd.read_parquet(ruta_silver_completa, columns=["Quincena Evaluada"])
-            quincenas_existentes = set(df_hist_meta["Quincena Evaluada"].unique())
-            del df_hist_meta
-            
+    try:
+        with bloqueo_dataset(carpeta_silver):
+            if os.path.exists(ruta_consolidado) and not glob.glob(os.path.join(carpeta_silver, "*.parquet")):
+                migrar_silver_legado(ruta_consolidado, carpeta_silver)
+            retirar_silver_consolidado(ruta_consolidado, carpeta_silver)
+            quincenas_existentes = set(particiones_existentes(carpeta_silver))
+        if quincenas_existentes:
             console.print(f"[green]✅ Memoria Silver cargada. {len(quincenas_existentes)} quincenas registradas.[/]")
-        except Exception as e:
-            console.print(f"[yellow]⚠️ Error leyendo memoria: {e}. Se hará lectura completa.[/]")
+    except Exception as e:
+        console.print(f"[yellow]⚠️ Error leyendo memoria: {e}. Se hará lectura completa.[/]")
 
     # 2. PROCESAMIENTO INTELIGENTE
-    console.print(f"\n[cyan]🚀 Fase 1: Escaneando {len(archivos)} Snapshots en orden cronológico...[/]")
+    console.print(f"\n[cyan]🚀 Fase 1: Escaneando {len(plan)} Snapshots en orden cronológico...[/]")
     dataframes_list = []
     quincenas_procesadas_hoy = []
+    conteos_hoy = {}
     
     # El último de la lista ordenada cronológicamente es el mes más reciente
-    ultimo_archivo_path = archivos[-1] 
+    ultimo_archivo_path = plan[-1][0]
 
     with Progress(
         SpinnerColumn(),
@@ -146,20 +351,16 @@ def ejecutar():
         console=console
     ) as progress:
         
-        task = progress.add_task("Procesando...", total=len(archivos))
+        task = progress.add_task("Procesando...", total=len(plan))
         
-        for archivo in archivos:
+        for archivo, fecha_corte, quincena_nombre in plan:
             nombre_archivo = os.path.basename(archivo)
             es_ultimo_archivo = (archivo == ultimo_archivo_path)
-            
-            fecha_inicio, fecha_fin, quincena_nombre = obtener_fecha_corte_snapshot(archivo)
-            
-            if not fecha_inicio:
-                progress.advance(task)
-                continue
+            fecha_inicio = fecha_fin = fecha_corte
 
-            # OMISIÓN INTELIGENTE
-            if quincena_nombre in quincenas_existentes and not es_ultimo_archivo:
+            # OMISIÓN INTELIGENTE (el último snapshot también se salta si no cambió desde que se ingirió)
+            ya_ingerido = metadatos[nombre_archivo]["filas"] is not None
+            if quincena_nombre in quincenas_existentes and (not es_ultimo_archivo or ya_ingerido):
                 progress.console.print(f"[dim]  ⏭️ Saltando -> {quincena_nombre} (Ya en Silver)[/]")
                 progress.advance(task)
                 continue
@@ -169,14 +370,11 @@ def ejecutar():
                 if es_ultimo_archivo:
                     progress.console.print(f"[magenta]  🔄 Refrescando quincena actual -> {quincena_nombre}[/]")
                 
-                df = pl.read_excel(archivo, engine="calamine", infer_schema_length=0).to_pandas(use_pyarrow_extension_array=True)
+                df = leer_excel_proyectado(archivo, COLS_EXCEL_ABONADOS, alias=MAPEO_COLUMNAS).to_pandas(use_pyarrow_extension_array=True)
                 if df.empty: 
                     progress.advance(task)
                     continue
 
-                df.columns = df.columns.astype(str).str.strip()
-                df = df.rename(columns=MAPEO_COLUMNAS)
-
                 # Construcción del DataFrame pequeño
                 df_small = pd.DataFrame()
                 df_small["ID"] = df["ID"] if "ID" in df.columns else None
@@ -201,6 +399,7 @@ def ejecutar():
 
                 dataframes_list.append(df_small[COLS_ABONADOS_SILVER].copy())
                 quincenas_procesadas_hoy.append(quincena_nombre)
+                conteos_hoy[nombre_archivo] = (len(df), len(df_small))
 
                 progress.console.print(f"[green]  ✅ Procesado -> {quincena_nombre} ({len(df_small):,} abonados)[/]")
 
@@ -214,85 +413,46 @@ def ejecutar():
 
     # 3. UPSERT EN SILVER
     if not dataframes_list:
-        console.print("[bold green]✅ El sistema ya está al día.[/]")
-        ruta_gold = PATHS.get("gold", "data/gold")
-        ruta_gold_completa = os.path.join(ruta_gold, "Stock_Abonados_Gold_Resumen.parquet")
-        
         # REGLA DE SEGURIDAD: Si no hay archivos nuevos, pero falta el Gold, lo regeneramos desde Silver
-        if not os.path.exists(ruta_gold_completa) and os.path.exists(ruta_silver_completa):
-            console.print("[yellow]⚠️ Silver existe pero falta el Gold. Regenerando tabla resumen...[/]")
-            con = duckdb.connect(database=':memory:')
-            query_gold = f"""
-            COPY (
-                SELECT "Quincena Evaluada", Franquicia, 
-                       COUNT(DISTINCT ID) as Total_Abonados, 
-                       MAX(FechaFin) as Fecha_Corte
-                FROM read_parquet('{ruta_silver_completa.replace(chr(92), '/')}')
-                GROUP BY "Quincena Evaluada", Franquicia
-            ) TO '{ruta_gold_completa.replace(chr(92), '/')}' (FORMAT PARQUET, COMPRESSION 'SNAPPY')
-            """
-            con.execute(query_gold)
-            con.close()
-            console.print("[bold green]✅ Stock_Abonados_Gold_Resumen.parquet reconstruido exitosamente.[/]")
+        faltantes = [r for r in [ruta_gold_completa, *rutas_gold_sketches] if not os.path.exists(r)]
+        if faltantes and quincenas_existentes:
+            console.print("[yellow]⚠️ Silver existe pero falta el Gold. Regenerando...[/]")
+            with bloqueo_dataset(carpeta_silver):
+                if ruta_gold_completa in faltantes:
+                    refrescar_gold(carpeta_silver, ruta_gold_completa)
+                if set(faltantes) & set(rutas_gold_sketches):
+                    refrescar_sketches(carpeta_silver, os.path.dirname(ruta_gold_completa))
+            console.print(f"[bold green]✅ {', '.join(os.path.basename(r) for r in faltantes)} reconstruido(s) exitosamente.[/]")
         else:
             console.print("[bold green]✅ El sistema ya está al día.[/]")
         return
 
-    console.print(f"\n[cyan]🔄 Fase 2: Uniendo con historial Silver (Upsert)...[/]")
+    console.print(f"\n[cyan]🔄 Fase 2: Reemplazando {len(set(quincenas_procesadas_hoy))} partición(es) del Silver...[/]")
     df_nuevo_lote = pd.concat(dataframes_list, ignore_index=True).drop_duplicates(subset=["Quincena Evaluada", "ID"], keep="last")
     dataframes_list.clear()
     
     # Limpiamos los nulos del lote nuevo antes de inyectarlo
     df_nuevo_lote = limpiar_nulos_powerbi(df_nuevo_lote)
-    
-    if os.path.exists(ruta_silver_completa):
-        console.print("[cyan]🦆 Ejecutando Upsert Out-Of-Core con DuckDB (Cero RAM)...[/]")
-        con = duckdb.connect(database=':memory:')
-        con.execute("PRAGMA memory_limit='2GB'")
-        con.register('df_nuevo_lote', df_nuevo_lote)
-        
-        quincenas_str = ", ".join([f"'{q}'" for q in quincenas_procesadas_hoy])
-        ruta_temp = ruta_silver_completa + ".tmp"
-        
-        # Hacemos el cruce escribiendo directamente al disco duro
-        query = f"""
-        COPY (
-            SELECT * FROM read_parquet('{ruta_silver_completa.replace(chr(92), '/')}')
-            WHERE "Quincena Evaluada" NOT IN ({quincenas_str})
-            UNION ALL BY NAME
-            SELECT * FROM df_nuevo_lote
-        ) TO '{ruta_temp.replace(chr(92), '/')}' (FORMAT PARQUET, COMPRESSION 'SNAPPY')
-        """
-        con.execute(query)
-        
-        # 4. GUARDADO GOLD OUT-OF-CORE
-        ruta_gold = PATHS.get("gold", "data/gold")
-        ruta_gold_completa = os.path.join(ruta_gold, "Stock_Abonados_Gold_Resumen.parquet")
-        query_gold = f"""
-        COPY (
-            SELECT "Quincena Evaluada", Franquicia, 
-                   COUNT(DISTINCT ID) as Total_Abonados, 
-                   MAX(FechaFin) as Fecha_Corte
-            FROM read_parquet('{ruta_temp.replace(chr(92), '/')}')
-            GROUP BY "Quincena Evaluada", Franquicia
-        ) TO '{ruta_gold_completa.replace(chr(92), '/')}' (FORMAT PARQUET, COMPRESSION 'SNAPPY')
-        """
-        con.execute(query_gold)
-        con.close()
-        
-        # Reemplazamos el silver viejo por el nuevo consolidado
-        if os.path.exists(ruta_silver_completa):
-            os.remove(ruta_silver_completa)
-        os.rename(ruta_temp, ruta_silver_completa)
-        
-        del df_nuevo_lote
-        
-    else:
-        df_silver_final = df_nuevo_lote
-        guardar_parquet(df_silver_final, "Stock_Abonados_Silver_Detalle.parquet", filas_iniciales=len(df_silver_final), ruta_destino=ruta_silver)
-        df_gold = df_silver_final.groupby(["Quincena Evaluada", "Franquicia"], as_index=False).agg(Total_Abonados=("ID", "nunique"), Fecha_Corte=("FechaFin", "max"))
-        guardar_parquet(df_gold, "Stock_Abonados_Gold_Resumen.parquet", filas_iniciales=len(df_gold), ruta_destino=PATHS.get("gold", "data/gold"))
-    
+
+    # Cada quincena es una escritura independiente; el Gold solo recalcula las tocadas
+    with bloqueo_dataset(carpeta_silver):
+        previas = particiones_existentes(carpeta_silver)
+        tocadas = []
+        for quincena, df_quincena in df_nuevo_lote.groupby("Quincena Evaluada", sort=False):
+            ruta = ruta_particion(carpeta_silver, quincena)
+            if previas.get(quincena, ruta) != ruta:  # Partición con otro nombre (ej. otra versión del slug)
+                os.remove(previas[quincena])
+            guardar_parquet(df_quincena, os.path.basename(ruta), filas_iniciales=len(df_quincena), ruta_destino=carpeta_silver)
+            tocadas.append(quincena)
+        refrescar_gold(carpeta_silver, ruta_gold_completa, quincenas=tocadas)
+        refrescar_sketches(carpeta_silver, os.path.dirname(ruta_gold_completa), quincenas=tocadas)
+        # Recién ahora los snapshots cuentan como ingeridos (una corrida sin cambios ya no los abre)
+        for nombre_archivo, (filas, abonados) in conteos_hoy.items():
+            metadatos[nombre_archivo].update(filas=filas, abonados=abonados)
+        guardar_metadatos_snapshots(ruta_metadatos, metadatos)
+    del df_nuevo_lote
+
+    console.print(f"[green]✅ Particiones actualizadas: {', '.join(tocadas)}[/]")
     console.print(f"[bold green]✨ Proceso Finalizado. (Sincronizado Cronológicamente)[/]")
 
 if __name__ == "__main__":
@@ -10,7 +10,7 @@ sys.path.append(parent_dir)
 
 from config import PATHS, FOLDERS_ACT_DATOS
 # Importamos la función incremental de Polars
-from utils import guardar_parquet, reportar_tiempo, console, ingesta_incremental_polars, standard_hours, limpiar_nulos_powerbi
+from utils import guardar_parquet, reportar_tiempo, console, ingesta_incremental_polars, standard_hours, limpiar_nulos_powerbi, ultimo_por_llave
 
 @reportar_tiempo
 def ejecutar():
@@ -161,11 +161,8 @@ def ejecutar():
     # ---------------------------------------------------------
     # 5. DEDUPLICACIÓN Y GUARDADO
     # ---------------------------------------------------------
-    if 'fecha_mod_archivo' in df_total.columns:
-        df_total = df_total.sort_values(by='fecha_mod_archivo', ascending=True)
-        
     subset_duplicados = ["N° Abonado", "Fecha", "Hora"]
-    df_final = df_total.drop_duplicates(subset=subset_duplicados, keep='last')
+    df_final = ultimo_por_llave(df_total, subset_duplicados, 'fecha_mod_archivo')
     
     if 'fecha_mod_archivo' in df_final.columns:
         df_final = df_final.drop(columns=['fecha_mod_archivo'])
@@ -8,7 +8,7 @@ parent_dir = os.path.dirname(current_dir)
 sys.path.append(parent_dir)
 
 from config import PATHS
-from utils import guardar_parquet, reportar_tiempo, limpiar_nulos_powerbi, console
+from utils import guardar_parquet, reportar_tiempo, limpiar_nulos_powerbi, console, leer_dimension_pandas
 
 @reportar_tiempo
 def ejecutar(ruta_silver=None): 
@@ -20,7 +20,7 @@ def ejecutar(ruta_silver=None):
 
     if not os.path.exists(ruta_silver):
         console.print("[red]❌ No se encontró el archivo Silver origen (Afluencia_Consolidada).[/]")
-        return
+        raise FileNotFoundError(ruta_silver)
 
     NOMBRE_GOLD = "Afluencia_Gold.parquet"
     RUTA_GOLD = os.path.join(PATHS["gold"], NOMBRE_GOLD)
@@ -33,7 +33,7 @@ def ejecutar(ruta_silver=None):
         console.print(f"[cyan]🚀 Iniciando normalización completa ({len(df_silver)} registros)...[/]")
     except Exception as e:
         console.print(f"[red]❌ Error leyendo archivo Silver: {e}[/]")
-        return
+        raise
 
     # -------------------------------------------------------------------------
     # 3. NORMALIZACIÓN (APLICADA AL UNIVERSO COMPLETO)
@@ -44,7 +44,7 @@ def ejecutar(ruta_silver=None):
         try:
             with console.status("[blue]Aplicando Dim Oficinas al universo completo...[/]"):
                 # Carga del Diccionario
-                df_map = pd.read_csv(path_map, sep=',', encoding='latin-1')
+                df_map = leer_dimension_pandas(path_map, arrow_dtypes=False, sep=',', encoding='latin-1')
                 
                 # Blindaje de columnas y datos del mapa
                 df_map.columns = df_map.columns.astype(str).str.strip()
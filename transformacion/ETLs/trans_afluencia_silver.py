@@ -1,9 +1,7 @@
 import pandas as pd
-from rapidfuzz import process, fuzz
 import re
 import os
 import sys
-from unidecode import unidecode
 import gc
 
 # --- SETUP DE RUTAS (TRUCO DEL ASCENSOR) ---
@@ -12,7 +10,7 @@ parent_dir = os.path.dirname(current_dir)
 sys.path.append(parent_dir)
 
 from config import PATHS, MAPA_MESES
-from utils import guardar_parquet, reportar_tiempo, console
+from utils import guardar_parquet, reportar_tiempo, console, leer_dimension_pandas
 from rich.progress import Progress, SpinnerColumn, BarColumn, TextColumn, TimeElapsedColumn
 
 # =============================================================================
@@ -32,6 +30,7 @@ PATRON_NO_HUMANO = re.compile('|'.join(KEYWORDS_NO_HUMANOS), re.IGNORECASE)
 # --- FUNCIONES AUXILIARES ---
 def normalize_text(text):
     if isinstance(text, str):
+        from unidecode import unidecode  # Carga diferida: solo se paga cuando hay matching
         text = unidecode(text).lower()
         text = re.sub(r'[^a-z0-9\s]', '', text)
         return re.sub(r'\s+', ' ', text).strip()
@@ -72,6 +71,9 @@ def preparar_universo(df):
 # =============================================================================
 @reportar_tiempo
 def ejecutar():
+    # Carga diferida: rapidfuzz solo se importa cuando realmente se corre el matching
+    from rapidfuzz import process, fuzz
+
     console.rule("[bold magenta]4. ETL SILVER: MATCHING BLINDADO (MODO FULL REFRESH)[/]")
     
     # --- DEFINICIÓN DE RUTAS ---
@@ -96,7 +98,11 @@ def ejecutar():
         if os.path.exists(ruta):
             try:
                 # 🚀 OPTIMIZACIÓN RAM: PyArrow reduce el peso de 1.8M de filas en un ~70%
-                df_source = pd.read_parquet(ruta, dtype_backend="pyarrow")
+                if origen == "ATC":
+                    # Compartido con ONT OFF: se reutiliza la tabla Arrow de la caché de la corrida
+                    df_source = leer_dimension_pandas(ruta)
+                else:
+                    df_source = pd.read_parquet(ruta, dtype_backend="pyarrow")
                 for col in cols_necesarias:
                     if col not in df_source.columns: df_source[col] = None
                 
@@ -121,7 +127,7 @@ def ejecutar():
     
     # --- PASO 2: MATCHING INTELIGENTE ---
     path_maestro = os.path.join(PATHS["gold"], "Maestro_Empleados_Gold.parquet")
-    df_maestro = pd.read_parquet(path_maestro) if os.path.exists(path_maestro) else pd.DataFrame()
+    df_maestro = leer_dimension_pandas(path_maestro, arrow_dtypes=False) if os.path.exists(path_maestro) else pd.DataFrame()
     path_univ = os.path.join(PATHS["raw_asesores_univ_14"], "Data_Universo_Asesores.xlsx")
     df_univ = pd.read_excel(path_univ) if os.path.exists(path_univ) else pd.DataFrame()
     
@@ -44,7 +44,7 @@ def ejecutar():
         df_total = pd.read_parquet(RUTA_BRONZE, dtype_backend="pyarrow")
     except Exception as e:
         console.print(f"[bold red]❌ Error leyendo Bronze: {e}[/]")
-        return
+        raise
 
     if df_total.empty:
         console.print("[yellow]⚠️ El Bronze está vacío.[/]")
@@ -9,7 +9,7 @@ parent_dir = os.path.dirname(current_dir)
 sys.path.append(parent_dir)
 
 from config import PATHS
-from utils import guardar_parquet, reportar_tiempo, limpiar_nulos_powerbi, console, standard_hours, ingesta_incremental_polars
+from utils import guardar_parquet, reportar_tiempo, limpiar_nulos_powerbi, console, standard_hours, ingesta_incremental_polars, escritura_atomica, ruta_staging, sql_ultimo_por_llave
 
 @reportar_tiempo
 def ejecutar():
@@ -114,7 +114,11 @@ def ejecutar():
         
         # Columnas dinámicas para particionar la deduplicación
         cols_dedupe = ["N° Abonado", "Fecha Llamada", "Hora"]
-        part_cols = ", ".join([f'"{c}"' for c in cols_dedupe if c in schema_info or c == "Hora"])
+        llaves = [c for c in cols_dedupe if c in schema_info or c == "Hora"]
+        # Último registro por llave con arg_max (agregación por hash, sin ordenar por ventana); ante
+        # empates gana la fila del Excel modificado más recientemente.
+        desempate = "Fecha_Modificacion_Archivo" if "Fecha_Modificacion_Archivo" in schema_info else None
+        dedup_sql = sql_ultimo_por_llave("SELECT * FROM Filtros", llaves, "Fecha Llamada", nulos="primero", columna_desempate=desempate)
         
         query = f"""
         COPY (
@@ -129,18 +133,14 @@ def ejecutar():
                 WHERE "N° Abonado" IS NOT NULL
                   AND "Fecha Llamada" <= CURRENT_DATE + INTERVAL 1 DAY
             )
-            SELECT *
-            FROM Filtros
-            -- Equivalente perfecto a .sort_values("Fecha Llamada", ascending=False).drop_duplicates(keep='first')
-            QUALIFY ROW_NUMBER() OVER (
-                PARTITION BY {part_cols}
-                ORDER BY "Fecha Llamada" DESC
-            ) = 1
-        ) TO '{RUTA_GOLD_COMPLETA.replace(chr(92), '/')}' (FORMAT PARQUET, COMPRESSION 'SNAPPY');
+            {dedup_sql}
+        ) TO '{ruta_staging(RUTA_GOLD_COMPLETA).replace(chr(92), '/')}' (FORMAT PARQUET, COMPRESSION 'SNAPPY');
         """
         
         console.print("[cyan]⏳ Ejecutando consulta relacional de DuckDB...[/]")
-        con.execute(query)
+        # Staging + publicación atómica: Power BI nunca ve un Gold a medio escribir
+        with escritura_atomica(RUTA_GOLD_COMPLETA):
+            con.execute(query)
         
         # Obtener registro de filas para el log con un simple count en metadatos
         filas_finales = con.execute(f"SELECT COUNT(*) FROM read_parquet('{RUTA_GOLD_COMPLETA.replace(chr(92), '/')}')").fetchone()[0] #type: ignore
@@ -150,6 +150,7 @@ def ejecutar():
         
     except Exception as e:
         console.print(f"[bold red]❌ Error procesando con DuckDB: {e}[/]")
+        raise
 
 if __name__ == "__main__":
     ejecutar()
\ No newline at end of file
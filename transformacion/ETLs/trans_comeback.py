@@ -9,7 +9,7 @@ parent_dir = os.path.dirname(current_dir)
 sys.path.append(parent_dir)
 
 from config import PATHS
-from utils import guardar_parquet, reportar_tiempo, limpiar_nulos_powerbi, console, standard_hours, ingesta_incremental_polars
+from utils import guardar_parquet, reportar_tiempo, limpiar_nulos_powerbi, console, standard_hours, ingesta_incremental_polars, ultimo_por_llave
 
 @reportar_tiempo
 def ejecutar():
@@ -44,7 +44,7 @@ def ejecutar():
         df_total = pd.read_parquet(RUTA_BRONZE, dtype_backend="pyarrow")
     except Exception as e:
         console.print(f"[bold red]❌ Error leyendo Bronze: {e}[/]")
-        return
+        raise
 
     if df_total.empty:
         console.print("[yellow]⚠️ El Bronze está vacío.[/]")
@@ -105,14 +105,12 @@ def ejecutar():
     # ---------------------------------------------------------
     # 5. DEDUPLICACIÓN GLOBAL Y GUARDADO
     # ---------------------------------------------------------
-    # Ordenamos por fecha descendente
-    df_total = df_total.sort_values(by="Fecha", ascending=False)
-
-    # Deduplicación Final (Keep First sobre orden descendente prioriza la data de la tarde)
+    # Deduplicación Final: equivale a ordenar por fecha descendente y quedarse con la primera fila
+    # (fecha más reciente; fechas nulas pierden y entre empates gana la primera aparición)
     subset_dedupe = ["N° Abonado", "Fecha", "Hora"]
     subset_dedupe = [c for c in subset_dedupe if c in df_total.columns]
     
-    df_final = df_total.drop_duplicates(subset=subset_dedupe, keep='first')
+    df_final = ultimo_por_llave(df_total, subset_dedupe, "Fecha", nulos="primero", desempate="primero")
     
     # Estandarización final
     df_final = limpiar_nulos_powerbi(df_final)
@@ -1,7 +1,7 @@
 import pandas as pd
 import os
 from config import PATHS
-from utils import guardar_parquet, console
+from utils import guardar_parquet, console, leer_dimension_pandas
 
 def generar_dim_franquicias():
     console.rule("[bold cyan]GENERANDO DIMENSIÓN FRANQUICIAS[/]")
@@ -13,7 +13,7 @@ def generar_dim_franquicias():
     # 1. Leer Abonados
     try:
         path_abo = os.path.join(ruta_gold, "Stock_Abonados_Gold_Resumen.parquet")
-        df_abo = pd.read_parquet(path_abo, dtype_backend="pyarrow")
+        df_abo = leer_dimension_pandas(path_abo, columnas=["Franquicia"])
         lista_abo = df_abo["Franquicia"].unique().tolist()
         console.print(f"   ✅ Abonados: {len(lista_abo)} franquicias.")
     except Exception:
@@ -24,7 +24,7 @@ def generar_dim_franquicias():
     try:
         # El script maestro ahora genera "IDF_Gold.parquet", no el nombre largo anterior
         path_idf = os.path.join(ruta_gold, "IDF_Gold.parquet")
-        df_idf = pd.read_parquet(path_idf, dtype_backend="pyarrow")
+        df_idf = leer_dimension_pandas(path_idf, columnas=["Franquicia"])
         lista_idf = df_idf["Franquicia"].unique().tolist()
         console.print(f"   ✅ IDF: {len(lista_idf)} franquicias.")
     except Exception:
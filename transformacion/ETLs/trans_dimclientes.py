@@ -9,7 +9,7 @@ grandparent_dir = os.path.dirname(parent_dir)  # Sube el segundo nivel
 sys.path.append(grandparent_dir)
 
 from config import PATHS
-from utils import ingesta_incremental_polars, reportar_tiempo, console
+from utils import ingesta_incremental_polars, reportar_tiempo, console, escritura_atomica
 
 @reportar_tiempo
 def ejecutar():
@@ -80,7 +80,6 @@ def ejecutar():
     # --- QUERY MAESTRA OUT-OF-CORE ---
     sql = f"""
         --sql
-        COPY (
             WITH bronze_clean AS (
                 SELECT 
                     *,
@@ -103,25 +102,20 @@ def ejecutar():
             FROM bronze_dedup b
             {gold_join}
             ORDER BY Cliente_SK
-        ) TO '{RUTA_GOLD_COMPLETA}.temp' (FORMAT PARQUET, COMPRESSION 'ZSTD')
     """
     
     try:
         console.print("[info]💾 Ejecutando cruce Out-Of-Core y escribiendo archivo Gold Parquet...[/]")
-        con.execute(sql)
-        
-        # Reemplazo atómico seguro para Windows
-        if os.path.exists(RUTA_GOLD_COMPLETA):
-            os.remove(RUTA_GOLD_COMPLETA)
-        os.rename(RUTA_GOLD_COMPLETA + ".temp", RUTA_GOLD_COMPLETA)
+        # Staging + publicación atómica bajo el lock del dataset (seguro para Windows y Power BI)
+        with escritura_atomica(RUTA_GOLD_COMPLETA) as ruta_temp:
+            con.execute(f"COPY ({sql}) TO '{ruta_temp}' (FORMAT PARQUET, COMPRESSION 'ZSTD')")
         
         count = con.execute(f"SELECT COUNT(*) FROM read_parquet('{RUTA_GOLD_COMPLETA}')").fetchone()[0] #type: ignore
         console.print(f"[bold green]✅ Dim_Cliente generada exitosamente. Total abonados únicos: {count:,}[/]")
 
     except Exception as e:
         console.print(f"[bold red]❌ Error en DuckDB generando la Dimensión: {e}[/]")
-        if os.path.exists(RUTA_GOLD_COMPLETA + ".temp"):
-            os.remove(RUTA_GOLD_COMPLETA + ".temp")
+        raise
     
     finally:
         con.close()
@@ -13,7 +13,7 @@ parent_dir = os.path.dirname(current_dir)
 sys.path.append(parent_dir)
 
 from config import PATHS
-from utils import reportar_tiempo, console
+from utils import reportar_tiempo, console, escritura_atomica
 
 # Mapa para convertir meses texto a número dentro de DuckDB
 MAPA_MESES_SQL = """
@@ -130,12 +130,13 @@ def ejecutar():
 
             console.print("[info]🦆 Ejecutando transformación y guardado en Parquet...[/]")
             
-            # Ejecutamos el COPY directo a Parquet (Súper eficiente)
-            con.execute(f"""
-                COPY ({query_maestra}) 
-                TO '{RUTA_GOLD_COMPLETA}' 
-                (FORMAT PARQUET, COMPRESSION 'SNAPPY')
-            """)
+            # Ejecutamos el COPY directo a Parquet (Súper eficiente), en staging y con publicación atómica
+            with escritura_atomica(RUTA_GOLD_COMPLETA) as ruta_tmp:
+                con.execute(f"""
+                    COPY ({query_maestra}) 
+                    TO '{ruta_tmp}' 
+                    (FORMAT PARQUET, COMPRESSION 'SNAPPY')
+                """)
             
             # 5. VALIDACIÓN FINAL
             resumen = con.execute(f"""
@@ -153,6 +154,7 @@ def ejecutar():
 
     except Exception as e:
         console.print(f"[bold red]💥 Error crítico procesando la data: {e}[/]")
+        raise
     
     finally:
         con.close()
@@ -9,7 +9,7 @@ grandparent_dir = os.path.dirname(parent_dir)  # Sube el segundo nivel
 sys.path.append(grandparent_dir)
 
 from config import PATHS, MAPA_MESES
-from utils import guardar_parquet, reportar_tiempo, limpiar_nulos_powerbi, console, standard_hours, ingesta_incremental_polars
+from utils import guardar_parquet, reportar_tiempo, limpiar_nulos_powerbi, console, standard_hours, ingesta_incremental_polars, leer_dimension_polars, escritura_atomica
 
 @reportar_tiempo
 def ejecutar():
@@ -45,7 +45,7 @@ def ejecutar():
         df_total= pl.scan_parquet(RUTA_BRONZE)
     except Exception as e:
         console.print(f"[bold red]❌ Error leyendo Bronze: {e}[/]")
-        return
+        raise
 
     # ---------------------------------------------------------
     # 4. TRANSFORMACIÓN Y LIMPIEZA (POLARS)
@@ -62,7 +62,8 @@ def ejecutar():
         "Vendedor", "Suscripción", "Grupo Afinidad", "Nombre Franquicia", 
         "Ciudad"])
 
-    df_atc = pl.scan_parquet(os.path.join(RUTA_GOLD, "Atencion_Cliente_Gold.parquet"))
+    # El Gold de ATC se comparte con Afluencia: se toma de la caché de dimensiones de la corrida
+    df_atc = leer_dimension_polars(os.path.join(RUTA_GOLD, "Atencion_Cliente_Gold.parquet")).lazy()
     # B. TRANSFORMACION DE TIPOS
     df_total = df_total.with_columns(pl.col("Hora").str.to_time("%H:%M:%S"))
     #df_atc = df_atc.with_columns(pl.col("Hora").str.to_time("%H:%M:%S"))
@@ -80,7 +81,8 @@ def ejecutar():
         "Vendedor", "Suscripción", "Grupo Afinidad", "Nombre Franquicia", 
         "Ciudad"])
     
-    df_final.sink_parquet(RUTA_GOLD_COMPLETA, compression="zstd", row_group_size=100000)
+    with escritura_atomica(RUTA_GOLD_COMPLETA) as ruta_tmp:
+        df_final.sink_parquet(ruta_tmp, compression="zstd", row_group_size=100000)
     print(df_final.describe())
     
 if __name__ == "__main__":
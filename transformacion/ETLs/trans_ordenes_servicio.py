@@ -4,8 +4,11 @@ import sys
 import os
 import glob
 import re
+import json
 import datetime
 import polars as pl
+import duckdb
+import pyarrow as pa
 
 # ==========================================
 # 🔼 EL TRUCO DEL ASCENSOR 🔼
@@ -15,8 +18,11 @@ parent_dir = os.path.dirname(current_dir)
 granparent_dir = os.path.dirname(parent_dir)  # Sube el segundo nivel
 sys.path.append(granparent_dir)
 
-from config import PATHS
-from utils import guardar_parquet, reportar_tiempo, console, limpiar_nulos_powerbi, archivos_raw
+from config import PATHS, BACKLOG_TRAMOS_DIAS
+from utils import (guardar_parquet, reportar_tiempo, console, limpiar_nulos_powerbi, archivos_raw,
+                   ParticionesIncrementales, bloqueo_dataset, ClasificadorPalabras, resolver_fechas_mixtas,
+                   ultimo_por_llave, leer_excel_proyectado, escritura_atomica)
+from sketches import sketches_por_grupo, tabla_percentiles
 
 ruta_silver = PATHS.get("silver")
 ruta_gold = PATHS.get("gold")
@@ -65,6 +71,17 @@ EXCLUIR_SOLUCIONES = [
     "LLAMADAS DE AGENDAMIENTO", "ORDEN REPETIDA", "ORDEN MAL GENERADA", "CAMBIO DE CLAVE"
 ]
 
+# --- CLASIFICADORES (UN SOLO AUTÓMATA POR COLUMNA) ---
+# Dentro del texto de la solución: administrativo > físico > lógico. Las reglas de usuario/grupo
+# se intercalan en clasificar_tickets respetando la prioridad original.
+CLASIFICADOR_SOLUCION = ClasificadorPalabras([
+    ("ADMINISTRATIVO", SOLUCIONES_ADMINISTRATIVAS),
+    ("FISICO", SOLUCIONES_FISICAS_OP),
+    ("LOGICO", SOLUCIONES_LOGICAS_NOC),
+])
+CLASIFICADOR_USUARIO = ClasificadorPalabras([("NOC", ["NOC"])])
+CLASIFICADOR_GRUPO = ClasificadorPalabras([("OPERACIONES", ["OPERACIONES", "MESA DE CONTROL"])])
+
 # ==========================================
 # 2. DEFINICIÓN DE COLUMNAS
 # ==========================================
@@ -100,6 +117,17 @@ ORDEN_SLA_STATS = [
     "Clasificacion", "SLA Resolucion Min", "SLA Despacho Min", "SLA Impresion Min"
 ]
 
+# Sketches t-digest de los tres SLA por grupo fino: cualquier percentil a cualquier nivel se responde
+# fusionando sketches (sketches.percentiles_sla), sin las filas crudas de SLA_GOLD_STATS.
+LLAVES_SKETCH_SLA = ["Quincena Evaluada", "Franquicia", "Clasificacion"]
+METRICAS_SLA = ["SLA Resolucion Min", "SLA Despacho Min", "SLA Impresion Min"]
+NIVELES_PERCENTILES_SLA = [
+    LLAVES_SKETCH_SLA,
+    ["Quincena Evaluada", "Franquicia"],
+    ["Quincena Evaluada", "Clasificacion"],
+    ["Quincena Evaluada"],
+]
+
 # --- LA NUEVA TABLA ÚNICA DE HECHOS PARA POWER BI ---
 ORDEN_FINAL_FACT_TICKETS = [
     "Quincena Evaluada", "Franquicia", "Fecha Apertura Date", "Fecha Cierre Date",
@@ -109,6 +137,18 @@ ORDEN_FINAL_FACT_TICKETS = [
     "Cumplio_SLA", "Duracion_Horas", "Es_Falla"
 ]
 
+# --- BACKLOG: TICKETS ABIERTOS SEGÚN SU ÚLTIMA APARICIÓN ---
+# Estado incremental (una fila por orden abierta) y las dos tablas que se publican a partir de él.
+ORDEN_BACKLOG = [
+    "N° Orden", "N° Contrato", "Franquicia", "Clasificacion", "Grupo Trabajo", "Detalle Orden",
+    "Estatus_orden", "Fecha Apertura", "Quincena Evaluada", "FechaFin"
+]
+ORDEN_BACKLOG_GOLD = ["Fecha Corte"] + ORDEN_BACKLOG + ["Edad_Dias", "Tramo_Edad", "Orden_Tramo"]
+ORDEN_BACKLOG_RESUMEN = [
+    "Fecha Corte", "Franquicia", "Clasificacion", "Tramo_Edad", "Orden_Tramo",
+    "Tickets", "Edad_Promedio_Dias", "Edad_Max_Dias"
+]
+
 COLS_INPUT_RAW = [
     "FechaInicio", "FechaFin", "FechaInicioQuincena", "Quincena Evaluada",
     "N° Contrato", "Estatus contrato", "N° Orden", "Estatus_orden",
@@ -118,9 +158,19 @@ COLS_INPUT_RAW = [
     "Usuario Final", "Solucion Aplicada"
 ]
 
+# Columnas que se leen de los Excel de IdF (el resto del exporte ni se convierte)
+COLS_EXCEL_IDF = [
+    "N° Contrato", "Estatus contrato", "N° Orden", "Estatus_orden",
+    "Fecha Creacion", "Fecha Impresion", "Fecha Finalizacion",
+    "Grupo Afinidad", "Detalle Orden", "Franquicia", "Grupo Trabajo",
+    "Usuario Emisión", "Usuario Impresión", "Usuario Final", "Solucion Aplicada"
+]
+
 # ==========================================
 # 3. FUNCIONES UTILITARIAS
 # ==========================================
+MESES_QUINCENA = ["", "ENE", "FEB", "MAR", "ABR", "MAY", "JUN", "JUL", "AGO", "SEP", "OCT", "NOV", "DIC"]
+
 def obtener_rango_fechas(nombre_archivo):
     try:
         nombre_limpio = os.path.basename(nombre_archivo).lower()
@@ -133,37 +183,44 @@ def obtener_rango_fechas(nombre_archivo):
         f_fin = datetime.datetime.strptime(norm(fechas_encontradas[1]), "%d-%m-%Y")
 
         quincena_str = "Q1" if f_fin.day <= 15 else "Q2"
-        meses = ["", "ENE", "FEB", "MAR", "ABR", "MAY", "JUN", "JUL", "AGO", "SEP", "OCT", "NOV", "DIC"]
-        nombre_etiqueta = f"{meses[f_fin.month]} {f_fin.year} {quincena_str}"
+        nombre_etiqueta = f"{MESES_QUINCENA[f_fin.month]} {f_fin.year} {quincena_str}"
         return f_inicio, f_fin, nombre_etiqueta
     except Exception: return None, None, None
 
-def limpiar_fechas_mixtas(series):
-    if pd.api.types.is_datetime64_any_dtype(series): return series
-    series_nums = pd.to_numeric(series, errors='coerce')
-    mask_es_serial = (series_nums > 35000) & (series_nums < 60000)
-    fechas_excel = pd.to_datetime(series_nums[mask_es_serial], unit='D', origin='1899-12-30')
-    resto = series[~mask_es_serial].astype(str).str.strip()
-    fechas_texto = pd.to_datetime(resto, dayfirst=True, errors='coerce')
-    return fechas_excel.combine_first(fechas_texto)
+def clasificar_tickets(solucion_norm, usuario_norm, grupo_norm):
+    """
+    Clasificación NOC/Operaciones/Administrativo en orden de prioridad estricto:
+    solución administrativa > usuario o grupo NOC > usuario con 'NOC' > grupo de Operaciones/Mesa
+    de Control > solución física > solución lógica > N/S. Recibe los textos ya normalizados
+    (mayúsculas, sin nulos) y retorna un array con la categoría de cada ticket.
+    """
+    tipo_solucion = CLASIFICADOR_SOLUCION.clasificar(solucion_norm)
+    es_noc = (usuario_norm.isin(NOC_USERS) | grupo_norm.isin(NOC_USERS)).to_numpy(dtype=bool) | \
+             (CLASIFICADOR_USUARIO.clasificar(usuario_norm) == "NOC")
+    es_operaciones = CLASIFICADOR_GRUPO.clasificar(grupo_norm) == "OPERACIONES"
+
+    condiciones = [
+        tipo_solucion == "ADMINISTRATIVO",
+        es_noc,
+        es_operaciones,
+        tipo_solucion == "FISICO",
+        tipo_solucion == "LOGICO",
+    ]
+    opciones = ['ADMINISTRATIVO', 'NOC', 'OPERACIONES', 'OPERACIONES', 'NOC']
+    return np.select(condiciones, opciones, default='N/S')
+
+def limpiar_fechas_mixtas(series, etiqueta=None):
+    """Seriales de Excel, ISO y día/mes/año mezclados en una columna -> datetime64[ns] (ver utils.resolver_fechas_mixtas)."""
+    return resolver_fechas_mixtas(series, etiqueta)
 
 # ==========================================
 # 4. PIPELINE PRINCIPAL (TU LÓGICA RESTAURADA)
 # ==========================================
-@reportar_tiempo
-def ejecutar():
-    console.rule("[bold magenta]PIPELINE MASTER: TICKETS (SLA + IDF)[/]")
-
-    ruta_origen = PATHS.get("raw_idf") 
-    archivo_bronze_salida = os.path.join(ruta_bronze, "Tickets_SLA_Raw_Bronze.parquet")
-    
-    # Mantenemos tu guardado en Bronze
-    try: archivos_raw(ruta_origen, archivo_bronze_salida)
-    except Exception: pass
-
-    archivos = glob.glob(os.path.join(ruta_origen, "*.xlsx")) #type: ignore
-    console.print(f"📂 Se encontraron {len(archivos)} archivos. Procesando...")
-
+def construir_silver(archivos):
+    """
+    Lee los Excel de IdF, aplica el filtro híbrido de backlog, clasifica (NOC/Operaciones/Admin),
+    calcula los SLAs y deduplica por quincena. Retorna el Silver de tickets o None si no hay datos.
+    """
     dataframes_procesados = []
 
     for archivo in archivos:
@@ -174,17 +231,16 @@ def ejecutar():
         if not fecha_inicio: continue
 
         try:
-            # OPTIMIZACIÓN RAM: Polars lee el Excel en C++ (mucho más ligero)
-            # y lo convierte a Pandas usando PyArrow. Esto evita el pico de RAM de pd.read_excel.
-            df = pl.read_excel(archivo, engine="calamine", infer_schema_length=0).to_pandas(use_pyarrow_extension_array=True)
+            # OPTIMIZACIÓN RAM: Polars lee el Excel en Rust (calamine) y lo convierte a Pandas con PyArrow,
+            # proyectando solo COLS_EXCEL_IDF (encabezados tolerantes a acentos/mayúsculas).
+            df = leer_excel_proyectado(archivo, COLS_EXCEL_IDF).to_pandas(use_pyarrow_extension_array=True)
             
             if df.empty: continue
 
             # --- LIMPIEZA FECHAS ---
-            cols_fecha = ["Fecha Creacion", "Fecha Emisión", "Fecha Final", 
-                          "Fecha Impresion", "Fecha Cierre", "Fecha Finalizacion"]
+            cols_fecha = ["Fecha Creacion", "Fecha Impresion", "Fecha Finalizacion"]
             for col in cols_fecha:
-                if col in df.columns: df[col] = limpiar_fechas_mixtas(df[col])
+                if col in df.columns: df[col] = limpiar_fechas_mixtas(df[col], f"{nombre_archivo} | {col}")
 
             if "Fecha Creacion" not in df.columns: continue
 
@@ -230,154 +286,460 @@ def ejecutar():
     # ==========================================
     # 5. CONSOLIDACIÓN Y FIX DE DUPLICADOS
     # ==========================================
-    if dataframes_procesados:
-        df_total = pd.concat(dataframes_procesados, ignore_index=True)
-        dataframes_procesados.clear()
+    if not dataframes_procesados:
+        return None
 
-        # EL FIX: Borramos columnas basura que causan el ValueError
-        df_total = df_total.drop(columns=["Fecha Apertura", "Fecha Cierre"], errors="ignore")
+    df_total = pd.concat(dataframes_procesados, ignore_index=True)
+    dataframes_procesados.clear()
 
-        df_total = df_total.rename(columns={"Fecha Creacion": "Fecha Apertura", "Fecha Finalizacion": "Fecha Cierre"})
-        df_total = df_total.loc[:, ~df_total.columns.duplicated()].copy()
+    # EL FIX: Borramos columnas basura que causan el ValueError
+    df_total = df_total.drop(columns=["Fecha Apertura", "Fecha Cierre"], errors="ignore")
 
-        # Tu clasificación NOC/Operaciones
-        df_total['Grupo_Norm'] = df_total['Grupo Trabajo'].fillna('').astype(str).str.upper()
-        df_total['Usuario_Norm'] = df_total['Usuario Final'].fillna('').astype(str).str.upper()
-        df_total['Solucion_Norm'] = df_total['Solucion Aplicada'].fillna('').astype(str).str.upper()
-        
-        patron_admin  = '|'.join(SOLUCIONES_ADMINISTRATIVAS)
-        patron_logico = '|'.join(SOLUCIONES_LOGICAS_NOC)
-        patron_fisico = '|'.join(SOLUCIONES_FISICAS_OP)
-        
-        # Evaluamos las condiciones en orden de prioridad estricto
-        condiciones = [
-            df_total['Solucion_Norm'].str.contains(patron_admin, regex=True, na=False),
-            df_total['Usuario_Norm'].isin(NOC_USERS), 
-            df_total['Grupo_Norm'].isin(NOC_USERS),
-            df_total['Usuario_Norm'].str.contains('NOC', na=False), 
-            df_total['Grupo_Norm'].str.contains('OPERACIONES|MESA DE CONTROL', na=False),
-            df_total['Solucion_Norm'].str.contains(patron_fisico, regex=True, na=False),
-            df_total['Solucion_Norm'].str.contains(patron_logico, regex=True, na=False)
-        ]
-        
-        opciones = ['ADMINISTRATIVO', 'NOC', 'NOC', 'NOC', 'OPERACIONES', 'OPERACIONES', 'NOC']
-        df_total['Clasificacion'] = np.select(condiciones, opciones, default='N/S')
+    df_total = df_total.rename(columns={"Fecha Creacion": "Fecha Apertura", "Fecha Finalizacion": "Fecha Cierre"})
+    df_total = df_total.loc[:, ~df_total.columns.duplicated()].copy()
 
-        # Tu lógica de KPIs
-        for c in ['Fecha Cierre', 'Fecha Apertura', 'Fecha Impresion']:
-            df_total[c] = pd.to_datetime(df_total[c], errors='coerce', dayfirst=True)
+    # Tu clasificación NOC/Operaciones
+    df_total['Grupo_Norm'] = df_total['Grupo Trabajo'].fillna('').astype(str).str.upper()
+    df_total['Usuario_Norm'] = df_total['Usuario Final'].fillna('').astype(str).str.upper()
+    df_total['Solucion_Norm'] = df_total['Solucion Aplicada'].fillna('').astype(str).str.upper()
+    
+    df_total['Clasificacion'] = clasificar_tickets(df_total['Solucion_Norm'], df_total['Usuario_Norm'], df_total['Grupo_Norm'])
 
-        delta_res = df_total['Fecha Cierre'] - df_total['Fecha Apertura']
-        
-        # FIX: Prevenir ruido en DAX causado por tiempos negativos (errores de fecha en el ERP)
-        df_total['SLA Resolucion Min'] = (delta_res.dt.total_seconds() / 60).round(2).clip(lower=0)
-        df_total['SLA Despacho Min']   = ((df_total['Fecha Cierre'] - df_total['Fecha Impresion']).dt.total_seconds() / 60).round(2).clip(lower=0)
-        df_total['SLA Impresion Min']  = ((df_total['Fecha Impresion'] - df_total['Fecha Apertura']).dt.total_seconds() / 60).round(2).clip(lower=0)
-        
-        # --- FIX NOC VS CALLE (VECTORIZADO PARA EVITAR BUG DE PYARROW) ---
-        mask_cerrado = df_total['Fecha Cierre'].notna()
-        mask_no_impreso = df_total['Fecha Impresion'].isna()
-        mask_remoto = mask_cerrado & mask_no_impreso
-        
-        # Extraemos los cálculos base
-        sla_res = df_total['SLA Resolucion Min']
-        sla_des = df_total['SLA Despacho Min']
-        sla_imp = df_total['SLA Impresion Min']
+    # Tu lógica de KPIs
+    for c in ['Fecha Cierre', 'Fecha Apertura', 'Fecha Impresion']:
+        df_total[c] = pd.to_datetime(df_total[c], errors='coerce', dayfirst=True)
+
+    delta_res = df_total['Fecha Cierre'] - df_total['Fecha Apertura']
+    
+    # FIX: Prevenir ruido en DAX causado por tiempos negativos (errores de fecha en el ERP)
+    df_total['SLA Resolucion Min'] = (delta_res.dt.total_seconds() / 60).round(2).clip(lower=0)
+    df_total['SLA Despacho Min']   = ((df_total['Fecha Cierre'] - df_total['Fecha Impresion']).dt.total_seconds() / 60).round(2).clip(lower=0)
+    df_total['SLA Impresion Min']  = ((df_total['Fecha Impresion'] - df_total['Fecha Apertura']).dt.total_seconds() / 60).round(2).clip(lower=0)
+    
+    # --- FIX NOC VS CALLE (VECTORIZADO PARA EVITAR BUG DE PYARROW) ---
+    mask_cerrado = df_total['Fecha Cierre'].notna()
+    mask_no_impreso = df_total['Fecha Impresion'].isna()
+    mask_remoto = mask_cerrado & mask_no_impreso
+    
+    # Extraemos los cálculos base
+    sla_res = df_total['SLA Resolucion Min']
+    sla_des = df_total['SLA Despacho Min']
+    sla_imp = df_total['SLA Impresion Min']
 
-        # Llenamos nulos temporalmente solo para las matemáticas de los tickets cerrados
-        sla_res_cerrado = np.where(mask_cerrado, sla_res.fillna(0), sla_res)
-        sla_des_cerrado = np.where(mask_cerrado, sla_des.fillna(0), sla_des)
+    # Llenamos nulos temporalmente solo para las matemáticas de los tickets cerrados
+    sla_res_cerrado = np.where(mask_cerrado, sla_res.fillna(0), sla_res)
+    sla_des_cerrado = np.where(mask_cerrado, sla_des.fillna(0), sla_des)
 
-        # 1. Para tickets remotos cerrados, despacho es 0
-        sla_des_cerrado = np.where(mask_remoto, 0.0, sla_des_cerrado)
+    # 1. Para tickets remotos cerrados, despacho es 0
+    sla_des_cerrado = np.where(mask_remoto, 0.0, sla_des_cerrado)
 
-        # 2. Blindaje para cerrados: Despacho no supera Resolución
-        sla_des_final = np.where(mask_cerrado, np.minimum(sla_des_cerrado, sla_res_cerrado), sla_des)
-        
-        # 3. Impresión para cerrados = Res - Despacho. Para abiertos se mantiene intacto.
-        sla_imp_final = np.where(mask_cerrado, sla_res_cerrado - sla_des_final, sla_imp)
+    # 2. Blindaje para cerrados: Despacho no supera Resolución
+    sla_des_final = np.where(mask_cerrado, np.minimum(sla_des_cerrado, sla_res_cerrado), sla_des)
+    
+    # 3. Impresión para cerrados = Res - Despacho. Para abiertos se mantiene intacto.
+    sla_imp_final = np.where(mask_cerrado, sla_res_cerrado - sla_des_final, sla_imp)
 
-        # Asignamos de vuelta de forma segura a las columnas de Power BI
-        df_total['SLA Despacho Min'] = sla_des_final
-        df_total['SLA Impresion Min'] = sla_imp_final
+    # Asignamos de vuelta de forma segura a las columnas de Power BI
+    df_total['SLA Despacho Min'] = sla_des_final
+    df_total['SLA Impresion Min'] = sla_imp_final
 
-        df_total['Fecha Apertura Date'] = df_total['Fecha Apertura'].dt.normalize()
-        df_total['Fecha Cierre Date'] = df_total['Fecha Cierre'].dt.normalize()
-        df_total['Duracion_Horas'] = df_total['SLA Resolucion Min'] / 60
-        df_total['Es_Falla'] = np.where(df_total['Clasificacion'] == 'ADMINISTRATIVO', 0, 1)
-        
-        df_total['Cumplio_SLA'] = np.where((df_total['Duracion_Horas'] > 0) & (df_total['Duracion_Horas'] <= HORAS_SLA_META), 1, 0)
-
-        # --- FIX: Normalización de IDs ---
-        # Polars puede leer números de Excel como "12345.0", lo que rompe la deduplicación
-        for col in ["N° Orden", "N° Contrato"]:
-            if col in df_total.columns:
-                df_total[col] = df_total[col].astype(str).str.replace(r'\.0$', '', regex=True).str.strip()
-
-        # Tu Deduplicación Blindada (Aislada por Quincena)
-        # CRÍTICO: Se incluye "Quincena Evaluada" para permitir que un ticket viva en Q1 (Backlog) y en Q2 (Cerrado)
-        df_total = df_total.sort_values(by=["Fecha Cierre"], na_position='first').drop_duplicates(
-            subset=["Quincena Evaluada", "N° Orden"], keep="last"
-        )
-        
-        df_total = limpiar_nulos_powerbi(df_total)
+    df_total['Fecha Apertura Date'] = df_total['Fecha Apertura'].dt.normalize()
+    df_total['Fecha Cierre Date'] = df_total['Fecha Cierre'].dt.normalize()
+    df_total['Duracion_Horas'] = df_total['SLA Resolucion Min'] / 60
+    df_total['Es_Falla'] = np.where(df_total['Clasificacion'] == 'ADMINISTRATIVO', 0, 1)
+    
+    df_total['Cumplio_SLA'] = np.where((df_total['Duracion_Horas'] > 0) & (df_total['Duracion_Horas'] <= HORAS_SLA_META), 1, 0)
+
+    # --- FIX: Normalización de IDs ---
+    # Polars puede leer números de Excel como "12345.0", lo que rompe la deduplicación
+    for col in ["N° Orden", "N° Contrato"]:
+        if col in df_total.columns:
+            df_total[col] = df_total[col].astype(str).str.replace(r'\.0$', '', regex=True).str.strip()
+
+    # Tu Deduplicación Blindada (Aislada por Quincena)
+    # CRÍTICO: Se incluye "Quincena Evaluada" para permitir que un ticket viva en Q1 (Backlog) y en Q2 (Cerrado)
+    # Gana el cierre más reciente; un cierre nulo (ticket abierto) solo si no hay otro
+    df_total = ultimo_por_llave(df_total, ["Quincena Evaluada", "N° Orden"], "Fecha Cierre", nulos="primero")
+    
+    df_total = limpiar_nulos_powerbi(df_total)
 
-        # Salidas Master y Gold
-        df_silver = df_total.reindex(columns=[c for c in ORDEN_FINAL_SILVER if c in df_total.columns])
-        guardar_parquet(df_silver, "Tickets_Silver_Master.parquet", filas_iniciales=len(df_silver), ruta_destino=ruta_silver)
-        
-        df_gold_sla = df_silver.dropna(subset=['SLA Resolucion Min']).query("`SLA Resolucion Min` > 0").groupby(
-            ["Quincena Evaluada", "Franquicia", "Clasificacion", "Fecha Apertura Date"], as_index=False
-        ).agg(Total_Ordenes=("N° Orden", "nunique"), **{k: (k, "sum") for k in ["SLA Resolucion Min", "SLA Despacho Min", "SLA Impresion Min"]})
-        
-        guardar_parquet(df_gold_sla.reindex(columns=ORDEN_FINAL_GOLD_SLA), "SLA_Gold.parquet", filas_iniciales=len(df_gold_sla), ruta_destino=ruta_gold)
-
-        # --- C. GOLD IDF ---
-        df_gold_idf = df_silver.groupby(
-            ["Quincena Evaluada", "Franquicia", "Fecha Apertura Date", "Fecha Cierre Date"],
-            as_index=False,
-            dropna=False
-        ).agg(Total_Fallas=("N° Orden", "nunique"))
-        df_gold_idf = df_gold_idf.reindex(columns=ORDEN_FINAL_GOLD_IDF)
-        guardar_parquet(df_gold_idf, "IDF_Gold.parquet", filas_iniciales=len(df_gold_idf), ruta_destino=ruta_gold)
-
-        # --- D. GOLD IDF DETALLE SOLUCIÓN ---
-        # Llenamos explícitamente los nulos para evitar que el groupby() elimine los tickets abiertos
-        df_prep_sol = df_silver[df_silver["Es_Falla"] == 1][["Quincena Evaluada", "Franquicia", "Solucion Aplicada", "Detalle Orden", "N° Orden"]].copy()
-        df_prep_sol["Solucion Aplicada"] = df_prep_sol["Solucion Aplicada"].fillna("EN PROCESO / SIN SOLUCIÓN")
-        df_prep_sol["Detalle Orden"] = df_prep_sol["Detalle Orden"].fillna("SIN DETALLE REPORTADO")
-        
-        df_gold_idf_detalle = df_prep_sol.groupby(
-            ["Quincena Evaluada", "Franquicia", "Solucion Aplicada", "Detalle Orden"],
-            as_index=False,
-            dropna=False
-        ).agg(Total_Ordenes=("N° Orden", "count"))
-        df_gold_idf_detalle = df_gold_idf_detalle.reindex(columns=ORDEN_FINAL_GOLD_IDF_DETALLE_SOLUCION)
-        guardar_parquet(df_gold_idf_detalle, "IDF_Gold_Detalle_Solucion.parquet", filas_iniciales=len(df_gold_idf_detalle), ruta_destino=ruta_gold)
-
-        # --- E. GOLD SLA-STATS ---
-        console.print("🚀 Generando Gold: SLA-Stats (Precisión absoluta para DAX)...")
-        df_gold_stats = df_silver[["Quincena Evaluada", "FechaFin", "Franquicia", "Clasificacion", "SLA Resolucion Min", "SLA Despacho Min", "SLA Impresion Min"]].copy()
-        
-        df_gold_stats = df_gold_stats.dropna(subset=['SLA Resolucion Min'])
-        
-        # # FIX ABSOLUTO: Filtrar y blindar para que SLA-Stats sea idéntico al SLA Normal
-        # df_gold_stats = df_gold_stats[df_gold_stats['SLA Resolucion Min'] > 0]
-        
-        # df_gold_stats['SLA Resolucion Min'] = df_gold_stats['SLA Resolucion Min'].clip(lower=1)
-        
-        df_gold_stats = df_gold_stats.reindex(columns=ORDEN_SLA_STATS)
-        guardar_parquet(df_gold_stats, "SLA_GOLD_STATS.parquet", filas_iniciales=len(df_gold_stats), ruta_destino=ruta_gold)
+    return df_total.reindex(columns=[c for c in ORDEN_FINAL_SILVER if c in df_total.columns])
+
+def agrupar_por_quincena(archivos):
+    """{Quincena Evaluada: [archivos]} según el rango de fechas del nombre de cada Excel de IdF."""
+    grupos = {}
+    for archivo in archivos:
+        nombre_archivo = os.path.basename(archivo)
+        if nombre_archivo.startswith("~$") or "Consolidado" in nombre_archivo: continue
+        _, _, quincena_nombre = obtener_rango_fechas(archivo)
+        if quincena_nombre:
+            grupos.setdefault(quincena_nombre, []).append(archivo)
+    return grupos
+
+# Los tres Golds agregados comparten 'Quincena Evaluada' + 'Franquicia' y difieren en el resto de la
+# llave y en el filtro: se calculan con un único GROUPING SETS y cada fila se reparte según su conjunto.
+# GROUPING(Clasificacion, Fecha Cierre Date, sol) vale 3 / 5 / 6 para SLA / IDF / Detalle.
+# El Silver ya viene deduplicado por (Quincena Evaluada, N° Orden) y los tres conjuntos incluyen la
+# quincena, así que el nunique de Pandas equivale a COUNT(orden) y se evita el COUNT DISTINCT
+# (la tabla hash de distintos por conjunto era el costo dominante).
+SQL_AGREGADOS_TICKETS = """
+WITH t AS (
+    SELECT
+        "Quincena Evaluada", "Franquicia", "Clasificacion", "Fecha Apertura Date", "Fecha Cierre Date",
+        COALESCE("Solucion Aplicada", 'EN PROCESO / SIN SOLUCIÓN') AS sol,
+        COALESCE("Detalle Orden", 'SIN DETALLE REPORTADO') AS det,
+        "N° Orden" AS orden,
+        COALESCE("SLA Resolucion Min" > 0, FALSE) AS con_sla,
+        COALESCE("Es_Falla" = 1, FALSE) AS es_falla,
+        "SLA Resolucion Min", "SLA Despacho Min", "SLA Impresion Min"
+    FROM silver
+)
+SELECT
+    GROUPING("Clasificacion", "Fecha Cierre Date", sol) AS conjunto,
+    "Quincena Evaluada", "Franquicia", "Clasificacion", "Fecha Apertura Date", "Fecha Cierre Date",
+    sol AS "Solucion Aplicada", det AS "Detalle Orden",
+    -- SLA_Gold: solo tickets con SLA de resolución positivo
+    COUNT(*) FILTER (WHERE con_sla) AS filas_sla,
+    COUNT(orden) FILTER (WHERE con_sla) AS "Total_Ordenes_SLA",
+    COALESCE(fsum("SLA Resolucion Min") FILTER (WHERE con_sla), 0) AS "SLA Resolucion Min",
+    COALESCE(fsum("SLA Despacho Min") FILTER (WHERE con_sla), 0) AS "SLA Despacho Min",
+    COALESCE(fsum("SLA Impresion Min") FILTER (WHERE con_sla), 0) AS "SLA Impresion Min",
+    -- IDF_Gold: todos los tickets
+    COUNT(orden) AS "Total_Fallas",
+    -- IDF_Gold_Detalle_Solucion: solo fallas
+    COUNT(*) FILTER (WHERE es_falla) AS filas_falla,
+    COUNT(orden) FILTER (WHERE es_falla) AS "Total_Ordenes_Detalle"
+FROM t
+GROUP BY GROUPING SETS (
+    ("Quincena Evaluada", "Franquicia", "Clasificacion", "Fecha Apertura Date"),
+    ("Quincena Evaluada", "Franquicia", "Fecha Apertura Date", "Fecha Cierre Date"),
+    ("Quincena Evaluada", "Franquicia", sol, det)
+)
+"""
+
+def agregados_tickets(df_silver):
+    """
+    SLA_Gold, IDF_Gold e IDF_Gold_Detalle_Solucion en una sola lectura del Silver. Replica la
+    semántica de los groupby de Pandas que reemplaza: SLA descarta llaves nulas (dropna por defecto),
+    IDF y Detalle las conservan, nunique/count ignoran órdenes nulas y cada tabla sale ordenada por
+    su llave con nulos al final. Las sumas usan fsum (Kahan), como el groupby de Pandas.
+    Requiere un Silver deduplicado por (Quincena Evaluada, N° Orden), como el de construir_silver.
+    """
+    columnas = ["Quincena Evaluada", "Franquicia", "Clasificacion", "Fecha Apertura Date", "Fecha Cierre Date",
+                "Solucion Aplicada", "Detalle Orden", "N° Orden", "Es_Falla",
+                "SLA Resolucion Min", "SLA Despacho Min", "SLA Impresion Min"]
+    silver = pa.Table.from_pandas(df_silver[columnas], preserve_index=False)
+    con = duckdb.connect(database=':memory:')
+    try:
+        con.register("silver", silver)
+        df = con.execute(SQL_AGREGADOS_TICKETS).fetch_arrow_table().to_pandas()
+    finally:
+        con.close()
+
+    def separar(conjunto, condicion, renombre, orden_final):
+        parte = df[(df["conjunto"] == conjunto) & condicion].rename(columns=renombre)
+        llaves = orden_final[:4]  # Las tres tablas tienen llave de 4 columnas
+        parte = parte.sort_values(llaves, na_position="last", kind="stable", ignore_index=True)
+        parte = parte.reindex(columns=orden_final)
+        for c in llaves:  # Las llaves conservan el tipo que tenían en el Silver
+            if c in df_silver.columns and parte[c].dtype != df_silver[c].dtype:
+                parte[c] = parte[c].astype(df_silver[c].dtype)
+        return parte
+
+    llaves_sla = ORDEN_FINAL_GOLD_SLA[:4]
+    df_gold_sla = separar(3, (df["filas_sla"] > 0) & df[llaves_sla].notna().all(axis=1),
+                          {"Total_Ordenes_SLA": "Total_Ordenes"}, ORDEN_FINAL_GOLD_SLA)
+    df_gold_idf = separar(5, True, {}, ORDEN_FINAL_GOLD_IDF)
+    df_gold_idf_detalle = separar(6, df["filas_falla"] > 0, {"Total_Ordenes_Detalle": "Total_Ordenes"},
+                                  ORDEN_FINAL_GOLD_IDF_DETALLE_SOLUCION)
+    return df_gold_sla, df_gold_idf, df_gold_idf_detalle
+
+def golds_sketches_sla(df_gold_stats):
+    """
+    SLA_Sketches_Gold (un t-digest por quincena × franquicia × clasificación y métrica) y
+    SLA_Percentiles_Gold (sus percentiles decodificados a cada nivel de NIVELES_PERCENTILES_SLA;
+    las llaves agregadas quedan como 'TODAS'). Ambos niveles incluyen la quincena, así que se
+    pueden calcular por quincena.
+    """
+    df_sketches = sketches_por_grupo(df_gold_stats, LLAVES_SKETCH_SLA, METRICAS_SLA)
+    niveles = []
+    for por in NIVELES_PERCENTILES_SLA:
+        tabla = tabla_percentiles(df_sketches, por)
+        for c in LLAVES_SKETCH_SLA:
+            if c not in por:
+                tabla[c] = "TODAS"
+        niveles.append(tabla)
+    df_percentiles = pd.concat(niveles, ignore_index=True)
+    orden = LLAVES_SKETCH_SLA + [c for c in df_percentiles.columns if c not in LLAVES_SKETCH_SLA]
+    return {"SLA_Sketches_Gold": df_sketches, "SLA_Percentiles_Gold": df_percentiles.reindex(columns=orden)}
+
+def construir_golds(df_silver):
+    """
+    Las tablas Gold de un Silver de tickets. Todas llevan 'Quincena Evaluada' en su llave
+    (o son a nivel de ticket), por lo que calcularlas por quincena y unirlas equivale a calcularlas
+    sobre el histórico completo.
+    """
+    # --- B/C/D. GOLDS AGREGADOS (UNA SOLA PASADA) ---
+    df_gold_sla, df_gold_idf, df_gold_idf_detalle = agregados_tickets(df_silver)
+
+    # --- E. GOLD SLA-STATS ---
+    df_gold_stats = df_silver[["Quincena Evaluada", "FechaFin", "Franquicia", "Clasificacion", "SLA Resolucion Min", "SLA Despacho Min", "SLA Impresion Min"]].copy()
+
+    df_gold_stats = df_gold_stats.dropna(subset=['SLA Resolucion Min'])
+
+    # # FIX ABSOLUTO: Filtrar y blindar para que SLA-Stats sea idéntico al SLA Normal
+    # df_gold_stats = df_gold_stats[df_gold_stats['SLA Resolucion Min'] > 0]
+
+    # df_gold_stats['SLA Resolucion Min'] = df_gold_stats['SLA Resolucion Min'].clip(lower=1)
+
+    # --- F. FACT TICKETS GOLD (LA TABLA DEFINITIVA PARA POWER BI) ---
+    # Nos quedamos solo con las columnas de negocio, fechas y métricas, descartando textos pesados
+    df_fact_tickets = df_silver.reindex(columns=ORDEN_FINAL_FACT_TICKETS)
+    df_fact_tickets["Solucion Aplicada"] = df_fact_tickets["Solucion Aplicada"].fillna("EN PROCESO / SIN SOLUCIÓN")
+
+    return {
+        "SLA_Gold": df_gold_sla,
+        "IDF_Gold": df_gold_idf,
+        "IDF_Gold_Detalle_Solucion": df_gold_idf_detalle,
+        "SLA_GOLD_STATS": df_gold_stats.reindex(columns=ORDEN_SLA_STATS),
+        "Tickets_Fact_Gold": df_fact_tickets,
+        **golds_sketches_sla(df_gold_stats),
+    }
+
+# Al unir las particiones se restituye el orden que daba el cálculo sobre el histórico completo
+# (groupby ordena por sus llaves con nulos al final; el Silver queda ordenado por cierre)
+ORDEN_CONSOLIDADO = {
+    "Tickets_Silver_Master": (["Fecha Cierre"], "first"),
+    "SLA_Gold": (ORDEN_FINAL_GOLD_SLA[:4], "last"),
+    "IDF_Gold": (ORDEN_FINAL_GOLD_IDF[:4], "last"),
+    "IDF_Gold_Detalle_Solucion": (ORDEN_FINAL_GOLD_IDF_DETALLE_SOLUCION[:4], "last"),
+    "SLA_Sketches_Gold": (LLAVES_SKETCH_SLA + ["Metrica"], "last"),
+}
 
-        # --- F. FACT TICKETS GOLD (LA TABLA DEFINITIVA PARA POWER BI) ---
-        console.print("🚀 Generando Gold: Fact_Tickets (Modelo Estrella Optimizado)...")
-        df_fact_tickets = df_silver.copy()
-        # Nos quedamos solo con las columnas de negocio, fechas y métricas, descartando textos pesados
-        df_fact_tickets = df_fact_tickets.reindex(columns=ORDEN_FINAL_FACT_TICKETS)
-        df_fact_tickets["Solucion Aplicada"] = df_fact_tickets["Solucion Aplicada"].fillna("EN PROCESO / SIN SOLUCIÓN")
-        guardar_parquet(df_fact_tickets, "Tickets_Fact_Gold.parquet", filas_iniciales=len(df_fact_tickets), ruta_destino=ruta_gold)
+@reportar_tiempo
+def ejecutar(completo=False):
+    """
+    Incremental por quincena: solo se recalculan (Silver + Golds) las quincenas cuyos Excel de IdF
+    cambiaron; cada salida se guarda particionada en silver/_particiones/trans_ordenes_servicio y
+    los Parquet que lee Power BI se republican uniendo las particiones.
+    completo=True descarta las particiones y recalcula todo el histórico.
+    """
+    console.rule("[bold magenta]PIPELINE MASTER: TICKETS (SLA + IDF)[/]")
 
-        console.print(f"[bold green]✨ Proceso Finalizado. Tickets Reales: {len(df_total):,}[/]")
+    ruta_origen = PATHS.get("raw_idf") 
+    archivo_bronze_salida = os.path.join(ruta_bronze, "Tickets_SLA_Raw_Bronze.parquet")
+    
+    # Mantenemos tu guardado en Bronze
+    try: archivos_raw(ruta_origen, archivo_bronze_salida)
+    except Exception: pass
+
+    archivos = glob.glob(os.path.join(ruta_origen, "*.xlsx")) #type: ignore
+    grupos = agrupar_por_quincena(archivos)
+    console.print(f"📂 Se encontraron {len(archivos)} archivos ({len(grupos)} quincenas).")
+
+    # La huella de versión incluye este script para que un cambio de reglas recalcule todas las quincenas.
+    part = ParticionesIncrementales("trans_ordenes_servicio", version=[os.path.abspath(__file__)])
+    with bloqueo_dataset(part.carpeta):
+        particiones_previas = dict(part.estado["particiones"])
+        cambiadas, eliminadas = part.pendientes(grupos, completo=completo)
+        if cambiadas or eliminadas:
+            console.print(f"🔄 Quincenas a recalcular: {', '.join(cambiadas) or '-'} | Retiradas: {', '.join(eliminadas) or '-'}")
+        else:
+            console.print("[dim]⏭️ Ninguna quincena cambió desde la última corrida.[/]")
+
+        # El backlog se actualiza con el delta si su estado corresponde a las particiones previas y
+        # lo recalculado es más reciente que todo lo intacto; si no, se evalúa sobre el histórico.
+        backlog_previo, meta_backlog = cargar_estado_backlog(part)
+        intactas = [q for q in grupos if q not in cambiadas]
+        backlog_incremental = (
+            backlog_previo is not None and not completo
+            and meta_backlog.get("version") == part.huella_version
+            and meta_backlog.get("particiones") == particiones_previas
+            and (not intactas or min(map(orden_quincena, cambiadas + eliminadas), default=(9999,)) > max(map(orden_quincena, intactas)))
+        )
+        ordenes_previas = set()
+        if backlog_incremental:
+            for quincena in cambiadas + eliminadas:
+                df_previo = part.leer(quincena, "Tickets_Silver_Master", columnas=["N° Orden"])
+                if df_previo is not None:
+                    ordenes_previas.update(df_previo["N° Orden"])
+
+        for quincena in cambiadas:
+            df_quincena = construir_silver(grupos[quincena])
+            if df_quincena is None or df_quincena.empty:
+                part.guardar(quincena, {})
+                continue
+            part.guardar(quincena, {"Tickets_Silver_Master": df_quincena, **construir_golds(df_quincena)})
+        for quincena in eliminadas:
+            part.eliminar(quincena)
+
+        if not part.requiere_publicar():
+            console.print("[bold green]✨ Salidas de tickets al día.[/]")
+            return
+
+        # Salidas Master y Gold (Power BI sigue leyendo un único archivo por tabla)
+        df_silver = part.consolidar("Tickets_Silver_Master")
+        if df_silver is None or df_silver.empty:
+            console.print("[yellow]⚠️ No se encontraron tickets válidos para procesar.[/]")
+            return
+
+        if backlog_incremental:
+            backlog = actualizar_backlog(
+                backlog_previo, ordenes_previas, leer_observaciones(part, cambiadas),
+                lambda ordenes: leer_observaciones(part, intactas, filtros=[("N° Orden", "in", sorted(ordenes))]),
+            )
+        else:
+            backlog = backlog_desde_cero(df_silver)
+        guardar_estado_backlog(part, backlog)
+        golds_backlog_actual = golds_backlog(backlog, fecha_corte_backlog(df_silver))
+
+        destinos = {
+            "Tickets_Silver_Master": ruta_silver, "SLA_Gold": ruta_gold, "IDF_Gold": ruta_gold,
+            "IDF_Gold_Detalle_Solucion": ruta_gold, "SLA_GOLD_STATS": ruta_gold, "Tickets_Fact_Gold": ruta_gold,
+            "SLA_Sketches_Gold": ruta_gold, "SLA_Percentiles_Gold": ruta_gold,
+            "Tickets_Backlog_Gold": ruta_gold, "Tickets_Backlog_Resumen_Gold": ruta_gold,
+        }
+        for salida, destino in destinos.items():
+            if not part.requiere_publicar(salida):
+                console.print(f"[dim]⏭️ {salida} ya se publicó en el intento anterior.[/]")
+                continue
+            if salida == "SLA_GOLD_STATS":
+                console.print("🚀 Generando Gold: SLA-Stats (Precisión absoluta para DAX)...")
+            elif salida == "Tickets_Fact_Gold":
+                console.print("🚀 Generando Gold: Fact_Tickets (Modelo Estrella Optimizado)...")
+            elif salida == "SLA_Sketches_Gold":
+                console.print("🚀 Generando Gold: Sketches y percentiles de SLA (t-digest)...")
+            elif salida == "Tickets_Backlog_Gold":
+                console.print(f"🚀 Generando Gold: Backlog de tickets abiertos ({'incremental' if backlog_incremental else 'desde el histórico'})...")
+            if salida in golds_backlog_actual:
+                df = golds_backlog_actual[salida]
+            else:
+                df = df_silver if salida == "Tickets_Silver_Master" else part.consolidar(salida)
+            if df is None:
+                continue
+            if salida in ORDEN_CONSOLIDADO:
+                llaves, nulos = ORDEN_CONSOLIDADO[salida]
+                df = df.sort_values(llaves, na_position=nulos, kind="stable", ignore_index=True)
+            guardar_parquet(df, f"{salida}.parquet", filas_iniciales=len(df), ruta_destino=destino)
+            part.marcar_publicado(salida)
+        part.marcar_publicado()
+
+    console.print(f"[bold green]✨ Proceso Finalizado. Tickets Reales: {len(df_silver):,}[/]")
+
+# ==========================================
+# 5. BACKLOG DE TICKETS ABIERTOS (INCREMENTAL)
+# ==========================================
+# Un ticket está en el backlog si su aparición más reciente (la quincena de mayor FechaFin que lo
+# trae) no tiene Fecha Cierre. El estado (una fila por orden abierta) vive junto a las particiones y
+# cada corrida solo le aplica las quincenas recalculadas; los Gold le agregan la antigüedad al corte.
+COLS_OBSERVACION_BACKLOG = ORDEN_BACKLOG + ["Fecha Cierre"]
+CARPETA_ESTADO_BACKLOG = "_backlog"  # Dentro de la carpeta de particiones: se descarta con ellas al reconstruir
+
+def orden_quincena(nombre):
+    """(año, mes, 1|2) de una etiqueta 'ENE 2025 Q1', para ordenar quincenas en el tiempo."""
+    mes, anio, q = nombre.split()
+    return int(anio), MESES_QUINCENA.index(mes), int(q[1:])
+
+def backlog_vacio():
+    """Backlog sin órdenes abiertas, con los tipos de uno real (las fechas como datetime64)."""
+    df = pd.DataFrame({c: pd.Series(dtype="object") for c in ORDEN_BACKLOG})
+    return df.astype({"Fecha Apertura": "datetime64[ns]", "FechaFin": "datetime64[ns]"})
+
+def backlog_desde_observaciones(df_obs):
+    """Órdenes cuya fila más reciente (mayor FechaFin) en 'df_obs' no tiene Fecha Cierre."""
+    if df_obs is None or df_obs.empty:
+        return backlog_vacio()
+    ultimas = ultimo_por_llave(df_obs.reindex(columns=COLS_OBSERVACION_BACKLOG), ["N° Orden"], "FechaFin")
+    return ultimas.loc[ultimas["Fecha Cierre"].isna(), ORDEN_BACKLOG]
+
+def ordenar_backlog(partes):
+    partes = [p for p in partes if p is not None and not p.empty]
+    if not partes:
+        return backlog_vacio()
+    df = pd.concat(partes, ignore_index=True) if len(partes) > 1 else partes[0]
+    return df.sort_values(["Fecha Apertura", "N° Orden"], kind="stable", ignore_index=True)
+
+def backlog_desde_cero(df_silver):
+    """Backlog evaluado sobre todo el Silver (lo que hacía el filtro híbrido en cada corrida)."""
+    return ordenar_backlog([backlog_desde_observaciones(df_silver)])
+
+def actualizar_backlog(backlog, ordenes_previas, df_nuevas, leer_intactas):
+    """
+    Aplica al backlog vigente las quincenas recalculadas o retiradas, que deben ser posteriores a
+    todas las intactas: su fila es la más reciente de cada orden que traen.
+    ordenes_previas: órdenes que tenían esas quincenas antes del cambio.
+    df_nuevas: sus filas de Silver tras recalcularlas (None si no queda ninguna).
+    leer_intactas(ordenes): filas de Silver de las quincenas intactas para esas órdenes. Solo se
+    consulta por las que desaparecieron del delta y vuelven a su aparición anterior.
+    """
+    vistas = set(df_nuevas["N° Orden"]) if df_nuevas is not None else set()
+    perdidas = set(ordenes_previas) - vistas
+    partes = [backlog[~backlog["N° Orden"].isin(vistas | perdidas)], backlog_desde_observaciones(df_nuevas)]
+    if perdidas:
+        partes.append(backlog_desde_observaciones(leer_intactas(perdidas)))
+    return ordenar_backlog(partes)
+
+def leer_observaciones(part, quincenas, filtros=None):
+    """Filas de Silver (solo las columnas del backlog) de las particiones de 'quincenas'."""
+    partes = [part.leer(q, "Tickets_Silver_Master", columnas=COLS_OBSERVACION_BACKLOG, filtros=filtros) for q in quincenas]
+    partes = [p for p in partes if p is not None and not p.empty]
+    return pd.concat(partes, ignore_index=True) if partes else None
+
+def cargar_estado_backlog(part):
+    """(backlog, metadatos) guardados por la última publicación, o (None, {}) si no hay estado legible."""
+    carpeta = os.path.join(part.carpeta, CARPETA_ESTADO_BACKLOG)
+    try:
+        with open(os.path.join(carpeta, "estado.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        return pd.read_parquet(os.path.join(carpeta, "Tickets_Backlog.parquet")), meta
+    except Exception:
+        return None, {}
+
+def guardar_estado_backlog(part, backlog):
+    """El JSON se escribe al final: sus particiones solo coinciden si el Parquet quedó completo."""
+    carpeta = os.path.join(part.carpeta, CARPETA_ESTADO_BACKLOG)
+    os.makedirs(carpeta, exist_ok=True)
+    with escritura_atomica(os.path.join(carpeta, "Tickets_Backlog.parquet")) as ruta_tmp:
+        backlog.to_parquet(ruta_tmp, index=False)
+    with escritura_atomica(os.path.join(carpeta, "estado.json")) as ruta_tmp:
+        with open(ruta_tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": part.huella_version, "particiones": part.estado["particiones"]}, f, ensure_ascii=False, indent=2)
+
+def fecha_corte_backlog(df_silver):
+    """Fin del día de cierre de la quincena más reciente, sin pasar del momento actual."""
+    return min(pd.Timestamp(df_silver["FechaFin"].max()) + pd.Timedelta(days=1), pd.Timestamp.now().floor("s"))
+
+def etiquetas_tramos(limites):
+    """['0-1 días', '1-3 días', ..., '+30 días'] para los límites de BACKLOG_TRAMOS_DIAS."""
+    bordes = [0] + list(limites)
+    return [f"{a:g}-{b:g} días" for a, b in zip(bordes, bordes[1:])] + [f"+{bordes[-1]:g} días"]
+
+def golds_backlog(backlog, fecha_corte):
+    """Detalle del backlog con su antigüedad a 'fecha_corte' y resumen por franquicia × clasificación × tramo."""
+    df = backlog.copy()
+    df["Fecha Corte"] = fecha_corte
+    # to_datetime: un estado vacío guardado por una versión anterior vuelve con las fechas como object
+    df["Edad_Dias"] = ((fecha_corte - pd.to_datetime(df["Fecha Apertura"])).dt.total_seconds() / 86400).round(2).clip(lower=0)
+
+    etiquetas = etiquetas_tramos(BACKLOG_TRAMOS_DIAS)
+    edad = df["Edad_Dias"].to_numpy(dtype=float, na_value=np.nan)
+    tramo = np.searchsorted(np.asarray(BACKLOG_TRAMOS_DIAS, dtype=float), edad, side="right")
+    sin_fecha = np.isnan(edad)
+    df["Tramo_Edad"] = np.where(sin_fecha, "SIN FECHA", np.asarray(etiquetas, dtype=object)[np.minimum(tramo, len(etiquetas) - 1)])
+    df["Orden_Tramo"] = np.where(sin_fecha, len(etiquetas) + 1, tramo + 1)
+
+    resumen = (
+        df.groupby(["Franquicia", "Clasificacion", "Tramo_Edad", "Orden_Tramo"], dropna=False, sort=False)
+          .agg(Tickets=("N° Orden", "size"), Edad_Promedio_Dias=("Edad_Dias", "mean"), Edad_Max_Dias=("Edad_Dias", "max"))
+          .reset_index()
+          .sort_values(["Franquicia", "Clasificacion", "Orden_Tramo"], na_position="last", kind="stable", ignore_index=True)
+    )
+    resumen["Edad_Promedio_Dias"] = resumen["Edad_Promedio_Dias"].round(2)
+    resumen["Fecha Corte"] = fecha_corte
+    return {
+        "Tickets_Backlog_Gold": df.reindex(columns=ORDEN_BACKLOG_GOLD),
+        "Tickets_Backlog_Resumen_Gold": resumen.reindex(columns=ORDEN_BACKLOG_RESUMEN),
+    }
 
 if __name__ == "__main__":
-    ejecutar()
\ No newline at end of file
+    ejecutar(completo="--completo" in sys.argv)
@@ -0,0 +1,348 @@
+import polars as pl
+import pandas as pd
+import os
+import sys
+import datetime
+
+# ==========================================
+# 🔼 EL TRUCO DEL ASCENSOR 🔼
+# ==========================================
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+granparent_dir = os.path.dirname(parent_dir)  # Sube el segundo nivel
+sys.path.append(granparent_dir)
+
+from config import PATHS
+from utils import (reportar_tiempo, console, logger, archivos_raw, escritura_atomica, expr_fecha_mixta,
+                   expr_fecha_invalida, reportar_fechas_invalidas, ultimo_por_llave_polars, clave_encabezado)
+import metricas
+
+# Las reglas de negocio se toman del motor pandas: ambos motores clasifican y filtran igual por construcción
+from transformacion.ETLs.trans_ordenes_servicio import (
+    HORAS_SLA_META,
+    NOC_USERS, EXCLUIR_SOLUCIONES, CLASIFICADOR_SOLUCION, CLASIFICADOR_USUARIO, CLASIFICADOR_GRUPO, ORDEN_FINAL_SILVER, ORDEN_FINAL_GOLD_SLA, ORDEN_FINAL_GOLD_IDF,
+    ORDEN_FINAL_GOLD_IDF_DETALLE_SOLUCION, ORDEN_SLA_STATS, ORDEN_FINAL_FACT_TICKETS, COLS_INPUT_RAW,
+    COLS_OBSERVACION_BACKLOG, obtener_rango_fechas, golds_sketches_sla, backlog_desde_cero, golds_backlog,
+    fecha_corte_backlog,
+)
+
+# ==========================================
+# MOTOR POLARS PARA TICKETS (SLA + IDF)
+# ==========================================
+# Alternativa a trans_ordenes_servicio: en lugar de releer cada Excel de IdF con pandas, parte del
+# Bronze de tickets (Tickets_SLA_Raw_Bronze.parquet, una fila por línea de Excel + Source.Name) y
+# expresa filtro híbrido, clasificación, SLAs y deduplicación como un plan lazy de Polars.
+# Produce los mismos archivos (Silver Master + Golds) con las mismas reglas.
+#
+# Fechas: ambos motores usan el mismo resolvedor vectorizado (utils.expr_fecha_mixta), que clasifica
+# cada valor como serial de Excel, ISO o día/mes/año y lo convierte sin depender del archivo.
+
+DT = pl.Datetime("ns")
+COLS_FECHA = ["Fecha Creacion", "Fecha Impresion", "Fecha Finalizacion"]
+BASURA_POWERBI = ["nan", "NaN", "NAN", "None", "null", "Null", ""]
+DERIVADAS = ("FechaInicio", "FechaFin", "FechaInicioQuincena", "Quincena Evaluada")  # Salen del nombre del archivo
+ORIGEN_SILVER = {"Fecha Apertura": "Fecha Creacion", "Fecha Cierre": "Fecha Finalizacion"}
+
+NOMBRES_SALIDA = {
+    "Tickets_Silver_Master": "Tickets_Silver_Master.parquet",
+    "SLA_Gold": "SLA_Gold.parquet",
+    "IDF_Gold": "IDF_Gold.parquet",
+    "IDF_Gold_Detalle_Solucion": "IDF_Gold_Detalle_Solucion.parquet",
+    "SLA_GOLD_STATS": "SLA_GOLD_STATS.parquet",
+    "Tickets_Fact_Gold": "Tickets_Fact_Gold.parquet",
+    "SLA_Sketches_Gold": "SLA_Sketches_Gold.parquet",
+    "SLA_Percentiles_Gold": "SLA_Percentiles_Gold.parquet",
+    "Tickets_Backlog_Gold": "Tickets_Backlog_Gold.parquet",
+    "Tickets_Backlog_Resumen_Gold": "Tickets_Backlog_Resumen_Gold.parquet",
+}
+
+# ==========================================
+# 1. PERFIL POR ARCHIVO (QUINCENA, LÍMITES Y FORMATO DE FECHAS)
+# ==========================================
+def perfil_archivos(lf, columnas):
+    """
+    Una fila por archivo con el rango de la quincena (del nombre) y los límites del filtro híbrido.
+    Replica los descartes del motor pandas: temporales, consolidados, nombres sin rango y rangos
+    imposibles (día de inicio inexistente en el mes de cierre).
+    """
+    aggs = [pl.col("Fecha Creacion").is_not_null().sum().alias("_n_creacion")] if "Fecha Creacion" in columnas else [pl.len()]
+    perfil = lf.group_by("Source.Name", maintain_order=True).agg(aggs).collect()
+
+    filas = []
+    for fila in perfil.iter_rows(named=True):
+        nombre = fila["Source.Name"]
+        if nombre is None or nombre.startswith("~$") or "Consolidado" in nombre:
+            continue
+        fecha_inicio, fecha_fin, quincena = obtener_rango_fechas(nombre)
+        if not fecha_inicio or not fila.get("_n_creacion"):
+            continue
+        try:
+            limite_inferior = fecha_fin.replace(day=fecha_inicio.day)  # type: ignore
+        except ValueError as e:
+            console.print(f"   ❌ Error en {nombre}: {e}")
+            continue
+        limite_superior = fecha_fin + datetime.timedelta(days=1) - datetime.timedelta(seconds=1)  # type: ignore
+        filas.append({"Source.Name": nombre, "FechaInicio": fecha_inicio, "FechaFin": fecha_fin,
+                      "Quincena Evaluada": quincena, "_lim_inf": limite_inferior, "_lim_sup": limite_superior})
+
+    esquema = {"Source.Name": pl.Utf8, "FechaInicio": DT, "FechaFin": DT, "Quincena Evaluada": pl.Utf8,
+               "_lim_inf": DT, "_lim_sup": DT}
+    return pl.DataFrame(filas, schema=esquema)
+
+# ==========================================
+# 2. PLAN LAZY DEL SILVER
+# ==========================================
+def _norm(col):
+    return pl.col(col).fill_null("").str.to_uppercase()
+
+def _minutos(fin, inicio):
+    return ((pl.col(fin) - pl.col(inicio)).dt.total_nanoseconds() / 1e9 / 60).round(2, mode="half_to_even").clip(lower_bound=0)
+
+def expr_clasificacion(sol, usr, grp):
+    """Versión Polars de clasificar_tickets: un recorrido Aho-Corasick por columna de texto."""
+    tipo_solucion = CLASIFICADOR_SOLUCION.expr(sol)
+    es_noc = usr.is_in(NOC_USERS) | grp.is_in(NOC_USERS) | (CLASIFICADOR_USUARIO.expr(usr) == "NOC").fill_null(False)
+    return (
+        pl.when(tipo_solucion == "ADMINISTRATIVO").then(pl.lit("ADMINISTRATIVO"))
+          .when(es_noc).then(pl.lit("NOC"))
+          .when(CLASIFICADOR_GRUPO.expr(grp) == "OPERACIONES").then(pl.lit("OPERACIONES"))
+          .when(tipo_solucion == "FISICO").then(pl.lit("OPERACIONES"))
+          .when(tipo_solucion == "LOGICO").then(pl.lit("NOC"))
+          .otherwise(pl.lit("N/S"))
+    )
+
+def _reindex(lf, columnas):
+    presentes = lf.collect_schema().names()
+    return lf.select([pl.col(c) if c in presentes else pl.lit(None).alias(c) for c in columnas])
+
+def proyectar_encabezados(lf, canonicas):
+    """
+    Equivalente lazy de leer_excel_proyectado sobre el Bronze (unión por nombre de todos los Excel):
+    cada columna canónica se arma con los encabezados del Bronze de igual clave_encabezado ('Nº Orden',
+    'N° ORDEN'...), en el orden del Bronze. Cada archivo trae una sola variante, así que coalesce toma
+    la de cada fila. Retorna (LazyFrame con Source.Name + las canónicas presentes, nombres presentes).
+    """
+    esquema = lf.collect_schema()
+    variantes = {}
+    for c in esquema.names():
+        variantes.setdefault(clave_encabezado(c), []).append(c)
+    exprs, presentes = [pl.col("Source.Name")], []
+    for canonica in canonicas:
+        cols = variantes.get(clave_encabezado(canonica))
+        if not cols:
+            continue
+        if len(cols) == 1:
+            exprs.append(pl.col(cols[0]).alias(canonica))
+        else:
+            mixtos = len({esquema[c] for c in cols}) > 1  # Bronze anterior con tipos distintos por variante
+            exprs.append(pl.coalesce([pl.col(c).cast(pl.Utf8) if mixtos else pl.col(c) for c in cols]).alias(canonica))
+        presentes.append(canonica)
+    return lf.select(exprs), presentes
+
+def plan_silver(ruta_bronze):
+    """
+    Construye el plan lazy del Silver de tickets a partir del Bronze. Retorna (LazyFrame, columnas,
+    conteo) donde 'conteo' es un plan con las fechas no reconocidas por columna (cantidad y ejemplos),
+    o (None, None, None) si no hay archivos válidos.
+    """
+    # Mismos encabezados tolerantes (acentos/mayúsculas) que la lectura proyectada del motor pandas
+    canonicas = [c for c in dict.fromkeys(COLS_INPUT_RAW + COLS_FECHA) if c not in DERIVADAS]
+    lf, columnas = proyectar_encabezados(pl.scan_parquet(ruta_bronze), canonicas)
+
+    archivos = perfil_archivos(lf, columnas)
+    if archivos.is_empty():
+        return None, None, None
+
+    # Columnas que ningún archivo trae: nulas (en pandas no existirían y no llegan al Silver)
+    faltantes = [c for c in canonicas if c not in columnas]
+    lf = (
+        lf.with_columns([pl.lit(None, dtype=pl.Utf8).alias(c) for c in faltantes])
+          .with_columns([pl.lit(None, dtype=DT).alias(c) for c in COLS_FECHA if c not in columnas])
+          .join(archivos.lazy(), on="Source.Name", how="inner", maintain_order="left")
+    )
+
+    # --- FECHAS MIXTAS (el texto no reconocido se conserva aparte para reportarlo) ---
+    fechas = [c for c in COLS_FECHA if c in columnas]
+    lf = lf.with_columns(
+        *[expr_fecha_mixta(c).alias(c) for c in fechas],
+        *[pl.when(expr_fecha_invalida(c, expr_fecha_mixta(c))).then(pl.col(c)).alias(f"_inv_{c}") for c in fechas],
+    )
+    conteo = lf.select(
+        *[pl.col(f"_inv_{c}").count().alias(c) for c in fechas],
+        *[pl.col(f"_inv_{c}").drop_nulls().unique(maintain_order=True).head(3).implode().alias(f"_ej_{c}") for c in fechas],
+    )
+
+    # --- FILTRO HÍBRIDO (BACKLOG) ---
+    fin, creacion = pl.col("Fecha Finalizacion"), pl.col("Fecha Creacion")
+    cerrados_aqui = fin.is_between(pl.col("_lim_inf"), pl.col("_lim_sup")).fill_null(False)
+    nacieron_aqui = creacion.is_between(pl.col("FechaInicio"), pl.col("_lim_sup")).fill_null(False)
+    lf = lf.filter(cerrados_aqui | (nacieron_aqui & fin.is_null()))
+
+    # --- EXCLUSIONES ---
+    excluir = (
+        _norm("Solucion Aplicada").is_in(EXCLUIR_SOLUCIONES)
+        | _norm("Grupo Trabajo").str.contains("GT API FIBEX", literal=True)
+        | (_norm("Detalle Orden") == "PRUEBA DE INTERNET")
+        | _norm("Estatus_orden").str.contains("CREACIÓN", literal=True)
+        | _norm("Estatus_orden").is_in(["ANULADA", "CANCELADA", "ELIMINADA"])
+    )
+    lf = lf.filter(~excluir).rename({"Fecha Creacion": "Fecha Apertura", "Fecha Finalizacion": "Fecha Cierre"})
+
+    # --- CLASIFICACIÓN (mismo orden de prioridad que clasificar_tickets) ---
+    lf = lf.with_columns(expr_clasificacion(_norm("Solucion Aplicada"), _norm("Usuario Final"), _norm("Grupo Trabajo")).alias("Clasificacion"))
+    lf = lf.with_columns(
+        _minutos("Fecha Cierre", "Fecha Apertura").alias("SLA Resolucion Min"),
+        _minutos("Fecha Cierre", "Fecha Impresion").alias("_des"),
+        _minutos("Fecha Impresion", "Fecha Apertura").alias("_imp"),
+    )
+
+    # --- FIX NOC VS CALLE ---
+    cerrado = pl.col("Fecha Cierre").is_not_null()
+    remoto = cerrado & pl.col("Fecha Impresion").is_null()
+    res, des, imp = pl.col("SLA Resolucion Min"), pl.col("_des"), pl.col("_imp")
+    lf = lf.with_columns(
+        pl.when(cerrado).then(res.fill_null(0)).otherwise(res).alias("_res_c"),
+        pl.when(remoto).then(0.0).when(cerrado).then(des.fill_null(0)).otherwise(des).alias("_des_c"),
+    ).with_columns(
+        pl.when(cerrado).then(pl.min_horizontal("_des_c", "_res_c")).otherwise(des).alias("SLA Despacho Min"),
+    ).with_columns(
+        pl.when(cerrado).then(pl.col("_res_c") - pl.col("SLA Despacho Min")).otherwise(imp).alias("SLA Impresion Min"),
+        pl.col("Fecha Apertura").dt.truncate("1d").alias("Fecha Apertura Date"),
+        pl.col("Fecha Cierre").dt.truncate("1d").alias("Fecha Cierre Date"),
+        (res / 60).alias("Duracion_Horas"),
+        pl.when(pl.col("Clasificacion") == "ADMINISTRATIVO").then(0).otherwise(1).cast(pl.Int64).alias("Es_Falla"),
+    ).with_columns(
+        # Se evalúa en minutos: Duracion_Horas puede diferir de pandas en el último bit justo en la meta
+        pl.when((res > 0) & (res <= HORAS_SLA_META * 60))
+          .then(1).otherwise(0).cast(pl.Int64).alias("Cumplio_SLA"),
+        # Polars puede leer números de Excel como "12345.0", lo que rompe la deduplicación
+        *[pl.col(c).str.replace(r"\.0$", "").str.strip_chars().alias(c) for c in ("N° Orden", "N° Contrato")],
+    )
+
+    # --- DEDUPLICACIÓN AISLADA POR QUINCENA (último cierre gana) ---
+    lf = ultimo_por_llave_polars(lf, ["Quincena Evaluada", "N° Orden"], "Fecha Cierre", nulos="primero")
+
+    # --- LIMPIEZA POWER BI (equivalente a limpiar_nulos_powerbi) ---
+    textos = [c for c, t in lf.collect_schema().items() if t == pl.Utf8]
+    lf = lf.with_columns([
+        pl.when(pl.col(c).str.contains(r"^\s*$") | pl.col(c).is_in(BASURA_POWERBI)).then(None).otherwise(pl.col(c)).alias(c)
+        for c in textos
+    ])
+
+    # Solo columnas que pandas habría tenido: las calculadas y las que algún archivo trae
+    presentes = set(columnas) | {"FechaInicio", "FechaFin", "Quincena Evaluada"}
+    calculadas = set(lf.collect_schema().names())
+    salida = [c for c in ORDEN_FINAL_SILVER if c in calculadas and (
+              c not in COLS_INPUT_RAW and c not in ORIGEN_SILVER or ORIGEN_SILVER.get(c, c) in presentes)]
+    return lf.select(salida), salida, conteo
+
+# ==========================================
+# 3. GOLDS
+# ==========================================
+def planes_gold(silver):
+    """Los Golds tabulares como planes lazy sobre el Silver ya materializado (los sketches van aparte)."""
+    lf = silver.lazy()
+    sla = ["SLA Resolucion Min", "SLA Despacho Min", "SLA Impresion Min"]
+
+    llaves_sla = ["Quincena Evaluada", "Franquicia", "Clasificacion", "Fecha Apertura Date"]
+    gold_sla = (
+        lf.filter(pl.col("SLA Resolucion Min").is_not_null() & (pl.col("SLA Resolucion Min") > 0))
+          .drop_nulls(llaves_sla)  # groupby de pandas descarta llaves nulas por defecto
+          .group_by(llaves_sla)
+          .agg(pl.col("N° Orden").drop_nulls().n_unique().cast(pl.Int64).alias("Total_Ordenes"),
+               *[pl.col(c).sum() for c in sla])
+          .sort(llaves_sla)
+    )
+
+    llaves_idf = ["Quincena Evaluada", "Franquicia", "Fecha Apertura Date", "Fecha Cierre Date"]
+    gold_idf = (
+        lf.group_by(llaves_idf)
+          .agg(pl.col("N° Orden").drop_nulls().n_unique().cast(pl.Int64).alias("Total_Fallas"))
+          .sort(llaves_idf, nulls_last=True)
+    )
+
+    llaves_det = ["Quincena Evaluada", "Franquicia", "Solucion Aplicada", "Detalle Orden"]
+    gold_detalle = (
+        lf.filter(pl.col("Es_Falla") == 1)
+          .with_columns(pl.col("Solucion Aplicada").fill_null("EN PROCESO / SIN SOLUCIÓN"),
+                        pl.col("Detalle Orden").fill_null("SIN DETALLE REPORTADO"))
+          .group_by(llaves_det)
+          .agg(pl.col("N° Orden").count().cast(pl.Int64).alias("Total_Ordenes"))
+          .sort(llaves_det, nulls_last=True)
+    )
+
+    gold_stats = lf.filter(pl.col("SLA Resolucion Min").is_not_null())
+    gold_fact = lf.with_columns(pl.col("Solucion Aplicada").fill_null("EN PROCESO / SIN SOLUCIÓN"))
+
+    return {
+        "SLA_Gold": _reindex(gold_sla, ORDEN_FINAL_GOLD_SLA),
+        "IDF_Gold": _reindex(gold_idf, ORDEN_FINAL_GOLD_IDF),
+        "IDF_Gold_Detalle_Solucion": _reindex(gold_detalle, ORDEN_FINAL_GOLD_IDF_DETALLE_SOLUCION),
+        "SLA_GOLD_STATS": _reindex(gold_stats, ORDEN_SLA_STATS),
+        "Tickets_Fact_Gold": _reindex(gold_fact, ORDEN_FINAL_FACT_TICKETS),
+    }
+
+def guardar_polars(df, nombre_archivo, carpeta):
+    """Publicación atómica de un DataFrame Polars con el mismo registro que guardar_parquet."""
+    if df.is_empty():
+        logger.warning(f"Dataset vacío: {nombre_archivo}. Se omitió el guardado.")
+        console.print(f"[warning]⚠️ Dataset vacío para {nombre_archivo}. Omitido.[/]")
+        return
+    os.makedirs(carpeta, exist_ok=True)
+    ruta = os.path.join(carpeta, nombre_archivo)
+    with escritura_atomica(ruta) as ruta_tmp:
+        df.write_parquet(ruta_tmp)
+    tipo = "GOLD" if carpeta == PATHS.get("gold") else "SILVER"
+    metricas.registrar_archivo(ruta, df.height, tipo.lower())
+    logger.info(f"DATA_QUALITY | {tipo}: {nombre_archivo} | Guardadas: {df.height:,} (Motor Polars)")
+    console.print(f"[bold green]✅ GUARDADO: {nombre_archivo} ({df.height:,} filas)[/]")
+
+# ==========================================
+# 4. PIPELINE PRINCIPAL
+# ==========================================
+@reportar_tiempo
+def ejecutar():
+    console.rule("[bold magenta]PIPELINE MASTER: TICKETS (SLA + IDF) - MOTOR POLARS[/]")
+
+    ruta_origen = PATHS.get("raw_idf")
+    ruta_bronze = os.path.join(PATHS.get("bronze", "data/bronze"), "Tickets_SLA_Raw_Bronze.parquet")
+
+    # El Bronze es la entrada de este motor: se refresca igual que en el motor pandas
+    try: archivos_raw(ruta_origen, ruta_bronze)
+    except Exception: pass
+
+    if not os.path.exists(ruta_bronze):
+        console.print("[yellow]⚠️ No existe el Bronze de tickets. Nada que procesar.[/]")
+        return
+
+    plan, _, plan_conteo = plan_silver(ruta_bronze)
+    if plan is None:
+        console.print("[yellow]⚠️ No se encontraron tickets válidos para procesar.[/]")
+        return
+
+    # Silver y conteo de fechas no reconocidas comparten la lectura del Bronze
+    df_silver, conteo = pl.collect_all([plan, plan_conteo])
+    for c in [c for c in conteo.columns if not c.startswith("_ej_")]:
+        reportar_fechas_invalidas(f"Bronze tickets | {c}", conteo[c][0], conteo[f"_ej_{c}"][0].to_list())
+    if df_silver.is_empty():
+        console.print("[yellow]⚠️ No se encontraron tickets válidos para procesar.[/]")
+        return
+
+    guardar_polars(df_silver, NOMBRES_SALIDA["Tickets_Silver_Master"], PATHS.get("silver"))
+    planes = planes_gold(df_silver)
+    for nombre, plan_gold in planes.items():
+        guardar_polars(plan_gold.collect(), NOMBRES_SALIDA[nombre], PATHS.get("gold"))
+
+    # Los sketches t-digest se construyen con la misma función que el motor pandas (bytes idénticos)
+    for nombre, df in golds_sketches_sla(planes["SLA_GOLD_STATS"].collect().to_pandas()).items():
+        guardar_polars(pl.from_pandas(df), NOMBRES_SALIDA[nombre], PATHS.get("gold"))
+
+    # Backlog: mismas funciones que el motor pandas, evaluado siempre sobre el Silver completo
+    df_obs = df_silver.select([c for c in COLS_OBSERVACION_BACKLOG if c in df_silver.columns]).to_pandas()
+    for nombre, df in golds_backlog(backlog_desde_cero(df_obs), fecha_corte_backlog(df_obs)).items():
+        guardar_polars(pl.from_pandas(df), NOMBRES_SALIDA[nombre], PATHS.get("gold"))
+
+    console.print(f"[bold green]✨ Proceso Finalizado. Tickets Reales: {df_silver.height:,}[/]")
+
+if __name__ == "__main__":
+    ejecutar()
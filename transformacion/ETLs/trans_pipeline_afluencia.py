@@ -37,14 +37,14 @@ def ejecutar_pipeline_completo():
         
         if not ruta_resultado_silver or not os.path.exists(ruta_resultado_silver):
             console.print("[bold red]❌ FALLO CRÍTICO EN SILVER[/]")
-            return 
+            raise RuntimeError("Afluencia Silver no generó archivo de salida")
             
         console.print(f"[green]✔ Universo Silver reconstruido:[/]")
         console.print(f"   📂 {os.path.basename(ruta_resultado_silver)}")
 
     except Exception as e:
         console.print(f"[bold red]💥 EXCEPCIÓN EN FASE SILVER: {e}[/]")
-        return
+        raise
 
     # =========================================================================
     # FASE 2: CAPA GOLD (Normalización de Oficinas y Sedes)
@@ -65,10 +65,11 @@ def ejecutar_pipeline_completo():
             ))
         else:
             console.print("[bold red]⚠️ ERROR: El archivo Gold no fue localizado tras la ejecución.[/]")
+            raise FileNotFoundError(ruta_gold_esperada)
 
     except Exception as e:
         console.print(f"[bold red]💥 EXCEPCIÓN EN FASE GOLD: {e}[/]")
-        return
+        raise
 
 if __name__ == "__main__":
     ejecutar_pipeline_completo()
\ No newline at end of file
@@ -1,12 +1,16 @@
 import os
 import sys
+import json
+import glob
+import shutil
+import datetime
 import polars as pl
 import duckdb
 import gc
 import gc
 
-from utils import  reportar_tiempo, console
-from utils import ingesta_incremental_polars  
+from utils import  reportar_tiempo, console, escritura_atomica, ruta_staging, bloqueo_dataset, huella_archivos
+from utils import ingesta_incremental_polars, nombre_id_normalizado, sql_id_normalizado
 
 # --- EL TRUCO DEL ASCENSOR ---
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -14,7 +18,7 @@ parent_dir = os.path.dirname(current_dir)
 sys.path.append(parent_dir)
 # -----------------------------
 
-from config import PATHS, MAPA_MESES
+from config import PATHS, MAPA_MESES, RECAUDACION_DIAS_HORAS_TARDIAS
 
 # --- CONSTANTES DE NEGOCIO ---
 OFICINAS_PROPIAS = [
@@ -30,209 +34,436 @@ OFICINAS_PROPIAS = [
     'OFI-SAN CARLOS', 'OFI-VIA VENETO'
 ]
 
+# La ingesta materializa en ambos Bronze el ID de pago normalizado (BIGINT + texto de respaldo):
+# el cruce con Horas y la deduplicación comparan enteros en lugar de aplicar REGEXP_REPLACE cada vez.
+COLUMNA_ID_PAGO = "ID Pago"
+ID_PAGO_NORM = nombre_id_normalizado(COLUMNA_ID_PAGO)
+ID_PAGO_TEXTO = f"{ID_PAGO_NORM}_texto"
+
+NOMBRE_GOLD = "Recaudacion_Gold.parquet"
+
+# Gold particionado por mes de pago (silver/_particiones/trans_recaudacion/Recaudacion_Gold/AAAA-MM.parquet):
+# cada corrida recalcula solo los meses que tocó el delta del Bronze y republica el consolidado.
+MES_SIN_FECHA = "SIN_FECHA"
+COLUMNAS_GOLD = [
+    "ID Contrato", "N° Abonado", "Fecha", "Total Pago", "Forma de Pago", "Banco", "Oficina",
+    "Fecha Contrato", "Estatus", "Suscripción", "Grupo Afinidad", "Nombre Franquicia", "Ciudad",
+    "Vendedor", "Tipo de afluencia", "Clasificacion", "Hora de Pago"
+]
+
+# Excel RAW ya ingeridos ({carpeta: {nombre: {tamanio, mtime_ns}}}): la ingesta relee toda la carpeta,
+# pero el delta del Gold sale solo de los archivos nuevos o modificados.
+NOMBRE_METADATOS_RAW = os.path.join("_metadatos", "trans_recaudacion_raw.json")
+
+def rutas_recaudacion():
+    """Rutas del ETL (se arman al ejecutar para respetar el lake activo en PATHS)."""
+    ruta_bronze = PATHS.get("bronze", "data/bronze")
+    particiones = os.path.join(PATHS.get("silver", "data/silver"), "_particiones", "trans_recaudacion")
+    return {
+        "raw": PATHS["raw_recaudacion"],
+        "raw_horas": PATHS["raw_horaspago"],
+        "bronze": os.path.join(ruta_bronze, "Recaudacion_Raw_Bronze.parquet"),
+        "bronze_horas": os.path.join(ruta_bronze, "Horas_Raw_Bronze.parquet"),
+        "temp_duckdb": os.path.join(ruta_bronze, "duckdb_temp"),
+        "gold": os.path.join(PATHS.get("gold", "data/gold"), NOMBRE_GOLD),
+        "particiones": os.path.join(particiones, "Recaudacion_Gold"),
+        "manifiesto": os.path.join(particiones, "manifiesto.json"),
+        "metadatos_raw": os.path.join(PATHS.get("silver", "data/silver"), NOMBRE_METADATOS_RAW),
+    }
+
+def _sql(ruta):
+    return ruta.replace("\\", "/")
+
+def conectar_duckdb(rutas):
+    con = duckdb.connect(database=':memory:')
+    con.execute("PRAGMA threads=8")
+    con.execute("PRAGMA memory_limit='3GB'")
+    con.execute("SET preserve_insertion_order=false")
+    os.makedirs(rutas["temp_duckdb"], exist_ok=True)
+    con.execute(f"PRAGMA temp_directory='{_sql(rutas['temp_duckdb'])}'")
+    return con
+
+def preparar_vistas(con, rutas):
+    """
+    Registra en 'con' la vista 'recaudacion' (cobros válidos ya con las columnas del Gold salvo la hora,
+    el ID normalizado y 'mes_pago') y retorna el SQL del Gold deduplicado sobre un origen con esas
+    columnas: plantilla con '{origen}'. Retorna None si el Bronze no trae 'ID Pago'.
+    """
+    # Exploración Lazy del Schema (Sin subir datos a la RAM)
+    schema_rec_lower = {c.lower(): c for c in pl.scan_parquet(rutas["bronze"]).collect_schema().names()}
+
+    if "id pago" not in schema_rec_lower:
+        return None
+
+    # Un Bronze anterior a la normalización (o escrito por el respaldo de Polars) la calcula al vuelo
+    id_rec_sql = "" if ID_PAGO_NORM in schema_rec_lower else ", " + sql_id_normalizado(schema_rec_lower["id pago"], ID_PAGO_NORM)
+
+    def safe_col_name(col_name):
+        return f'"{schema_rec_lower[col_name.lower()]}"' if col_name.lower() in schema_rec_lower else "NULL"
+
+    def safe_cast(col_name, data_type="VARCHAR", default="NULL"):
+        if col_name.lower() in schema_rec_lower:
+            real_name = schema_rec_lower[col_name.lower()]
+            return f'COALESCE(CAST(r."{real_name}" AS {data_type}), {default})'
+        return default
+
+    # Manejo de Horas nativo de DuckDB
+    join_horas = ""
+    hora_select = "'00:00'"
+
+    if os.path.exists(rutas["bronze_horas"]):
+        schema_h_lower = {c.lower(): c for c in pl.scan_parquet(rutas["bronze_horas"]).collect_schema().names()}
+        if "id pago" in schema_h_lower and "hora de pago" in schema_h_lower:
+            id_col_h = schema_h_lower["id pago"]
+            hora_col_h = schema_h_lower["hora de pago"]
+            id_horas_sql = "" if ID_PAGO_NORM in schema_h_lower else ", " + sql_id_normalizado(id_col_h, ID_PAGO_NORM)
+            join_horas = f"""
+            LEFT JOIN (
+                SELECT
+                    "{ID_PAGO_NORM}", "{ID_PAGO_TEXTO}",
+                    MAX("{hora_col_h}") AS hora_pago
+                FROM (SELECT *{id_horas_sql} FROM read_parquet('{_sql(rutas["bronze_horas"])}'))
+                WHERE "{id_col_h}" IS NOT NULL
+                GROUP BY 1, 2
+            ) h ON r."{ID_PAGO_NORM}" IS NOT DISTINCT FROM h."{ID_PAGO_NORM}"
+               AND r."{ID_PAGO_TEXTO}" IS NOT DISTINCT FROM h."{ID_PAGO_TEXTO}"
+            """
+            hora_select = """COALESCE(
+                LPAD(EXTRACT('hour' FROM TRY_CAST(TRY_CAST(h.hora_pago AS TIMESTAMP) AS TIME))::VARCHAR, 2, '0') || ':00',
+                LPAD(EXTRACT('hour' FROM TRY_CAST(h.hora_pago AS TIME))::VARCHAR, 2, '0') || ':00',
+                REGEXP_EXTRACT(CAST(h.hora_pago AS VARCHAR), '([0-9]{2}):', 1) || ':00',
+                '00:00'
+            )"""
+        else:
+            console.print("[warning]⚠️ El Bronze de Horas no tiene las columnas requeridas.[/]")
+    else:
+        console.print("[warning]⚠️ No se encontró Bronze de Horas. Se asignarán horas en blanco.[/]")
+
+    # Convertimos la lista de Python a una cadena SQL lista para el IN (...)
+    oficinas_sql = ", ".join([f"'{ofi}'" for ofi in OFICINAS_PROPIAS])
+
+    con.execute(f"""--sql
+        CREATE OR REPLACE TEMP VIEW recaudacion AS
+        WITH
+        Recaudacion AS (
+            SELECT
+                *{id_rec_sql}
+            FROM read_parquet('{_sql(rutas["bronze"])}')
+            WHERE {safe_col_name('ID Pago')} IS NOT NULL
+              AND NOT REGEXP_MATCHES(COALESCE(CAST({safe_col_name('Oficina Cobro')} AS VARCHAR), ''), '(?i)VIRTUAL|Virna|Fideliza|Externa|Unicenter|Compensa')
+        ),
+        Cruce AS (
+            SELECT
+                {safe_cast('ID Contrato', 'VARCHAR', "NULL")} AS "ID Contrato",
+                {safe_cast('N° Abonado', 'VARCHAR', "''")} AS "N° Abonado",
+
+                COALESCE(
+                    TRY_CAST({safe_col_name('Fecha')} AS DATE),
+                    TRY_STRPTIME(CAST({safe_col_name('Fecha')} AS VARCHAR), '%d/%m/%Y %H:%M:%S')::DATE,
+                    TRY_STRPTIME(CAST({safe_col_name('Fecha')} AS VARCHAR), '%d/%m/%Y')::DATE,
+                    TRY_STRPTIME(CAST({safe_col_name('Fecha')} AS VARCHAR), '%d-%m-%Y %H:%M:%S')::DATE,
+                    TRY_STRPTIME(CAST({safe_col_name('Fecha')} AS VARCHAR), '%d-%m-%Y')::DATE,
+                    TRY_STRPTIME(CAST({safe_col_name('Fecha')} AS VARCHAR), '%Y-%m-%d %H:%M:%S')::DATE,
+                    TRY_STRPTIME(CAST({safe_col_name('Fecha')} AS VARCHAR), '%Y-%m-%d')::DATE
+                ) AS "Fecha",
+
+                COALESCE(TRY_CAST(REPLACE(CAST({safe_col_name('Total Pago')} AS VARCHAR), ',', '.') AS DOUBLE), 0.0) AS "Total Pago",
+                {safe_cast('Forma de Pago', 'VARCHAR', "''")} AS "Forma de Pago",
+                {safe_cast('Banco', 'VARCHAR', "''")} AS "Banco",
+                {safe_cast('Oficina Cobro', 'VARCHAR', "''")} AS "Oficina",
+                {safe_cast('Fecha Contrato', 'VARCHAR', "NULL")} AS "Fecha Contrato",
+                {safe_cast('Estatus', 'VARCHAR', "''")} AS "Estatus",
+                {safe_cast('Suscripción', 'VARCHAR', "''")} AS "Suscripción",
+                {safe_cast('Grupo Afinidad', 'VARCHAR', "''")} AS "Grupo Afinidad",
+                {safe_cast('Nombre Franquicia', 'VARCHAR', "''")} AS "Nombre Franquicia",
+                {safe_cast('Ciudad', 'VARCHAR', "''")} AS "Ciudad",
+                {safe_cast('Cobrador', 'VARCHAR', "''")} AS "Vendedor",
+                'RECAUDACIÓN' AS "Tipo de afluencia",
+
+                CASE
+                    WHEN {safe_cast('Oficina Cobro', 'VARCHAR', "''")} IN ({oficinas_sql}) THEN 'OFICINAS PROPIAS'
+                    ELSE 'ALIADOS Y DESARROLLO'
+                END AS "Clasificacion",
+
+                r."{ID_PAGO_NORM}", r."{ID_PAGO_TEXTO}"
+            FROM Recaudacion r
+        )
+        SELECT *, COALESCE(STRFTIME("Fecha", '%Y-%m'), '{MES_SIN_FECHA}') AS mes_pago FROM Cruce
+    """)
+
+    columnas = ", ".join(f'r."{c}"' for c in COLUMNAS_GOLD[:-1])
+    return f"""
+        SELECT
+            {columnas},
+            {hora_select} AS "Hora de Pago",
+            r."{ID_PAGO_NORM}", r."{ID_PAGO_TEXTO}", r.mes_pago
+        FROM {{origen}} r
+        {join_horas}
+        -- Deduplicación Nativa equivalente a Polars .unique(keep="last"), por el ID de pago normalizado.
+        -- El desempate fijo hace que recalcular un mes elija la misma fila que la reconstrucción completa.
+        QUALIFY ROW_NUMBER() OVER (
+            PARTITION BY r."{ID_PAGO_NORM}", r."{ID_PAGO_TEXTO}"
+            ORDER BY r."Fecha" DESC, r."Total Pago" DESC, r."ID Contrato", r."Oficina", r."Forma de Pago", r."Banco", r."Vendedor"
+        ) = 1
+    """
+
+def _llave_igual(a, b):
+    return (f'{a}."{ID_PAGO_NORM}" IS NOT DISTINCT FROM {b}."{ID_PAGO_NORM}" '
+            f'AND {a}."{ID_PAGO_TEXTO}" IS NOT DISTINCT FROM {b}."{ID_PAGO_TEXTO}"')
+
+def meses_delta(fechas_recaudacion, fechas_horas, dias_horas_tardias=RECAUDACION_DIAS_HORAS_TARDIAS):
+    """Meses de pago a recalcular: los de cada fecha nueva de Recaudación y, por cada fecha nueva de Horas, los de los días previos."""
+    fechas = {datetime.date.fromisoformat(f) for f in fechas_recaudacion}
+    for f in fechas_horas:
+        dia = datetime.date.fromisoformat(f)
+        fechas.update(dia - datetime.timedelta(days=k) for k in range(dias_horas_tardias + 1))
+    return {f.strftime("%Y-%m") for f in fechas}
+
+def expandir_meses(con, meses, carpeta_particiones):
+    """
+    Un ID de pago se queda con su fila más reciente en todo el histórico, así que recalcular un mes
+    puede mover la fila ganadora de un ID a otro mes. Se agregan los meses donde aparece algún ID de
+    los meses a recalcular (en el Bronze o en sus particiones actuales).
+    """
+    meses_sql = ", ".join(f"'{m}'" for m in sorted(meses))
+    previas = [_sql(p) for m in sorted(meses) for p in [os.path.join(carpeta_particiones, f"{m}.parquet")] if os.path.exists(p)]
+    ids_previos = ""
+    if previas:
+        lista = ", ".join(f"'{p}'" for p in previas)
+        ids_previos = f'UNION SELECT "{ID_PAGO_NORM}", "{ID_PAGO_TEXTO}" FROM read_parquet([{lista}])'
+    filas = con.execute(f"""
+        WITH k AS (
+            SELECT "{ID_PAGO_NORM}", "{ID_PAGO_TEXTO}" FROM recaudacion WHERE mes_pago IN ({meses_sql})
+            {ids_previos}
+        )
+        SELECT DISTINCT r.mes_pago FROM recaudacion r SEMI JOIN k ON {_llave_igual('r', 'k')}
+    """).fetchall()
+    return set(meses) | {f[0] for f in filas}
+
+def escribir_particiones(con, sql_gold, carpeta_particiones, meses=None):
+    """
+    Recalcula el Gold de 'meses' (None = todo el histórico) y reemplaza sus particiones. El origen
+    son todas las filas de los IDs que aparecen en esos meses, para deduplicar contra el histórico.
+    """
+    carpeta_tmp = carpeta_particiones + ".tmp"
+    shutil.rmtree(carpeta_tmp, ignore_errors=True)
+    if meses is None:
+        consulta = sql_gold.replace("{origen}", "recaudacion")
+    else:
+        meses_sql = ", ".join(f"'{m}'" for m in sorted(meses))
+        origen = f"""(
+            SELECT c.* FROM recaudacion c SEMI JOIN (
+                SELECT DISTINCT "{ID_PAGO_NORM}", "{ID_PAGO_TEXTO}" FROM recaudacion WHERE mes_pago IN ({meses_sql})
+            ) k ON {_llave_igual('c', 'k')}
+        )"""
+        gold_meses = sql_gold.replace("{origen}", origen)
+        consulta = f"SELECT * FROM ({gold_meses}) WHERE mes_pago IN ({meses_sql})"
+    con.execute(f"COPY ({consulta}) TO '{_sql(carpeta_tmp)}' (FORMAT PARQUET, COMPRESSION 'SNAPPY', PARTITION_BY (mes_pago))")
+
+    os.makedirs(carpeta_particiones, exist_ok=True)
+    calculados = {}
+    for carpeta in glob.glob(os.path.join(carpeta_tmp, "mes_pago=*")):
+        calculados[os.path.basename(carpeta).split("=", 1)[1]] = sorted(glob.glob(os.path.join(carpeta, "*.parquet")))
+    actuales = {os.path.basename(p)[:-len(".parquet")] for p in glob.glob(os.path.join(carpeta_particiones, "*.parquet"))}
+    for mes in (actuales if meses is None else set(meses) & actuales) - set(calculados):
+        os.remove(os.path.join(carpeta_particiones, f"{mes}.parquet"))  # Mes que se quedó sin cobros
+    for mes, archivos in calculados.items():
+        with escritura_atomica(os.path.join(carpeta_particiones, f"{mes}.parquet")) as ruta_tmp:
+            if len(archivos) > 1:
+                lista = ", ".join(f"'{_sql(a)}'" for a in archivos)
+                con.execute(f"COPY (SELECT * FROM read_parquet([{lista}])) TO '{_sql(ruta_tmp)}' (FORMAT PARQUET, COMPRESSION 'SNAPPY')")
+            else:
+                shutil.copyfile(archivos[0], ruta_tmp)
+    shutil.rmtree(carpeta_tmp, ignore_errors=True)
+    return sorted(calculados)
+
+def publicar_gold(con, rutas):
+    """Une las particiones mensuales en el Parquet único que lee Power BI (sin las columnas internas)."""
+    patron = _sql(os.path.join(rutas["particiones"], "*.parquet"))
+    columnas = ", ".join(f'"{c}"' for c in COLUMNAS_GOLD)
+    # Staging + publicación atómica: Power BI nunca ve un Gold a medio escribir
+    with escritura_atomica(rutas["gold"]):
+        con.execute(f"COPY (SELECT {columnas} FROM read_parquet('{patron}')) TO '{_sql(ruta_staging(rutas['gold']))}' (FORMAT PARQUET, COMPRESSION 'SNAPPY')")
+
+def _cargar_manifiesto(ruta):
+    try:
+        with open(ruta, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+def _guardar_manifiesto(ruta, estado):
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    with escritura_atomica(ruta) as ruta_tmp:
+        with open(ruta_tmp, "w", encoding="utf-8") as f:
+            json.dump(estado, f, ensure_ascii=False, indent=2)
+
+def huellas_raw(carpeta):
+    """{nombre: {tamanio, mtime_ns}} de los Excel de 'carpeta' (sin temporales de Office)."""
+    huellas = {}
+    for ruta in glob.glob(os.path.join(carpeta, "*.xlsx")):
+        nombre = os.path.basename(ruta)
+        if not nombre.startswith("~$"):
+            st = os.stat(ruta)
+            huellas[nombre] = {"tamanio": st.st_size, "mtime_ns": st.st_mtime_ns}
+    return huellas
+
+def fechas_por_archivo(ruta_bronze, nombres):
+    """
+    {nombre: {fechas 'AAAA-MM-DD'}} de las filas que 'nombres' tienen en el Bronze (según Source.Name).
+    None si el Bronze no registra el archivo de origen.
+    """
+    if not nombres or not os.path.exists(ruta_bronze):
+        return {}
+    if "Source.Name" not in pl.scan_parquet(ruta_bronze).collect_schema().names():
+        return None
+    con = duckdb.connect(database=':memory:')
+    try:
+        filas = con.execute(f"""
+            SELECT DISTINCT "Source.Name", CAST(TRY_CAST("Fecha" AS DATE) AS VARCHAR)
+            FROM read_parquet('{_sql(ruta_bronze)}')
+            WHERE "Source.Name" IN (SELECT UNNEST(?::VARCHAR[]))
+        """, [sorted(nombres)]).fetchall()
+    finally:
+        con.close()
+    fechas = {}
+    for nombre, fecha in filas:
+        fechas.setdefault(nombre, set())
+        if fecha is not None:
+            fechas[nombre].add(fecha)
+    return fechas
+
+def actualizar_bronze(etiqueta, ruta_raw, ruta_bronze, vistos):
+    """
+    Ingesta del Bronze solo si hay Excel nuevos o modificados (tamaño o mtime distintos a 'vistos').
+    La ingesta relee toda la carpeta porque su upsert reemplaza días completos, así que el delta son
+    las fechas de los archivos nuevos o modificados más las de los retirados de la carpeta desde la
+    última ingesta (el reemplazo de sus días borra sus filas). Retorna (fechas, archivos a recordar);
+    fechas None = no se sabe qué cambió (error o Bronze sin Source.Name) -> reconstrucción completa.
+    """
+    actuales = huellas_raw(ruta_raw)
+    cambiados = [n for n in sorted(actuales) if vistos.get(n) != actuales[n]]
+    if not os.path.exists(ruta_bronze):
+        cambiados = sorted(actuales)
+    if not cambiados:
+        console.print(f"[dim]⏭️ {etiqueta}: sin Excel nuevos ni modificados, el Bronze no se toca.[/dim]")
+        return [], vistos
+
+    console.print(f"[dim]Actualizando Bronze de {etiqueta} ({len(cambiados)} archivo(s) nuevo(s) o modificado(s))...[/dim]")
+    try:
+        retirados = fechas_por_archivo(ruta_bronze, set(vistos) - set(actuales))
+        fechas = ingesta_incremental_polars(
+            ruta_raw=ruta_raw,
+            ruta_bronze_historico=ruta_bronze,
+            columna_fecha="Fecha",
+            columna_id=COLUMNA_ID_PAGO,
+            retornar_fechas=True
+        )
+        if fechas is None or retirados is None:
+            return None, actuales
+        ingeridos = fechas_por_archivo(ruta_bronze, set(cambiados))
+        if ingeridos is None:
+            return None, actuales
+    except Exception as e:
+        console.print(f"[yellow]⚠️ La capa Bronze de {etiqueta} no se actualizó. Error: {e}[/]")
+        return None, vistos
+
+    # Un Excel que la ingesta no pudo leer no llega al Bronze: se vuelve a intentar en la próxima corrida
+    recordar = {n: h for n, h in actuales.items() if n not in cambiados or n in ingeridos}
+    delta = set().union(*ingeridos.values(), *retirados.values())
+    return sorted(delta), recordar
+
 @reportar_tiempo
-def ejecutar():
-    console.rule("[bold white]PIPELINE INTEGRAL: RECAUDACIÓN + HORAS (BRONZE DUAL / GOLD FULL)[/]")
-    
-    # 1. RUTAS
-    RUTA_RAW_RECAUDACION = PATHS["raw_recaudacion"]
-    RUTA_RAW_HORAS = PATHS["raw_horaspago"]
-    NOMBRE_GOLD = "Recaudacion_Gold.parquet"
-    RUTA_GOLD_COMPLETA = os.path.join(PATHS.get("gold", "data/gold"), NOMBRE_GOLD)
-    
-    # --- RUTAS DE LAS DOS CAPAS BRONZE ---
-    RUTA_BRONZE = os.path.join(PATHS.get("bronze", "data/bronze"), "Recaudacion_Raw_Bronze.parquet")
-    RUTA_BRONZE_HORAS = os.path.join(PATHS.get("bronze", "data/bronze"), "Horas_Raw_Bronze.parquet")
+def ejecutar(completo=False):
+    """
+    Ingesta incremental de ambos Bronze y Gold incremental por mes de pago: solo se recalculan los
+    meses con fechas de los Excel nuevos o modificados de Recaudación (más RECAUDACION_DIAS_HORAS_TARDIAS
+    días hacia atrás por cada fecha nueva de Horas) y los meses a los que se movió algún ID de pago afectado.
+    Se reconstruye todo si cambia el script, si no hay particiones previas o con completo=True.
+    """
+    console.rule("[bold white]PIPELINE INTEGRAL: RECAUDACIÓN + HORAS (BRONZE DUAL / GOLD INCREMENTAL)[/]")
+    rutas = rutas_recaudacion()
 
     # =========================================================
     # --- PASO 1: ACTUALIZACIÓN BRONZE DOBLE CON POLARS ---
     # =========================================================
-    try:
-        console.print("[dim]Actualizando Bronze de Recaudación...[/dim]")
-        ingesta_incremental_polars(
-            ruta_raw=RUTA_RAW_RECAUDACION,
-            ruta_bronze_historico=RUTA_BRONZE,
-            columna_fecha="Fecha"
-        )
-    except Exception as e:
-        console.print(f"[yellow]⚠️ La capa Bronze de Recaudación no se actualizó. Error: {e}[/]")
+    # None = no se sabe qué fechas cambiaron (error o ingesta sin fechas) -> reconstrucción completa
+    metadatos_raw = _cargar_manifiesto(rutas["metadatos_raw"])
+    fechas_rec, vistos_rec = actualizar_bronze("Recaudación", rutas["raw"], rutas["bronze"], metadatos_raw.get("recaudacion", {}))
 
     # 🚀 OPTIMIZACIÓN RAM: Forzamos a vaciar los GBs del primer archivo antes de leer el segundo
     gc.collect()
 
-    try:
-        console.print("[dim]Actualizando Bronze de Horas...[/dim]")
-        ingesta_incremental_polars(
-            ruta_raw=RUTA_RAW_HORAS,
-            ruta_bronze_historico=RUTA_BRONZE_HORAS,
-            columna_fecha="Fecha"  
-        )
-    except Exception as e:
-        console.print(f"[yellow]⚠️ La capa Bronze de Horas no se actualizó. Error: {e}[/]")
+    fechas_horas, vistos_horas = actualizar_bronze("Horas", rutas["raw_horas"], rutas["bronze_horas"], metadatos_raw.get("horas", {}))
+    metadatos_raw = {"recaudacion": vistos_rec, "horas": vistos_horas}
 
     # 🚀 OPTIMIZACIÓN RAM: Vaciamos los GBs del segundo archivo antes de encender DuckDB
     gc.collect()
 
     # =========================================================
-    # --- PASO 2, 3 Y 4: PROCESAMIENTO LAZY Y MERGE CON DUCKDB ---
+    # --- PASO 2: ALCANCE (MESES A RECALCULAR) ---
     # =========================================================
-    if not os.path.exists(RUTA_BRONZE):
+    if not os.path.exists(rutas["bronze"]):
         console.print("[red]❌ No se encontró la capa Bronze de Recaudación. Ejecución abortada.[/]")
         return
-        
-    console.print("[cyan]🦆 Procesando y cruzando de forma 100% Nativa con DuckDB (Out-Of-Core, RAM casi cero)...[/]")
-    
-    try:
-        con = duckdb.connect(database=':memory:')
-        con.execute("PRAGMA threads=8") 
-        con.execute("PRAGMA memory_limit='3GB'") 
-        con.execute("SET preserve_insertion_order=false") 
-        
-        temp_dir = os.path.join(PATHS.get("bronze", "data/bronze"), "duckdb_temp").replace("\\", "/")
-        os.makedirs(temp_dir, exist_ok=True)
-        con.execute(f"PRAGMA temp_directory='{temp_dir}'")
-
-        # Exploración Lazy del Schema (Sin subir datos a la RAM)
-        schema_rec_lower = {c.lower(): c for c in pl.scan_parquet(RUTA_BRONZE).collect_schema().names()}
-        
-        if "id pago" not in schema_rec_lower:
-            console.print("[bold green]✅ No se detectó 'ID Pago' en la estructura. Operación abortada de forma segura.[/]")
-            return
-            
-        def safe_col_name(col_name):
-            return f'"{schema_rec_lower[col_name.lower()]}"' if col_name.lower() in schema_rec_lower else "NULL"
-
-        def safe_cast(col_name, data_type="VARCHAR", default="NULL"):
-            if col_name.lower() in schema_rec_lower:
-                real_name = schema_rec_lower[col_name.lower()]
-                return f'COALESCE(CAST(r."{real_name}" AS {data_type}), {default})'
-            return default
-
-        # Manejo de Horas nativo de DuckDB
-        join_horas = ""
-        hora_select = "'00:00'"
-        
-        if os.path.exists(RUTA_BRONZE_HORAS):
-            schema_h_lower = {c.lower(): c for c in pl.scan_parquet(RUTA_BRONZE_HORAS).collect_schema().names()}
-            if "id pago" in schema_h_lower and "hora de pago" in schema_h_lower:
-                id_col_h = schema_h_lower["id pago"]
-                hora_col_h = schema_h_lower["hora de pago"]
-                join_horas = f"""
-                LEFT JOIN (
-                    SELECT 
-                        TRIM(REGEXP_REPLACE(CAST("{id_col_h}" AS VARCHAR), '\\.0$', '')) AS id_pago_norm, 
-                        MAX("{hora_col_h}") AS hora_pago
-                    FROM read_parquet('{RUTA_BRONZE_HORAS.replace("\\", "/")}')
-                    WHERE "{id_col_h}" IS NOT NULL
-                    GROUP BY 1
-                ) h ON r.id_pago_norm = h.id_pago_norm
-                """
-                hora_select = """COALESCE(
-                    LPAD(EXTRACT('hour' FROM TRY_CAST(TRY_CAST(h.hora_pago AS TIMESTAMP) AS TIME))::VARCHAR, 2, '0') || ':00', 
-                    LPAD(EXTRACT('hour' FROM TRY_CAST(h.hora_pago AS TIME))::VARCHAR, 2, '0') || ':00', 
-                    REGEXP_EXTRACT(CAST(h.hora_pago AS VARCHAR), '([0-9]{2}):', 1) || ':00', 
-                    '00:00'
-                )"""
+
+    # La huella del script invalida las particiones cuando cambian las reglas del Gold
+    version = huella_archivos([os.path.abspath(__file__)])
+    with bloqueo_dataset(rutas["particiones"]):
+        estado = _cargar_manifiesto(rutas["manifiesto"])
+        reconstruir = (
+            completo or fechas_rec is None or fechas_horas is None
+            or estado.get("version") != version or not glob.glob(os.path.join(rutas["particiones"], "*.parquet"))
+        )
+        meses = None
+        if not reconstruir:
+            # Meses de una corrida anterior que no llegó a publicar + los del delta
+            meses = set(estado.get("pendientes", [])) | meses_delta(fechas_rec, fechas_horas)
+            if not meses and estado.get("publicado"):
+                _guardar_manifiesto(rutas["metadatos_raw"], metadatos_raw)
+                console.print("[bold green]✨ Recaudacion_Gold al día: no llegaron Excel nuevos ni modificados.[/]")
+                return
+            if meses:
+                meses.add(MES_SIN_FECHA)
+
+        console.print("[cyan]🦆 Procesando y cruzando de forma 100% Nativa con DuckDB (Out-Of-Core, RAM casi cero)...[/]")
+        try:
+            con = conectar_duckdb(rutas)
+            sql_gold = preparar_vistas(con, rutas)
+            if sql_gold is None:
+                con.close()
+                console.print("[bold green]✅ No se detectó 'ID Pago' en la estructura. Operación abortada de forma segura.[/]")
+                return
+
+            if reconstruir:
+                console.print("[cyan]⏳ Reconstrucción completa del Gold (todas las particiones mensuales)...[/]")
+                _guardar_manifiesto(rutas["manifiesto"], {"version": None, "pendientes": [], "publicado": False})
             else:
-                console.print("[warning]⚠️ El Bronze de Horas no tiene las columnas requeridas.[/]")
-        else:
-            console.print("[warning]⚠️ No se encontró Bronze de Horas. Se asignarán horas en blanco.[/]")
-
-        # Convertimos la lista de Python a una cadena SQL lista para el IN (...)
-        oficinas_sql = ", ".join([f"'{ofi}'" for ofi in OFICINAS_PROPIAS])
-
-        # Consulta SQL para procesamiento "Out-of-Core" (Usa disco si se llena la RAM)
-        query = f"""--sql
-        COPY (
-            WITH 
-            Recaudacion AS (
-                SELECT 
-                    *,
-                    -- CRÍTICO: Normalizamos el ID Pago limpiando los decimales .0 y espacios para asegurar el match
-                    TRIM(REGEXP_REPLACE(CAST({safe_col_name('ID Pago')} AS VARCHAR), '\\.0$', '')) AS id_pago_norm
-                FROM read_parquet('{RUTA_BRONZE.replace("\\", "/")}')
-                WHERE {safe_col_name('ID Pago')} IS NOT NULL
-                  AND NOT REGEXP_MATCHES(COALESCE(CAST({safe_col_name('Oficina Cobro')} AS VARCHAR), ''), '(?i)VIRTUAL|Virna|Fideliza|Externa|Unicenter|Compensa')
-            ),
-            Cruce AS (
-                SELECT 
-                    {safe_cast('ID Contrato', 'VARCHAR', "NULL")} AS "ID Contrato",
-                    {safe_cast('ID Pago', 'VARCHAR', "NULL")} AS "ID Pago",
-                    {safe_cast('N° Abonado', 'VARCHAR', "''")} AS "N° Abonado",
-                    
-                    COALESCE(
-                        TRY_CAST({safe_col_name('Fecha')} AS DATE),
-                        TRY_STRPTIME(CAST({safe_col_name('Fecha')} AS VARCHAR), '%d/%m/%Y %H:%M:%S')::DATE,
-                        TRY_STRPTIME(CAST({safe_col_name('Fecha')} AS VARCHAR), '%d/%m/%Y')::DATE,
-                        TRY_STRPTIME(CAST({safe_col_name('Fecha')} AS VARCHAR), '%d-%m-%Y %H:%M:%S')::DATE,
-                        TRY_STRPTIME(CAST({safe_col_name('Fecha')} AS VARCHAR), '%d-%m-%Y')::DATE,
-                        TRY_STRPTIME(CAST({safe_col_name('Fecha')} AS VARCHAR), '%Y-%m-%d %H:%M:%S')::DATE,
-                        TRY_STRPTIME(CAST({safe_col_name('Fecha')} AS VARCHAR), '%Y-%m-%d')::DATE
-                    ) AS "Fecha",
-                    
-                    COALESCE(TRY_CAST(REPLACE(CAST({safe_col_name('Total Pago')} AS VARCHAR), ',', '.') AS DOUBLE), 0.0) AS "Total Pago",
-                    {safe_cast('Forma de Pago', 'VARCHAR', "''")} AS "Forma de Pago",
-                    {safe_cast('Banco', 'VARCHAR', "''")} AS "Banco",
-                    {safe_cast('Oficina Cobro', 'VARCHAR', "''")} AS "Oficina",
-                    {safe_cast('Fecha Contrato', 'VARCHAR', "NULL")} AS "Fecha Contrato",
-                    {safe_cast('Estatus', 'VARCHAR', "''")} AS "Estatus",
-                    {safe_cast('Suscripción', 'VARCHAR', "''")} AS "Suscripción",
-                    {safe_cast('Grupo Afinidad', 'VARCHAR', "''")} AS "Grupo Afinidad",
-                    {safe_cast('Nombre Franquicia', 'VARCHAR', "''")} AS "Nombre Franquicia",
-                    {safe_cast('Ciudad', 'VARCHAR', "''")} AS "Ciudad",
-                    {safe_cast('Cobrador', 'VARCHAR', "''")} AS "Vendedor",
-                    'RECAUDACIÓN' AS "Tipo de afluencia",
-                    
-                    CASE 
-                        WHEN {safe_cast('Oficina Cobro', 'VARCHAR', "''")} IN ({oficinas_sql}) THEN 'OFICINAS PROPIAS'
-                        ELSE 'ALIADOS Y DESARROLLO'
-                    END AS "Clasificacion",
-                    
-                    {hora_select} AS "Hora de Pago"
-                    
-                FROM Recaudacion r
-                {join_horas}
-            )
-            SELECT 
-                "ID Contrato", 
-                "N° Abonado", 
-                "Fecha", 
-                "Total Pago", 
-                "Forma de Pago", 
-                "Banco", 
-                "Oficina", 
-                "Fecha Contrato", 
-                "Estatus", 
-                "Suscripción", 
-                "Grupo Afinidad", 
-                "Nombre Franquicia", 
-                "Ciudad", 
-                "Vendedor", 
-                "Tipo de afluencia", 
-                "Clasificacion",
-                "Hora de Pago"
-            FROM Cruce
-            -- Deduplicación Nativa equivalente a Polars .unique(keep="last")
-            QUALIFY ROW_NUMBER() OVER (PARTITION BY "ID Pago" ORDER BY "Fecha" DESC) = 1
-            
-        ) TO '{RUTA_GOLD_COMPLETA.replace("\\", "/")}' (FORMAT PARQUET, COMPRESSION 'SNAPPY');
-        """
-        
-        console.print("[cyan]⏳ Ejecutando proceso SQL Out-Of-Core directo a Disco...[/]")
-        con.execute(query)
-        con.close()
-        del con
-        
-        # 🚀 OPTIMIZACIÓN RAM: Forzamos al sistema a liberar instantáneamente 
-        # los 2GB que DuckDB tenía reservados para el cruce.
-        gc.collect()
-        
-        console.print(f"[bold green]✅ Archivo {NOMBRE_GOLD} generado y exportado exitosamente (RAM casi Cero).[/]")
-        
-    except Exception as e:
-        console.print(f"[bold red]❌ Error ejecutando motor DuckDB: {e}[/]")
-        console.print(f"[bold red]❌ Error en proceso de Recaudación: {e}[/]")
-        return
+                meses = expandir_meses(con, meses, rutas["particiones"])
+                console.print(f"[cyan]⏳ Recalculando {len(meses)} mes(es) de pago: {', '.join(sorted(meses))}[/]")
+                _guardar_manifiesto(rutas["manifiesto"], {**estado, "pendientes": sorted(meses), "publicado": False})
+
+            escritos = escribir_particiones(con, sql_gold, rutas["particiones"], meses)
+            if not glob.glob(os.path.join(rutas["particiones"], "*.parquet")):
+                con.close()
+                console.print("[yellow]⚠️ No hay cobros válidos para publicar.[/]")
+                return
+            publicar_gold(con, rutas)
+            _guardar_manifiesto(rutas["manifiesto"], {"version": version, "pendientes": [], "publicado": True})
+            # Recién con el Gold publicado los Excel cuentan como procesados
+            _guardar_manifiesto(rutas["metadatos_raw"], metadatos_raw)
+            con.close()
+            del con
+
+            # 🚀 OPTIMIZACIÓN RAM: Forzamos al sistema a liberar instantáneamente
+            # los 2GB que DuckDB tenía reservados para el cruce.
+            gc.collect()
+
+            console.print(f"[bold green]✅ Archivo {NOMBRE_GOLD} republicado ({len(escritos)} partición(es) recalculada(s)).[/]")
+
+        except Exception as e:
+            console.print(f"[bold red]❌ Error ejecutando motor DuckDB: {e}[/]")
+            raise
 
 if __name__ == "__main__":
-    ejecutar()
\ No newline at end of file
+    ejecutar(completo="--completo" in sys.argv)
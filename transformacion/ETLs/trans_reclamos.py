@@ -16,7 +16,7 @@ from config import (
     SUB_RECLAMOS_BANCO,
     FALLAS_BANCO_TARGET
 )
-from utils import guardar_parquet, console, reportar_tiempo, ingesta_incremental_polars, standard_hours, limpiar_nulos_powerbi
+from utils import guardar_parquet, console, reportar_tiempo, ingesta_incremental_polars, standard_hours, limpiar_nulos_powerbi, ultimo_por_llave
 
 # -----------------------------------------------------------------------------
 # 1. ETL: RECLAMOS GENERALES (Call Center, OOCC, RRSS)
@@ -90,10 +90,8 @@ def procesar_reclamos_general():
     # =========================================================
     df_final = df_nuevo_total.copy()
     
-    if 'Fecha_Modificacion_Archivo' in df_final.columns:
-        df_final = df_final.sort_values(by='Fecha_Modificacion_Archivo', ascending=True)
-        
-    df_final = df_final.drop_duplicates(subset=["N° Abonado", "Fecha Llamada", "Hora Llamada"], keep='last')
+    # Último registro por llave según la metadata del archivo (hash, sin ordenar todo el DataFrame)
+    df_final = ultimo_por_llave(df_final, ["N° Abonado", "Fecha Llamada", "Hora Llamada"], 'Fecha_Modificacion_Archivo')
     
     if 'Fecha_Modificacion_Archivo' in df_final.columns:
         df_final = df_final.drop(columns=['Fecha_Modificacion_Archivo'])
@@ -161,10 +159,7 @@ def procesar_fallas_app():
     df_final = df_nuevo.copy()
     
     if not df_final.empty:
-        if 'Fecha_Modificacion_Archivo' in df_final.columns:
-            df_final = df_final.sort_values(by='Fecha_Modificacion_Archivo', ascending=True)
-            
-        df_final = df_final.drop_duplicates(subset=["N° Abonado", "Fecha Llamada", "Hora Llamada"], keep='last')
+        df_final = ultimo_por_llave(df_final, ["N° Abonado", "Fecha Llamada", "Hora Llamada"], 'Fecha_Modificacion_Archivo')
         
         if 'Fecha_Modificacion_Archivo' in df_final.columns:
             df_final = df_final.drop(columns=['Fecha_Modificacion_Archivo'])
@@ -242,10 +237,7 @@ def procesar_fallas_banco():
 
         df_final = df_nuevo.copy()
         
-        if 'Fecha_Modificacion_Archivo' in df_final.columns:
-            df_final = df_final.sort_values(by='Fecha_Modificacion_Archivo', ascending=True)
-            
-        df_final = df_final.drop_duplicates(subset=["N° Abonado", "Fecha Llamada", "Hora Llamada"], keep='last')
+        df_final = ultimo_por_llave(df_final, ["N° Abonado", "Fecha Llamada", "Hora Llamada"], 'Fecha_Modificacion_Archivo')
         
         if 'Fecha_Modificacion_Archivo' in df_final.columns:
             df_final = df_final.drop(columns=['Fecha_Modificacion_Archivo'])
@@ -1,15 +1,21 @@
 import pandas as pd
 import numpy as np
-from scipy.stats import normaltest
 import os
 
-usuario_path = os.environ['USERPROFILE']
-ruta_parquet = os.path.join(usuario_path, "Documents", "A-DataStack", "01-Proyectos", "01-Data_PipelinesFibex", "02_Data_Lake", "silver_data", "Tickets_Silver_Master.parquet")
-df = pd.read_parquet(ruta_parquet)
+def ejecutar():
+    # Carga diferida: scipy es pesado y solo se necesita para esta prueba estadística
+    from scipy.stats import normaltest
 
-stat, p_valor = normaltest(df['tiempo_resolucion'])
+    usuario_path = os.environ['USERPROFILE']
+    ruta_parquet = os.path.join(usuario_path, "Documents", "A-DataStack", "01-Proyectos", "01-Data_PipelinesFibex", "02_Data_Lake", "silver_data", "Tickets_Silver_Master.parquet")
+    df = pd.read_parquet(ruta_parquet)
 
-if p_valor > 0.05:
-    print("Los datos se comportan como una distribución normal.")
-else:
-    print("Los datos no son normales.")
\ No newline at end of file
+    stat, p_valor = normaltest(df['tiempo_resolucion'])
+
+    if p_valor > 0.05:
+        print("Los datos se comportan como una distribución normal.")
+    else:
+        print("Los datos no son normales.")
+
+if __name__ == "__main__":
+    ejecutar()
@@ -4,7 +4,7 @@ import os
 from config import PATHS, LISTA_VENDEDORES_OFICINA, LISTA_VENDEDORES_PROPIOS, MAPA_MESES
 from utils import (
     guardar_parquet, reportar_tiempo, console, 
-    ingesta_incremental_polars, limpiar_nulos_powerbi
+    ingesta_incremental_polars, limpiar_nulos_powerbi, ultimo_por_llave
 )
 
 # --- LÓGICA DE CLASIFICACIÓN (Mantenida 100% igual) ---
@@ -129,16 +129,9 @@ def ejecutar():
     if not df_final.empty:
         filas_antes = len(df_final)
         
-        # 1. ORDENAMIENTO CRONOLÓGICO POR METADATA (Si existe)
-        if 'Fecha_Modificacion_Archivo' in df_final.columns:
-            console.print("[cyan]⏱️ Ordenando por metadata para preservar el registro más reciente...[/]")
-            df_final = df_final.sort_values(by='Fecha_Modificacion_Archivo', ascending=True)
-            
-        # Último seguro contra duplicados por clave de negocio
-        df_final = df_final.drop_duplicates(
-            subset=["N° Abonado", "Fecha Contrato"], 
-            keep='last'
-        )
+        # Último seguro contra duplicados por clave de negocio: gana el registro más reciente según
+        # la metadata del archivo (si existe)
+        df_final = ultimo_por_llave(df_final, ["N° Abonado", "Fecha Contrato"], 'Fecha_Modificacion_Archivo')
         
         # ELIMINAMOS LA COLUMNA FANTASMA (Hizo su trabajo y no sale a PBI)
         if 'Fecha_Modificacion_Archivo' in df_final.columns:
@@ -106,17 +106,12 @@ def ejecutar():
     if not df_final.empty:
         filas_antes = len(df_final)
         
-        # 1. ORDENAMIENTO CRONOLÓGICO POR METADATA (Si existe)
-        if 'Fecha_Modificacion_Archivo' in df_final.columns:
-            utils.console.print("[cyan]⏱️ Ordenando por metadata para preservar el registro más reciente...[/]")
-            df_final = df_final.sort_values(by='Fecha_Modificacion_Archivo', ascending=True)
-        
-        # 2. ESTANDARIZAR ANTES DE DEDUPLICAR (Evita falsos duplicados por formato ERP)
+        # 1. ESTANDARIZAR ANTES DE DEDUPLICAR (Evita falsos duplicados por formato ERP)
         df_final = utils.standard_hours(df_final, 'Hora')
 
-        # 3. DEDUPLICACIÓN ESTRICTA
+        # 2. DEDUPLICACIÓN ESTRICTA (gana el registro más reciente según la metadata, si existe)
         subset_dedup = ["N° Abonado", "Fecha", "Hora"]
-        df_final = df_final.drop_duplicates(subset=subset_dedup, keep='last')
+        df_final = utils.ultimo_por_llave(df_final, subset_dedup, 'Fecha_Modificacion_Archivo')
         
         #  ELIMINAMOS LA COLUMNA FANTASMA (Hizo su trabajo y no sale)
         if 'Fecha_Modificacion_Archivo' in df_final.columns:
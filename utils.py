@@ -11,9 +11,14 @@ import warnings
 import time
 import datetime
 import re
+import unicodedata
 import shutil
 import duckdb
 import threading
+import json
+import random
+import platform
+from contextlib import contextmanager
 from functools import wraps
 from rich.console import Console
 from rich.progress import (
@@ -25,7 +30,8 @@ from rich.progress import (
 )
 from rich.table import Table 
 from rich.panel import Panel 
-from config import PATHS, THEME_COLOR 
+from config import PATHS, THEME_COLOR, LOCK_ESPERA_MAX_SEG, LOCK_EXPIRACION_SEG, PUBLICACION_REINTENTOS
+import metricas
 import logging
 from logging.handlers import RotatingFileHandler
 from pathlib import Path
@@ -105,7 +111,9 @@ def audit_performance(func):
     @wraps(func)
     def wrapper(*args, **kwargs):
         inicio = time.time()
-        filas = f"{args[0].shape[0]:,}" if args and hasattr(args[0], 'shape') else "N/A"
+        n_filas = args[0].shape[0] if args and hasattr(args[0], 'shape') else None
+        filas = f"{n_filas:,}" if n_filas is not None else "N/A"
+        etapa = f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
         
         # --- Monitoreo ---
         muestras_ram = []
@@ -126,13 +134,351 @@ def audit_performance(func):
             ram_avg_str = f"{promedio:.1f} MB (Media)"
             
             logger.info(f"EXITO:  [{func.__name__}] | Duración: {duracion:.2f}s | RAM: {ram_avg_str}")
+            metricas.registrar_etapa(etapa, duracion, True, max(muestras_ram, default=None), filas=n_filas)
+            metricas.volcar()
             return resultado
         except Exception as e:
             detener_monitor.set()
             logger.error(f"FALLO:  [{func.__name__}] | Error: {str(e)}", exc_info=True)
+            metricas.registrar_etapa(etapa, time.time() - inicio, False, max(muestras_ram, default=None), filas=n_filas)
+            metricas.volcar()
             raise e 
     return wrapper
 
+# --- CACHÉ DE DIMENSIONES (ÁMBITO DE CORRIDA) ---
+# Varios ETLs de una misma corrida releen las mismas tablas compartidas (Dim_Cliente, ATC Gold,
+# Dim Oficinas, Maestro de Empleados, Golds de franquicias). La caché carga cada archivo UNA sola vez
+# como tabla Arrow y entrega vistas sin copia a Polars, Pandas (dtypes Arrow) y DuckDB.
+# La huella del archivo (mtime + tamaño) se valida en cada acceso y guardar_parquet invalida la
+# entrada al reescribir, por lo que nunca se sirve una versión vieja de la dimensión.
+# main.ejecutar_objetivos la vacía al terminar la corrida para no retener las tablas en RAM.
+class CacheDimensiones:
+    def __init__(self):
+        self._tablas = {}
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.cargas = 0
+
+    @staticmethod
+    def _normalizar(ruta):
+        return os.path.normcase(os.path.abspath(ruta))
+
+    @staticmethod
+    def _huella(ruta):
+        st = os.stat(ruta)
+        return (st.st_mtime_ns, st.st_size)
+
+    @staticmethod
+    def _cargar(ruta, columnas, opciones_csv):
+        if ruta.lower().endswith(".csv"):
+            # El CSV se interpreta con Pandas para conservar su inferencia de tipos original
+            df = pd.read_csv(ruta, usecols=columnas, **opciones_csv)
+            return pa.Table.from_pandas(df, preserve_index=False)
+        import pyarrow.parquet as pq
+        return pq.read_table(ruta, columns=columnas)
+
+    def tabla(self, ruta, columnas=None, **opciones_csv):
+        """
+        Retorna la tabla Arrow del archivo (Parquet o CSV), cargándola solo si no está en caché
+        o si el archivo cambió en disco. Lanza FileNotFoundError si el archivo no existe.
+        """
+        clave = (self._normalizar(ruta), tuple(columnas) if columnas else None, tuple(sorted(opciones_csv.items())))
+        huella = self._huella(ruta)
+        with self._lock:
+            entrada = self._tablas.get(clave)
+            if entrada and entrada[0] == huella:
+                self.aciertos += 1
+                return entrada[1]
+
+            tabla = self._cargar(ruta, list(columnas) if columnas else None, opciones_csv)
+            self._tablas[clave] = (huella, tabla)
+            self.cargas += 1
+            logger.info(f"DIM_CACHE | Cargada: {os.path.basename(ruta)} | Filas: {tabla.num_rows:,} | {tabla.nbytes / (1024 * 1024):.1f} MB")
+            return tabla
+
+    def invalidar(self, ruta):
+        """Descarta todas las proyecciones cacheadas de un archivo (se llama al reescribirlo)."""
+        ruta_norm = self._normalizar(ruta)
+        with self._lock:
+            for clave in [c for c in self._tablas if c[0] == ruta_norm]:
+                del self._tablas[clave]
+
+    def limpiar(self):
+        """Descarta todas las tablas cacheadas y devuelve la memoria al sistema operativo."""
+        with self._lock:
+            self._tablas.clear()
+        liberar_ram_os()
+
+cache_dimensiones = CacheDimensiones()
+
+def leer_dimension_polars(ruta, columnas=None, **opciones_csv):
+    """Vista Polars (sin copia) de la dimensión cacheada."""
+    return pl.from_arrow(cache_dimensiones.tabla(ruta, columnas, **opciones_csv))
+
+def leer_dimension_pandas(ruta, columnas=None, arrow_dtypes=True, **opciones_csv):
+    """
+    DataFrame Pandas de la dimensión cacheada. Con arrow_dtypes=True equivale a
+    read_parquet(dtype_backend="pyarrow") y reutiliza los buffers Arrow; con False se obtienen
+    los dtypes clásicos de Pandas (implica copia), para código que depende de object/NaN.
+    """
+    tabla = cache_dimensiones.tabla(ruta, columnas, **opciones_csv)
+    if arrow_dtypes:
+        return tabla.to_pandas(types_mapper=pd.ArrowDtype)
+    return tabla.to_pandas()
+
+def registrar_dimension_duckdb(con, nombre, ruta, columnas=None):
+    """Registra la dimensión cacheada como vista en una conexión DuckDB (escaneo Arrow sin copia)."""
+    con.register(nombre, cache_dimensiones.tabla(ruta, columnas))
+    return nombre
+
+def invalidar_dimension(ruta):
+    cache_dimensiones.invalidar(ruta)
+
+# --- LECTURA DE EXCEL CON PROYECCIÓN DE COLUMNAS ---
+# Los exportes del SAE traen decenas de columnas y los ETLs usan un puñado. Calamine igual tiene que
+# parsear el XML de toda la hoja, pero con 'use_columns' las columnas descartadas no se convierten a
+# texto/Arrow ni llegan a Pandas, que es donde se iba el resto del tiempo y de la RAM.
+def clave_encabezado(nombre):
+    """'Nº Orden', ' N° ORDEN' y 'n°  orden' -> 'no orden': sin acentos, mayúsculas, '_' ni espacios extra."""
+    texto = unicodedata.normalize("NFKD", str(nombre).replace("°", "º"))
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return " ".join(texto.replace("_", " ").casefold().split())
+
+def leer_excel_proyectado(ruta, columnas, alias=None):
+    """
+    Lee de la primera hoja de un Excel (calamine, todo como texto) solo las columnas pedidas y las renombra a su nombre
+    canónico. 'columnas' son los nombres canónicos y 'alias' mapea variantes de encabezado -> canónico
+    (ej. {"Nombre Franquicia": "Franquicia"}); la comparación usa clave_encabezado. Si varias variantes
+    están presentes gana la primera de izquierda a derecha. Las columnas que el archivo no trae
+    simplemente no aparecen. Retorna un DataFrame de Polars.
+    """
+    buscadas = {clave_encabezado(c): c for c in columnas}
+    for variante, canonica in (alias or {}).items():
+        buscadas.setdefault(clave_encabezado(variante), canonica)
+    renombre = {}
+
+    def usar_columna(info):
+        if info.name in renombre:
+            return True
+        canonica = buscadas.get(clave_encabezado(info.name))
+        if canonica is None or canonica in renombre.values():
+            return False
+        renombre[info.name] = canonica
+        return True
+
+    df = pl.read_excel(ruta, engine="calamine", infer_schema_length=0,
+                       raise_if_empty=False, read_options={"use_columns": usar_columna})
+    return df.rename({origen: destino for origen, destino in renombre.items() if origen in df.columns})
+
+# --- PROTOCOLO DE ESCRITURA DEL LAKE (LOCKS + PUBLICACIÓN ATÓMICA) ---
+# El "anti-lock" original borraba el destino y luego lo reescribía: si dos ETLs (o Power BI) tocaban el
+# mismo archivo podían ver un Parquet inexistente o a medio escribir, y por eso todo corría en serie.
+# Protocolo:
+#   1. Lock consultivo por dataset: '<archivo>.lock' creado con O_EXCL (atómico en NTFS y POSIX).
+#      Guarda pid/host/inicio para detectar locks abandonados por un proceso que murió; solo se
+#      rompen con el dueño muerto, serializando a quienes los rompen y apartándolos con rename.
+#   2. Escritura en un archivo de staging dentro de la misma carpeta (mismo volumen).
+#   3. Publicación con os.replace: los lectores ven la versión anterior o la nueva, nunca una mitad.
+#      Si el destino está abierto (PermissionError en Windows) se reintenta con backoff exponencial.
+_locks_propios = {}
+_locks_propios_mutex = threading.Lock()
+
+def _pid_activo(pid, desde=None):
+    """
+    True/False según el proceso 'pid' siga vivo; None si no se puede saber (Windows sin psutil).
+    Con 'desde' (epoch de creación del lock) un PID reutilizado por un proceso posterior cuenta como muerto.
+    """
+    try:
+        import psutil
+        try:
+            proceso = psutil.Process(pid)
+            return desde is None or proceso.create_time() <= desde + 1
+        except psutil.NoSuchProcess:
+            return False
+        except psutil.Error:
+            return None
+    except ImportError:
+        pass
+    if os.name != "posix":
+        return None  # En Windows os.kill no sirve de sonda: termina el proceso
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # Existe pero pertenece a otro usuario
+
+def _leer_lock(ruta_lock):
+    """Contenido del lock (pid/host/inicio) o None si no existe o aún está vacío."""
+    try:
+        with open(ruta_lock, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _lock_abandonado(ruta_lock):
+    """
+    True solo si el dueño del lock está muerto. La edad (LOCK_EXPIRACION_SEG) se usa únicamente
+    cuando no hay forma de comprobarlo: lock de otro host, sin contenido o sin sonda de procesos.
+    """
+    try:
+        edad = time.time() - os.path.getmtime(ruta_lock)
+    except OSError:
+        return False  # Ya fue liberado por su dueño
+    info = _leer_lock(ruta_lock)
+    if info and info.get("host") == platform.node() and info.get("pid"):
+        try:
+            desde = datetime.datetime.fromisoformat(info["inicio"]).timestamp()
+        except (KeyError, TypeError, ValueError):
+            desde = None
+        vivo = _pid_activo(int(info["pid"]), desde)
+        if vivo is not None:
+            return not vivo
+    return edad > LOCK_EXPIRACION_SEG
+
+def _romper_lock(ruta_lock):
+    """
+    Rompe un lock abandonado sin carreras. Los que lo rompen se serializan con un segundo lock
+    '<lock>.romper' (O_EXCL) y, dentro de él, se vuelve a comprobar que siga abandonado antes de
+    apartarlo con un rename atómico: así dos procesos en espera nunca borran el lock que otro
+    acaba de tomar. Retorna True si lo rompió.
+    """
+    ruta_romper = ruta_lock + ".romper"
+    try:
+        fd = os.open(ruta_romper, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        # Otro proceso lo está rompiendo; la sección crítica dura milisegundos, así que
+        # un '.romper' de más de un minuto quedó de un proceso que murió a mitad.
+        try:
+            if time.time() - os.path.getmtime(ruta_romper) > 60:
+                os.rename(ruta_romper, f"{ruta_romper}.{os.getpid()}.{threading.get_ident()}.roto")
+        except OSError:
+            pass
+        return False
+    os.close(fd)
+    try:
+        if not _lock_abandonado(ruta_lock):
+            return False
+        apartado = f"{ruta_lock}.{os.getpid()}.{threading.get_ident()}.roto"
+        try:
+            os.rename(ruta_lock, apartado)
+        except OSError:
+            return False  # Liberado por su dueño entre la comprobación y el rename
+        logger.warning(f"LOCK | Se rompe lock abandonado: {ruta_lock} | Dueño: {_leer_lock(apartado)}")
+        try:
+            os.remove(apartado)
+        except OSError:
+            pass
+        return True
+    finally:
+        try:
+            os.remove(ruta_romper)
+        except OSError:
+            pass
+
+@contextmanager
+def bloqueo_dataset(ruta, espera_max=None):
+    """
+    Adquiere el lock consultivo del dataset 'ruta' (archivo o carpeta de particiones).
+    Es reentrante dentro del mismo hilo, de modo que una función que ya tiene el lock puede
+    llamar a guardar_parquet / escritura_atomica sobre el mismo destino sin bloquearse.
+    Lanza TimeoutError si no lo obtiene en 'espera_max' segundos.
+    """
+    ruta_lock = os.path.abspath(ruta) + ".lock"
+    hilo = threading.get_ident()
+
+    with _locks_propios_mutex:
+        propio = _locks_propios.get(ruta_lock)
+        reentrante = bool(propio and propio[0] == hilo)
+        if reentrante:
+            propio[1] += 1 #type: ignore
+    if reentrante:
+        try:
+            yield ruta_lock
+        finally:
+            with _locks_propios_mutex:
+                _locks_propios[ruta_lock][1] -= 1
+        return
+
+    espera_max = LOCK_ESPERA_MAX_SEG if espera_max is None else espera_max
+    os.makedirs(os.path.dirname(ruta_lock), exist_ok=True)
+    inicio, pausa, avisado = time.time(), 0.2, False
+    while True:
+        try:
+            fd = os.open(ruta_lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"pid": os.getpid(), "host": platform.node(),
+                           "inicio": datetime.datetime.now().isoformat(timespec="seconds")}, f)
+            break
+        except FileExistsError:
+            if _lock_abandonado(ruta_lock) and _romper_lock(ruta_lock):
+                continue
+            if time.time() - inicio > espera_max:
+                raise TimeoutError(f"No se obtuvo el lock de {os.path.basename(ruta)} en {espera_max}s ({ruta_lock})")
+            if not avisado:
+                console.print(f"[yellow]⏳ {os.path.basename(ruta)} está siendo escrito por otro proceso. Esperando su lock...[/]")
+                avisado = True
+            time.sleep(pausa + random.uniform(0, pausa / 2))
+            pausa = min(pausa * 2, 5)
+
+    with _locks_propios_mutex:
+        _locks_propios[ruta_lock] = [hilo, 0]
+    try:
+        yield ruta_lock
+    finally:
+        with _locks_propios_mutex:
+            _locks_propios.pop(ruta_lock, None)
+        try:
+            os.remove(ruta_lock)
+        except OSError:
+            pass
+
+def publicar_atomico(ruta_staging, ruta_destino, reintentos=None):
+    """
+    Reemplaza atómicamente 'ruta_destino' por 'ruta_staging'. Si el destino está abierto por otro
+    programa (Power BI, Excel) reintenta con backoff exponencial antes de propagar el PermissionError.
+    """
+    reintentos = PUBLICACION_REINTENTOS if reintentos is None else reintentos
+    pausa = 0.5
+    for intento in range(reintentos + 1):
+        try:
+            os.replace(ruta_staging, ruta_destino)
+            return
+        except PermissionError:
+            if intento == reintentos:
+                raise
+            logger.warning(f"PUBLICACION | {os.path.basename(ruta_destino)} bloqueado, reintento {intento + 1}/{reintentos}")
+            console.print(f"[yellow]🔒 {os.path.basename(ruta_destino)} está abierto en otro programa. Reintento {intento + 1}/{reintentos} en {pausa:.1f}s...[/]")
+            time.sleep(pausa)
+            pausa = min(pausa * 2, 30)
+
+def ruta_staging(ruta):
+    """Ruta de staging que escritura_atomica entrega para 'ruta' (útil para armar un COPY de antemano)."""
+    return f"{ruta}.{os.getpid()}.staging"
+
+@contextmanager
+def escritura_atomica(ruta, espera_max=None):
+    """
+    Escritura segura de un archivo del lake:
+        with escritura_atomica(ruta_gold) as ruta_tmp:
+            df.write_parquet(ruta_tmp)      # o COPY ... TO ruta_tmp en DuckDB
+    Toma el lock del dataset, entrega una ruta de staging y al salir sin errores la publica
+    atómicamente sobre 'ruta'. Si el bloque falla, el destino queda intacto y el staging se borra.
+    """
+    with bloqueo_dataset(ruta, espera_max):
+        ruta_tmp = ruta_staging(ruta)
+        try:
+            yield ruta_tmp
+            publicar_atomico(ruta_tmp, ruta)
+            invalidar_dimension(ruta)
+        finally:
+            if os.path.exists(ruta_tmp):
+                try:
+                    os.remove(ruta_tmp)
+                except OSError:
+                    pass
+
 # La intención de esta función es la implementación del star schema en el modelo de Power BI
 # Se asigna un Cliente_SK el cual sera un numero entero a fin de funcionar como llave principal en Dim_Cliente y llave foranea en las tablas de hechos
 # lo que permite disminuir la cardinalidad del modelo. 
@@ -172,11 +518,13 @@ def asignar_cliente_sk(df, col_abonado="N° Abonado"):
             COALESCE(d.Cliente_SK, -1) AS Cliente_SK,
             h.*
         FROM df_hechos h
-        LEFT JOIN read_parquet('{ruta_dim}') d
+        LEFT JOIN dim_cliente d
           ON CAST(h."{col_abonado}" AS VARCHAR) = CAST(d."N° Abonado" AS VARCHAR)
     """
     
     try:
+        # Dim_Cliente se lee una sola vez por corrida aunque varias tablas de hechos la crucen
+        registrar_dimension_duckdb(con, 'dim_cliente', ruta_dim, columnas=["Cliente_SK", "N° Abonado"])
         if isinstance(df, pd.DataFrame):
             df_res = con.execute(query).df()
         else:
@@ -196,6 +544,7 @@ def reportar_tiempo(func):
         start_time = time.time()
         is_scraper = 'scraper' in func.__module__ or 'descargar' in func.__name__
         active_logger = logger_extraccion if is_scraper else logger
+        etapa = f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
         
         # --- Monitoreo ---
         muestras_ram = []
@@ -218,6 +567,7 @@ def reportar_tiempo(func):
 
             console.print(f"[bold yellow]⏱️ Tiempo total bloque: {minutos:.0f} min y {segundos:.2f} seg | RAM Media: {ram_avg_str}[/]\n")
             active_logger.info(f"EXITO: [{func.__name__}] | Duración: {duration:.2f}s | RAM: {ram_avg_str}")
+            metricas.registrar_etapa(etapa, duration, True, max(muestras_ram, default=None), es_scraper=is_scraper)
             return result
         except Exception as e:
             detener_monitor.set()
@@ -228,8 +578,10 @@ def reportar_tiempo(func):
             
             console.print(f"[bold red] FALLO CRÍTICO: {func.__name__} |  RAM Media: {ram_avg_str}[/]\n")
             active_logger.error(f"FALLO CRITICO: [{func.__name__}] | Duración: {duration:.2f}s | RAM: {ram_avg_str} | Error: {str(e)}", exc_info=True)
+            metricas.registrar_etapa(etapa, duration, False, max(muestras_ram, default=None), es_scraper=is_scraper)
             raise e
         finally:
+            metricas.volcar()
             liberar_ram_os()
     return wrapper
 
@@ -307,17 +659,44 @@ def archivos_raw(ruta_raw, ruta_destino_parquet):
         console.print(f"[bold red]❌ FALLO CRÍTICO en Bronze: {e}[/]")
         raise
 
+def nombre_id_normalizado(columna):
+    """'ID Pago' -> 'id_pago_norm': columna con el ID normalizado que la ingesta agrega al Bronze."""
+    return re.sub(r"\W+", "_", columna.strip().lower()).strip("_") + "_norm"
+
+def sql_id_normalizado(columna, alias=None):
+    """
+    Expresiones DuckDB '<alias>' (BIGINT) y '<alias>_texto' (VARCHAR) con el ID sin '.0' final ni
+    espacios. Si el ID normalizado es un entero en forma canónica (sin ceros a la izquierda, hasta
+    18 dígitos) va en la columna entera y el texto queda NULL; si no, se conserva el texto. La pareja
+    identifica lo mismo que el texto normalizado, pero cruces y deduplicaciones comparan enteros.
+    """
+    alias = alias or nombre_id_normalizado(columna)
+    texto = f"""TRIM(REGEXP_REPLACE(CAST("{columna}" AS VARCHAR), '\\.0$', ''))"""
+    es_entero = f"REGEXP_FULL_MATCH({texto}, '-?[1-9][0-9]{{0,17}}|0')"
+    return (f'CASE WHEN {es_entero} THEN CAST({texto} AS BIGINT) END AS "{alias}", '
+            f'CASE WHEN {es_entero} THEN NULL ELSE {texto} END AS "{alias}_texto"')
+
 # Función principal, utilizada en cada uno de los scripts de transformación, 
 # la cual se encarga de realizar la ingesta incremental utilizando Polars y DuckDB.
 @audit_performance
-def ingesta_incremental_polars(ruta_raw, ruta_bronze_historico, columna_fecha=None):
+def ingesta_incremental_polars(ruta_raw, ruta_bronze_historico, columna_fecha=None, columna_id=None, retornar_fechas=False):
     """
     Ingesta Incremental (Upsert / Drop & Replace) usando Polars y DuckDB:
     1. Lee los Excels nuevos con Polars (calamine) a máxima velocidad.
     2. Descarga a disco como Parquets temporales, liberando la RAM archivo por archivo.
     3. Usa DuckDB para unificar el histórico con lo nuevo (UNION ALL BY NAME + DISTINCT), 
        cruzando Gigabytes de datos minimizando el consumo de RAM (Out-of-Core directo a disco).
+    Todo el ciclo lectura-cruce-escritura ocurre bajo el lock del Bronze, y la publicación es atómica.
+    columna_id: materializa el ID normalizado (sql_id_normalizado) y ordena el Bronze por él, de modo
+    que las estadísticas min/max de cada row group permitan descartar rangos de IDs al leer.
+    retornar_fechas: en lugar de True/False retorna las fechas ('AAAA-MM-DD') que trajo el delta
+    ([] si no hubo archivos; None si se ingirió sin poder determinarlas), para que el Gold procese
+    solo esos días.
     """
+    with bloqueo_dataset(ruta_bronze_historico):
+        return _ingesta_incremental_polars(ruta_raw, ruta_bronze_historico, columna_fecha, columna_id, retornar_fechas)
+
+def _ingesta_incremental_polars(ruta_raw, ruta_bronze_historico, columna_fecha=None, columna_id=None, retornar_fechas=False):
     ref_titulo = columna_fecha if columna_fecha else "Append / Unique"
     console.rule(f"[bold purple]⚡ INGESTA INCREMENTAL (Ref: {ref_titulo})[/]")
     
@@ -326,7 +705,7 @@ def ingesta_incremental_polars(ruta_raw, ruta_bronze_historico, columna_fecha=No
     
     if not archivos_validos:
         console.print("[yellow]⚠️ No hay archivos RAW nuevos para procesar en esta ruta.[/]")
-        return False
+        return [] if retornar_fechas else False
 
     # --- DIRECTORIO TEMPORAL DINÁMICO ---
     nombre_base_bronze = os.path.basename(ruta_bronze_historico).replace(".parquet", "")
@@ -396,7 +775,7 @@ def ingesta_incremental_polars(ruta_raw, ruta_bronze_historico, columna_fecha=No
             
     if not hubo_archivos_procesados:
         shutil.rmtree(temp_parts_path)
-        return False
+        return [] if retornar_fechas else False
         
     # =========================================================================
     # --- UNIFICACIÓN OUT-OF-CORE CON DUCKDB (CERO RAM) ---
@@ -415,6 +794,24 @@ def ingesta_incremental_polars(ruta_raw, ruta_bronze_historico, columna_fecha=No
     
     archivos_temporales = os.path.join(temp_parts_path, "*.parquet").replace("\\", "/")
     fechas_nuevas = []
+    fechas_detectadas = False
+
+    # ID normalizado: se calcula en el cruce (también para un histórico que aún no lo tiene) y el
+    # Bronze se escribe ordenado por él.
+    ruta_bronze_norm = ruta_bronze_historico.replace("\\", "/")
+    nuevos_sql = f"SELECT * FROM read_parquet('{archivos_temporales}', union_by_name=True)"
+    historico_sql = f"SELECT * FROM read_parquet('{ruta_bronze_norm}', union_by_name=True)"
+    orden_sql = ""
+    columnas_id = []
+    if columna_id:
+        alias_id = nombre_id_normalizado(columna_id)
+        columnas_id = [alias_id, f"{alias_id}_texto"]
+        nuevos_sql = f"SELECT *, {sql_id_normalizado(columna_id)} FROM read_parquet('{archivos_temporales}', union_by_name=True)"
+        if os.path.exists(ruta_bronze_historico):
+            import pyarrow.parquet as pq
+            if alias_id not in pq.read_schema(ruta_bronze_historico).names:
+                historico_sql = historico_sql.replace("SELECT *", f"SELECT *, {sql_id_normalizado(columna_id)}", 1)
+        orden_sql = f' ORDER BY "{alias_id}", "{alias_id}_texto"'
     
     if columna_fecha:
         try:
@@ -427,6 +824,7 @@ def ingesta_incremental_polars(ruta_raw, ruta_bronze_historico, columna_fecha=No
             fechas_df = con.execute(query_fechas).df()
             if not fechas_df.empty:
                 fechas_nuevas = fechas_df['dt'].astype(str).tolist()
+            fechas_detectadas = True
             console.print(f"[green]📅 Fechas detectadas para Upsert: {len(fechas_nuevas)} días únicos.[/]")
         except Exception:
             pass
@@ -434,41 +832,37 @@ def ingesta_incremental_polars(ruta_raw, ruta_bronze_historico, columna_fecha=No
         console.print("[green]🔄 Ingresando datos en modo Deduplicación Continua (Sin Fecha).[/]")
 
     if os.path.exists(ruta_bronze_historico):
-        ruta_bronze_norm = ruta_bronze_historico.replace("\\", "/")
-        ruta_temp = ruta_bronze_historico + ".tmp"
-        ruta_temp_norm = ruta_temp.replace("\\", "/")
         
         try:
-            if columna_fecha and fechas_nuevas:
-                # Upsert: Borra lo viejo que coincida en fecha y anexa lo nuevo
-                fechas_sql = ", ".join([f"'{f}'" for f in fechas_nuevas])
-                query_cruce = f"""
-                    COPY (
-                        SELECT * FROM read_parquet('{ruta_bronze_norm}', union_by_name=True)
-                        WHERE CAST("{columna_fecha}" AS DATE) NOT IN ({fechas_sql})
-                        UNION ALL BY NAME
-                        SELECT * FROM read_parquet('{archivos_temporales}', union_by_name=True)
-                    ) TO '{ruta_temp_norm}' (FORMAT PARQUET, COMPRESSION 'SNAPPY')
-                """
-            else:
-                # Deduplicación absoluta nativa (Disk-spill enabled)
-                query_cruce = f"""
-                    COPY (
-                        SELECT DISTINCT * FROM (
-                            SELECT * FROM read_parquet('{ruta_bronze_norm}', union_by_name=True)
+            with escritura_atomica(ruta_bronze_historico) as ruta_temp:
+                ruta_temp_norm = ruta_temp.replace("\\", "/")
+                if columna_fecha and fechas_nuevas:
+                    # Upsert: Borra lo viejo que coincida en fecha y anexa lo nuevo
+                    fechas_sql = ", ".join([f"'{f}'" for f in fechas_nuevas])
+                    query_cruce = f"""
+                        COPY (
+                            SELECT * FROM ({historico_sql})
+                            WHERE CAST("{columna_fecha}" AS DATE) NOT IN ({fechas_sql})
                             UNION ALL BY NAME
-                            SELECT * FROM read_parquet('{archivos_temporales}', union_by_name=True)
-                        )
-                    ) TO '{ruta_temp_norm}' (FORMAT PARQUET, COMPRESSION 'SNAPPY')
-                """
-                
-            con.execute(query_cruce)
+                            {nuevos_sql}
+                            {orden_sql}
+                        ) TO '{ruta_temp_norm}' (FORMAT PARQUET, COMPRESSION 'SNAPPY')
+                    """
+                else:
+                    # Deduplicación absoluta nativa (Disk-spill enabled)
+                    query_cruce = f"""
+                        COPY (
+                            SELECT DISTINCT * FROM (
+                                {historico_sql}
+                                UNION ALL BY NAME
+                                {nuevos_sql}
+                            ){orden_sql}
+                        ) TO '{ruta_temp_norm}' (FORMAT PARQUET, COMPRESSION 'SNAPPY')
+                    """
+                    
+                con.execute(query_cruce)
             con.close()
             
-            if os.path.exists(ruta_bronze_historico):
-                os.remove(ruta_bronze_historico)
-            os.rename(ruta_temp, ruta_bronze_historico)
-            
         except Exception as e:
             con.close()
             logger.error(f"DuckDB error en histórico: {e}")
@@ -478,26 +872,30 @@ def ingesta_incremental_polars(ruta_raw, ruta_bronze_historico, columna_fecha=No
             archivos_glob = glob.glob(os.path.join(temp_parts_path, "*.parquet"))
             lf_temporales = [pl.scan_parquet(f) for f in archivos_glob]
             lf_nuevo = pl.concat(lf_temporales, how="diagonal")
-            lf_hist = pl.scan_parquet(ruta_bronze_historico)
+            # Sin DuckDB no hay ID normalizado para lo nuevo: se descarta y la próxima ingesta lo recalcula
+            lf_hist = pl.scan_parquet(ruta_bronze_historico).drop(columnas_id, strict=False)
             lf_final = pl.concat([lf_hist, lf_nuevo], how="diagonal")
-            lf_final.collect(streaming=True).write_parquet(ruta_bronze_historico, compression="snappy") #type: ignore
+            with escritura_atomica(ruta_bronze_historico) as ruta_temp:
+                lf_final.collect(streaming=True).write_parquet(ruta_temp, compression="snappy") #type: ignore
     else:
         os.makedirs(os.path.dirname(ruta_bronze_historico), exist_ok=True)
-        ruta_bronze_norm = ruta_bronze_historico.replace("\\", "/")
         
         try:
-            query_inicial = f"""
-                COPY (
-                    SELECT DISTINCT * FROM read_parquet('{archivos_temporales}', union_by_name=True)
-                ) TO '{ruta_bronze_norm}' (FORMAT PARQUET, COMPRESSION 'SNAPPY')
-            """
-            con.execute(query_inicial)
+            with escritura_atomica(ruta_bronze_historico) as ruta_temp:
+                ruta_temp_norm = ruta_temp.replace("\\", "/")
+                query_inicial = f"""
+                    COPY (
+                        SELECT DISTINCT * FROM ({nuevos_sql}){orden_sql}
+                    ) TO '{ruta_temp_norm}' (FORMAT PARQUET, COMPRESSION 'SNAPPY')
+                """
+                con.execute(query_inicial)
         except Exception as e:
             logger.error(f"Error DuckDB carga inicial: {e}")
             archivos_glob = glob.glob(os.path.join(temp_parts_path, "*.parquet"))
             lf_temporales = [pl.scan_parquet(f) for f in archivos_glob]
             lf_nuevo = pl.concat(lf_temporales, how="diagonal")
-            lf_nuevo.collect(streaming=True).write_parquet(ruta_bronze_historico, compression="snappy") #type: ignore
+            with escritura_atomica(ruta_bronze_historico) as ruta_temp:
+                lf_nuevo.collect(streaming=True).write_parquet(ruta_temp, compression="snappy") #type: ignore
         finally:
             con.close()
             
@@ -514,6 +912,8 @@ def ingesta_incremental_polars(ruta_raw, ruta_bronze_historico, columna_fecha=No
         
     liberar_ram_os()
     
+    if retornar_fechas:
+        return sorted(fechas_nuevas) if fechas_detectadas else None
     return True
 def limpiar_nulos_powerbi(df):
     """
@@ -590,31 +990,31 @@ def guardar_parquet(df, nombre_archivo, filas_iniciales=None, ruta_destino=None)
     os.makedirs(carpeta_salida, exist_ok=True)
     
     try:
-        # --- LÓGICA ANTI-LOCK ---
-        if os.path.exists(ruta_salida):
-            try:
-                os.remove(ruta_salida)
-            except PermissionError:
-                logger.error(f"ARCHIVO BLOQUEADO: {nombre_archivo} está abierto en otro programa.")
-                console.print(Panel(
-                    f"[bold red]❌ ERROR CRÍTICO: ARCHIVO BLOQUEADO[/]\n"
-                    f"El archivo [cyan]{nombre_archivo}[/] está abierto en otro programa.\n"
-                    f"⚠️  Ciérralo e intenta de nuevo.",
-                    title="ACCESO DENEGADO", style="red"
-                ))
-                raise 
-            except Exception as e:
-                logger.warning(f"No se pudo eliminar previo en {nombre_archivo}: {e}")
-
         # --- LIMPIEZA PARA POWER BI (OPTIMIZADA O(1) RAM) ---
         cols_obj = df.select_dtypes(include=['object', 'string']).columns
         for col in cols_obj:
+            # Columnas binarias (ej. sketches serializados) se guardan tal cual
+            primero = df[col].first_valid_index()
+            if primero is not None and isinstance(df[col].at[primero], (bytes, bytearray)):
+                continue
             # Preserva los null nativos de forma vectorized sin usar .loc
             df[col] = df[col].where(df[col].isnull(), df[col].astype(str))
             
-        # GUARDADO FÍSICO
-        df.to_parquet(ruta_salida, index=False)
-        
+        # GUARDADO FÍSICO (staging + publicación atómica bajo el lock del dataset)
+        # Reemplaza la antigua lógica anti-lock: el archivo previo sigue disponible hasta el último instante
+        try:
+            with escritura_atomica(ruta_salida) as ruta_tmp:
+                df.to_parquet(ruta_tmp, index=False)
+        except PermissionError:
+            logger.error(f"ARCHIVO BLOQUEADO: {nombre_archivo} está abierto en otro programa.")
+            console.print(Panel(
+                f"[bold red]❌ ERROR CRÍTICO: ARCHIVO BLOQUEADO[/]\n"
+                f"El archivo [cyan]{nombre_archivo}[/] está abierto en otro programa.\n"
+                f"⚠️  Ciérralo e intenta de nuevo.",
+                title="ACCESO DENEGADO", style="red"
+            ))
+            raise
+
         # --- REPORTE Y AUDITORÍA ---
         filas_finales = len(df)
         
@@ -622,6 +1022,7 @@ def guardar_parquet(df, nombre_archivo, filas_iniciales=None, ruta_destino=None)
         tipo = "CUSTOM"
         if PATHS.get("silver") and PATHS.get("silver") in ruta_salida: tipo = "SILVER" #type: ignore
         if PATHS.get("gold") and PATHS.get("gold") in ruta_salida: tipo = "GOLD"       #type: ignore
+        metricas.registrar_archivo(ruta_salida, filas_finales, tipo.lower())
 
         if filas_iniciales is not None:
             filas_eliminadas = filas_iniciales - filas_finales
@@ -648,7 +1049,198 @@ def guardar_parquet(df, nombre_archivo, filas_iniciales=None, ruta_destino=None)
         logger.error(f"FALLO CRÍTICO GUARDANDO {nombre_archivo}: {str(e)}", exc_info=True)
         console.print(f"[bold red]❌ FALLO GUARDANDO {nombre_archivo}: {e}[/]")
         raise
-    
+
+# --- HUELLA DE ENTRADAS ---
+# Para decidir si una salida derivada sigue vigente basta con la huella barata (nombre, tamaño, mtime)
+# de los archivos de los que depende: si ninguno cambió, no hace falta releerlos.
+def huella_archivos(entradas):
+    """sha1 de (nombre, tamaño, mtime) de cada archivo de 'entradas'; los ausentes también cuentan."""
+    import hashlib
+    h = hashlib.sha1()
+    for ruta in sorted(os.path.abspath(r) for r in entradas):
+        try:
+            st = os.stat(ruta)
+            h.update(f"{os.path.basename(ruta)}|{st.st_size}|{st.st_mtime_ns}\n".encode("utf-8"))
+        except OSError:
+            h.update(f"{os.path.basename(ruta)}|AUSENTE\n".encode("utf-8"))
+    return h.hexdigest()
+
+class ParticionesIncrementales:
+    """
+    Salidas particionadas por una llave de negocio (ej. 'Quincena Evaluada') para recalcular solo
+    las particiones cuyas entradas cambiaron.
+    Uso:
+        part = ParticionesIncrementales("trans_x", version=[__file__])
+        cambiadas, eliminadas = part.pendientes({"ENE 2026 Q1": [archivos...], ...})
+        for clave in cambiadas:
+            part.guardar(clave, {"Silver": df_s, "Gold_A": df_a})   # una partición por salida
+        for clave in eliminadas:
+            part.eliminar(clave)
+        for salida in ("Gold_A", "Gold_B"):
+            if part.requiere_publicar(salida):
+                guardar_parquet(part.consolidar(salida), ...)
+                part.marcar_publicado(salida)
+        part.marcar_publicado()
+    La huella de cada partición es huella_archivos sobre sus entradas; 'version' (típicamente el
+    propio script) invalida todas las particiones cuando cambian las reglas.
+    Cada salida publicada queda registrada en el manifiesto: si una escritura falla (ej. Power BI
+    bloqueando el Parquet), el reintento no recalcula particiones y retoma desde esa salida.
+    """
+    def __init__(self, nombre_etl, version=(), ruta_base=None):
+        self.nombre_etl = nombre_etl
+        self.carpeta = os.path.join(ruta_base or PATHS.get("silver", "data/silver"), "_particiones", nombre_etl)
+        self.ruta_manifiesto = os.path.join(self.carpeta, "manifiesto.json")
+        self.huella_version = huella_archivos(version)
+        self.estado = self._cargar_manifiesto()
+        self._huellas = {}
+
+    def _cargar_manifiesto(self):
+        if os.path.exists(self.ruta_manifiesto):
+            try:
+                with open(self.ruta_manifiesto, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except Exception as e:
+                logger.warning(f"PARTICIONES | Manifiesto ilegible en {self.nombre_etl}: {e}")
+        return {"version": None, "publicado": False, "salidas_publicadas": [], "particiones": {}}
+
+    def _guardar_manifiesto(self):
+        os.makedirs(self.carpeta, exist_ok=True)
+        with escritura_atomica(self.ruta_manifiesto) as ruta_tmp:
+            with open(ruta_tmp, "w", encoding="utf-8") as f:
+                json.dump(self.estado, f, ensure_ascii=False, indent=2)
+
+    @staticmethod
+    def _archivo(clave):
+        return re.sub(r"\W+", "_", str(clave)).strip("_") + ".parquet"
+
+    def _salidas(self):
+        if not os.path.isdir(self.carpeta):
+            return []
+        return sorted(d for d in os.listdir(self.carpeta) if os.path.isdir(os.path.join(self.carpeta, d)))
+
+    def pendientes(self, grupos, completo=False):
+        """
+        grupos: {clave: [rutas de entrada]}. Retorna (cambiadas, eliminadas): claves a recalcular
+        (huella distinta, nuevas o todas si cambió la versión / completo=True) y claves que ya no
+        tienen entradas.
+        """
+        self._huellas = {clave: huella_archivos(entradas) for clave, entradas in grupos.items()}
+        previas = self.estado["particiones"]
+        if completo or self.estado.get("version") != self.huella_version:
+            if previas:
+                console.print(f"[dim]🧹 {self.nombre_etl}: reglas cambiadas o reconstrucción completa, se recalculan todas las particiones.[/]")
+            self.estado = {"version": self.huella_version, "publicado": False, "salidas_publicadas": [], "particiones": {}}
+            for salida in self._salidas():
+                shutil.rmtree(os.path.join(self.carpeta, salida), ignore_errors=True)
+            self._guardar_manifiesto()
+            return sorted(grupos), []
+        cambiadas = sorted(c for c, huella in self._huellas.items() if previas.get(c) != huella)
+        eliminadas = sorted(c for c in previas if c not in grupos)
+        return cambiadas, eliminadas
+
+    def guardar(self, clave, salidas):
+        """Reemplaza la partición 'clave' de cada salida. DataFrames vacíos o None no dejan archivo."""
+        self._borrar_archivos(clave)
+        for salida, df in salidas.items():
+            if df is None or df.empty:
+                continue
+            ruta = os.path.join(self.carpeta, salida, self._archivo(clave))
+            os.makedirs(os.path.dirname(ruta), exist_ok=True)
+            with escritura_atomica(ruta) as ruta_tmp:
+                df.to_parquet(ruta_tmp, index=False)
+        self.estado["particiones"][clave] = self._huellas.get(clave)
+        self._invalidar_publicacion()
+
+    def eliminar(self, clave):
+        self._borrar_archivos(clave)
+        self.estado["particiones"].pop(clave, None)
+        self._invalidar_publicacion()
+
+    def _invalidar_publicacion(self):
+        self.estado["publicado"] = False
+        self.estado["salidas_publicadas"] = []
+        self._guardar_manifiesto()
+
+    def _borrar_archivos(self, clave):
+        for salida in self._salidas():
+            try:
+                os.remove(os.path.join(self.carpeta, salida, self._archivo(clave)))
+            except FileNotFoundError:
+                pass
+
+    def consolidar(self, salida):
+        """Une todas las particiones de 'salida' en un DataFrame de Pandas (None si no hay ninguna)."""
+        carpeta = os.path.join(self.carpeta, salida)
+        archivos = sorted(glob.glob(os.path.join(carpeta, "*.parquet")))
+        if not archivos:
+            return None
+        return pd.concat([pd.read_parquet(a) for a in archivos], ignore_index=True)
+
+    def leer(self, clave, salida, columnas=None, filtros=None):
+        """
+        La partición 'clave' de 'salida', o None si no existe. 'columnas' se limita a las que tiene el
+        archivo y 'filtros' (formato PyArrow) descarta filas al leer.
+        """
+        import pyarrow.parquet as pq
+        ruta = os.path.join(self.carpeta, salida, self._archivo(clave))
+        if not os.path.exists(ruta):
+            return None
+        if columnas is not None:
+            existentes = set(pq.read_schema(ruta).names)
+            columnas = [c for c in columnas if c in existentes]
+        return pd.read_parquet(ruta, columns=columnas, filters=filtros)
+
+    def requiere_publicar(self, salida=None):
+        """
+        Sin 'salida': si falta publicar algo desde el último cambio de particiones. Con 'salida': si esa
+        en particular falta (False si ya se publicó en un intento previo con las mismas particiones).
+        """
+        if self.estado.get("publicado"):
+            return False
+        return salida is None or salida not in self.estado.get("salidas_publicadas", [])
+
+    def marcar_publicado(self, salida=None):
+        """Registra la publicación de 'salida', o de todas (sin argumento) al terminar."""
+        if salida is None:
+            self.estado["publicado"] = True
+            self.estado["salidas_publicadas"] = []
+        else:
+            self.estado.setdefault("salidas_publicadas", []).append(salida)
+        self._guardar_manifiesto()
+
+class ClasificadorPalabras:
+    """
+    Clasifica textos por palabras clave con prioridad: gana la primera regla (en orden) que tenga
+    alguna palabra contenida en el texto, como un np.select de varios str.contains con regex.
+    Cada regla se compila en un autómata Aho-Corasick (Polars str.contains_any): el costo por texto
+    depende del número de reglas y no del de palabras, y no hay backtracking de regex.
+    Uso:
+        clf = ClasificadorPalabras([("ADMIN", ["PAGO", "SALDO"]), ("FISICO", ["FIBRA"])], defecto="N/S")
+        df.with_columns(clf.expr("Solucion").alias("Tipo"))     # Polars
+        df["Tipo"] = clf.clasificar(df["Solucion"])              # Pandas (escanea solo valores únicos)
+    La comparación es literal y sensible a mayúsculas: normalizar el texto antes de clasificar.
+    """
+    def __init__(self, reglas, defecto=None):
+        self.reglas = [(categoria, list(palabras)) for categoria, palabras in reglas if palabras]
+        self.defecto = defecto
+
+    def expr(self, columna):
+        """Expresión Polars (Utf8) con la categoría de cada fila."""
+        columna = pl.col(columna) if isinstance(columna, str) else columna
+        columna = columna.fill_null("")
+        resultado = pl.lit(self.defecto, dtype=pl.Utf8)
+        for categoria, palabras in reversed(self.reglas):
+            resultado = pl.when(columna.str.contains_any(palabras)).then(pl.lit(categoria)).otherwise(resultado)
+        return resultado
+
+    def clasificar(self, serie):
+        """Serie de Pandas -> array numpy (object) de categorías. Los textos de negocio repiten
+        mucho, así que se factoriza y los autómatas solo recorren los valores únicos."""
+        codigos, unicos = pd.factorize(serie.fillna("").astype(str))
+        unicos = pl.Series("texto", np.asarray(unicos, dtype=object), dtype=pl.Utf8)
+        categorias = unicos.to_frame().select(self.expr("texto")).to_series()
+        return categorias.to_numpy().astype(object)[codigos]
+
 def standard_hours(df, columna_hora):
     """
     Limpia el formato del ERP (a. m. / p. m.) y estandariza a bloques de 1 hora.
@@ -718,4 +1310,179 @@ def obtener_rango_fechas(nombre_archivo):
 
     except Exception as e:
         print(f"Error parseando fechas en {nombre_archivo}: {e}")
-        return None, None, None
\ No newline at end of file
+        return None, None, None
+# --- FECHAS MIXTAS (SERIAL DE EXCEL / ISO / DÍA-MES-AÑO) ---
+# Las exportaciones del SAE mezclan en una misma columna celdas de fecha real (que Calamine entrega
+# como serial de Excel o como texto ISO) y celdas de texto en formato día/mes/año. Cada valor se
+# clasifica por su forma con una expresión regular y cada grupo se convierte con un solo kernel:
+# aritmética para los seriales y un único strptime sobre el texto llevado a forma canónica.
+FECHAS_VACIAS = ["", "nan", "NaN", "NAN", "NaT", "nat", "None", "null", "NULL"]
+SERIAL_EXCEL_MIN, SERIAL_EXCEL_MAX = 35000, 60000  # ~1995 a ~2064, fuera de eso no es una fecha de Excel
+
+_PATRON_SERIAL = r"^\d+(?:\.\d+)?$"
+_PATRON_DMA = r"^(\d{1,2})[/.-](\d{1,2})[/.-](\d{4})"        # DD/MM/AAAA -> AAAA-MM-DD
+_PATRON_MERIDIANO = r"\s*([aApP])\.?\s*[mM]\.?$"               # ' p. m.', 'PM', 'a.m.'
+
+def _fecha_canonica(texto):
+    """
+    Lleva ISO y DD/MM/AAAA (con o sin hora y a. m./p. m.) a la forma completa
+    'AAAA-MM-DD HH:MM:SS[.f]' con reemplazos de texto y la convierte con un único strptime.
+    Cada subexpresión se usa una sola vez: Polars no reutiliza ramas repetidas del árbol.
+    """
+    canonico = (texto.str.replace(_PATRON_MERIDIANO, "")
+                     .str.replace(_PATRON_DMA, "${3}-${2}-${1}")
+                     .str.replace("T", " ", literal=True)
+                     .str.replace(r"^(\d{4}-\d{1,2}-\d{1,2})$", "${1} 0:0")
+                     .str.replace(r" (\d{1,2}):(\d{1,2})$", " ${1}:${2}:0"))
+    fecha = canonico.str.strptime(pl.Datetime("ns"), "%Y-%m-%d %H:%M:%S%.f", strict=False)
+    meridiano = texto.str.extract(_PATRON_MERIDIANO, 1).str.to_uppercase()
+    hora = texto.str.extract(r"[ T](\d{1,2}):", 1).cast(pl.Int32, strict=False)
+    ajuste = (pl.when((meridiano == "P") & (hora < 12)).then(pl.duration(hours=12))
+                .when((meridiano == "A") & (hora == 12)).then(pl.duration(hours=-12))
+                .otherwise(pl.duration(hours=0)))
+    return fecha + ajuste
+
+def _serial_a_fecha(numero):
+    # Misma aritmética que pd.to_datetime(unit='D', origin='1899-12-30'): días desde la época,
+    # parte entera y fracción (redondeada a 13 decimales) escaladas a nanosegundos por separado.
+    ns_dia = 86_400 * 10 ** 9
+    dias = numero - 25_569.0
+    entero = dias.cast(pl.Int64)
+    fraccion = (dias - entero.cast(pl.Float64)).round(13, mode="half_to_even")
+    return (entero * ns_dia + (fraccion * float(ns_dia)).cast(pl.Int64)).cast(pl.Datetime("ns"))
+
+def expr_fecha_mixta(columna):
+    """
+    Expresión Polars que convierte una columna de texto con fechas mixtas a Datetime("ns"):
+      - serial de Excel (número entre SERIAL_EXCEL_MIN y SERIAL_EXCEL_MAX, con fracción horaria),
+      - ISO 'AAAA-MM-DD[ HH:MM[:SS[.f]]]' (o con 'T'),
+      - 'DD/MM/AAAA[ HH:MM[:SS]][ a. m./p. m.]' (también con '-' o '.').
+    Lo que no encaja en ninguna forma o es una fecha imposible queda nulo.
+    """
+    columna = pl.col(columna) if isinstance(columna, str) else columna
+    texto = columna.cast(pl.Utf8).str.strip_chars()
+    numero = pl.when(texto.str.contains(_PATRON_SERIAL)).then(texto.cast(pl.Float64, strict=False))
+    es_serial = ((numero > SERIAL_EXCEL_MIN) & (numero < SERIAL_EXCEL_MAX)).fill_null(False)
+    return pl.when(es_serial).then(_serial_a_fecha(numero)).otherwise(_fecha_canonica(texto))
+
+def expr_fecha_invalida(columna, fecha):
+    """True donde 'columna' trae un valor (no vacío) que 'fecha' no pudo convertir."""
+    columna = pl.col(columna) if isinstance(columna, str) else columna
+    texto = columna.cast(pl.Utf8).str.strip_chars()
+    return texto.is_not_null() & ~texto.is_in(FECHAS_VACIAS) & fecha.is_null()
+
+def reportar_fechas_invalidas(etiqueta, invalidas, ejemplos=()):
+    """Registra en el log (y avisa en consola) los valores de fecha que no se pudieron interpretar."""
+    if not invalidas:
+        return
+    muestra = ", ".join(repr(e) for e in list(ejemplos)[:3])
+    logger.warning(f"FECHAS | {etiqueta}: {invalidas:,} valores no reconocidos como fecha. Ej: {muestra}")
+    console.print(f"[yellow]   ⚠️ {etiqueta}: {invalidas:,} fechas no reconocidas (ej: {muestra})[/]")
+
+def resolver_fechas_mixtas(series, etiqueta=None):
+    """
+    Versión Pandas de expr_fecha_mixta: retorna la Serie como datetime64[ns] (mismo índice) y
+    reporta cuántos valores no vacíos no se pudieron convertir.
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    texto = pl.from_pandas(series.astype("string")).cast(pl.Utf8).alias("v")
+    resultado = (texto.to_frame()
+                 .with_columns(expr_fecha_mixta("v").alias("fecha"))
+                 .select("fecha", expr_fecha_invalida("v", pl.col("fecha")).alias("invalida")))
+    invalidas = int(resultado["invalida"].sum())
+    if invalidas:
+        ejemplos = texto.filter(resultado["invalida"]).unique(maintain_order=True).head(3).to_list()
+        reportar_fechas_invalidas(etiqueta or series.name or "fecha", invalidas, ejemplos)
+    return pd.Series(resultado["fecha"].to_numpy(), index=series.index, name=series.name)
+
+# ========================================================
+# ÚLTIMO REGISTRO POR LLAVE (DEDUPLICACIÓN SIN ORDENAR)
+# ========================================================
+# Reemplaza el patrón sort_values(version) + drop_duplicates(keep='last'): en lugar de ordenar todo
+# el DataFrame (O(n log n)) se agrupa por hash y se toma el arg-max de la versión en cada llave.
+#   nulos     = 'ultimo'  -> una versión nula cuenta como la más reciente (sort_values por defecto)
+#               'primero' -> una versión nula cuenta como la más antigua (na_position='first', DESC en SQL)
+#   desempate = 'ultimo' / 'primero' -> entre versiones iguales gana la fila que aparece después / antes
+# El resultado conserva el orden original de las filas ganadoras.
+
+def _orden_version(serie, nulos):
+    """Arreglo numérico comparable de la columna de versión, con los nulos en el extremo que pide 'nulos'."""
+    nulo = serie.isna().to_numpy()
+    if pd.api.types.is_datetime64_any_dtype(serie) or pd.api.types.is_timedelta64_dtype(serie):
+        orden = serie.to_numpy().view("i8").copy()
+    elif pd.api.types.is_numeric_dtype(serie) or pd.api.types.is_bool_dtype(serie):
+        orden = serie.to_numpy(dtype=np.float64, na_value=np.nan)
+    else:
+        orden = pd.factorize(serie, sort=True)[0].astype(np.int64)  # Ordena solo los valores únicos
+    if nulo.any():
+        extremo = np.inf if orden.dtype.kind == "f" else np.iinfo(np.int64).max
+        orden[nulo] = extremo if nulos == "ultimo" else -extremo
+    return orden
+
+def _codigos_llave(df, llaves):
+    """Código entero denso por combinación de llaves (factorize por columna, sin ordenar). Nulos = un valor más."""
+    codigos, tam = np.zeros(len(df), dtype=np.int64), 1
+    for c in llaves:
+        cod, unicos = pd.factorize(df[c], use_na_sentinel=False)
+        if tam * max(len(unicos), 1) >= 2 ** 62:  # Se recomprime antes de desbordar int64
+            codigos, unicos_previos = pd.factorize(codigos)
+            tam = len(unicos_previos)
+        codigos = codigos * max(len(unicos), 1) + cod
+        tam *= max(len(unicos), 1)
+    codigos, unicos = pd.factorize(codigos)
+    return codigos, len(unicos)
+
+def ultimo_por_llave(df, llaves, version=None, nulos="ultimo", desempate="ultimo"):
+    """
+    Una fila por combinación de 'llaves': la de mayor 'version' (Pandas). Sin 'version' (o si la
+    columna no existe) equivale a drop_duplicates(keep=desempate). Las llaves nulas forman su grupo.
+    """
+    llaves = list(llaves)
+    if version is None or version not in df.columns:
+        return df.drop_duplicates(subset=llaves, keep="last" if desempate == "ultimo" else "first")
+    if df.empty:
+        return df
+    grupos, n_grupos = _codigos_llave(df, llaves)
+    orden = _orden_version(df[version], nulos)
+    maximo = np.full(n_grupos, orden.min(), dtype=orden.dtype)
+    np.maximum.at(maximo, grupos, orden)
+    candidatas = np.flatnonzero(orden == maximo[grupos])
+    if desempate == "ultimo":
+        elegidas = np.full(n_grupos, -1, dtype=np.int64)
+        np.maximum.at(elegidas, grupos[candidatas], candidatas)
+    else:
+        elegidas = np.full(n_grupos, len(df), dtype=np.int64)
+        np.minimum.at(elegidas, grupos[candidatas], candidatas)
+    return df.iloc[np.sort(elegidas)]
+
+def ultimo_por_llave_polars(lf, llaves, version=None, nulos="ultimo", desempate="ultimo"):
+    """
+    Versión Polars (DataFrame o LazyFrame) de ultimo_por_llave, con la misma semántica de 'nulos' y
+    'desempate'. En Polars ordenar una sola columna es barato (radix, en paralelo) y las variantes por
+    agregación (arg_max + gather, ventanas over) midieron más lentas: se ordena de forma estable solo
+    por la versión y unique() deduplica por hash. La salida queda en orden de versión.
+    """
+    llaves = list(llaves)
+    conservar = "last" if desempate == "ultimo" else "first"
+    if version is None or version not in lf.collect_schema().names():
+        return lf.unique(subset=llaves, keep=conservar, maintain_order=True)
+    descendente = desempate == "primero"  # Descendente + keep='first' = mayor versión y primera aparición
+    return (
+        lf.sort(version, descending=descendente, nulls_last=(nulos == "ultimo") != descendente, maintain_order=True)
+          .unique(subset=llaves, keep=conservar, maintain_order=True)
+    )
+
+def sql_ultimo_por_llave(origen, llaves, version, nulos="ultimo", columna_desempate=None):
+    """
+    Versión DuckDB: consulta con la fila de mayor 'version' por llave vía arg_max (max_by) sobre la
+    fila completa, una agregación por hash en lugar de la ventana ROW_NUMBER() OVER (ORDER BY ...).
+    'origen' es una tabla o subconsulta; 'columna_desempate' una columna (ej. un número de fila; gana
+    el mayor) para que los empates sean determinísticos. Las columnas de salida son las de 'origen'.
+    """
+    def q(c):
+        return '"' + c.replace('"', '""') + '"'
+    prioridad = f"{q(version)} IS NULL" if nulos == "ultimo" else f"{q(version)} IS NOT NULL"
+    criterio = ", ".join([prioridad, q(version)] + ([q(columna_desempate)] if columna_desempate else []))
+    return (f"SELECT UNNEST(arg_max(t, ({criterio}))) FROM ({origen}) t "
+            f"GROUP BY {', '.join(q(c) for c in llaves)}")
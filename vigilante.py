@@ -0,0 +1,304 @@
+# Vigilante de carpetas RAW (ingesta por eventos).
+# Hasta ahora la ingesta solo ocurría cuando alguien lanzaba el menú, y los Excel recién descargados
+# quedaban esperando. Este servicio observa las carpetas raw de PATHS (inotify vía watchdog en Linux,
+# o polling si watchdog no está instalado), agrupa las llegadas con un debounce, espera a que cada
+# archivo deje de crecer y dispara únicamente el ETL del dataset afectado (ingesta Bronze + Silver/Gold)
+# y sus dependientes.
+#
+# Uso: python vigilante.py            (watchdog si está disponible)
+#      python vigilante.py --polling  (fuerza el modo polling, p.ej. en unidades de red)
+
+import os
+import sys
+import time
+import argparse
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from config import PATHS, VIGILANTE_DEBOUNCE_SEG, VIGILANTE_ESTABILIDAD_SEG, VIGILANTE_POLL_SEG
+from utils import console, logger
+from pipeline_master import transformar
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+    WATCHDOG_DISPONIBLE = True
+except ImportError:
+    WATCHDOG_DISPONIBLE = False
+    FileSystemEventHandler = object
+
+# ========================================================
+# 1. CARPETA RAW -> OBJETIVOS DE TRANSFORMACIÓN
+# ========================================================
+# Cada ETL hace su propia ingesta Bronze, así que disparar el objetivo cubre Raw -> Gold.
+# El orden de la lista es el orden de ejecución (primero el dueño del dato, luego dependientes).
+CARPETAS_VIGILADAS = {
+    "raw_recaudacion":      ["trans_recaudacion", "PipelineAfluencia"],
+    "raw_horaspago":        ["trans_recaudacion", "PipelineAfluencia"],
+    "raw_reclamos":         ["trans_reclamos"],
+    "raw_atencion":         ["trans_atc", "trans_ont_off", "PipelineAfluencia"],
+    "raw_idf":              ["PipelineIndicadores"],
+    "raw_abonados_idf":     ["PipelineIndicadores"],
+    "raw_cobranza":         ["trans_cobranza"],
+    "raw_ont_off":          ["trans_ont_off"],
+    "raw_act_datos":        ["trans_actualizacion_datos"],
+    "raw_comeback":         ["trans_comeback"],
+    "raw_clientes":         ["trans_dimclientes"],
+    "raw_estad_abonados":   ["trans_estadistica_abonado"],
+    "raw_empleados":        ["trans_empleados", "PipelineAfluencia"],
+    "raw_asesores_univ_14": ["PipelineAfluencia"],
+    "ventas_abonados":      ["trans_ventas"],
+    "ventas_estatus":       ["trans_ventase", "PipelineAfluencia"],
+}
+
+EXTENSIONES_VALIDAS = (".xlsx", ".xls", ".csv")
+# Temporales del navegador/Excel y artefactos del propio protocolo de escritura del lake
+MARCAS_IGNORADAS = ("~$", ".crdownload", ".part", ".tmp", ".staging", ".lock")
+
+def carpetas_ordenadas():
+    """Rutas vigiladas de la más específica a la más general (raw_horaspago vive dentro de raw_recaudacion)."""
+    pares = [(os.path.normcase(os.path.abspath(PATHS[clave])), clave)
+             for clave in CARPETAS_VIGILADAS if clave in PATHS]
+    return sorted(pares, key=lambda p: len(p[0]), reverse=True)
+
+def dataset_de_ruta(ruta, carpetas=None):
+    """Retorna la clave de PATHS dueña del archivo, o None si no pertenece a una carpeta vigilada."""
+    ruta = os.path.normcase(os.path.abspath(ruta))
+    if os.sep + "_backfill" + os.sep in ruta:
+        return None  # El backfill publica sus tramos por su cuenta
+    for carpeta, clave in carpetas or carpetas_ordenadas():
+        if ruta.startswith(carpeta + os.sep):
+            return clave
+    return None
+
+def es_archivo_relevante(ruta):
+    nombre = os.path.basename(ruta)
+    if any(marca in nombre for marca in MARCAS_IGNORADAS):
+        return False
+    return nombre.lower().endswith(EXTENSIONES_VALIDAS)
+
+# ========================================================
+# 2. COLA CON DEBOUNCE Y ESTABILIDAD
+# ========================================================
+class ColaEventos:
+    """
+    Acumula archivos por dataset. Un dataset queda listo cuando pasaron `debounce` segundos
+    desde su última llegada y todos sus archivos mantienen tamaño y fecha durante `estabilidad`
+    segundos (descargas o copias en curso siguen creciendo).
+    """
+
+    def __init__(self, debounce=None, estabilidad=None):
+        self.debounce = VIGILANTE_DEBOUNCE_SEG if debounce is None else debounce
+        self.estabilidad = VIGILANTE_ESTABILIDAD_SEG if estabilidad is None else estabilidad
+        self.carpetas = carpetas_ordenadas()
+        self._mutex = threading.Lock()
+        self._ultimo_evento = {}   # clave -> timestamp
+        self._archivos = {}        # clave -> {ruta: (firma, desde)}
+
+    def registrar(self, ruta):
+        if not es_archivo_relevante(ruta):
+            return False
+        clave = dataset_de_ruta(ruta, self.carpetas)
+        if clave is None:
+            return False
+        with self._mutex:
+            self._ultimo_evento[clave] = time.time()
+            self._archivos.setdefault(clave, {})[ruta] = (None, time.time())
+        return True
+
+    @staticmethod
+    def _firma(ruta):
+        try:
+            st = os.stat(ruta)
+            # Si el escritor aún tiene el archivo abierto en exclusiva (Windows), no está listo
+            with open(ruta, "rb"):
+                pass
+            return (st.st_size, st.st_mtime_ns)
+        except OSError:
+            return None
+
+    def listos(self, ahora=None):
+        """Retorna (y retira de la cola) las claves cuyos archivos ya están completos."""
+        ahora = ahora or time.time()
+        listos = []
+        with self._mutex:
+            for clave in list(self._ultimo_evento):
+                if ahora - self._ultimo_evento[clave] < self.debounce:
+                    continue
+                estables = True
+                archivos = self._archivos.get(clave, {})
+                for ruta, (firma_previa, desde) in list(archivos.items()):
+                    if not os.path.exists(ruta):
+                        del archivos[ruta]  # Renombrado o borrado: el evento del destino lo reemplaza
+                        continue
+                    firma = self._firma(ruta)
+                    if firma is None or firma != firma_previa:
+                        archivos[ruta] = (firma, ahora)
+                        estables = False
+                    elif ahora - desde < self.estabilidad:
+                        estables = False
+                if estables:
+                    del self._ultimo_evento[clave]
+                    self._archivos.pop(clave, None)
+                    if archivos:
+                        listos.append(clave)
+        return listos
+
+# ========================================================
+# 3. FUENTES DE EVENTOS (WATCHDOG / POLLING)
+# ========================================================
+class ManejadorEventos(FileSystemEventHandler):
+    def __init__(self, cola):
+        super().__init__()
+        self.cola = cola
+
+    def on_created(self, event):
+        if not event.is_directory:
+            self.cola.registrar(event.src_path)
+
+    def on_modified(self, event):
+        if not event.is_directory:
+            self.cola.registrar(event.src_path)
+
+    def on_moved(self, event):
+        # Chrome/Playwright descargan a .crdownload y renombran al terminar
+        if not event.is_directory:
+            self.cola.registrar(event.dest_path)
+
+def escanear(raiz):
+    """Foto (tamaño, mtime) de los archivos relevantes bajo la carpeta raw."""
+    foto = {}
+    for carpeta, subcarpetas, archivos in os.walk(raiz):
+        subcarpetas[:] = [s for s in subcarpetas if s != "_backfill"]
+        for nombre in archivos:
+            ruta = os.path.join(carpeta, nombre)
+            if not es_archivo_relevante(ruta):
+                continue
+            try:
+                st = os.stat(ruta)
+            except OSError:
+                continue
+            foto[ruta] = (st.st_size, st.st_mtime_ns)
+    return foto
+
+class Sondeo(threading.Thread):
+    """Alternativa sin dependencias: compara fotos sucesivas de la carpeta raw."""
+
+    def __init__(self, cola, raiz, intervalo=None):
+        super().__init__(daemon=True)
+        self.cola = cola
+        self.raiz = raiz
+        self.intervalo = VIGILANTE_POLL_SEG if intervalo is None else intervalo
+        self.detener = threading.Event()
+        self.foto = escanear(raiz)  # Lo existente al arrancar no dispara nada
+
+    def run(self):
+        while not self.detener.wait(self.intervalo):
+            foto_nueva = escanear(self.raiz)
+            for ruta, firma in foto_nueva.items():
+                if self.foto.get(ruta) != firma:
+                    self.cola.registrar(ruta)
+            self.foto = foto_nueva
+
+    def stop(self):
+        self.detener.set()
+
+# ========================================================
+# 4. DESPACHO DE TRANSFORMACIONES
+# ========================================================
+class Despachador:
+    """
+    Ejecuta los objetivos en un proceso aparte (uno a la vez, en orden de llegada) para que el
+    vigilante siga recibiendo eventos. Un objetivo que ya espera en cola no se duplica; si ya está
+    corriendo, se vuelve a encolar para que procese los archivos que llegaron durante la corrida.
+    """
+
+    def __init__(self):
+        self.pool = ProcessPoolExecutor(max_workers=1)
+        self.en_cola = {}
+
+    def encolar(self, objetivos):
+        for objetivo in objetivos:
+            futuro = self.en_cola.get(objetivo)
+            if futuro is not None and not futuro.running() and not futuro.done():
+                continue
+            console.print(f"[bold magenta]📤 Encolando transformación: {objetivo}[/]")
+            futuro = self.pool.submit(transformar, objetivo)
+            futuro.add_done_callback(lambda f, o=objetivo: self._terminado(o, f))
+            self.en_cola[objetivo] = futuro
+
+    def _terminado(self, objetivo, futuro):
+        try:
+            fallos = futuro.result()
+        except Exception as e:
+            fallos = [f"{objetivo} ({e})"]
+        if fallos:
+            console.print(f"[bold red]❌ Falló {objetivo}: {', '.join(map(str, fallos))}[/]")
+            logger.error(f"VIGILANTE | {objetivo} | Fallos: {fallos}")
+        else:
+            console.print(f"[bold green]✅ {objetivo} actualizado.[/]")
+            logger.info(f"VIGILANTE | {objetivo} | OK")
+
+    def cerrar(self):
+        self.pool.shutdown(wait=True)
+
+def objetivos_para(claves):
+    """Une los objetivos de varias carpetas respetando el orden y sin repetir."""
+    objetivos = []
+    for clave in claves:
+        for objetivo in CARPETAS_VIGILADAS[clave]:
+            if objetivo not in objetivos:
+                objetivos.append(objetivo)
+    # Los pipelines compuestos leen lo que producen los ETLs simples: van al final
+    return sorted(objetivos, key=lambda o: o.startswith("Pipeline"))
+
+# ========================================================
+# 5. BUCLE PRINCIPAL
+# ========================================================
+def vigilar(forzar_polling=False, debounce=None, estabilidad=None, intervalo=None):
+    raiz = PATHS["raw"]
+    os.makedirs(raiz, exist_ok=True)
+    cola = ColaEventos(debounce, estabilidad)
+    despachador = Despachador()
+
+    if WATCHDOG_DISPONIBLE and not forzar_polling:
+        fuente = Observer()
+        fuente.schedule(ManejadorEventos(cola), raiz, recursive=True)
+        modo = "eventos del sistema (watchdog)"
+    else:
+        fuente = Sondeo(cola, raiz, intervalo)
+        modo = f"polling cada {fuente.intervalo}s"
+
+    console.rule("[bold blue]👁️ VIGILANTE DE CARPETAS RAW[/]")
+    console.print(f"[cyan]📂 {raiz} | Modo: {modo} | Debounce: {cola.debounce}s | Estabilidad: {cola.estabilidad}s[/]")
+    fuente.start()
+    try:
+        while True:
+            time.sleep(1)
+            claves = cola.listos()
+            if claves:
+                console.print(f"[yellow]📥 Archivos completos en: {', '.join(claves)}[/]")
+                logger.info(f"VIGILANTE | Llegadas en {claves}")
+                despachador.encolar(objetivos_para(claves))
+    except KeyboardInterrupt:
+        console.print("[dim]Deteniendo vigilante (esperando transformaciones en curso)...[/]")
+    finally:
+        fuente.stop()
+        fuente.join()
+        despachador.cerrar()
+    return 0
+
+def parsear_argumentos(argv=None):
+    parser = argparse.ArgumentParser(description="Vigilante de carpetas raw: dispara los ETLs al llegar archivos.")
+    parser.add_argument("--polling", action="store_true", help="Fuerza el modo polling aunque watchdog esté instalado.")
+    parser.add_argument("--debounce", type=float, help="Segundos de silencio antes de disparar un dataset.")
+    parser.add_argument("--estabilidad", type=float, help="Segundos sin cambios de tamaño para dar un archivo por completo.")
+    parser.add_argument("--intervalo", type=float, help="Intervalo del polling en segundos.")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parsear_argumentos(argv)
+    return vigilar(args.polling, args.debounce, args.estabilidad, args.intervalo)
+
+if __name__ == "__main__":
+    sys.exit(main())